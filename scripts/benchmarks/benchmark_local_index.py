@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of the local vector index: HNSW against brute force
+
+Builds two LocalVectorIndex instances over the same synthetic embeddings,
+one kept on exact brute-force search and one on the HNSW graph, and
+queries both with the same held-out tickets. Embeddings are drawn around
+cluster centres (one per "topic") and normalized, which, unlike random
+vectors, gives the neighbourhood structure real ticket embeddings have.
+Reports:
+
+- Build time of each index (HNSW insert rate)
+- Brute-force query latency (p50 / p95)
+- Per ef_search: HNSW latency (p50 / p95), speedup over brute force and
+  recall@k against the exact brute-force top k
+- The same for a filtered query (one department of eight)
+
+Usage:
+    python scripts/benchmarks/benchmark_local_index.py [--vectors N] [--dimension D]
+        [--queries N] [--top-k K] [--ef 16,32,64,128] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vector_db.local_index import LocalIndexConfig, LocalVectorIndex  # noqa: E402
+
+DEPARTMENTS = ["BILLING", "TECHNICAL", "NETWORK", "SALES", "RETENTION", "FRAUD", "ROAMING", "HARDWARE"]
+
+
+def generate_embeddings(count: int, dimension: int, clusters: int, spread: float,
+                        rng: np.random.Generator) -> np.ndarray:
+    """Unit-norm float32 embeddings scattered around `clusters` random centres."""
+    centres = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)]
+    vectors += spread * rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _percentiles(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    return {"p50_ms": float(np.percentile(latencies_ms, 50)), "p95_ms": float(np.percentile(latencies_ms, 95))}
+
+
+def run_queries(index: LocalVectorIndex, queries: np.ndarray, top_k: int,
+                filter_metadata: Optional[Dict[str, Any]] = None):
+    """Top-k ids per query and per-query latency (ms)."""
+    ids, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        matches = index.search(query, top_k, filter_metadata, include_metadata=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids.append([match["id"] for match in matches])
+    return ids, latencies
+
+
+def recall_at_k(approximate: List[List[str]], exact: List[List[str]]) -> float:
+    """Mean fraction of the exact top k found by the approximate search."""
+    return float(np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approximate, exact, strict=True) if e]))
+
+
+async def build_index(vectors: np.ndarray, hnsw: bool, m: int, ef_construction: int):
+    """Index every vector (department metadata round-robin); returns the index and build seconds."""
+    config = LocalIndexConfig(dimension=vectors.shape[1], persist_dir=None, hnsw_m=m,
+                              hnsw_ef_construction=ef_construction,
+                              hnsw_threshold=0 if hnsw else len(vectors) + 1)
+    index = LocalVectorIndex(config)
+    await index.initialize_index()
+    started = time.perf_counter()
+    await index.upsert_vectors(
+        [(f"T{i}", vector, {"actual_department": DEPARTMENTS[i % len(DEPARTMENTS)]})
+         for i, vector in enumerate(vectors)],
+        batch_size=1000
+    )
+    return index, time.perf_counter() - started
+
+
+async def run_benchmark(vectors: int, dimension: int, queries: int, top_k: int, ef_values: Sequence[int],
+                        clusters: int, spread: float, m: int, ef_construction: int, seed: int) -> Dict[str, Any]:
+    """
+    Build both indexes and compare their answers.
+
+    Returns:
+        Report with build times, brute-force latency and per-ef recall / latency
+    """
+    rng = np.random.default_rng(seed)
+    data = generate_embeddings(vectors + queries, dimension, clusters, spread, rng)
+    corpus, held_out = data[:vectors], data[vectors:]
+
+    brute_force, brute_seconds = await build_index(corpus, hnsw=False, m=m, ef_construction=ef_construction)
+    hnsw, hnsw_seconds = await build_index(corpus, hnsw=True, m=m, ef_construction=ef_construction)
+
+    report = {
+        "vectors": vectors, "dimension": dimension, "queries": queries, "top_k": top_k,
+        "hnsw_m": m, "hnsw_ef_construction": ef_construction,
+        "build": {"brute_force_seconds": brute_seconds, "hnsw_seconds": hnsw_seconds,
+                  "hnsw_inserts_per_second": vectors / hnsw_seconds if hnsw_seconds > 0 else None},
+        "unfiltered": {}, "filtered": {},
+    }
+    for name, filter_metadata in (("unfiltered", None), ("filtered", {"actual_department": "NETWORK"})):
+        exact, exact_latencies = run_queries(brute_force, held_out, top_k, filter_metadata)
+        brute_p50 = _percentiles(exact_latencies)["p50_ms"]
+        section = {"brute_force": _percentiles(exact_latencies), "hnsw": []}
+        for ef in ef_values:
+            hnsw.config.hnsw_ef_search = ef
+            fallbacks_before = hnsw.stats["filter_fallbacks"]
+            approximate, latencies = run_queries(hnsw, held_out, top_k, filter_metadata)
+            entry = {"ef_search": ef, **_percentiles(latencies), "recall": recall_at_k(approximate, exact),
+                     "brute_force_fallbacks": hnsw.stats["filter_fallbacks"] - fallbacks_before}
+            entry["speedup"] = brute_p50 / entry["p50_ms"] if entry["p50_ms"] > 0 else None
+            section["hnsw"].append(entry)
+        report[name] = section
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--vectors", type=int, default=20_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef", default="16,32,64,128", help="Comma-separated ef_search values")
+    parser.add_argument("--clusters", type=int, default=200, help="Topic centres the embeddings scatter around")
+    parser.add_argument("--spread", type=float, default=0.6, help="Noise around each centre (per coordinate)")
+    parser.add_argument("--m", type=int, default=16, help="HNSW neighbors per node")
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run_benchmark(
+        args.vectors, args.dimension, args.queries, args.top_k, [int(ef) for ef in args.ef.split(",")],
+        args.clusters, args.spread, args.m, args.ef_construction, args.seed
+    ))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    build = report["build"]
+    print(f"🗂️ Local vector index: HNSW vs brute force ({report['vectors']:,} x {report['dimension']}, "
+          f"{report['queries']} queries, top {report['top_k']})")
+    print("=" * 78)
+    print(f"Build: brute force {build['brute_force_seconds']:.2f}s, HNSW {build['hnsw_seconds']:.1f}s "
+          f"({build['hnsw_inserts_per_second']:,.0f} inserts/s, m={report['hnsw_m']}, "
+          f"ef_construction={report['hnsw_ef_construction']})")
+    for name in ("unfiltered", "filtered"):
+        section = report[name]
+        print(f"\n{name} queries")
+        print(f"{'search':>14} {'p50':>9} {'p95':>9} {'speedup':>8} {'recall@k':>9} {'fallbacks':>10}")
+        exact = section["brute_force"]
+        print(f"{'brute force':>14} {exact['p50_ms']:>6.2f} ms {exact['p95_ms']:>6.2f} ms {'-':>8} {1.0:>9.3f} {'-':>10}")
+        for entry in section["hnsw"]:
+            print(f"{'hnsw ef=' + str(entry['ef_search']):>14} {entry['p50_ms']:>6.2f} ms {entry['p95_ms']:>6.2f} ms "
+                  f"{entry['speedup']:>7.2f}x {entry['recall']:>9.3f} {entry['brute_force_fallbacks']:>10}")
+
+
+if __name__ == "__main__":
+    main()
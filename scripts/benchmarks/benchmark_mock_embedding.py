@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: mock embedding generation (Python loop vs numpy Generator)
+
+Compares the previous generate_mock_embedding, which reseeded the global
+random module and built the vector with a random.gauss loop, against the
+numpy implementation in IntelligentSimilaritySearch: uncached (first sight
+of a text), cached (repeat text) and the batch variant.
+
+Usage:
+    python scripts/benchmarks/benchmark_mock_embedding.py [--texts N] [--dimension D]
+"""
+
+import argparse
+import hashlib
+import math
+import random
+import sys
+import timeit
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.rag_intelligent_routing import (  # noqa: E402
+    IntelligentSimilaritySearch,
+    _mock_embedding_for_digest,
+)
+
+
+def legacy_mock_embedding(text: str, dimension: int = 1536) -> list:
+    """Previous generate_mock_embedding implementation."""
+    seed = int(hashlib.md5(text.encode(), usedforsecurity=False).hexdigest()[:8], 16)
+    random.seed(seed)
+
+    embedding = [random.gauss(0, 1) for _ in range(dimension)]
+    norm = math.sqrt(sum(x * x for x in embedding))
+    if norm > 0:
+        embedding = [x / norm for x in embedding]
+
+    return embedding
+
+
+def run(text_count: int, dimension: int) -> dict:
+    """Time each implementation over `text_count` distinct ticket texts."""
+    texts = [f"Ticket {i}: my internet keeps dropping during video calls" for i in range(text_count)]
+    generate = IntelligentSimilaritySearch.generate_mock_embedding
+
+    def legacy():
+        for text in texts:
+            legacy_mock_embedding(text, dimension)
+
+    def uncached():
+        _mock_embedding_for_digest.cache_clear()
+        for text in texts:
+            generate(text, dimension)
+
+    def cached():
+        for text in texts:
+            generate(text, dimension)
+
+    def batch():
+        _mock_embedding_for_digest.cache_clear()
+        IntelligentSimilaritySearch.generate_mock_embeddings(texts, dimension)
+
+    timings = {}
+    for name, fn in (("legacy", legacy), ("uncached", uncached), ("batch", batch)):
+        timings[name] = min(timeit.repeat(fn, number=1, repeat=5)) / text_count * 1e6
+
+    uncached()  # warm the cache for the repeat-text case
+    timings["cached"] = min(timeit.repeat(cached, number=1, repeat=5)) / text_count * 1e6
+
+    return {
+        "texts": text_count,
+        "dimension": dimension,
+        "us_per_embedding": timings,
+        "speedup_uncached": timings["legacy"] / timings["uncached"],
+        "speedup_cached": timings["legacy"] / timings["cached"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    args = parser.parse_args()
+
+    results = run(args.texts, args.dimension)
+    timings = results["us_per_embedding"]
+
+    print("⚡ Mock embedding microbenchmark")
+    print("=" * 50)
+    print(f"Texts x dimension:   {results['texts']:,} x {results['dimension']}")
+    print(f"Python gauss loop:   {timings['legacy']:.1f} µs/embedding")
+    print(f"numpy (uncached):    {timings['uncached']:.1f} µs/embedding")
+    print(f"numpy (batch):       {timings['batch']:.1f} µs/embedding")
+    print(f"numpy (cached):      {timings['cached']:.1f} µs/embedding")
+    print(f"Speedup:             {results['speedup_uncached']:.1f}x uncached, "
+          f"{results['speedup_cached']:.0f}x cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential route_with_confidence vs concurrent route_many
+
+Routes the same ticket batch one by one and through route_many against
+local stand-ins for the vector index and the LLM, which add a fixed
+network-like latency per call. Reports wall time, tickets/sec and the
+per-stage throughput of route_many.
+
+With --llm-server the real async LLMClassifier is used, talking HTTP to a
+local OpenAI-compatible stand-in server instead of an in-process stub.
+
+Usage:
+    python scripts/benchmarks/benchmark_route_many.py [--tickets N] [--concurrency C]
+        [--vector-latency-ms MS] [--llm-latency-ms MS] [--llm-server]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.benchmarks.openai_stand_in import OpenAIStandInServer  # noqa: E402
+from scripts.benchmarks.stand_ins import LocalLLMStandIn, LocalVectorStandIn, constant_latency  # noqa: E402
+from src.models.confidence_based_routing import ConfidenceBasedRouter  # noqa: E402
+from src.models.rag_intelligent_routing import LLMClassifier, LLMClientConfig  # noqa: E402
+
+
+def build_router(vector_latency_ms: float, llm_latency_ms: float,
+                 llm_base_url: str = None, concurrency: int = 16) -> ConfidenceBasedRouter:
+    """Router wired to the local stand-ins, with the exact-duplicate cache disabled."""
+    router = ConfidenceBasedRouter(decision_cache_size=0)
+    router.similarity_search.vector_client = LocalVectorStandIn.synthetic(1000, constant_latency(vector_latency_ms))
+    if llm_base_url:
+        router.rag_system.llm_classifier = LLMClassifier(
+            LLMClientConfig(base_url=llm_base_url, max_concurrency=concurrency), api_key="stand-in"
+        )
+    else:
+        router.rag_system.llm_classifier = LocalLLMStandIn(constant_latency(llm_latency_ms))
+    return router
+
+
+async def run(ticket_count: int, concurrency: int, vector_latency_ms: float, llm_latency_ms: float,
+              llm_base_url: str = None) -> dict:
+    """Route `ticket_count` distinct tickets sequentially and with route_many."""
+    texts = [f"Ticket {i}: my internet keeps dropping during video calls" for i in range(ticket_count)]
+
+    sequential_router = build_router(vector_latency_ms, llm_latency_ms, llm_base_url, concurrency)
+    started = time.perf_counter()
+    for text in texts:
+        await sequential_router.route_with_confidence(text)
+    sequential_s = time.perf_counter() - started
+    await sequential_router.close()
+
+    batch_router = build_router(vector_latency_ms, llm_latency_ms, llm_base_url, concurrency)
+    started = time.perf_counter()
+    await batch_router.route_many(texts, concurrency=concurrency)
+    batch_s = time.perf_counter() - started
+    stages = batch_router.get_batch_stage_throughput()
+    await batch_router.close()
+
+    return {
+        "tickets": ticket_count,
+        "concurrency": concurrency,
+        "sequential_tps": ticket_count / sequential_s,
+        "route_many_tps": ticket_count / batch_s,
+        "speedup": sequential_s / batch_s,
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickets", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--vector-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=150.0)
+    parser.add_argument("--llm-server", action="store_true",
+                        help="Use LLMClassifier against a local OpenAI-compatible stand-in server")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir, OpenAIStandInServer(args.llm_latency_ms) as server:
+        # Routing log and accuracy store are written to the working directory
+        os.chdir(workdir)
+        results = asyncio.run(run(args.tickets, args.concurrency, args.vector_latency_ms, args.llm_latency_ms,
+                                  server.base_url if args.llm_server else None))
+        os.chdir(project_root)
+
+    llm = "stand-in server" if args.llm_server else "stand-in"
+    print(f"⚡ route_many benchmark (local vector/LLM {llm})")
+    print("=" * 50)
+    print(f"Tickets / concurrency: {results['tickets']:,} / {results['concurrency']}")
+    print(f"Sequential:            {results['sequential_tps']:.1f} tickets/sec")
+    print(f"route_many:            {results['route_many_tps']:.1f} tickets/sec")
+    print(f"Speedup:               {results['speedup']:.1f}x")
+    print("Stages:")
+    for stage, timing in results["stages"].items():
+        print(f"  {stage:<8} {timing['items']:>6} items  {timing['items_per_second']:>12,.0f} items/sec")
+
+
+if __name__ == "__main__":
+    main()
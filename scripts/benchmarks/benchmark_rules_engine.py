@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Rules Engine Benchmark & Regression Suite
+=========================================
+
+Replays the rules engine fixtures in data/test/ plus a synthetic scale-up of
+realistic-length tickets through TelcoRulesEngine and reports:
+
+- Throughput (tickets/second)
+- Latency percentiles per ticket (p50/p99, microseconds)
+- Peak traced memory during evaluation (tracemalloc KiB, separate pass)
+- Fixture accuracy (expected rule and department)
+
+Results are compared with a stored JSON baseline; the run fails (exit code 1)
+when throughput drops by more than the tolerance or fixture accuracy drops.
+
+Usage:
+    python scripts/benchmarks/benchmark_rules_engine.py
+    python scripts/benchmarks/benchmark_rules_engine.py --tickets 10000 --tolerance 0.3
+    python scripts/benchmarks/benchmark_rules_engine.py --update-baseline
+"""
+
+import argparse
+import csv
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.rules_engine import TelcoRulesEngine  # noqa: E402
+
+TEST_DATA_DIR = project_root / "data" / "test"
+DEFAULT_BASELINE = TEST_DATA_DIR / "benchmarks" / "rules_engine_baseline.json"
+DEFAULT_TICKETS = 100_000
+DEFAULT_TOLERANCE = 0.20
+
+# Neutral context sentences used to pad tickets to realistic lengths without
+# introducing rule keywords of their own.
+FILLER_SENTENCES = [
+    "I have been a customer for over five years.",
+    "My account number is on the attached statement.",
+    "I called yesterday and was told someone would get back to me.",
+    "This has happened a few times over the last month.",
+    "Please let me know what information you need from me.",
+    "I am available on my mobile during business hours.",
+    "The reference number from my last call was 48213.",
+    "I would appreciate a quick response on this matter.",
+    "We have two lines on this account, both for the household.",
+    "I tried the self-service portal first before writing in.",
+    "Kind regards, and thanks in advance.",
+    "It is quite frustrating to have to follow up again.",
+]
+
+
+def load_fixture_cases(data_dir: Path = TEST_DATA_DIR) -> List[Dict[str, Any]]:
+    """
+    Load labelled rules engine fixtures from JSON and CSV.
+
+    Cases are de-duplicated by ticket_id (JSON takes precedence).
+
+    Returns:
+        List of dicts with ticket_id, text, expected_rule, expected_department
+    """
+    cases: Dict[str, Dict[str, Any]] = {}
+
+    json_path = data_dir / "rules_engine_test_data.json"
+    if json_path.exists():
+        with open(json_path, encoding="utf-8") as f:
+            for case in json.load(f).get("test_cases", []):
+                cases[case["ticket_id"]] = {
+                    "ticket_id": case["ticket_id"],
+                    "text": case["text"],
+                    "expected_rule": case["expected_rule"],
+                    "expected_department": case["expected_department"],
+                }
+
+    csv_path = data_dir / "rules_engine_test_cases.csv"
+    if csv_path.exists():
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                cases.setdefault(row["ticket_id"], {
+                    "ticket_id": row["ticket_id"],
+                    "text": row["ticket_text"],
+                    "expected_rule": row["expected_rule"],
+                    "expected_department": row["expected_department"],
+                })
+
+    return list(cases.values())
+
+
+def load_seed_texts(data_dir: Path = TEST_DATA_DIR) -> List[str]:
+    """Load rule-matching and RAG (non-matching) fixture texts as synthetic seeds."""
+    texts = [case["text"] for case in load_fixture_cases(data_dir)]
+
+    rag_path = data_dir / "rag_system_test_data.json"
+    if rag_path.exists():
+        with open(rag_path, encoding="utf-8") as f:
+            texts.extend(case["text"] for case in json.load(f).get("test_cases", []))
+
+    return texts
+
+
+def generate_synthetic_tickets(
+    count: int,
+    seed_texts: List[str],
+    seed: int = 42,
+    median_length: int = 320
+) -> List[str]:
+    """
+    Generate realistic-length tickets by padding fixture texts with filler.
+
+    Target lengths are log-normally distributed around median_length characters
+    (clipped to 60-2000), matching the long tail of free-text tickets.
+
+    Args:
+        count: Number of tickets to generate
+        seed_texts: Fixture texts to build tickets from
+        seed: Random seed for reproducibility
+        median_length: Median ticket length in characters
+
+    Returns:
+        List of ticket texts
+    """
+    rng = random.Random(seed)
+    lengths = np.clip(
+        np.random.default_rng(seed).lognormal(np.log(median_length), 0.5, count),
+        60, 2000
+    ).astype(int)
+
+    tickets = []
+    for target in lengths:
+        core = rng.choice(seed_texts)
+        parts = [core]
+        size = len(core)
+        while size < target:
+            sentence = rng.choice(FILLER_SENTENCES)
+            # Insert filler before or after the core complaint
+            if rng.random() < 0.5:
+                parts.insert(0, sentence)
+            else:
+                parts.append(sentence)
+            size += len(sentence) + 1
+        tickets.append(" ".join(parts))
+
+    return tickets
+
+
+def evaluate_accuracy(engine: TelcoRulesEngine, cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Replay labelled fixtures and compute rule/department accuracy."""
+    rule_correct = 0
+    dept_correct = 0
+    misses = []
+
+    for case in cases:
+        match = engine.evaluate_ticket(case["text"])
+        if match and match.rule_id == case["expected_rule"]:
+            rule_correct += 1
+        else:
+            misses.append({
+                "ticket_id": case["ticket_id"],
+                "expected_rule": case["expected_rule"],
+                "actual_rule": match.rule_id if match else None,
+            })
+        if match and match.department == case["expected_department"]:
+            dept_correct += 1
+
+    total = max(len(cases), 1)
+    return {
+        "fixture_cases": len(cases),
+        "rule_accuracy": rule_correct / total,
+        "department_accuracy": dept_correct / total,
+        "misses": misses,
+    }
+
+
+def measure_latency(engine: TelcoRulesEngine, tickets: List[str]) -> Dict[str, Any]:
+    """Time each evaluation and compute throughput and latency percentiles."""
+    latencies_ns = np.empty(len(tickets), dtype=np.int64)
+    matches = 0
+
+    start = time.perf_counter_ns()
+    for i, ticket in enumerate(tickets):
+        t0 = time.perf_counter_ns()
+        if engine.evaluate_ticket(ticket) is not None:
+            matches += 1
+        latencies_ns[i] = time.perf_counter_ns() - t0
+    elapsed_s = (time.perf_counter_ns() - start) / 1e9
+
+    latencies_us = latencies_ns / 1e3
+    return {
+        "tickets": len(tickets),
+        "elapsed_seconds": elapsed_s,
+        "throughput_tps": len(tickets) / elapsed_s if elapsed_s else 0.0,
+        "latency_us": {
+            "mean": float(latencies_us.mean()),
+            "p50": float(np.percentile(latencies_us, 50)),
+            "p90": float(np.percentile(latencies_us, 90)),
+            "p99": float(np.percentile(latencies_us, 99)),
+            "max": float(latencies_us.max()),
+        },
+        "match_rate": matches / len(tickets) if tickets else 0.0,
+    }
+
+
+def measure_peak_memory(engine: TelcoRulesEngine, tickets: List[str]) -> float:
+    """Peak traced allocation (KiB) while evaluating tickets (separate pass)."""
+    tracemalloc.start()
+    try:
+        for ticket in tickets:
+            engine.evaluate_ticket(ticket)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_benchmark(
+    ticket_count: int = DEFAULT_TICKETS,
+    seed: int = 42,
+    data_dir: Path = TEST_DATA_DIR
+) -> Dict[str, Any]:
+    """
+    Run the full benchmark: fixture accuracy, synthetic latency and memory.
+
+    Returns:
+        Benchmark result dictionary (JSON-serializable)
+    """
+    engine = TelcoRulesEngine()
+
+    cases = load_fixture_cases(data_dir)
+    accuracy = evaluate_accuracy(engine, cases)
+
+    tickets = generate_synthetic_tickets(ticket_count, load_seed_texts(data_dir), seed=seed)
+    lengths = np.array([len(t) for t in tickets])
+
+    # Warm up regex caches before timing
+    for ticket in tickets[:min(1000, len(tickets))]:
+        engine.evaluate_ticket(ticket)
+
+    performance = measure_latency(engine, tickets)
+    peak_kib = measure_peak_memory(engine, tickets)
+
+    return {
+        "benchmark": "rules_engine",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "workload": {
+            "synthetic_tickets": ticket_count,
+            "seed": seed,
+            "mean_ticket_length": float(lengths.mean()) if len(lengths) else 0.0,
+            "p99_ticket_length": float(np.percentile(lengths, 99)) if len(lengths) else 0.0,
+            "rules_loaded": len(engine.rules),
+        },
+        "accuracy": accuracy,
+        "performance": performance,
+        "peak_memory_kib": peak_kib,
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Optional[Dict[str, Any]],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    Args:
+        results: Current benchmark results
+        baseline: Stored baseline results (None = nothing to compare)
+        tolerance: Allowed fractional throughput drop (0.2 = 20%)
+
+    Returns:
+        List of regression messages (empty = pass)
+    """
+    if not baseline:
+        return []
+
+    regressions = []
+
+    base_tps = baseline["performance"]["throughput_tps"]
+    current_tps = results["performance"]["throughput_tps"]
+    floor = base_tps * (1 - tolerance)
+    if current_tps < floor:
+        regressions.append(
+            f"Throughput regressed: {current_tps:,.0f} tps < {floor:,.0f} tps "
+            f"(baseline {base_tps:,.0f} tps, tolerance {tolerance:.0%})"
+        )
+
+    for metric in ("rule_accuracy", "department_accuracy"):
+        base_acc = baseline["accuracy"][metric]
+        current_acc = results["accuracy"][metric]
+        if current_acc < base_acc:
+            regressions.append(
+                f"{metric} regressed: {current_acc:.1%} < baseline {base_acc:.1%}"
+            )
+
+    return regressions
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a stored baseline, or None if it does not exist."""
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, Any], path: Path) -> None:
+    """Write results as the new baseline."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rules engine benchmark & regression suite")
+    parser.add_argument("--tickets", type=int, default=DEFAULT_TICKETS,
+                        help="Number of synthetic tickets (default: 100000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="Baseline JSON path")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional throughput drop (default: 0.20)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="Also write results JSON here")
+    args = parser.parse_args()
+
+    # Keep engine start-up logging out of the report
+    logging.getLogger("src.models.rules_engine").setLevel(logging.WARNING)
+    results = run_benchmark(ticket_count=args.tickets, seed=args.seed)
+    perf = results["performance"]
+    acc = results["accuracy"]
+
+    print("🔧 RULES ENGINE BENCHMARK")
+    print("=" * 50)
+    print(f"Fixture cases:       {acc['fixture_cases']}")
+    print(f"Rule accuracy:       {acc['rule_accuracy']:.1%}")
+    print(f"Department accuracy: {acc['department_accuracy']:.1%}")
+    print(f"Synthetic tickets:   {perf['tickets']:,} "
+          f"(mean {results['workload']['mean_ticket_length']:.0f} chars)")
+    print(f"Throughput:          {perf['throughput_tps']:,.0f} tickets/s")
+    print(f"Latency p50 / p99:   {perf['latency_us']['p50']:.1f} / {perf['latency_us']['p99']:.1f} µs")
+    print(f"Match rate:          {perf['match_rate']:.1%}")
+    print(f"Peak memory:         {results['peak_memory_kib']:.1f} KiB")
+
+    if args.output:
+        save_baseline(results, args.output)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\n⚠️ No baseline at {args.baseline} - run with --update-baseline to create one")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ REGRESSIONS DETECTED:")
+        for message in regressions:
+            print(f"   {message}")
+        return 1
+
+    print(f"\n✅ Within {args.tolerance:.0%} of baseline "
+          f"({baseline['performance']['throughput_tps']:,.0f} tps)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
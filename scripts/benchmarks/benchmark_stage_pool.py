@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Core scaling of the CPU-bound routing stages in StageWorkerPool
+
+Runs a synthetic batch of realistic-length tickets (built like
+benchmark_rules_engine.py) through the rules stage, and the ML stage when a
+model is given, first in-process on the event loop (as /classify/batch does)
+and then through StageWorkerPool with 1..N worker processes. Reports per
+configuration:
+
+- Throughput (tickets/second), speedup over one worker and parallel efficiency
+- Worst event-loop lag while the batch ran (a 1 ms heartbeat task), which is
+  what the I/O-bound LLM calls sharing the loop would see
+- Pool warm-up time (processes spawned, stages compiled and loaded)
+
+Usage:
+    python scripts/benchmarks/benchmark_stage_pool.py [--tickets N] [--max-workers N]
+        [--model models/telco_ticket_classifier.pkl] [--json]
+
+A .pkl model is re-saved as a memory-mappable .joblib artifact first.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.benchmarks.benchmark_rules_engine import generate_synthetic_tickets, load_seed_texts  # noqa: E402
+from src.models.business_rules_config import BusinessRulesConfig  # noqa: E402
+from src.models.rules_engine import TelcoRulesEngine  # noqa: E402
+from src.models.stage_worker_pool import StageWorkerPool  # noqa: E402
+from src.models.ticket_classifier import TicketClassificationPipeline  # noqa: E402
+
+
+async def _with_loop_lag(work) -> Dict[str, float]:
+    """Await `work` while a 1 ms heartbeat measures how late the event loop wakes it."""
+    lags = [0.0]
+    done = False
+
+    async def heartbeat():
+        while not done:
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    ticker = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    try:
+        await work
+    finally:
+        elapsed = time.perf_counter() - started
+        done = True
+        await ticker
+    return {"seconds": elapsed, "max_loop_lag_ms": max(lags)}
+
+
+async def measure_in_process(tickets: List[str], pipeline: Optional[TicketClassificationPipeline]) -> Dict[str, Any]:
+    """Both stages run synchronously on the event loop thread."""
+    engine = TelcoRulesEngine(business_config=BusinessRulesConfig())
+    engine.compile_rules()
+
+    async def rules():
+        for text in tickets:
+            engine.evaluate_ticket(text)
+
+    results = {"rules": await _with_loop_lag(rules())}
+    if pipeline is not None:
+        async def ml():
+            pipeline.predict_proba(tickets)
+        results["ml"] = await _with_loop_lag(ml())
+    return results
+
+
+async def measure_pool(tickets: List[str], workers: int, model_path: Optional[str]) -> Dict[str, Any]:
+    """Both stages through a pre-warmed pool of `workers` processes."""
+    pool = StageWorkerPool(workers=workers, model_path=model_path, chunk_size=max(1, len(tickets) // (workers * 4)))
+    try:
+        pool.start()
+        results = {"warmup_ms": pool.stats["warmup_time_ms"],
+                   "rules": await _with_loop_lag(pool.evaluate_tickets(tickets))}
+        if model_path is not None:
+            results["ml"] = await _with_loop_lag(pool.predict_proba(tickets))
+        return results
+    finally:
+        pool.close()
+
+
+async def run_benchmark(tickets: List[str], max_workers: int, model_path: Optional[str]) -> Dict[str, Any]:
+    """
+    In-process baseline plus one pool run per worker count.
+
+    Returns:
+        Report with per-stage throughput, speedup, efficiency and loop lag
+    """
+    pipeline = None
+    if model_path is not None:
+        pipeline = TicketClassificationPipeline()
+        pipeline.load_model(model_path, mmap_mode="r")
+
+    def summarize(run: Dict[str, Any], stage: str, one_worker_seconds: Optional[float], workers: int):
+        seconds = run[stage]["seconds"]
+        entry = {
+            "tickets_per_second": len(tickets) / seconds if seconds > 0 else None,
+            "max_loop_lag_ms": run[stage]["max_loop_lag_ms"],
+        }
+        if one_worker_seconds is not None:
+            entry["speedup"] = one_worker_seconds / seconds
+            entry["efficiency"] = entry["speedup"] / workers
+        return entry
+
+    stages = ["rules"] + (["ml"] if model_path is not None else [])
+    baseline = await measure_in_process(tickets, pipeline)
+    report = {
+        "tickets": len(tickets),
+        "cpu_count": os.cpu_count(),
+        "in_process": {stage: summarize(baseline, stage, None, 1) for stage in stages},
+        "pool": [],
+    }
+    one_worker = {}
+    for workers in range(1, max_workers + 1):
+        run = await measure_pool(tickets, workers, model_path)
+        if workers == 1:
+            one_worker = {stage: run[stage]["seconds"] for stage in stages}
+        report["pool"].append({
+            "workers": workers,
+            "warmup_ms": run["warmup_ms"],
+            **{stage: summarize(run, stage, one_worker[stage], workers) for stage in stages},
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickets", type=int, default=20_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", type=Path, default=None,
+                        help="Trained TicketClassificationPipeline (.pkl or .joblib); rules only without it")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    tickets = generate_synthetic_tickets(args.tickets, load_seed_texts(), seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        model_path = None
+        if args.model is not None:
+            model_path = str(args.model)
+            if args.model.suffix != ".joblib":
+                pipeline = TicketClassificationPipeline()
+                pipeline.load_model(model_path)
+                model_path = str(Path(workdir) / "model.joblib")
+                pipeline.save_model_mmap(model_path)
+        report = asyncio.run(run_benchmark(tickets, args.max_workers, model_path))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    stages = list(report["in_process"])
+    print(f"🏭 Stage worker pool scaling ({report['tickets']:,} tickets, {report['cpu_count']} CPUs)")
+    print("=" * 78)
+    print(f"{'workers':>8} {'stage':>6} {'tickets/sec':>12} {'speedup':>8} {'efficiency':>11} "
+          f"{'loop lag':>10} {'warm-up':>9}")
+    for stage in stages:
+        entry = report["in_process"][stage]
+        print(f"{'inline':>8} {stage:>6} {entry['tickets_per_second']:>12,.0f} {'-':>8} {'-':>11} "
+              f"{entry['max_loop_lag_ms']:>7,.1f} ms {'-':>9}")
+    for run in report["pool"]:
+        for stage in stages:
+            entry = run[stage]
+            print(f"{run['workers']:>8} {stage:>6} {entry['tickets_per_second']:>12,.0f} {entry['speedup']:>7.2f}x "
+                  f"{entry['efficiency']:>11.0%} {entry['max_loop_lag_ms']:>7,.1f} ms {run['warmup_ms']:>6,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in server
+
+Serves POST /v1/chat/completions on localhost with a fixed latency and a
+canned classification reply, so LLMClassifier (and routers built on it)
+can be exercised and benchmarked end to end without network access or an
+API key. Failures can be injected to exercise retries.
+
+Usage:
+    with OpenAIStandInServer(latency_ms=50) as server:
+        classifier = LLMClassifier(LLMClientConfig(base_url=server.base_url), api_key="stand-in")
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+DEFAULT_REPLY = "Department: technical_support_l2\nConfidence: medium\nReasoning: Stand-in classification"
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Bursts of concurrent connects would overflow the default backlog of 5
+
+
+class OpenAIStandInServer:
+    """Threaded chat-completions server that counts connections, requests and peak concurrency."""
+
+    def __init__(self, latency_ms: float = 0.0, reply: str = DEFAULT_REPLY, port: int = 0):
+        """
+        Initialize the stand-in (call start() or use as a context manager).
+
+        Args:
+            latency_ms: Delay before each response
+            reply: Assistant message content returned for every request
+            port: Port to bind on 127.0.0.1 (0 picks a free port)
+        """
+        self.latency_ms = latency_ms
+        self.reply = reply
+        self.stats = {"connections": 0, "requests": 0, "failed": 0, "in_flight": 0, "peak_in_flight": 0}
+        self._failures: list = []
+        self._lock = threading.Lock()
+        self._server = _StandInHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def fail_next(self, count: int, status: int = 500, delay_ms: float = 0.0) -> None:
+        """Answer the next `count` requests with `status` after `delay_ms`."""
+        with self._lock:
+            self._failures.extend([(status, delay_ms)] * count)
+
+    def start(self) -> "OpenAIStandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="openai-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "OpenAIStandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _next_failure(self):
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def _completion(self, request: Dict) -> Dict:
+        prompt_chars = sum(len(message.get("content", "")) for message in request.get("messages", []))
+        completion_tokens = len(self.reply) // 4
+        return {
+            "id": f"chatcmpl-standin-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_chars // 4 + completion_tokens,
+            },
+        }
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so client connection reuse is observable
+
+            def setup(self):
+                super().setup()
+                with stand_in._lock:
+                    stand_in.stats["connections"] += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stand_in._lock:
+                    stand_in.stats["requests"] += 1
+                    stand_in.stats["in_flight"] += 1
+                    stand_in.stats["peak_in_flight"] = max(stand_in.stats["peak_in_flight"],
+                                                           stand_in.stats["in_flight"])
+                try:
+                    failure = stand_in._next_failure()
+                    if failure is not None:
+                        status, delay_ms = failure
+                        time.sleep(delay_ms / 1000)
+                        with stand_in._lock:
+                            stand_in.stats["failed"] += 1
+                        self._send(status, {"error": {"message": "stand-in failure", "type": "server_error"}})
+                        return
+
+                    time.sleep(stand_in.latency_ms / 1000)
+                    if not self.path.rstrip("/").endswith("/chat/completions"):
+                        self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                        return
+                    self._send(200, stand_in._completion(json.loads(body or b"{}")))
+                finally:
+                    with stand_in._lock:
+                        stand_in.stats["in_flight"] -= 1
+
+            def _send(self, status: int, payload: Dict):
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client gave up (e.g. timed out)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
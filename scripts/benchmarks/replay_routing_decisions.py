@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Replay recorded routing decision streams through the router
+
+Feeds the tickets of one or more routing decision logs (routing_decisions.jsonl,
+including rotated .gz segments) into ConfidenceBasedRouter at their original
+arrival times, optionally accelerated, against local stand-ins for the vector
+index and the LLM with injectable latency distributions. A fixed number of
+worker slots models server capacity, so arrivals that find every slot busy
+queue.
+
+Reports throughput, queueing delay, cache hit rate, agreement with the
+recorded departments and latency percentiles per routing method.
+
+The stand-in index is seeded with a fraction of the distinct replayed tickets
+(--history-fraction) under their recorded departments, so both cached routes
+and RAG-LLM routes occur; --history-log indexes an older log instead. Logs only keep a 100-character preview of each
+ticket, so longer tickets are replayed as their preview.
+
+Usage:
+    python scripts/benchmarks/replay_routing_decisions.py [LOG ...] [--speedup X]
+        [--concurrency C] [--vector-latency SPEC] [--llm-latency SPEC]
+        [--history-fraction F | --history-log LOG] [--limit N] [--json]
+
+Latency SPECs: constant:MS, lognormal:MEDIAN_MS,SIGMA or empirical (resamples
+the recorded rag_llm processing times).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.benchmarks.stand_ins import (LatencySampler, LocalLLMStandIn, LocalVectorStandIn, distinct,  # noqa: E402
+                                          parse_latency)
+from src.models.confidence_based_routing import ConfidenceBasedRouter, RoutingMethod  # noqa: E402
+from src.models.threshold_optimizer import iter_routing_log  # noqa: E402
+
+DEFAULT_LOG = project_root / "data" / "test" / "routing_decisions.jsonl"
+
+CACHE_METHODS = {RoutingMethod.CENTROID.value, RoutingMethod.CACHED_ROUTE.value, RoutingMethod.EXACT_CACHE.value,
+                 RoutingMethod.COALESCED.value}
+
+
+@dataclass
+class ReplayEvent:
+    """One recorded routing decision to replay."""
+    offset_seconds: float  # Arrival time relative to the first event
+    ticket_text: str
+    department: Optional[str]
+    method: Optional[str]
+    processing_time_ms: Optional[float]
+
+
+def load_decision_stream(paths: Sequence[Path], limit: Optional[int] = None) -> List[ReplayEvent]:
+    """
+    Load routing decisions from JSONL logs in arrival order.
+
+    Args:
+        paths: Decision logs (.jsonl or rotated .jsonl.gz segments)
+        limit: Keep only the first `limit` arrivals
+
+    Returns:
+        Events sorted by timestamp, offsets relative to the first arrival
+    """
+    rows = []
+    for entry in iter_routing_log(paths):
+        if "ticket" not in entry:
+            continue
+        routing = entry.get("routing", {})
+        rows.append((
+            datetime.fromisoformat(entry["timestamp"]).timestamp(),
+            entry["ticket"]["text_preview"],
+            routing.get("department"),
+            routing.get("method"),
+            entry.get("performance", {}).get("processing_time_ms"),
+        ))
+
+    rows.sort(key=lambda row: row[0])
+    rows = rows[:limit] if limit is not None else rows
+    first = rows[0][0] if rows else 0.0
+    return [ReplayEvent(timestamp - first, *rest) for timestamp, *rest in rows]
+
+
+def recorded_latencies(events: Sequence[ReplayEvent], method: str = RoutingMethod.RAG_LLM.value) -> List[float]:
+    """Recorded processing times of `method` decisions (all decisions if there are none)."""
+    times = [e.processing_time_ms for e in events if e.method == method and e.processing_time_ms is not None]
+    return times or [e.processing_time_ms for e in events if e.processing_time_ms is not None]
+
+
+def build_replay_router(events: Sequence[ReplayEvent], vector_latency: LatencySampler, llm_latency: LatencySampler,
+                        workdir: str, history_fraction: float = 0.5, seed: int = 0,
+                        history: Optional[Sequence[ReplayEvent]] = None,
+                        **router_options) -> ConfidenceBasedRouter:
+    """
+    Router wired to stand-ins seeded from the replayed stream.
+
+    Args:
+        events: Stream to be replayed
+        vector_latency: Stand-in vector query latency sampler (ms)
+        llm_latency: Stand-in LLM latency sampler (ms)
+        workdir: Directory for the routing log
+        history_fraction: Fraction of distinct tickets indexed as history
+        seed: Seed for choosing the history tickets
+        history: Decisions to index instead of sampling `events`
+        **router_options: Passed to ConfidenceBasedRouter
+    """
+    departments = {}
+    for event in [*(history or []), *events]:
+        if event.department:
+            departments.setdefault(event.ticket_text, event.department)
+
+    if history is not None:
+        indexed = distinct(e.ticket_text for e in history if e.department)
+    else:
+        rng = np.random.default_rng(seed)
+        indexed = [text for text in distinct(e.ticket_text for e in events if e.department)
+                   if rng.random() < history_fraction]
+
+    router = ConfidenceBasedRouter(routing_log_file=str(Path(workdir) / "routing_decisions.jsonl"),
+                                   accuracy_db_path=None, **router_options)
+    router.similarity_search.vector_client = LocalVectorStandIn(
+        indexed, [departments[text] for text in indexed], vector_latency
+    )
+    router.rag_system.llm_classifier = LocalLLMStandIn(llm_latency, departments)
+    return router
+
+
+def _percentiles(values_ms: Sequence[float]) -> Dict[str, Optional[float]]:
+    if not values_ms:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    p50, p90, p99 = np.percentile(values_ms, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(max(values_ms))}
+
+
+async def replay(events: Sequence[ReplayEvent], router: ConfidenceBasedRouter,
+                 speedup: float = 1.0, concurrency: int = 16) -> Dict:
+    """
+    Replay `events` through `router` and summarize what happened.
+
+    Args:
+        events: Stream from load_decision_stream
+        router: Router to drive (see build_replay_router)
+        speedup: Arrival-rate multiplier (1 = original timing, 0 = all at once)
+        concurrency: Worker slots; arrivals beyond this queue
+
+    Returns:
+        Report with throughput, queueing delay, cache hit rate, department
+        agreement and per-method latency percentiles (milliseconds)
+    """
+    slots = asyncio.Semaphore(concurrency)
+    outcomes = []
+
+    async def handle(event: ReplayEvent, arrived: float):
+        async with slots:
+            started = time.perf_counter()
+            decision = await router.route_with_confidence(event.ticket_text)
+        finished = time.perf_counter()
+        outcomes.append((
+            decision.routing_method.value,
+            (started - arrived) * 1000,
+            (finished - arrived) * 1000,
+            event.department is not None and decision.recommended_department == event.department,
+        ))
+
+    tasks = []
+    replay_start = time.perf_counter()
+    for event in events:
+        due = replay_start + (event.offset_seconds / speedup if speedup > 0 else 0.0)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handle(event, time.perf_counter())))
+    await asyncio.gather(*tasks)
+    wall_seconds = time.perf_counter() - replay_start
+
+    methods = sorted({method for method, *_ in outcomes})
+    span_seconds = (events[-1].offset_seconds / speedup if speedup > 0 else 0.0) if events else 0.0
+    total = len(outcomes)
+    return {
+        "events": total,
+        "speedup": speedup,
+        "concurrency": concurrency,
+        "wall_seconds": wall_seconds,
+        "offered_rate_per_second": total / span_seconds if span_seconds > 0 else None,
+        "throughput_per_second": total / wall_seconds if wall_seconds > 0 else None,
+        "queueing_delay_ms": _percentiles([queued for _, queued, _, _ in outcomes]),
+        "cache_hit_rate": sum(method in CACHE_METHODS for method, *_ in outcomes) / total if total else 0.0,
+        "department_agreement": sum(agreed for *_, agreed in outcomes) / total if total else 0.0,
+        "llm_calls": getattr(router.rag_system.llm_classifier, "calls", None),
+        "methods": {
+            method: {
+                "count": sum(m == method for m, *_ in outcomes),
+                **{
+                    f"latency_{name}_ms": value
+                    for name, value in _percentiles([e2e for m, _, e2e, _ in outcomes if m == method]).items()
+                },
+            }
+            for method in methods
+        },
+    }
+
+
+async def run(paths: Sequence[Path], speedup: float, concurrency: int, vector_latency: str, llm_latency: str,
+              history_fraction: float, limit: Optional[int], seed: int,
+              history_paths: Optional[Sequence[Path]] = None, **router_options) -> Dict:
+    events = load_decision_stream(paths, limit)
+    if not events:
+        raise SystemExit(f"No routing decisions found in {', '.join(map(str, paths))}")
+    history = load_decision_stream(history_paths) if history_paths else None
+    recorded = recorded_latencies(events)
+    with tempfile.TemporaryDirectory() as workdir:
+        router = build_replay_router(
+            events, parse_latency(vector_latency, recorded, seed), parse_latency(llm_latency, recorded, seed + 1),
+            workdir, history_fraction, seed, history, **router_options
+        )
+        try:
+            return await replay(events, router, speedup, concurrency)
+        finally:
+            await router.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("logs", nargs="*", type=Path, default=[DEFAULT_LOG],
+                        help="Decision logs to replay (.jsonl or .jsonl.gz)")
+    parser.add_argument("--speedup", type=float, default=1.0,
+                        help="Arrival-rate multiplier (1 = original timing, 0 = all at once)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--vector-latency", default="lognormal:25,0.4")
+    parser.add_argument("--llm-latency", default="empirical")
+    parser.add_argument("--history-fraction", type=float, default=0.5,
+                        help="Fraction of distinct replayed tickets indexed as history")
+    parser.add_argument("--history-log", type=Path, action="append",
+                        help="Index these decision logs as history instead (repeatable)")
+    parser.add_argument("--confidence-threshold", type=float, default=0.92)
+    parser.add_argument("--accuracy-threshold", type=float, default=0.85)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args.logs, args.speedup, args.concurrency, args.vector_latency, args.llm_latency,
+                             args.history_fraction, args.limit, args.seed, args.history_log,
+                             confidence_threshold=args.confidence_threshold,
+                             accuracy_threshold=args.accuracy_threshold))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    def ms(value):
+        return "-" if value is None else f"{value:,.1f}"
+
+    queued = report["queueing_delay_ms"]
+    print(f"🔁 Routing replay ({report['events']:,} decisions, {report['speedup']:g}x, "
+          f"{report['concurrency']} slots)")
+    print("=" * 60)
+    if report["offered_rate_per_second"] is not None:
+        print(f"Offered rate:     {report['offered_rate_per_second']:.2f} tickets/sec")
+    print(f"Throughput:       {report['throughput_per_second']:.2f} tickets/sec ({report['wall_seconds']:.1f}s)")
+    print(f"Queueing delay:   p50 {ms(queued['p50'])} ms  p99 {ms(queued['p99'])} ms  max {ms(queued['max'])} ms")
+    print(f"Cache hit rate:   {report['cache_hit_rate']:.1%}")
+    print(f"Dept agreement:   {report['department_agreement']:.1%}")
+    print(f"LLM calls:        {report['llm_calls']}")
+    print("Latency by method (arrival to decision):")
+    for method, stats in report["methods"].items():
+        print(f"  {method:<14} {stats['count']:>6}  p50 {ms(stats['latency_p50_ms']):>10} ms"
+              f"  p99 {ms(stats['latency_p99_ms']):>10} ms")
+
+
+if __name__ == "__main__":
+    main()
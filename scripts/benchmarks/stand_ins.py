@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the vector index and the LLM classifier
+
+In-process replacements for PineconeClient and LLMClassifier used by the
+routing benchmarks and the replay harness. Each call sleeps for a latency
+drawn from an injectable sampler (milliseconds), so latency distributions
+can be varied without network access.
+
+Latency specs (see parse_latency):
+    constant:20               every call takes 20 ms
+    lognormal:800,0.6         median 800 ms, log-space sigma 0.6
+    empirical                 resample recorded latencies (replay only)
+"""
+
+import asyncio
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.models.rag_intelligent_routing import IntelligentSimilaritySearch
+from src.vector_db.pinecone_client import VectorDBHealth
+
+LatencySampler = Callable[[], float]
+
+DEPARTMENTS = ["billing_corrections", "technical_support_l2", "account_security", "network_operations"]
+
+
+def constant_latency(ms: float) -> LatencySampler:
+    """Every call takes `ms` milliseconds."""
+    return lambda: ms
+
+
+def lognormal_latency(median_ms: float, sigma: float, seed: int = 0) -> LatencySampler:
+    """Log-normal latency with the given median and log-space sigma (long right tail)."""
+    rng = np.random.default_rng(seed)
+    return lambda: float(rng.lognormal(np.log(median_ms), sigma))
+
+
+def empirical_latency(samples_ms: Sequence[float], seed: int = 0) -> LatencySampler:
+    """Resample observed latencies with replacement."""
+    if not samples_ms:
+        raise ValueError("empirical latency needs at least one recorded sample")
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    return lambda: float(samples[rng.integers(len(samples))])
+
+
+def parse_latency(spec: str, recorded_ms: Optional[Sequence[float]] = None, seed: int = 0) -> LatencySampler:
+    """
+    Build a latency sampler from a CLI spec.
+
+    Args:
+        spec: "constant:MS", "lognormal:MEDIAN_MS,SIGMA" or "empirical"
+        recorded_ms: Observed latencies used by "empirical"
+        seed: Random seed for stochastic samplers
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "constant" and len(values) == 1:
+        return constant_latency(values[0])
+    if kind == "lognormal" and len(values) == 2:
+        return lognormal_latency(values[0], values[1], seed)
+    if kind == "empirical" and not values:
+        return empirical_latency(recorded_ms or [], seed)
+    raise ValueError(f"Invalid latency spec {spec!r}; expected constant:MS, lognormal:MEDIAN_MS,SIGMA or empirical")
+
+
+class LocalVectorStandIn:
+    """In-process brute-force index over mock embeddings of known tickets."""
+
+    def __init__(self, texts: Sequence[str], departments: Sequence[str], latency: LatencySampler):
+        """
+        Args:
+            texts: Historical ticket texts to index
+            departments: Actual department per text
+            latency: Per-call latency sampler (ms)
+        """
+        self.latency = latency
+        self.texts = list(texts)
+        self.departments = list(departments)
+        self.vectors = IntelligentSimilaritySearch.generate_mock_embeddings(self.texts)
+
+    @classmethod
+    def synthetic(cls, history_size: int, latency: LatencySampler) -> "LocalVectorStandIn":
+        """Index of generated tickets spread over DEPARTMENTS."""
+        departments = [DEPARTMENTS[i % len(DEPARTMENTS)] for i in range(history_size)]
+        texts = [f"Historical ticket {i} about {department}" for i, department in enumerate(departments)]
+        return cls(texts, departments, latency)
+
+    async def initialize_index(self):
+        await asyncio.sleep(self.latency() / 1000)
+
+    async def query_vectors(self, query_vector, top_k=5, include_metadata=True, **kwargs):
+        await asyncio.sleep(self.latency() / 1000)
+        if not self.texts:
+            return {"matches": []}
+        scores = self.vectors @ np.asarray(query_vector, dtype=np.float32)
+        top = np.argsort(scores)[::-1][:top_k]
+        return {
+            "matches": [
+                {
+                    "score": float(scores[i]),
+                    "metadata": {
+                        "ticket_id": f"HIST-{i}",
+                        "text": self.texts[i],
+                        "actual_department": self.departments[i],
+                        "prediction_was_correct": True,
+                    },
+                }
+                for i in top
+            ]
+        }
+
+    async def health_check(self, force_check=False):
+        return VectorDBHealth.HEALTHY
+
+    async def close(self):
+        pass
+
+
+class LocalLLMStandIn:
+    """LLM classifier stand-in; answers with a known department per ticket when given one."""
+
+    NEW_TICKET = re.compile(r'NEW ticket: "(.*)"|Ticket: "(.*)"\n\nAvailable departments')
+
+    def __init__(self, latency: LatencySampler, departments: Optional[Dict[str, str]] = None,
+                 default_department: str = "technical_support_l2"):
+        """
+        Args:
+            latency: Per-call latency sampler (ms)
+            departments: Department to answer per ticket text (e.g. recorded decisions)
+            default_department: Answer for unknown tickets
+        """
+        self.latency = latency
+        self.departments = departments or {}
+        self.default_department = default_department
+        self.calls = 0
+
+    async def classify_with_rag_prompt(self, rag_prompt, model="gpt-3.5-turbo", priority=None, deadline=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency() / 1000)
+        match = self.NEW_TICKET.search(rag_prompt)
+        ticket = (match.group(1) or match.group(2)) if match else None
+        department = self.departments.get(ticket, self.default_department)
+        return {"department": department, "confidence": "medium", "reasoning": "stand-in"}
+
+    async def close(self):
+        pass
+
+
+def distinct(texts: Sequence[str]) -> List[str]:
+    """Texts in first-seen order without repeats."""
+    return list(dict.fromkeys(texts))
@@ -5,12 +5,10 @@ Demonstrates the complete Epic 1.6 functionality without requiring OpenAI API cr
 
 import asyncio
 import time
-import hashlib
-import random
-import math
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 
+from src.models.rag_intelligent_routing import IntelligentSimilaritySearch
 from src.vector_db.pinecone_client import PineconeClient
 
 # Load environment variables  
@@ -28,20 +26,8 @@ class MockEmbeddingPipeline:
         }
     
     def generate_mock_embedding(self, text: str, dimension: int = 1536) -> List[float]:
-        """Generate consistent mock embedding based on text content"""
-        # Use text hash for consistency
-        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-        random.seed(seed)
-        
-        # Generate random embedding
-        embedding = [random.gauss(0, 1) for _ in range(dimension)]
-        
-        # Normalize to unit vector
-        norm = math.sqrt(sum(x * x for x in embedding))
-        if norm > 0:
-            embedding = [x / norm for x in embedding]
-        
-        return embedding
+        """Generate consistent mock embedding based on text content (same vector the routing search queries with)"""
+        return IntelligentSimilaritySearch.generate_mock_embedding(text, dimension).tolist()
     
     async def process_enhanced_tickets(self, tickets_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Process tickets with enhanced routing intelligence"""
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Optimize the cached-route thresholds from labelled routing decisions
+
+Sweeps confidence_threshold × accuracy_threshold over a grid using routing
+decision logs labelled with each ticket's actual department, prints the
+Pareto frontier of cache-hit rate against routing accuracy (with expected
+LLM calls and latency saved) and, with --write, stores the chosen pair as
+routing_thresholds.cached_route_similarity / cached_route_accuracy in the
+business rules (read by ConfidenceBasedRouter.from_business_rules).
+
+The chosen pair is the frontier point with the highest cache-hit rate whose
+accuracy is at least --min-accuracy (default: the accuracy of the currently
+configured thresholds, i.e. no accuracy regression).
+
+Usage:
+    python scripts/optimize_routing_thresholds.py LOG [LOG ...] --labels labels.csv
+        [--min-accuracy A] [--grid-step S] [--config config/business_rules.json]
+        [--write] [--json]
+
+labels.csv needs ticket_id and actual_department columns; log entries can
+instead carry an actual_department field.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.business_rules_config import BusinessRulesConfig  # noqa: E402
+from src.models.threshold_optimizer import (LabelledDecisions, choose_thresholds, evaluate_thresholds,  # noqa: E402
+                                            iter_routing_log, records_from_routing_log, sweep_thresholds,
+                                            write_thresholds)
+
+
+def load_labels(path: Path) -> dict:
+    """ticket_id → actual_department from a CSV file."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        return {row["ticket_id"]: row["actual_department"] for row in csv.DictReader(handle)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("logs", nargs="+", type=Path, help="Routing decision logs (.jsonl or .jsonl.gz)")
+    parser.add_argument("--labels", type=Path, help="CSV with ticket_id,actual_department")
+    parser.add_argument("--min-accuracy", type=float, default=None)
+    parser.add_argument("--grid-step", type=float, default=0.01)
+    parser.add_argument("--config", type=Path, default=project_root / "config" / "business_rules.json")
+    parser.add_argument("--write", action="store_true", help="Write the chosen thresholds to --config")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    labels = load_labels(args.labels) if args.labels else {}
+    data = LabelledDecisions.from_records(records_from_routing_log(iter_routing_log(args.logs), labels))
+    if len(data) == 0:
+        raise SystemExit(f"No labelled decisions with a top-match department ({data.skipped} skipped)")
+
+    config = BusinessRulesConfig(config_path=args.config.parent)
+    current = evaluate_thresholds(data, *config.get_cached_route_thresholds())
+    min_accuracy = args.min_accuracy if args.min_accuracy is not None else current["accuracy"]
+
+    grid = np.round(np.arange(0.50, 1.0 + 1e-9, args.grid_step), 4)
+    sweep = sweep_thresholds(data, np.union1d(grid, current["confidence_threshold"]),
+                             np.union1d(grid, current["accuracy_threshold"]))
+    frontier = sweep.pareto_frontier()
+    chosen = choose_thresholds(sweep, min_accuracy)
+
+    if args.write and chosen is not None:
+        write_thresholds(args.config, chosen["confidence_threshold"], chosen["accuracy_threshold"])
+
+    if args.json:
+        print(json.dumps({"decisions": len(data), "skipped": data.skipped, "min_accuracy": min_accuracy,
+                          "current": current, "chosen": chosen, "frontier": frontier}, indent=2))
+        return
+
+    print(f"🎯 Cached-route threshold sweep ({len(data):,} labelled decisions, {data.skipped:,} skipped, "
+          f"{sweep.cache_hits.size:,} grid points)")
+    print("=" * 78)
+    print(f"{'confidence':>10} {'accuracy':>9} {'hit rate':>9} {'routing acc':>12} "
+          f"{'LLM calls':>10} {'saved':>7} {'latency saved':>14}")
+    for point in frontier:
+        print(f"{point['confidence_threshold']:>10g} {point['accuracy_threshold']:>9g} "
+              f"{point['cache_hit_rate']:>9.1%} {point['accuracy']:>12.1%} {point['expected_llm_calls']:>10,} "
+              f"{point['llm_calls_saved']:>7,} {point['latency_saved_ms'] / 1000:>12,.1f} s")
+    print()
+    print(f"Current {current['confidence_threshold']:g}/{current['accuracy_threshold']:g}: "
+          f"hit rate {current['cache_hit_rate']:.1%}, accuracy {current['accuracy']:.1%}")
+    if chosen is None:
+        print(f"No thresholds reach {min_accuracy:.1%} accuracy; configuration unchanged")
+        return
+    print(f"Chosen  {chosen['confidence_threshold']:g}/{chosen['accuracy_threshold']:g}: "
+          f"hit rate {chosen['cache_hit_rate']:.1%}, accuracy {chosen['accuracy']:.1%}, "
+          f"{chosen['llm_calls_saved'] - current['llm_calls_saved']:+,} LLM calls saved vs current")
+    print(f"Written to {args.config}" if args.write else "Dry run (use --write to update the configuration)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,13 @@ Production-ready API for call centre ticket classification
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+import json
 import logging
 import time
 import uuid
 from datetime import datetime
+from pathlib import Path
 import sys
 import os
 
@@ -18,6 +20,14 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models.ticket_classifier import TicketClassificationPipeline
+from models.business_rules_config import (
+    DEFAULT_RULES_SHORT_CIRCUIT_CONFIDENCE,
+    BusinessRulesConfig,
+    get_config_cache_stats,
+    preload_region_configs
+)
+from models.rules_engine import RuleMatch, TelcoRulesEngine
+from models.request_deadline import STAGE_SKIP, RequestDeadline, StageCostModel
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -38,6 +48,54 @@ app = FastAPI(
 model_pipeline: Optional[TicketClassificationPipeline] = None
 model_loaded_at: Optional[datetime] = None
 
+# Rules engine short-circuit stage (runs before the ML model)
+rules_engine: Optional[TelcoRulesEngine] = None
+rules_short_circuit_confidence: float = DEFAULT_RULES_SHORT_CIRCUIT_CONFIDENCE
+
+# Per-request SLA budget (processing_time_sla.ai_classification_minutes) and expected stage costs
+DEFAULT_CLASSIFICATION_BUDGET_SECONDS = 5 * 60.0
+classification_budget_seconds: float = DEFAULT_CLASSIFICATION_BUDGET_SECONDS
+stage_costs = StageCostModel()
+
+# Routing pipeline config; its rules stage label map is the rules engine -> API category mapping
+ROUTING_PIPELINE_CONFIG = Path(__file__).parent.parent.parent / "config" / "routing_pipeline.json"
+
+def load_rule_category_map(path: Path = ROUTING_PIPELINE_CONFIG) -> Dict[str, str]:
+    """
+    Read the rules stage's label map from the routing pipeline config, so the
+    API and RoutingOrchestrator map rule matches onto the same categories.
+    
+    Returns:
+        Rule id (rules whose category differs from their department's) or
+        department -> API category (see /categories)
+    
+    Raises:
+        ValueError: The config has no rules stage, or its label map is missing
+    """
+    with open(path, encoding="utf-8") as handle:
+        config = json.load(handle)
+    rules_stage = next((stage for stage in config.get("stages", []) if stage.get("type") == "rules"), None)
+    if rules_stage is None:
+        raise ValueError(f"Routing pipeline config {path} has no rules stage")
+    label_map = rules_stage.get("label_map")
+    if label_map not in config.get("label_maps", {}):
+        raise ValueError(f"Unknown label map '{label_map}' for the rules stage in {path}")
+    return dict(config["label_maps"][label_map])
+
+# Loaded by the startup hook (or on first use), not at import
+rule_category_map: Optional[Dict[str, str]] = None
+
+def get_rule_category_map() -> Dict[str, str]:
+    """Return the rules engine -> API category map, loading it on first use."""
+    global rule_category_map
+    
+    if rule_category_map is None:
+        rule_category_map = load_rule_category_map()
+    return rule_category_map
+
+DECISION_STAGE_RULES = "rules"
+DECISION_STAGE_ML = "ml"
+
 # Request/Response Models
 class TicketClassificationRequest(BaseModel):
     """Request model for single ticket classification."""
@@ -82,6 +140,22 @@ class ClassificationResponse(BaseModel):
     timestamp: datetime = Field(
         description="Prediction timestamp"
     )
+    decision_stage: str = Field(
+        DECISION_STAGE_ML,
+        description="Stage that decided the classification ('rules' or 'ml')"
+    )
+    rule_id: Optional[str] = Field(
+        None,
+        description="Matched routing rule when decided by the rules stage"
+    )
+    department: Optional[str] = Field(
+        None,
+        description="Routing department from the matched rule"
+    )
+    degraded_stages: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Stages skipped or degraded to stay within the SLA budget, with reasons"
+    )
 
 class BatchClassificationResponse(BaseModel):
     """Response model for batch classification."""
@@ -103,11 +177,145 @@ class MetricsResponse(BaseModel):
     average_response_time_ms: float
     model_accuracy: Optional[float]
     uptime_seconds: float
+    config_cache: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Business rules config loads vs cache hits"
+    )
+    decision_stages: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Rules short-circuit rate and latency per classification stage"
+    )
+
+class DecisionStageMetrics:
+    """
+    Track which stage decided each ticket and how long each stage took.
+    
+    The rules pass runs for every ticket; the ML stage only sees tickets the
+    rules did not decide. Latency saved is estimated as the average ML cost
+    per ticket multiplied by the number of short-circuited tickets, less the
+    rules pass overhead paid by tickets that still reached the model.
+    """
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Clear all counters."""
+        self.rules_evaluated = 0
+        self.rules_time_ms = 0.0
+        self.rules_decided = 0
+        self.ml_decided = 0
+        self.ml_time_ms = 0.0
+    
+    def record_rules_pass(self, tickets: int, decided: int, elapsed_ms: float):
+        """Record a rules pass over `tickets`, of which `decided` short-circuited."""
+        self.rules_evaluated += tickets
+        self.rules_decided += decided
+        self.rules_time_ms += elapsed_ms
+    
+    def record_ml(self, tickets: int, elapsed_ms: float):
+        """Record an ML stage call over `tickets`."""
+        self.ml_decided += tickets
+        self.ml_time_ms += elapsed_ms
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """Short-circuit rate, per-stage latency and estimated latency saved."""
+        decided = self.rules_decided + self.ml_decided
+        rules_avg_ms = self.rules_time_ms / self.rules_evaluated if self.rules_evaluated else 0.0
+        ml_avg_ms = self.ml_time_ms / self.ml_decided if self.ml_decided else 0.0
+        saved_ms = self.rules_decided * ml_avg_ms - self.ml_decided * rules_avg_ms
+        
+        return {
+            "short_circuit_rate": self.rules_decided / decided if decided else 0.0,
+            "estimated_latency_saved_ms": saved_ms,
+            "stages": {
+                DECISION_STAGE_RULES: {
+                    "tickets_evaluated": self.rules_evaluated,
+                    "tickets_decided": self.rules_decided,
+                    "total_time_ms": self.rules_time_ms,
+                    "avg_time_per_ticket_ms": rules_avg_ms
+                },
+                DECISION_STAGE_ML: {
+                    "tickets_evaluated": self.ml_decided,
+                    "tickets_decided": self.ml_decided,
+                    "total_time_ms": self.ml_time_ms,
+                    "avg_time_per_ticket_ms": ml_avg_ms
+                }
+            }
+        }
 
 # Global metrics tracking
 request_count = 0
 total_response_time = 0.0
 start_time = time.time()
+stage_metrics = DecisionStageMetrics()
+
+def get_rules_engine() -> TelcoRulesEngine:
+    """
+    Return the shared rules engine, creating it on first use.
+    
+    Uses BusinessRulesConfig for thresholds when it loads, falling back to
+    the engine's hard-coded defaults otherwise.
+    """
+    global rules_engine, rules_short_circuit_confidence, classification_budget_seconds
+    
+    if rules_engine is None:
+        business_config = None
+        try:
+            business_config = BusinessRulesConfig()
+        except Exception as e:
+            logger.warning(f"⚠️ Business rules config unavailable, rules engine using defaults: {str(e)}")
+        
+        rules_engine = TelcoRulesEngine(business_config=business_config)
+        rules_engine.compile_rules()
+        if business_config is not None:
+            rules_short_circuit_confidence = business_config.get_rules_short_circuit_confidence()
+            classification_budget_seconds = business_config.get_processing_time_sla("ai_classification") * 60.0
+        logger.info(
+            f"⚡ Rules short-circuit stage ready ({len(rules_engine.rules)} rules, "
+            f"threshold {rules_short_circuit_confidence:.2f})"
+        )
+    
+    return rules_engine
+
+def rules_pass_match(ticket_text: str) -> Optional[RuleMatch]:
+    """
+    Run the rules pass for one ticket.
+    
+    Returns:
+        Best rule match that maps onto an API category, None otherwise. Whether
+        it short-circuits the ML model is up to the caller (see
+        is_short_circuit); below the threshold it is still the fallback when the
+        SLA budget has no room left for the model.
+    """
+    match = get_rules_engine().evaluate_ticket(ticket_text)
+    if match is None or rule_category(match) is None:
+        return None
+    return match
+
+def is_short_circuit(match: Optional[RuleMatch]) -> bool:
+    """Whether a rules pass match is confident enough to skip the ML model."""
+    return match is not None and match.confidence >= rules_short_circuit_confidence
+
+def rule_category(match: RuleMatch) -> Optional[str]:
+    """Map a rule match onto an API category."""
+    category_map = get_rule_category_map()
+    return category_map.get(match.rule_id, category_map.get(match.department))
+
+def rules_response(ticket_id: str, match: RuleMatch, processing_time_ms: float,
+                   degraded_stages: Optional[List[Dict[str, Any]]] = None) -> ClassificationResponse:
+    """Build a classification response decided by the rules stage."""
+    return ClassificationResponse(
+        ticket_id=ticket_id,
+        predicted_category=rule_category(match),
+        confidence=match.confidence,
+        processing_time_ms=processing_time_ms,
+        timestamp=datetime.now(),
+        decision_stage=DECISION_STAGE_RULES,
+        rule_id=match.rule_id,
+        department=match.department,
+        degraded_stages=list(degraded_stages or [])
+    )
 
 @app.on_event("startup")
 async def load_model():
@@ -116,6 +324,21 @@ async def load_model():
     
     logger.info("🚀 Starting Telco Ticket Classification API...")
     
+    # Warm the business rules config cache for every configured region
+    try:
+        preload_region_configs()
+    except Exception as e:
+        logger.warning(f"⚠️ Business rules config preload failed: {str(e)}")
+    
+    # Rule -> category mapping; a broken routing pipeline config fails startup
+    get_rule_category_map()
+    
+    # Compile the rules short-circuit stage before the first request
+    try:
+        get_rules_engine()
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize rules engine: {str(e)}")
+    
     try:
         # Initialize model pipeline
         model_pipeline = TicketClassificationPipeline()
@@ -170,12 +393,37 @@ async def get_metrics():
         total_requests=request_count,
         average_response_time_ms=avg_response_time,
         model_accuracy=None,  # Would be populated from model monitoring
-        uptime_seconds=uptime
+        uptime_seconds=uptime,
+        config_cache=get_config_cache_stats(),
+        decision_stages={**stage_metrics.get_summary(), "expected_stage_ms": stage_costs.get_stats()}
     )
 
 @app.post("/classify", response_model=ClassificationResponse)
 async def classify_ticket(request: TicketClassificationRequest):
-    """Classify a single ticket."""
+    """Classify a single ticket (rules short-circuit first, then the ML model)."""
+    # Record processing start time
+    start_time_proc = time.time()
+    
+    # Generate ticket ID if not provided
+    ticket_id = request.ticket_id or str(uuid.uuid4())
+    deadline = RequestDeadline(classification_budget_seconds, stage_costs)
+    
+    # Rules pass: high-confidence matches skip the model entirely
+    with deadline.measure("rules"):
+        match = rules_pass_match(request.ticket_text)
+    rules_time = (time.time() - start_time_proc) * 1000
+    decided = is_short_circuit(match)
+    stage_metrics.record_rules_pass(1, 1 if decided else 0, rules_time)
+    
+    if decided:
+        logger.info(f"⚡ Rules decided ticket {ticket_id}: {match.rule_id} (confidence: {match.confidence:.3f})")
+        return rules_response(ticket_id, match, rules_time)
+    
+    # SLA budget nearly spent: fall back to the below-threshold rule match instead of the model
+    if deadline.plan("ml", can_skip=match is not None) == STAGE_SKIP:
+        logger.warning(f"⏱️ SLA budget spent for ticket {ticket_id}, using rule {match.rule_id}")
+        return rules_response(ticket_id, match, (time.time() - start_time_proc) * 1000, deadline.skips)
+    
     if model_pipeline is None:
         raise HTTPException(
             status_code=503, 
@@ -183,20 +431,17 @@ async def classify_ticket(request: TicketClassificationRequest):
         )
     
     try:
-        # Record processing start time
-        start_time_proc = time.time()
-        
         # Make prediction
-        prediction = model_pipeline.predict([request.ticket_text])[0]
-        probabilities = model_pipeline.predict_proba([request.ticket_text])[0]
+        start_time_ml = time.time()
+        with deadline.measure("ml"):
+            prediction = model_pipeline.predict([request.ticket_text])[0]
+            probabilities = model_pipeline.predict_proba([request.ticket_text])[0]
         confidence = float(max(probabilities))
+        stage_metrics.record_ml(1, (time.time() - start_time_ml) * 1000)
         
         # Calculate processing time
         processing_time = (time.time() - start_time_proc) * 1000
         
-        # Generate ticket ID if not provided
-        ticket_id = request.ticket_id or str(uuid.uuid4())
-        
         logger.info(f"📊 Classified ticket {ticket_id}: {prediction} (confidence: {confidence:.3f})")
         
         return ClassificationResponse(
@@ -204,7 +449,8 @@ async def classify_ticket(request: TicketClassificationRequest):
             predicted_category=prediction,
             confidence=confidence,
             processing_time_ms=processing_time,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            degraded_stages=deadline.skips
         )
         
     except Exception as e:
@@ -213,13 +459,7 @@ async def classify_ticket(request: TicketClassificationRequest):
 
 @app.post("/classify/batch", response_model=BatchClassificationResponse)
 async def classify_tickets_batch(request: BatchClassificationRequest):
-    """Classify multiple tickets in batch."""
-    if model_pipeline is None:
-        raise HTTPException(
-            status_code=503, 
-            detail="Model not loaded. Please ensure the model is trained and available."
-        )
-    
+    """Classify multiple tickets in batch (only rules misses reach the ML model)."""
     if len(request.tickets) > 100:
         raise HTTPException(
             status_code=400,
@@ -228,13 +468,40 @@ async def classify_tickets_batch(request: BatchClassificationRequest):
     
     try:
         start_time_batch = time.time()
+        deadline = RequestDeadline(classification_budget_seconds, stage_costs)
+        
+        # Rules pass over every ticket
+        with deadline.measure("rules"):
+            matches = [rules_pass_match(ticket.ticket_text) for ticket in request.tickets]
+        remaining = [i for i, match in enumerate(matches) if not is_short_circuit(match)]
+        stage_metrics.record_rules_pass(
+            len(request.tickets),
+            len(request.tickets) - len(remaining),
+            (time.time() - start_time_batch) * 1000
+        )
         
-        # Extract text from all tickets
-        ticket_texts = [ticket.ticket_text for ticket in request.tickets]
+        # SLA budget nearly spent: the remainder falls back to its below-threshold
+        # rule matches, if every ticket in it has one
+        fallback = all(matches[i] is not None for i in remaining)
+        if remaining and deadline.plan("ml", can_skip=fallback) == STAGE_SKIP:
+            logger.warning(f"⏱️ SLA budget spent for batch, {len(remaining)} tickets fall back to rules")
+            remaining = []
         
-        # Batch prediction
-        predictions = model_pipeline.predict(ticket_texts)
-        probabilities = model_pipeline.predict_proba(ticket_texts)
+        # Only the undecided remainder goes to the model, in one call
+        predictions, probabilities = {}, {}
+        if remaining:
+            if model_pipeline is None:
+                raise HTTPException(
+                    status_code=503, 
+                    detail="Model not loaded. Please ensure the model is trained and available."
+                )
+            
+            start_time_ml = time.time()
+            ticket_texts = [request.tickets[i].ticket_text for i in remaining]
+            with deadline.measure("ml"):
+                predictions = dict(zip(remaining, model_pipeline.predict(ticket_texts), strict=True))
+                probabilities = dict(zip(remaining, model_pipeline.predict_proba(ticket_texts), strict=True))
+            stage_metrics.record_ml(len(remaining), (time.time() - start_time_ml) * 1000)
         
         # Process results
         results = []
@@ -243,15 +510,21 @@ async def classify_tickets_batch(request: BatchClassificationRequest):
         for i, ticket_request in enumerate(request.tickets):
             try:
                 ticket_id = ticket_request.ticket_id or str(uuid.uuid4())
-                confidence = float(max(probabilities[i]))
                 
-                result = ClassificationResponse(
-                    ticket_id=ticket_id,
-                    predicted_category=predictions[i],
-                    confidence=confidence,
-                    processing_time_ms=0,  # Individual timing not tracked in batch
-                    timestamp=datetime.now()
-                )
+                if i in predictions:
+                    result = ClassificationResponse(
+                        ticket_id=ticket_id,
+                        predicted_category=predictions[i],
+                        confidence=float(max(probabilities[i])),
+                        processing_time_ms=0,  # Individual timing not tracked in batch
+                        timestamp=datetime.now(),
+                        degraded_stages=deadline.skips
+                    )
+                elif is_short_circuit(matches[i]):
+                    # Individual timing not tracked in batch
+                    result = rules_response(ticket_id, matches[i], 0)
+                else:
+                    result = rules_response(ticket_id, matches[i], 0, deadline.skips)
                 results.append(result)
                 successful_count += 1
                 
@@ -261,7 +534,10 @@ async def classify_tickets_batch(request: BatchClassificationRequest):
         
         total_processing_time = (time.time() - start_time_batch) * 1000
         
-        logger.info(f"📊 Batch classified {successful_count}/{len(request.tickets)} tickets")
+        logger.info(
+            f"📊 Batch classified {successful_count}/{len(request.tickets)} tickets "
+            f"({len(request.tickets) - len(remaining)} by rules, {len(remaining)} by model)"
+        )
         
         return BatchClassificationResponse(
             results=results,
@@ -270,6 +546,8 @@ async def classify_tickets_batch(request: BatchClassificationRequest):
             total_processing_time_ms=total_processing_time
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Batch classification error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch classification failed: {str(e)}")
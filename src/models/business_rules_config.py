@@ -23,12 +23,21 @@ Usage:
     # Get configuration values
     confidence = config.get_confidence_threshold("credit_management")
     sla_hours = config.get_sla_hours("R001_DISPUTE_EXPLICIT")
+
+Caching:
+    Merged configurations are cached process-wide per
+    (config_path, environment, region) and invalidated when any contributing
+    JSON file changes (mtime/size). Use preload_region_configs() at startup and
+    get_config_cache_stats() to monitor loads versus cache hits.
 """
 
 import json
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple, Union
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -47,6 +56,143 @@ class ThresholdValidationError(Exception):
                 f"(allowed range: {self.min_value} - {self.max_value})")
 
 
+DEFAULT_RULES_SHORT_CIRCUIT_CONFIDENCE = 0.90
+
+# routing_thresholds keys ending in _confidence that configure pipeline stages, not departments
+PIPELINE_CONFIDENCE_KEYS = ("rules_short_circuit_confidence",)
+
+
+def _strip_suffix_map(
+    section: Mapping[str, Any],
+    suffix: str,
+    cast: type
+) -> Mapping[str, Any]:
+    """
+    Flatten a config section into a read-only lookup keyed by stripped suffix.
+
+    e.g. {"credit_management_confidence": 0.95} → {"credit_management": 0.95}
+    Comment keys and non-numeric values are skipped.
+    """
+    flat = {}
+    for key, value in section.items():
+        if key.startswith("_") or not key.endswith(suffix):
+            continue
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        flat[key[:-len(suffix)]] = cast(value)
+    return MappingProxyType(flat)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledBusinessRules:
+    """
+    Frozen, flat lookup tables compiled from the merged configuration.
+
+    Built once at load time so that the public getters (and the rules engine)
+    resolve thresholds with a single dict lookup instead of re-walking the
+    nested configuration and formatting keys on every call.
+    """
+    # routing_thresholds
+    department_confidence: Mapping[str, float]
+    standard_confidence: float
+    hitl_threshold: float
+    cached_route_similarity: float
+    cached_route_accuracy: float
+    rules_short_circuit_confidence: float
+
+    # department_sla_hours (rule_id → hours)
+    rule_sla_hours: Mapping[str, int]
+    default_sla_hours: int
+
+    # processing_time_sla (stage → minutes), escalation (level → days)
+    processing_minutes: Mapping[str, int]
+    escalation_age_days: Mapping[str, int]
+
+    # priority_sla_response, accuracy_targets, currency_settings
+    priority_sla: Mapping[str, Dict[str, Any]]
+    accuracy_targets: Mapping[str, float]
+    region_currencies: Mapping[str, Dict[str, str]]
+    default_currency: Dict[str, str]
+
+    # feature_flags (raw values plus the well-known flags as attributes)
+    feature_flags: Mapping[str, Any]
+    use_config_driven_thresholds: bool
+    enable_multi_region_support: bool
+    enable_dynamic_sla_adjustment: bool
+    enable_ab_testing: bool
+    log_threshold_violations: bool
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "CompiledBusinessRules":
+        """
+        Compile a merged configuration dictionary into flat lookup tables.
+
+        Args:
+            config: Merged (base → environment → region) configuration
+
+        Returns:
+            Frozen CompiledBusinessRules instance
+        """
+        thresholds = config.get("routing_thresholds", {})
+        sla_hours = config.get("department_sla_hours", {})
+        processing = config.get("processing_time_sla", {})
+        escalation = config.get("escalation_thresholds", {})
+        currency = config.get("currency_settings", {})
+        features = config.get("feature_flags", {})
+
+        rule_sla_hours = {
+            key: int(value) for key, value in sla_hours.items()
+            if not key.startswith("_") and isinstance(value, (int, float))
+        }
+
+        # "total" is an alias for total_routing_minutes, never total_minutes
+        processing_minutes = dict(_strip_suffix_map(processing, "_minutes", int))
+        processing_minutes.pop("total", None)
+        if "total_routing" in processing_minutes:
+            processing_minutes["total"] = processing_minutes["total_routing"]
+
+        # Pipeline knobs share the *_confidence naming but are not departments
+        department_confidence = dict(_strip_suffix_map(thresholds, "_confidence", float))
+        for key in PIPELINE_CONFIDENCE_KEYS:
+            department_confidence.pop(key[:-len("_confidence")], None)
+
+        return cls(
+            department_confidence=MappingProxyType(department_confidence),
+            standard_confidence=float(thresholds.get("standard_confidence", 0.80)),
+            hitl_threshold=float(thresholds.get("hitl_trigger_threshold", 0.80)),
+            cached_route_similarity=float(thresholds.get("cached_route_similarity", 0.92)),
+            cached_route_accuracy=float(thresholds.get("cached_route_accuracy", 0.85)),
+            rules_short_circuit_confidence=float(thresholds.get("rules_short_circuit_confidence",
+                                                                DEFAULT_RULES_SHORT_CIRCUIT_CONFIDENCE)),
+            rule_sla_hours=MappingProxyType(rule_sla_hours),
+            default_sla_hours=int(sla_hours.get("default_sla_hours", 24)),
+            processing_minutes=MappingProxyType(processing_minutes),
+            escalation_age_days=_strip_suffix_map(escalation, "_age_days", int),
+            priority_sla=MappingProxyType({
+                key: value for key, value in config.get("priority_sla_response", {}).items()
+                if not key.startswith("_")
+            }),
+            accuracy_targets=MappingProxyType({
+                key: float(value) for key, value in config.get("accuracy_targets", {}).items()
+                if not key.startswith("_") and isinstance(value, (int, float))
+            }),
+            region_currencies=MappingProxyType(dict(currency.get("region_currencies", {}))),
+            default_currency={
+                "currency": currency.get("default_currency", "USD"),
+                "locale": currency.get("default_locale", "en_US"),
+                "symbol": "$"
+            },
+            feature_flags=MappingProxyType({
+                key: value for key, value in features.items() if not key.startswith("_")
+            }),
+            use_config_driven_thresholds=bool(features.get("use_config_driven_thresholds", False)),
+            enable_multi_region_support=bool(features.get("enable_multi_region_support", False)),
+            enable_dynamic_sla_adjustment=bool(features.get("enable_dynamic_sla_adjustment", False)),
+            enable_ab_testing=bool(features.get("enable_ab_testing", False)),
+            log_threshold_violations=bool(features.get("log_threshold_violations", False)),
+        )
+
+
 class BusinessRulesConfig:
     """
     Configuration manager for business rules thresholds and policies.
@@ -64,7 +210,8 @@ class BusinessRulesConfig:
         self,
         environment: Optional[str] = None,
         region: Optional[str] = None,
-        config_path: Optional[Path] = None
+        config_path: Optional[Path] = None,
+        use_cache: bool = True
     ):
         """
         Initialize business rules configuration.
@@ -73,22 +220,52 @@ class BusinessRulesConfig:
             environment: Environment name (dev/test/prod). None = production
             region: Region code (za/au/us/uk). None = default
             config_path: Custom config directory path. None = default
+            use_cache: Reuse the process-wide merged config when the source
+                       files are unchanged. False = always re-read from disk
         """
         self.environment = environment or "prod"
         self.region = region
         self.config_path = config_path or self.DEFAULT_CONFIG_PATH
         
-        # Load hierarchical configuration
-        self.config = self._load_hierarchical_config()
+        # Load, validate and compile (or reuse the cached result)
+        if use_cache:
+            self.config, self.compiled = _config_cache.get_or_load(self)
+        else:
+            self.config, self.compiled = self._load_validated_config()
         
-        # Validate configuration
-        self._validate_config()
-        
-        logger.info(
+        logger.debug(
             f"BusinessRulesConfig initialized: "
             f"env={self.environment}, region={self.region}"
         )
     
+    def _load_validated_config(self) -> Tuple[Dict[str, Any], CompiledBusinessRules]:
+        """
+        Load, validate and compile the hierarchical configuration from disk.
+        
+        Returns:
+            Tuple of (merged configuration, compiled lookup tables)
+            
+        Raises:
+            ThresholdValidationError: If any threshold violates validation rules
+        """
+        self.config = self._load_hierarchical_config()
+        self._validate_config()
+        return self.config, CompiledBusinessRules.from_config(self.config)
+    
+    def _source_files(self) -> List[Path]:
+        """
+        List the files that contribute to this configuration, in merge order.
+        
+        Returns:
+            Base, environment (if not prod) and region (if set) file paths
+        """
+        files = [self.config_path / self.DEFAULT_CONFIG_FILE]
+        if self.environment != "prod":
+            files.append(self.config_path / f"business_rules.{self.environment}.json")
+        if self.region:
+            files.append(self.config_path / f"regions/{self.region}.json")
+        return files
+    
     def _load_hierarchical_config(self) -> Dict[str, Any]:
         """
         Load configuration with hierarchical override support.
@@ -303,15 +480,10 @@ class BusinessRulesConfig:
         Returns:
             Confidence threshold (0.0 - 1.0)
         """
-        thresholds = self.config.get("routing_thresholds", {})
-        
+        compiled = self.compiled
         if department:
-            key = f"{department}_confidence"
-            if key in thresholds:
-                return float(thresholds[key])
-        
-        # Fallback to standard confidence
-        return float(thresholds.get("standard_confidence", 0.80))
+            return compiled.department_confidence.get(department, compiled.standard_confidence)
+        return compiled.standard_confidence
     
     def get_sla_hours(self, rule_id: str) -> int:
         """
@@ -323,8 +495,8 @@ class BusinessRulesConfig:
         Returns:
             SLA hours (integer)
         """
-        sla_config = self.config.get("department_sla_hours", {})
-        return int(sla_config.get(rule_id, sla_config.get("default_sla_hours", 24)))
+        compiled = self.compiled
+        return compiled.rule_sla_hours.get(rule_id, compiled.default_sla_hours)
     
     def get_processing_time_sla(self, stage: str = "total") -> int:
         """
@@ -336,9 +508,7 @@ class BusinessRulesConfig:
         Returns:
             SLA time in minutes
         """
-        sla_config = self.config.get("processing_time_sla", {})
-        key = f"{stage}_routing_minutes" if stage == "total" else f"{stage}_minutes"
-        return int(sla_config.get(key, 15))
+        return self.compiled.processing_minutes.get(stage, 15)
     
     def get_hitl_threshold(self) -> float:
         """
@@ -347,8 +517,26 @@ class BusinessRulesConfig:
         Returns:
             HITL confidence threshold (0.0 - 1.0)
         """
-        thresholds = self.config.get("routing_thresholds", {})
-        return float(thresholds.get("hitl_trigger_threshold", 0.80))
+        return self.compiled.hitl_threshold
+    
+    def get_cached_route_thresholds(self) -> Tuple[float, float]:
+        """
+        Get the thresholds for reusing a similar ticket's department without an LLM call.
+        
+        Returns:
+            (minimum top-match similarity, minimum historical accuracy)
+        """
+        compiled = self.compiled
+        return compiled.cached_route_similarity, compiled.cached_route_accuracy
+    
+    def get_rules_short_circuit_confidence(self) -> float:
+        """
+        Get the minimum rule confidence that decides a ticket without the ML model.
+        
+        Returns:
+            Short-circuit confidence threshold (0.0 - 1.0)
+        """
+        return self.compiled.rules_short_circuit_confidence
     
     def get_escalation_threshold(self, level: str) -> int:
         """
@@ -360,9 +548,7 @@ class BusinessRulesConfig:
         Returns:
             Age threshold in days
         """
-        escalation = self.config.get("escalation_thresholds", {})
-        key = f"{level}_age_days"
-        return int(escalation.get(key, 7))
+        return self.compiled.escalation_age_days.get(level, 7)
     
     def get_priority_sla(self, priority: str) -> Dict[str, Any]:
         """
@@ -374,8 +560,7 @@ class BusinessRulesConfig:
         Returns:
             Dictionary with response_hours and escalation_warning
         """
-        priority_config = self.config.get("priority_sla_response", {})
-        return priority_config.get(priority, {
+        return self.compiled.priority_sla.get(priority, {
             "response_hours": 24,
             "escalation_warning_hours": 18
         })
@@ -390,17 +575,12 @@ class BusinessRulesConfig:
         Returns:
             Dictionary with currency, locale, symbol
         """
-        currency_config = self.config.get("currency_settings", {})
-        
-        if region and region in currency_config.get("region_currencies", {}):
-            return currency_config["region_currencies"][region]
+        compiled = self.compiled
+        if region and region in compiled.region_currencies:
+            return compiled.region_currencies[region]
         
         # Return default
-        return {
-            "currency": currency_config.get("default_currency", "USD"),
-            "locale": currency_config.get("default_locale", "en_US"),
-            "symbol": "$"
-        }
+        return dict(compiled.default_currency)
     
     def is_feature_enabled(self, feature_name: str) -> bool:
         """
@@ -412,8 +592,7 @@ class BusinessRulesConfig:
         Returns:
             True if feature is enabled
         """
-        features = self.config.get("feature_flags", {})
-        return features.get(feature_name, False)
+        return self.compiled.feature_flags.get(feature_name, False)
     
     def get_accuracy_target(self, metric: str) -> float:
         """
@@ -425,8 +604,7 @@ class BusinessRulesConfig:
         Returns:
             Target accuracy (0.0 - 1.0)
         """
-        targets = self.config.get("accuracy_targets", {})
-        return float(targets.get(metric, 0.95))
+        return self.compiled.accuracy_targets.get(metric, 0.95)
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -445,6 +623,165 @@ class BusinessRulesConfig:
                 f"version={self.config.get('version', 'unknown')})")
 
 
+# ========== Process-wide Configuration Cache ==========
+
+@dataclass
+class _ConfigCacheEntry:
+    """Cached merged configuration with the file fingerprint it was built from."""
+    fingerprint: Tuple[Tuple[str, Optional[int], Optional[int]], ...]
+    config: Dict[str, Any]
+    compiled: CompiledBusinessRules
+    checked_at: float
+
+
+class BusinessRulesConfigCache:
+    """
+    Thread-safe cache of merged configurations keyed by
+    (config_path, environment, region).
+    
+    Entries are invalidated when the mtime or size of any contributing file
+    changes (including a file appearing or disappearing). Only successfully
+    validated configurations are cached.
+    """
+    
+    def __init__(self, revalidate_interval_seconds: float = 0.0):
+        """
+        Initialize the cache.
+        
+        Args:
+            revalidate_interval_seconds: Minimum time between file stat checks
+                                         for an entry. 0 = check on every lookup
+        """
+        self.revalidate_interval_seconds = revalidate_interval_seconds
+        self._entries: Dict[Tuple[str, str, Optional[str]], _ConfigCacheEntry] = {}
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "hits": 0, "invalidations": 0}
+    
+    @staticmethod
+    def _fingerprint(files: List[Path]) -> Tuple[Tuple[str, Optional[int], Optional[int]], ...]:
+        """Build a (path, mtime_ns, size) fingerprint for the source files."""
+        fingerprint = []
+        for file_path in files:
+            try:
+                stat = file_path.stat()
+                fingerprint.append((str(file_path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((str(file_path), None, None))
+        return tuple(fingerprint)
+    
+    def get_or_load(
+        self,
+        config: "BusinessRulesConfig"
+    ) -> Tuple[Dict[str, Any], CompiledBusinessRules]:
+        """
+        Return the cached merged configuration for config's key, loading on miss.
+        
+        Args:
+            config: Partially initialized BusinessRulesConfig (environment,
+                    region and config_path set)
+        
+        Returns:
+            Tuple of (merged configuration, compiled lookup tables)
+        """
+        key = (str(config.config_path), config.environment, config.region)
+        files = config._source_files()
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry.checked_at < self.revalidate_interval_seconds:
+                    self._stats["hits"] += 1
+                    return entry.config, entry.compiled
+                if self._fingerprint(files) == entry.fingerprint:
+                    entry.checked_at = now
+                    self._stats["hits"] += 1
+                    return entry.config, entry.compiled
+                self._stats["invalidations"] += 1
+                del self._entries[key]
+                logger.info(f"Config files changed, reloading: env={key[1]}, region={key[2]}")
+            
+            # Fingerprint before reading so a concurrent edit forces a reload
+            fingerprint = self._fingerprint(files)
+            merged, compiled = config._load_validated_config()
+            self._stats["loads"] += 1
+            self._entries[key] = _ConfigCacheEntry(
+                fingerprint=fingerprint,
+                config=merged,
+                compiled=compiled,
+                checked_at=now
+            )
+            return merged, compiled
+    
+    def clear(self) -> None:
+        """Drop all cached entries and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._stats = {"loads": 0, "hits": 0, "invalidations": 0}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with loads, hits, invalidations, entries and hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["loads"] + stats["hits"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_config_cache = BusinessRulesConfigCache()
+
+
+def get_config_cache_stats() -> Dict[str, Any]:
+    """Get process-wide config cache statistics (loads vs cache hits)."""
+    return _config_cache.get_stats()
+
+
+def clear_config_cache() -> None:
+    """Clear the process-wide config cache (e.g. in tests)."""
+    _config_cache.clear()
+
+
+def preload_region_configs(
+    regions: Optional[List[str]] = None,
+    environment: Optional[str] = None,
+    config_path: Optional[Path] = None
+) -> Dict[str, BusinessRulesConfig]:
+    """
+    Load and cache region configurations, typically at service startup.
+    
+    Args:
+        regions: Region codes to preload. None = every config/regions/*.json
+        environment: Environment name (dev/test/prod). None = production
+        config_path: Custom config directory path. None = default
+    
+    Returns:
+        Dictionary of region code → BusinessRulesConfig (None key = no region)
+    """
+    base_path = config_path or BusinessRulesConfig.DEFAULT_CONFIG_PATH
+    if regions is None:
+        regions = sorted(p.stem for p in (base_path / "regions").glob("*.json"))
+    
+    loaded = {None: BusinessRulesConfig(environment=environment, config_path=base_path)}
+    for region in regions:
+        try:
+            loaded[region] = BusinessRulesConfig(
+                environment=environment,
+                region=region,
+                config_path=base_path
+            )
+        except ThresholdValidationError as e:
+            logger.error(f"Failed to preload region config '{region}': {e}")
+    
+    logger.info(f"Preloaded {len(loaded)} business rules configs (regions: {regions})")
+    return loaded
+
+
 # ========== Convenience Factory Functions ==========
 
 def load_production_config() -> BusinessRulesConfig:
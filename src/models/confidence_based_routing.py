@@ -9,21 +9,29 @@ This system implements intelligent routing decisions that combine:
 
 Architecture:
 - ConfidenceRouter: Main orchestrator for routing decisions
-- AccuracyTracker: Historical accuracy metrics and caching
+- AccuracyTracker: Historical accuracy metrics (SQLite WAL store, read-through cache)
 - RoutingLogger: Structured logging for analytics and monitoring
 - PerformanceMonitor: Real-time metrics and dashboard data
+- DecisionCache: Exact-duplicate decision reuse (bounded LRU with TTL)
+- Single-flight coalescing: concurrent identical requests share one in-flight decision
 """
 
 import asyncio
 import json
 import logging
+import queue
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, UTC
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Any, Sequence
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import hashlib
 
+import numpy as np
+
 # Add project root to path for imports
 import sys
 import os
@@ -33,6 +41,11 @@ from src.models.rag_intelligent_routing import (
     RAGIntelligentRouting,
     IntelligentSimilaritySearch
 )
+from src.models.business_rules_config import BusinessRulesConfig
+from src.models.jsonl_writer import BufferedJsonlWriter
+from src.models.latency_metrics import LatencyRingBuffer, WindowedLatencyHistogram, prometheus_percentile_lines
+from src.models.minhash import minhash_bands, minhash_signature
+from src.models.request_deadline import (STAGE_DEGRADE, STAGE_SKIP, RequestDeadline, StageCostModel)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,7 +54,10 @@ logger = logging.getLogger(__name__)
 
 class RoutingMethod(Enum):
     """Different routing methods available"""
+    CENTROID = "centroid"                   # Department centroid match, no vector query
     CACHED_ROUTE = "cached_route"           # High-confidence cached classification
+    EXACT_CACHE = "exact_cache"             # Exact duplicate of a recently routed ticket
+    COALESCED = "coalesced"                 # Joined an identical/near-identical in-flight request
     RAG_LLM = "rag_llm"                    # RAG-enhanced LLM analysis
     FALLBACK = "fallback"                   # Emergency fallback classification
 
@@ -69,61 +85,632 @@ class RoutingDecision:
     similar_tickets_found: int
     confidence_threshold_met: bool
     accuracy_threshold_met: bool
+    
+    # Estimated tokens of the RAG prompt sent for this ticket (None when no LLM call was made)
+    prompt_tokens: Optional[int] = None
+    
+    # Department a cached route would have used (top match), kept for offline threshold tuning
+    top_match_department: Optional[str] = None
+    
+    # Stages degraded or skipped to stay within the SLA budget ({"stage", "action", "reason", "remaining_ms"})
+    degraded_stages: List[Dict[str, Any]] = field(default_factory=list)
 
 
-class AccuracyTracker:
+def ticket_fingerprint(ticket_text: str) -> str:
+    """Fingerprint of case- and whitespace-normalized ticket text."""
+    normalized = " ".join(ticket_text.lower().split())
+    return hashlib.md5(normalized.encode(), usedforsecurity=False).hexdigest()
+
+
+@dataclass(eq=False)
+class InFlightRoute:
+    """A routing request currently being computed that identical requests can await"""
+    fingerprint: str
+    signature: Optional[np.ndarray]
+    future: asyncio.Future
+
+
+class DecisionCache:
     """
-    Track and manage historical accuracy metrics for cached routing decisions.
+    Bounded LRU cache of routing decisions for exact duplicate tickets.
     
-    In production, this would integrate with PostgreSQL to store and retrieve
-    historical success rates per department, routing pattern, and time period.
+    Entries expire after `ttl_seconds`. The whole cache is dropped when the
+    caller's generation (accuracy stats version and thresholds) changes, so
+    a reused decision was always made under the current routing inputs.
     """
     
-    def __init__(self):
-        """Initialize accuracy tracking with mock data for demonstration"""
-        
-        # Mock historical accuracy data (in production: PostgreSQL queries)
-        self.department_accuracy = {
-            "technical_support_l1": {"total": 245, "correct": 201, "accuracy": 0.82},
-            "technical_support_l2": {"total": 156, "correct": 142, "accuracy": 0.91},
-            "billing_corrections": {"total": 189, "correct": 175, "accuracy": 0.93},
-            "account_security": {"total": 134, "correct": 119, "accuracy": 0.89},
-            "customer_feedback": {"total": 98, "correct": 87, "accuracy": 0.89},
-            "network_operations": {"total": 67, "correct": 58, "accuracy": 0.87}
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize decision cache.
+        
+        Args:
+            max_entries: Maximum cached decisions (least recently used evicted)
+            ttl_seconds: Seconds a decision stays reusable
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._generation: Optional[Hashable] = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+    
+    def validate(self, generation: Hashable) -> None:
+        """Drop all entries if the routing inputs changed since they were cached."""
+        if generation != self._generation:
+            if self._entries:
+                self.stats["invalidations"] += 1
+                self._entries.clear()
+            self._generation = generation
+    
+    def get(self, fingerprint: str) -> Optional["RoutingDecision"]:
+        """Return the cached decision for a fingerprint, or None if absent/expired."""
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        
+        decision, expires_at = entry
+        if self._clock() >= expires_at:
+            del self._entries[fingerprint]
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        
+        self._entries.move_to_end(fingerprint)
+        self.stats["hits"] += 1
+        return decision
+    
+    def put(self, fingerprint: str, decision: "RoutingDecision") -> None:
+        """Cache a decision, evicting the least recently used entry when full."""
+        if self.max_entries <= 0:
+            return
+        self._entries[fingerprint] = (decision, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def clear(self) -> None:
+        """Remove all cached decisions."""
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters, size and hit rate."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
         }
+
+
+@dataclass
+class CentroidMatch:
+    """Best department for a query under the department centroid model"""
+    department: str
+    similarity: float  # Cosine similarity to the department's closest prototype
+    margin: float      # Lead over the runner-up department's similarity
+    samples: int       # Historical embeddings behind the department's prototypes
+
+
+class DepartmentCentroids:
+    """
+    Per-department prototype embeddings for routing without a vector query.
+    
+    Each department keeps up to `prototypes_per_department` running-mean
+    prototypes of its historical embeddings (sequential spherical k-means: a
+    new embedding updates its nearest prototype, or seeds a new one while the
+    department has fewer). Normalized prototypes are rows of one float32
+    matrix, so a query is scored against every department with a single
+    matrix-vector product and each outcome updates one row in O(dimension).
+    """
+    
+    def __init__(self, dimension: int = 1536, prototypes_per_department: int = 1, min_samples: int = 5):
+        """
+        Initialize an empty centroid model.
+        
+        Args:
+            dimension: Embedding dimension
+            prototypes_per_department: Maximum prototypes kept per department
+            min_samples: Embeddings a department needs before it can be routed to
+        """
+        if prototypes_per_department < 1:
+            raise ValueError("prototypes_per_department must be at least 1")
+        self.dimension = dimension
+        self.prototypes_per_department = prototypes_per_department
+        self.min_samples = min_samples
+        self.departments: List[str] = []
+        self._department_index: Dict[str, int] = {}
+        self._department_rows: List[List[int]] = []
+        self._rows = 0
+        self._matrix = np.zeros((16, dimension), dtype=np.float32)  # Normalized prototypes
+        self._sums = np.zeros((16, dimension), dtype=np.float64)    # Unnormalized running sums
+        self._counts = np.zeros(16, dtype=np.int64)
+        self._row_department = np.zeros(16, dtype=np.int64)
+        self.version = 0
+        self.stats = {"queries": 0, "updates": 0}
+    
+    def __len__(self) -> int:
+        """Number of prototypes"""
+        return self._rows
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """(prototypes, dimension) float32 matrix of normalized prototypes"""
+        return self._matrix[:self._rows]
+    
+    def fit(self, embeddings: np.ndarray, departments: Sequence[str]) -> None:
+        """
+        Add many historical embeddings at once.
         
-        # Pattern-based accuracy (regex/keyword patterns)
-        self.pattern_accuracy = {
-            "billing_refund": {"accuracy": 0.94, "sample_size": 78},
-            "login_security": {"accuracy": 0.91, "sample_size": 45},
-            "network_outage": {"accuracy": 0.88, "sample_size": 34},
-            "account_locked": {"accuracy": 0.96, "sample_size": 52}
+        Args:
+            embeddings: (n, dimension) embeddings
+            departments: Actual department of each embedding
+        """
+        embeddings = self._normalize(np.asarray(embeddings, dtype=np.float64).reshape(-1, self.dimension))
+        if self.prototypes_per_department > 1:
+            for embedding, department in zip(embeddings, departments, strict=True):
+                self._add(embedding, department)
+        else:
+            # One prototype per department: accumulate each department's sum in one pass
+            row_of = {}
+            for department in dict.fromkeys(departments):
+                department_rows = self._department_rows[self._department(department)]
+                if not department_rows:
+                    department_rows.append(self._new_row(self._department_index[department]))
+                row_of[department] = department_rows[0]
+            rows = np.array([row_of[department] for department in departments], dtype=np.int64)
+            np.add.at(self._sums, rows, embeddings)
+            np.add.at(self._counts, rows, 1)
+            for row in np.unique(rows):
+                self._refresh_row(row)
+        self.stats["updates"] += len(embeddings)
+        self.version += 1
+    
+    def add(self, embedding: np.ndarray, department: str) -> None:
+        """Add one embedding with its actual department (e.g. as an outcome arrives)."""
+        embedding = self._normalize(np.asarray(embedding, dtype=np.float64).reshape(1, self.dimension))[0]
+        self._add(embedding, department)
+        self.stats["updates"] += 1
+        self.version += 1
+    
+    def route(self, query_embedding: np.ndarray) -> Optional[CentroidMatch]:
+        """Best department for one query (None until two departments have min_samples)."""
+        return self.route_batch(np.asarray(query_embedding).reshape(1, self.dimension))[0]
+    
+    def route_batch(self, query_embeddings: np.ndarray) -> List[Optional[CentroidMatch]]:
+        """
+        Best department for each query, scored with one matrix product.
+        
+        Args:
+            query_embeddings: (n, dimension) query embeddings
+            
+        Returns:
+            CentroidMatch per query (None while fewer than two departments are routable)
+        """
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimension))
+        self.stats["queries"] += len(queries)
+        samples = np.bincount(self._row_department[:self._rows], weights=self._counts[:self._rows],
+                              minlength=len(self.departments))
+        routable = [d for d in range(len(self.departments)) if samples[d] >= self.min_samples]
+        if len(routable) < 2:
+            return [None] * len(queries)
+        
+        scores = queries @ self.matrix.T
+        best = np.column_stack([scores[:, self._department_rows[d]].max(axis=1) for d in routable])
+        order = np.argsort(best, axis=1)
+        winner, runner_up = order[:, -1], order[:, -2]
+        rows = np.arange(len(queries))
+        top, second = best[rows, winner], best[rows, runner_up]
+        return [
+            CentroidMatch(
+                department=self.departments[routable[w]],
+                similarity=float(t),
+                margin=float(t - s),
+                samples=int(samples[routable[w]])
+            )
+            for w, t, s in zip(winner, top, second, strict=True)
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Model size and usage counters"""
+        counts = self._counts[:self._rows]
+        return {
+            **self.stats,
+            "departments": len(self.departments),
+            "prototypes": self._rows,
+            "samples": int(counts.sum()),
+            "version": self.version
         }
     
-    async def get_department_accuracy(self, department: str) -> float:
-        """Get historical accuracy for a specific department"""
-        dept_stats = self.department_accuracy.get(department, {})
-        return dept_stats.get("accuracy", 0.5)  # Default to 50% if unknown
+    def _add(self, embedding: np.ndarray, department: str) -> None:
+        row = self._prototype_row(department, embedding)
+        self._sums[row] += embedding
+        self._counts[row] += 1
+        self._refresh_row(row)
+    
+    def _prototype_row(self, department: str, embedding: np.ndarray) -> int:
+        """Row a new embedding updates: a new prototype while below the limit, else the nearest."""
+        index = self._department(department)
+        rows = self._department_rows[index]
+        if len(rows) < self.prototypes_per_department:
+            rows.append(self._new_row(index))
+            return rows[-1]
+        return rows[int(np.argmax(self._matrix[rows] @ embedding.astype(np.float32)))]
+    
+    def _department(self, department: str) -> int:
+        index = self._department_index.get(department)
+        if index is None:
+            index = self._department_index[department] = len(self.departments)
+            self.departments.append(department)
+            self._department_rows.append([])
+        return index
+    
+    def _new_row(self, department_index: int) -> int:
+        if self._rows == len(self._counts):
+            capacity = 2 * len(self._counts)
+            self._matrix = np.resize(self._matrix, (capacity, self.dimension))
+            self._sums = np.resize(self._sums, (capacity, self.dimension))
+            self._counts = np.resize(self._counts, capacity)
+            self._row_department = np.resize(self._row_department, capacity)
+        row = self._rows
+        self._matrix[row] = 0.0
+        self._sums[row] = 0.0
+        self._counts[row] = 0
+        self._row_department[row] = department_index
+        self._rows += 1
+        return row
+    
+    def _refresh_row(self, row: int) -> None:
+        norm = np.linalg.norm(self._sums[row])
+        self._matrix[row] = self._sums[row] / norm if norm > 0 else 0.0
+    
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms > 0, norms, 1.0)
+
+
+# Mock historical accuracy used to seed a new accuracy store (department: total, correct)
+SEED_DEPARTMENT_ACCURACY = {
+    "technical_support_l1": (245, 201),
+    "technical_support_l2": (156, 142),
+    "billing_corrections": (189, 175),
+    "account_security": (134, 119),
+    "customer_feedback": (98, 87),
+    "network_operations": (67, 58)
+}
+
+# Pattern-based accuracy seeds (regex/keyword patterns: sample_size, correct)
+SEED_PATTERN_ACCURACY = {
+    "billing_refund": (78, 73),
+    "login_security": (45, 41),
+    "network_outage": (34, 30),
+    "account_locked": (52, 50)
+}
+
+# Half-lives of the time-decayed accuracy windows
+DEFAULT_DECAY_HALF_LIVES = {"1h": 3600.0, "1d": 86400.0, "7d": 604800.0}
+
+# Store used when persistence is switched on (feature flag persist_routing_accuracy), in the
+# project's data/ directory next to the other runtime state (git-ignored)
+DEFAULT_ACCURACY_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "routing_accuracy.db"
+)
+
+
+@dataclass
+class AccuracyStats:
+    """Cumulative and exponentially time-decayed outcome counts for one key"""
+    total: int = 0
+    correct: int = 0
+    decayed: Dict[str, List[float]] = field(default_factory=dict)  # window -> [weighted_total, weighted_correct]
+    updated_at: float = 0.0
+    
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.total if self.total else 0.5
+
+
+class AccuracyTracker:
+    """
+    Track and manage historical accuracy metrics for cached routing decisions.
+    
+    Stats live in SQLite (WAL mode) behind an in-memory read-through cache,
+    so hot-path reads never touch disk after the first lookup of a key.
+    Outcome updates are applied to the cache immediately and persisted by a
+    background thread in batched transactions.
+    
+    Time-decayed accuracy keeps, per half-life window, exponentially
+    weighted totals that are decayed and incremented in O(1) per update.
+    """
+    
+    DEPARTMENT = "department"
+    PATTERN = "pattern"
+    
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 decay_half_lives: Optional[Dict[str, float]] = None,
+                 seed_defaults: bool = True,
+                 batch_size: int = 200,
+                 flush_interval_seconds: float = 1.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize accuracy tracking.
+        
+        Args:
+            db_path: SQLite database file, parent directory created if missing
+                (None, the default, keeps stats in memory only)
+            decay_half_lives: Time-decayed windows as {label: half-life seconds}
+            seed_defaults: Seed an empty store with the demonstration accuracy data
+            batch_size: Maximum updates persisted per transaction
+            flush_interval_seconds: Maximum delay before queued updates are written
+            clock: Wall-clock time source (injectable for tests)
+        """
+        self.db_path = db_path
+        self.decay_half_lives = dict(decay_half_lives or DEFAULT_DECAY_HALF_LIVES)
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._clock = clock
+        
+        # (kind, key) -> AccuracyStats; None caches a miss
+        self._cache: Dict[tuple, Optional[AccuracyStats]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "updates": 0, "rows_written": 0, "batches": 0}
+        
+        # Incremented on every accuracy update (invalidates cached decisions)
+        self.version = 0
+        
+        self._reader = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        if db_path is not None:
+            self._reader = self._connect()
+            self._create_schema(self._reader)
+            self._thread = threading.Thread(target=self._run, name="accuracy-store", daemon=True)
+            self._thread.start()
+        
+        if seed_defaults and self._is_empty():
+            self._seed(self.DEPARTMENT, SEED_DEPARTMENT_ACCURACY)
+            self._seed(self.PATTERN, SEED_PATTERN_ACCURACY)
+    
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+    
+    @staticmethod
+    def _create_schema(connection) -> None:
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS accuracy_stats (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                decayed TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+            """
+        )
+        connection.commit()
     
-    async def get_pattern_accuracy(self, pattern_id: str) -> float:
-        """Get accuracy for a specific routing pattern"""
-        pattern_stats = self.pattern_accuracy.get(pattern_id, {})
-        return pattern_stats.get("accuracy", 0.5)
+    def _is_empty(self) -> bool:
+        if self._reader is None:
+            return not self._cache
+        with self._lock:
+            return self._reader.execute("SELECT 1 FROM accuracy_stats LIMIT 1").fetchone() is None
     
-    async def update_accuracy(self, department: str, correct: bool):
-        """Update accuracy metrics based on routing outcome"""
-        if department not in self.department_accuracy:
-            self.department_accuracy[department] = {"total": 0, "correct": 0, "accuracy": 0.5}
+    def _seed(self, kind: str, seeds: Dict[str, tuple]) -> None:
+        now = self._clock()
+        for key, (total, correct) in seeds.items():
+            stats = AccuracyStats(
+                total=total,
+                correct=correct,
+                decayed={window: [float(total), float(correct)] for window in self.decay_half_lives},
+                updated_at=now
+            )
+            with self._lock:
+                self._cache[(kind, key)] = stats
+            self._enqueue(kind, key, stats)
+    
+    def _lookup(self, kind: str, key: str) -> Optional[AccuracyStats]:
+        """Read-through cache lookup (SQLite only on the first miss of a key)."""
+        with self._lock:
+            return self._lookup_locked(kind, key)
+    
+    def _lookup_locked(self, kind: str, key: str) -> Optional[AccuracyStats]:
+        """_lookup for callers already holding the lock."""
+        if (kind, key) in self._cache:
+            self.stats["cache_hits"] += 1
+            return self._cache[(kind, key)]
+        self.stats["cache_misses"] += 1
+        stats = None
+        if self._reader is not None:
+            row = self._reader.execute(
+                "SELECT total, correct, decayed, updated_at FROM accuracy_stats WHERE kind = ? AND key = ?",
+                (kind, key)
+            ).fetchone()
+            if row is not None:
+                decayed = json.loads(row[2])
+                for window in self.decay_half_lives:
+                    decayed.setdefault(window, [float(row[0]), float(row[1])])
+                stats = AccuracyStats(total=row[0], correct=row[1], decayed=decayed, updated_at=row[3])
+        self._cache[(kind, key)] = stats
+        return stats
+    
+    def _accuracy(self, kind: str, key: str, window: Optional[str]) -> float:
+        stats = self._lookup(kind, key)
+        if stats is None:
+            return 0.5  # Default to 50% if unknown
+        if window is None:
+            return stats.accuracy
+        if window not in self.decay_half_lives:
+            raise ValueError(f"Unknown accuracy window {window!r}; expected one of {sorted(self.decay_half_lives)}")
+        # Decay scales both weights equally, so the ratio is current without decaying first
+        weighted_total, weighted_correct = stats.decayed[window]
+        return weighted_correct / weighted_total if weighted_total > 0 else 0.5
+    
+    async def get_department_accuracy(self, department: str, window: Optional[str] = None) -> float:
+        """
+        Get historical accuracy for a specific department.
         
-        stats = self.department_accuracy[department]
-        stats["total"] += 1
-        if correct:
-            stats["correct"] += 1
+        Args:
+            department: Department name
+            window: Time-decayed window label (None for all-time accuracy)
+        """
+        return self._accuracy(self.DEPARTMENT, department, window)
+    
+    async def get_pattern_accuracy(self, pattern_id: str, window: Optional[str] = None) -> float:
+        """Get accuracy for a specific routing pattern (optionally time-decayed)"""
+        return self._accuracy(self.PATTERN, pattern_id, window)
+    
+    def get_accuracy_stats(self, department: str) -> Optional[Dict[str, Any]]:
+        """Cumulative and time-decayed accuracy with effective sample sizes for a department"""
+        stats = self._lookup(self.DEPARTMENT, department)
+        if stats is None:
+            return None
+        now = self._clock()
+        windows = {}
+        for window, half_life in self.decay_half_lives.items():
+            weighted_total, weighted_correct = stats.decayed[window]
+            decay = 0.5 ** ((now - stats.updated_at) / half_life)
+            windows[window] = {
+                "accuracy": weighted_correct / weighted_total if weighted_total > 0 else 0.5,
+                "effective_samples": weighted_total * decay
+            }
+        return {"total": stats.total, "correct": stats.correct, "accuracy": stats.accuracy, "windows": windows}
+    
+    def _record(self, kind: str, key: str, correct: bool) -> AccuracyStats:
+        """Apply one outcome to the cached stats in O(1) and return a snapshot to persist."""
+        # Lookup and update under one lock, so concurrent first updates of a key share one AccuracyStats
+        with self._lock:
+            current = self._lookup_locked(kind, key)
+            now = self._clock()
+            if current is None:
+                current = AccuracyStats(
+                    decayed={window: [0.0, 0.0] for window in self.decay_half_lives},
+                    updated_at=now
+                )
+                self._cache[(kind, key)] = current
+            elapsed = max(0.0, now - current.updated_at)
+            for window, half_life in self.decay_half_lives.items():
+                weights = current.decayed[window]
+                decay = 0.5 ** (elapsed / half_life)
+                weights[0] = weights[0] * decay + 1.0
+                weights[1] = weights[1] * decay + (1.0 if correct else 0.0)
+            current.total += 1
+            if correct:
+                current.correct += 1
+            current.updated_at = now
+            return AccuracyStats(
+                total=current.total,
+                correct=current.correct,
+                decayed={window: list(weights) for window, weights in current.decayed.items()},
+                updated_at=now
+            )
+    
+    async def update_accuracy(self, department: str, correct: bool, pattern_id: Optional[str] = None):
+        """
+        Update accuracy metrics based on routing outcome.
         
-        # Recalculate accuracy
-        stats["accuracy"] = stats["correct"] / stats["total"] if stats["total"] > 0 else 0.5
+        The in-memory stats change immediately; persistence happens in the
+        background (see flush).
         
-        logger.info(f"Updated accuracy for {department}: {stats['accuracy']:.3f} ({stats['correct']}/{stats['total']})")
+        Args:
+            department: Department the ticket was routed to
+            correct: Whether the routing was correct
+            pattern_id: Routing pattern that produced the decision, if any
+        """
+        self._enqueue(self.DEPARTMENT, department, self._record(self.DEPARTMENT, department, correct))
+        if pattern_id is not None:
+            self._enqueue(self.PATTERN, pattern_id, self._record(self.PATTERN, pattern_id, correct))
+        with self._lock:
+            self.stats["updates"] += 1
+            self.version += 1
+        
+        logger.debug(f"Updated accuracy for {department} (correct={correct})")
+    
+    def _enqueue(self, kind: str, key: str, stats: AccuracyStats) -> None:
+        if self._thread is not None:
+            self._queue.put((kind, key, stats))
+    
+    def _run(self) -> None:
+        """Persist queued snapshots, one transaction per batch (latest snapshot per key wins)."""
+        writer = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval_seconds
+                while item is not None and len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                
+                latest = {(kind, key): stats for kind, key, stats in (i for i in batch if i is not None)}
+                if latest:
+                    try:
+                        self._write_batch(writer, latest)
+                    except sqlite3.Error as e:
+                        logger.error(f"❌ Failed to persist accuracy stats: {e}")
+                for _ in batch:
+                    self._queue.task_done()
+                if batch[-1] is None:
+                    return
+        finally:
+            writer.close()
+    
+    def _write_batch(self, writer, latest: Dict[tuple, AccuracyStats]) -> None:
+        with writer:
+            writer.executemany(
+                """
+                INSERT INTO accuracy_stats (kind, key, total, correct, decayed, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (kind, key) DO UPDATE SET
+                    total = excluded.total,
+                    correct = excluded.correct,
+                    decayed = excluded.decayed,
+                    updated_at = excluded.updated_at
+                """,
+                [
+                    (kind, key, stats.total, stats.correct, json.dumps(stats.decayed), stats.updated_at)
+                    for (kind, key), stats in latest.items()
+                ]
+            )
+        self.stats["rows_written"] += len(latest)
+        self.stats["batches"] += 1
+    
+    def flush(self) -> None:
+        """Block until every queued update has been written."""
+        if self._thread is not None:
+            self._queue.join()
+    
+    def close(self) -> None:
+        """Write pending updates, stop the writer thread and close the database."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            self._reader.close()
+            self._reader = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and persistence counters"""
+        return {**self.stats, "pending_writes": self._queue.qsize(), "persistent": self.db_path is not None}
 
 
 class RoutingLogger:
@@ -131,19 +718,22 @@ class RoutingLogger:
     Structured logging system for routing decisions and analytics.
     
     Provides JSON-formatted logs suitable for ingestion into monitoring
-    systems like ELK Stack, Splunk, or CloudWatch.
+    systems like ELK Stack, Splunk, or CloudWatch. Entries are handed to a
+    BufferedJsonlWriter so the routing coroutine never waits on disk I/O.
     """
     
-    def __init__(self, log_file: str = "routing_decisions.jsonl"):
-        """Initialize structured logging"""
-        self.log_file = log_file
+    def __init__(self, log_file: str = "routing_decisions.jsonl", **writer_options):
+        """
+        Initialize structured logging.
         
-        # Configure JSON logger
-        self.json_logger = logging.getLogger("routing_decisions")
-        handler = logging.FileHandler(log_file)
-        handler.setFormatter(logging.Formatter('%(message)s'))  # Raw JSON
-        self.json_logger.addHandler(handler)
-        self.json_logger.setLevel(logging.INFO)
+        Args:
+            log_file: JSONL output file
+            **writer_options: BufferedJsonlWriter options (batch_size,
+                flush_interval_seconds, max_bytes, rotate_interval_seconds,
+                backup_count, backpressure, max_queue_size, ...)
+        """
+        self.log_file = log_file
+        self.writer = BufferedJsonlWriter(log_file, **writer_options)
     
     def log_routing_decision(self, decision: RoutingDecision, ticket_text: str = ""):
         """Log routing decision in structured JSON format"""
@@ -166,6 +756,7 @@ class RoutingLogger:
                 "top_similarity": decision.top_similarity_score,
                 "historical_accuracy": decision.historical_accuracy,
                 "similar_tickets": decision.similar_tickets_found,
+                "top_match_department": decision.top_match_department,
                 "reasoning": decision.reasoning
             },
             
@@ -177,7 +768,9 @@ class RoutingLogger:
             
             # Performance
             "performance": {
-                "processing_time_ms": decision.processing_time_ms
+                "processing_time_ms": decision.processing_time_ms,
+                "prompt_tokens": decision.prompt_tokens,
+                "degraded_stages": decision.degraded_stages
             },
             
             # Optional ticket data (truncated for privacy)
@@ -187,8 +780,8 @@ class RoutingLogger:
             }
         }
         
-        # Log to JSON file
-        self.json_logger.info(json.dumps(log_entry))
+        # Queue for the background JSONL writer
+        self.writer.write(log_entry)
         
         # Log human-readable summary
         cache_status = "🎯 CACHE HIT" if decision.cache_hit else "🤖 LLM ANALYSIS"
@@ -209,53 +802,92 @@ class RoutingLogger:
             }
         }
         
-        self.json_logger.info(json.dumps(log_entry))
+        self.writer.write(log_entry)
         logger.info(f"📊 Cache Metrics: {hit_rate:.1%} hit rate ({cache_hits}/{total_requests})")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer queue depth and write/drop counters."""
+        return self.writer.get_stats()
+    
+    def flush(self):
+        """Block until queued entries are on disk."""
+        self.writer.flush()
+    
+    def close(self):
+        """Flush and stop the background writer."""
+        self.writer.close()
 
 
 class PerformanceMonitor:
     """
     Real-time performance monitoring for routing system.
     
-    Tracks metrics suitable for Grafana dashboards and alerting.
+    Tracks metrics suitable for Grafana dashboards and alerting: O(1)
+    updates, p50/p90/p99 per routing method over 1m/5m/1h windows, and a
+    Prometheus text exporter (see export_prometheus).
     """
     
-    def __init__(self):
-        """Initialize performance tracking"""
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        Initialize performance tracking.
+        
+        Args:
+            clock: Wall-clock time source for rolling windows (injectable for tests)
+        """
         self.metrics = {
             "total_requests": 0,
             "cache_hits": 0,
+            "exact_cache_hits": 0,
+            "coalesced_requests": 0,
+            "centroid_routes": 0,
             "rag_llm_calls": 0,
             "fallback_calls": 0,
             
             # Performance metrics
             "avg_processing_time": 0.0,
-            "processing_times": [],
             
             # Accuracy tracking
             "routing_accuracy": {},
             "confidence_distribution": {"high": 0, "medium": 0, "low": 0}
         }
+        
+        # Last 1000 processing times (O(1) running mean)
+        self.recent_processing_times = LatencyRingBuffer(capacity=1000)
+        
+        # Rolling-window latency histograms, overall and per routing method
+        self._clock = clock
+        self.latency_histograms: Dict[str, WindowedLatencyHistogram] = {
+            "all": WindowedLatencyHistogram(clock=clock)
+        }
+        for method in RoutingMethod:
+            self.latency_histograms[method.value] = WindowedLatencyHistogram(clock=clock)
+        self.method_counts = {method.value: 0 for method in RoutingMethod}
     
     def record_routing_decision(self, decision: RoutingDecision):
         """Record metrics from a routing decision"""
         self.metrics["total_requests"] += 1
+        self.method_counts[decision.routing_method.value] += 1
         
-        # Route method tracking
-        if decision.cache_hit:
+        # Route method tracking (exact duplicates reported apart from similarity hits)
+        if decision.routing_method == RoutingMethod.EXACT_CACHE:
+            self.metrics["exact_cache_hits"] += 1
+        elif decision.routing_method == RoutingMethod.COALESCED:
+            self.metrics["coalesced_requests"] += 1
+        elif decision.routing_method == RoutingMethod.CENTROID:
+            self.metrics["centroid_routes"] += 1
+        elif decision.cache_hit:
             self.metrics["cache_hits"] += 1
         elif decision.routing_method == RoutingMethod.RAG_LLM:
             self.metrics["rag_llm_calls"] += 1
         else:
             self.metrics["fallback_calls"] += 1
         
-        # Performance tracking
-        self.metrics["processing_times"].append(decision.processing_time_ms)
-        if len(self.metrics["processing_times"]) > 1000:  # Keep last 1000
-            self.metrics["processing_times"] = self.metrics["processing_times"][-1000:]
+        # Performance tracking (rolling average over the last 1000)
+        self.recent_processing_times.append(decision.processing_time_ms)
+        self.metrics["avg_processing_time"] = self.recent_processing_times.mean()
         
-        # Calculate rolling average
-        self.metrics["avg_processing_time"] = sum(self.metrics["processing_times"]) / len(self.metrics["processing_times"])
+        self.latency_histograms["all"].record(decision.processing_time_ms)
+        self.latency_histograms[decision.routing_method.value].record(decision.processing_time_ms)
         
         # Confidence distribution
         if decision.confidence_score >= 0.85:
@@ -266,11 +898,17 @@ class PerformanceMonitor:
             self.metrics["confidence_distribution"]["low"] += 1
     
     def get_cache_hit_rate(self) -> float:
-        """Calculate current cache hit rate"""
+        """Calculate current similarity cache hit rate"""
         if self.metrics["total_requests"] == 0:
             return 0.0
         return self.metrics["cache_hits"] / self.metrics["total_requests"]
     
+    def get_exact_cache_hit_rate(self) -> float:
+        """Calculate current exact-duplicate cache hit rate"""
+        if self.metrics["total_requests"] == 0:
+            return 0.0
+        return self.metrics["exact_cache_hits"] / self.metrics["total_requests"]
+    
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get comprehensive performance metrics"""
         hit_rate = self.get_cache_hit_rate()
@@ -279,10 +917,15 @@ class PerformanceMonitor:
             "cache_performance": {
                 "hit_rate": hit_rate,
                 "total_requests": self.metrics["total_requests"],
-                "cache_hits": self.metrics["cache_hits"]
+                "cache_hits": self.metrics["cache_hits"],
+                "exact_hit_rate": self.get_exact_cache_hit_rate(),
+                "exact_cache_hits": self.metrics["exact_cache_hits"]
             },
             
             "routing_distribution": {
+                "exact_cache": self.metrics["exact_cache_hits"],
+                "coalesced": self.metrics["coalesced_requests"],
+                "centroid": self.metrics["centroid_routes"],
                 "cached": self.metrics["cache_hits"],
                 "rag_llm": self.metrics["rag_llm_calls"],
                 "fallback": self.metrics["fallback_calls"]
@@ -293,8 +936,62 @@ class PerformanceMonitor:
                 "total_requests": self.metrics["total_requests"]
             },
             
+            "latency_percentiles": self.get_latency_percentiles(),
+            
             "confidence": self.metrics["confidence_distribution"]
         }
+    
+    def get_latency_percentiles(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Latency percentiles per routing method over rolling windows.
+        
+        Returns:
+            {method: {window: {"count", "p50", "p90", "p99"}}} for "all" and each RoutingMethod
+        """
+        return {method: histogram.window_percentiles() for method, histogram in self.latency_histograms.items()}
+    
+    def export_prometheus(self, prefix: str = "routing") -> str:
+        """
+        Render metrics in the Prometheus text exposition format.
+        
+        Args:
+            prefix: Metric name prefix
+            
+        Returns:
+            Text suitable for serving from a /metrics scrape endpoint
+        """
+        lines = [
+            f"# HELP {prefix}_decisions_total Routing decisions by routing method.",
+            f"# TYPE {prefix}_decisions_total counter",
+        ]
+        for method, count in self.method_counts.items():
+            lines.append(f'{prefix}_decisions_total{{method="{method}"}} {count}')
+        
+        lines += [
+            f"# HELP {prefix}_cache_hit_ratio Share of decisions served from cache.",
+            f"# TYPE {prefix}_cache_hit_ratio gauge",
+            f'{prefix}_cache_hit_ratio{{cache="similarity"}} {self.get_cache_hit_rate():.6f}',
+            f'{prefix}_cache_hit_ratio{{cache="exact"}} {self.get_exact_cache_hit_rate():.6f}',
+            f"# HELP {prefix}_latency_ms Routing latency percentiles over rolling windows.",
+            f"# TYPE {prefix}_latency_ms gauge",
+        ]
+        for method, windows in self.get_latency_percentiles().items():
+            lines += prometheus_percentile_lines(f"{prefix}_latency_ms", {"method": method}, windows)
+        
+        lines += [
+            f"# HELP {prefix}_latency_observed_ms_total Cumulative routing latency.",
+            f"# TYPE {prefix}_latency_observed_ms_total counter",
+        ]
+        for method, histogram in self.latency_histograms.items():
+            lines.append(f'{prefix}_latency_observed_ms_total{{method="{method}"}} {histogram.total_sum_ms:.3f}')
+        lines += [
+            f"# HELP {prefix}_latency_observations_total Routing latency samples recorded.",
+            f"# TYPE {prefix}_latency_observations_total counter",
+        ]
+        for method, histogram in self.latency_histograms.items():
+            lines.append(f'{prefix}_latency_observations_total{{method="{method}"}} {histogram.total_count}')
+        
+        return "\n".join(lines) + "\n"
 
 
 class ConfidenceBasedRouter:
@@ -305,89 +1002,659 @@ class ConfidenceBasedRouter:
     
     def __init__(self, 
                  confidence_threshold: float = 0.92,
-                 accuracy_threshold: float = 0.85):
+                 accuracy_threshold: float = 0.85,
+                 decision_cache_size: int = 10000,
+                 decision_cache_ttl_seconds: float = 3600.0,
+                 coalesce_near_duplicates: bool = False,
+                 near_duplicate_threshold: float = 0.8,
+                 routing_log_file: str = "routing_decisions.jsonl",
+                 accuracy_db_path: Optional[str] = None,
+                 centroid_similarity_threshold: float = 0.85,
+                 centroid_margin: float = 0.05,
+                 centroid_prototypes: int = 1,
+                 centroid_min_samples: int = 5,
+                 llm_scheduler=None,
+                 sla_budget_seconds: Optional[float] = None):
         """
         Initialize confidence-based router.
         
         Args:
             confidence_threshold: Minimum similarity score for cached routing
             accuracy_threshold: Minimum historical accuracy for cached routing
+            decision_cache_size: Exact-duplicate decisions kept (0 disables)
+            decision_cache_ttl_seconds: Seconds an exact-duplicate decision is reused
+            coalesce_near_duplicates: Let requests join an in-flight request whose
+                MinHash-estimated word Jaccard similarity is at least
+                `near_duplicate_threshold`
+            near_duplicate_threshold: Minimum estimated Jaccard similarity to join
+            routing_log_file: JSONL file decisions are appended to
+            accuracy_db_path: SQLite accuracy store (None, the default, keeps accuracy in memory)
+            centroid_similarity_threshold: Minimum similarity to a department's
+                centroid for routing without a vector query
+            centroid_margin: Minimum lead of the best department over the runner-up
+            centroid_prototypes: Prototype embeddings kept per department
+            centroid_min_samples: Historical embeddings a department needs first
+            llm_scheduler: Shared LLMScheduler ordering RAG-LLM calls by ticket
+                priority and SLA deadline (None = first-come-first-served)
+            sla_budget_seconds: Per-ticket processing budget; vector search and
+                LLM stages degrade or skip when it is nearly spent (None = no
+                deadline unless route_with_confidence is given one)
         """
         self.confidence_threshold = confidence_threshold
         self.accuracy_threshold = accuracy_threshold
+        self.decision_cache = DecisionCache(decision_cache_size, decision_cache_ttl_seconds)
         
-        # Core components
-        self.rag_system = RAGIntelligentRouting()
+        # Single-flight coalescing of concurrent identical (optionally near-identical) requests
+        self.coalesce_near_duplicates = coalesce_near_duplicates
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self._in_flight: Dict[str, InFlightRoute] = {}
+        self._in_flight_bands: Dict[tuple, List[InFlightRoute]] = {}
+        self.coalescing_stats = {"leaders": 0, "exact_joins": 0, "near_duplicate_joins": 0}
+        
+        # Zero-network first stage: department centroids of historical embeddings
+        # (empty until fit via load_department_centroids or record_outcome)
+        self.centroid_similarity_threshold = centroid_similarity_threshold
+        self.centroid_margin = centroid_margin
+        self.department_centroids = DepartmentCentroids(
+            prototypes_per_department=centroid_prototypes, min_samples=centroid_min_samples
+        )
+        
+        # Core components (one similarity search, and vector connection, shared with RAG)
         self.similarity_search = IntelligentSimilaritySearch()
-        self.accuracy_tracker = AccuracyTracker()
-        self.routing_logger = RoutingLogger()
+        self.rag_system = RAGIntelligentRouting(similarity_search=self.similarity_search,
+                                                llm_scheduler=llm_scheduler)
+        self.accuracy_tracker = AccuracyTracker(db_path=accuracy_db_path)
+        self.routing_logger = RoutingLogger(routing_log_file)
         self.performance_monitor = PerformanceMonitor()
+        
+        # Per-stage throughput of route_many batches
+        self.batch_stage_timings: Dict[str, Dict[str, float]] = {}
+        
+        # Deadline-aware degradation: budget per ticket and expected stage costs learnt across requests
+        self.sla_budget_seconds = sla_budget_seconds
+        self.stage_costs = StageCostModel()
+        self.deadline_stats = {"deadlines": 0, "degraded": 0, "skipped": 0}
+    
+    @classmethod
+    def from_business_rules(cls, config: Optional[BusinessRulesConfig] = None,
+                            **options) -> "ConfidenceBasedRouter":
+        """
+        Create a router using the cached-route thresholds and the AI
+        classification processing-time SLA from the business rules.
+        
+        Accuracy is persisted to DEFAULT_ACCURACY_DB_PATH when the
+        persist_routing_accuracy feature flag is on, otherwise kept in memory.
+        
+        Args:
+            config: Business rules (default: production config)
+            **options: Other ConfidenceBasedRouter arguments
+        """
+        config = config or BusinessRulesConfig()
+        confidence_threshold, accuracy_threshold = config.get_cached_route_thresholds()
+        options.setdefault("sla_budget_seconds", config.get_processing_time_sla("ai_classification") * 60.0)
+        if config.is_feature_enabled("persist_routing_accuracy"):
+            options.setdefault("accuracy_db_path", DEFAULT_ACCURACY_DB_PATH)
+        return cls(confidence_threshold=confidence_threshold, accuracy_threshold=accuracy_threshold, **options)
     
     def generate_ticket_id(self, ticket_text: str) -> str:
         """Generate consistent ticket ID from text"""
         hash_obj = hashlib.md5(ticket_text.encode())
         return f"TICKET-{hash_obj.hexdigest()[:8].upper()}"
     
-    async def route_with_confidence(self, ticket_text: str) -> RoutingDecision:
+    async def route_with_confidence(self, ticket_text: str, priority: Optional[str] = None,
+                                    deadline: Optional[RequestDeadline] = None) -> RoutingDecision:
         """
         Route ticket using confidence-based decision logic.
         
+        `priority` (P0_IMMEDIATE..P3_STANDARD, e.g. from llm_scheduler.priority_for
+        on the rules-engine urgency) orders the ticket's LLM call when the router
+        has an llm_scheduler.
+        
+        `deadline` carries the ticket's remaining SLA budget from earlier stages
+        (default: a new one of `sla_budget_seconds`, if set). The vector search
+        falls back to top_k=1 and the LLM to a labels-only prompt when the full
+        stage would not fit; stages that cannot fit at all are skipped to the
+        keyword fallback. Each is listed in the decision's degraded_stages.
+        
         Decision flow:
-        1. Search for most similar historical ticket
+        0. Reuse a recent exact-duplicate decision, or await an identical request already in flight
+        0b. Route by department centroid when similarity and margin are high enough (no vector query)
+        1. Retrieve the top-k similar historical tickets (once per ticket)
         2. Check if similarity ≥ confidence_threshold AND accuracy ≥ accuracy_threshold
         3. If both met: return cached classification (cache hit)
-        4. Otherwise: use RAG-enhanced LLM analysis
+        4. Otherwise: use RAG-enhanced LLM analysis over the same matches
         """
         
         start_time = time.time()
         ticket_id = self.generate_ticket_id(ticket_text)
+        fingerprint = ticket_fingerprint(ticket_text)
+        if deadline is None and self.sla_budget_seconds is not None:
+            deadline = RequestDeadline(self.sla_budget_seconds, self.stage_costs)
+        if deadline is not None:
+            self.deadline_stats["deadlines"] += 1
         
         try:
-            # Step 1: Get top similar ticket for confidence analysis
-            similar_tickets = await self.similarity_search.search_similar_tickets_with_routing(
-                query_text=ticket_text,
-                top_k=1  # Only need top match for confidence check
-            )
-            
-            if not similar_tickets:
-                # No similar tickets found - use RAG with empty context
-                return await self._fallback_routing(ticket_id, ticket_text, start_time, "No similar tickets found")
+            # Step 0: Exact duplicate of a recent ticket routed under the same inputs
+            self.decision_cache.validate(self._cache_generation())
+            cached_decision = self.decision_cache.get(fingerprint)
+            if cached_decision is not None:
+                return self._exact_cache_routing(ticket_id, ticket_text, cached_decision, start_time)
             
-            top_match = similar_tickets[0]
-            top_similarity = top_match.similarity_score
+            # Identical (or near-identical) ticket already being routed: await its decision
+            signature = minhash_signature(ticket_text) if self.coalesce_near_duplicates else None
+            flight = self._find_in_flight(fingerprint, signature)
+            if flight is not None:
+                return await self._coalesced_routing(ticket_id, ticket_text, flight, start_time)
             
-            # Step 2: Get historical accuracy for the matched department
-            if top_match.actual_department:
-                historical_accuracy = await self.accuracy_tracker.get_department_accuracy(
-                    top_match.actual_department
-                )
-            else:
-                historical_accuracy = 0.0
-            
-            # Step 3: Apply confidence-based routing logic
-            confidence_met = top_similarity >= self.confidence_threshold
-            accuracy_met = historical_accuracy >= self.accuracy_threshold
-            
-            if confidence_met and accuracy_met:
-                # HIGH CONFIDENCE: Use cached classification
-                return await self._cached_routing(
-                    ticket_id, ticket_text, top_match, historical_accuracy, start_time
-                )
-            else:
-                # LOW CONFIDENCE: Use RAG-enhanced LLM analysis
-                return await self._rag_llm_routing(
-                    ticket_id, ticket_text, similar_tickets, historical_accuracy, start_time
-                )
+            flight = self._begin_flight(fingerprint, signature)
+            decision = None
+            try:
+                # Step 0b: Department centroids (the embedding is reused by the search)
+                query_embedding = None
+                if len(self.department_centroids):
+                    query_embedding = self.similarity_search.generate_mock_embedding(ticket_text)
+                    match = self.department_centroids.route(query_embedding)
+                    decision = await self._centroid_decide(ticket_id, ticket_text, fingerprint, match, start_time)
+                    if decision is not None:
+                        return decision
+                
+                # Step 1: Single retrieval; the top match drives the confidence check and
+                # the full list is reused as RAG context if the LLM path is taken
+                similar_tickets = await self._deadline_search(ticket_text, query_embedding, deadline)
+                if similar_tickets is None:
+                    decision = await self._fallback_routing(
+                        ticket_id, ticket_text, start_time, "SLA budget spent before vector search", deadline
+                    )
+                    return decision
+                
+                decision = await self._decide(ticket_id, ticket_text, fingerprint, similar_tickets, start_time,
+                                              priority, deadline)
+                return decision
+            finally:
+                self._end_flight(flight, decision)
                 
         except Exception as e:
             # Error fallback
             logger.error(f"Routing error for {ticket_id}: {e}")
             return await self._fallback_routing(
-                ticket_id, ticket_text, start_time, f"Error: {str(e)}"
+                ticket_id, ticket_text, start_time, f"Error: {str(e)}", deadline
+            )
+    
+    async def route_from_cache(self, ticket_text: str,
+                               deadline: Optional[RequestDeadline] = None) -> Optional[RoutingDecision]:
+        """
+        Route a ticket only if no LLM call is needed.
+        
+        Runs the cheap steps of route_with_confidence (exact-duplicate cache,
+        department centroids, one vector search and the cached-route check)
+        and returns None where route_with_confidence would go on to the LLM or
+        the fallback, so a caller (e.g. routing_orchestrator) can pick the
+        next stage itself. Identical requests are not coalesced here.
+        
+        Args:
+            ticket_text: Ticket to route
+            deadline: Remaining SLA budget (the search is degraded or skipped like in route_with_confidence)
+        
+        Returns:
+            Exact-cache, centroid or cached-route decision, or None
+        """
+        start_time = time.time()
+        ticket_id = self.generate_ticket_id(ticket_text)
+        fingerprint = ticket_fingerprint(ticket_text)
+        
+        self.decision_cache.validate(self._cache_generation())
+        cached_decision = self.decision_cache.get(fingerprint)
+        if cached_decision is not None:
+            return self._exact_cache_routing(ticket_id, ticket_text, cached_decision, start_time)
+        
+        query_embedding = None
+        if len(self.department_centroids):
+            query_embedding = self.similarity_search.generate_mock_embedding(ticket_text)
+            match = self.department_centroids.route(query_embedding)
+            decision = await self._centroid_decide(ticket_id, ticket_text, fingerprint, match, start_time)
+            if decision is not None:
+                return decision
+        
+        similar_tickets = await self._deadline_search(ticket_text, query_embedding, deadline)
+        if not similar_tickets:
+            return None
+        top_match = similar_tickets[0]
+        historical_accuracy = await self._historical_accuracy(top_match)
+        if not self._use_cached_route(top_match, historical_accuracy):
+            return None
+        
+        decision = await self._cached_routing(ticket_id, ticket_text, top_match, historical_accuracy, start_time,
+                                              deadline)
+        if not decision.degraded_stages:
+            self.decision_cache.put(fingerprint, decision)
+        return decision
+    
+    async def _deadline_search(self, ticket_text: str, query_embedding: Optional[np.ndarray],
+                               deadline: Optional[RequestDeadline]) -> Optional[List]:
+        """
+        Vector search within the remaining budget.
+        
+        Returns:
+            Matches (top_k=1 when degraded), or None when the stage was skipped or timed out
+        """
+        search = self.similarity_search.search_similar_tickets_with_routing
+        if deadline is None:
+            return await search(query_text=ticket_text, top_k=RAGIntelligentRouting.RETRIEVAL_TOP_K,
+                                query_embedding=query_embedding)
+        
+        plan = deadline.plan("vector_search")
+        if plan == STAGE_SKIP:
+            return None
+        variant = "cheap" if plan == STAGE_DEGRADE else "full"
+        try:
+            with deadline.measure("vector_search", variant):
+                return await asyncio.wait_for(
+                    search(query_text=ticket_text, query_embedding=query_embedding,
+                           top_k=1 if plan == STAGE_DEGRADE else RAGIntelligentRouting.RETRIEVAL_TOP_K),
+                    timeout=deadline.remaining_seconds()
+                )
+        except TimeoutError:
+            deadline.record("vector_search", STAGE_SKIP, "timed out at the SLA deadline")
+            return None
+    
+    def _find_in_flight(self, fingerprint: str, signature: Optional[np.ndarray]) -> Optional[InFlightRoute]:
+        """In-flight request with the same fingerprint, else a near-duplicate by MinHash."""
+        flight = self._in_flight.get(fingerprint)
+        if flight is not None:
+            self.coalescing_stats["exact_joins"] += 1
+            return flight
+        
+        if signature is not None:
+            for band in minhash_bands(signature):
+                for candidate in self._in_flight_bands.get(band, ()):
+                    if np.mean(candidate.signature == signature) >= self.near_duplicate_threshold:
+                        self.coalescing_stats["near_duplicate_joins"] += 1
+                        return candidate
+        return None
+    
+    def _begin_flight(self, fingerprint: str, signature: Optional[np.ndarray]) -> InFlightRoute:
+        """Register this request as the leader other identical requests will await."""
+        flight = InFlightRoute(fingerprint, signature, asyncio.get_running_loop().create_future())
+        self._in_flight[fingerprint] = flight
+        if signature is not None:
+            for band in minhash_bands(signature):
+                self._in_flight_bands.setdefault(band, []).append(flight)
+        self.coalescing_stats["leaders"] += 1
+        return flight
+    
+    def _end_flight(self, flight: InFlightRoute, decision: Optional[RoutingDecision]) -> None:
+        """Publish the leader's decision (or failure) and unregister it."""
+        del self._in_flight[flight.fingerprint]
+        if flight.signature is not None:
+            for band in minhash_bands(flight.signature):
+                members = self._in_flight_bands[band]
+                members.remove(flight)
+                if not members:
+                    del self._in_flight_bands[band]
+        
+        if decision is not None:
+            flight.future.set_result(decision)
+        else:
+            flight.future.set_exception(RuntimeError("coalesced routing request failed"))
+            flight.future.exception()  # Waiters still see it; silences "never retrieved" when there are none
+    
+    async def _coalesced_routing(self, ticket_id: str, ticket_text: str,
+                                 flight: InFlightRoute, start_time: float) -> RoutingDecision:
+        """Reuse the decision of an identical request that was already in flight"""
+        
+        # Shielded so a cancelled waiter does not cancel the shared result
+        leader = await asyncio.shield(flight.future)
+        if leader.routing_method == RoutingMethod.FALLBACK:
+            return await self._fallback_routing(
+                ticket_id, ticket_text, start_time, leader.reasoning.removeprefix("Fallback routing: ")
+            )
+        
+        processing_time = (time.time() - start_time) * 1000
+        
+        decision = replace(
+            leader,
+            ticket_id=ticket_id,
+            routing_method=RoutingMethod.COALESCED,
+            reasoning=f"Coalesced with in-flight {leader.ticket_id} ({leader.routing_method.value}): {leader.reasoning}",
+            cache_hit=True,
+            processing_time_ms=processing_time,
+            timestamp=datetime.now(UTC),
+            prompt_tokens=None
+        )
+        
+        # Log and track decision
+        self.routing_logger.log_routing_decision(decision, ticket_text)
+        self.performance_monitor.record_routing_decision(decision)
+        
+        return decision
+    
+    async def route_many(self, ticket_texts: Sequence[str], concurrency: int = 16,
+                         llm_concurrency: Optional[int] = None,
+                         priorities: Optional[Sequence[Optional[str]]] = None) -> List[RoutingDecision]:
+        """
+        Route many tickets concurrently (e.g. bulk re-routing after an outage).
+        
+        Stages:
+        1. Exact-duplicate lookup; repeats within the batch are routed once
+        2. One batch embedding call for the remaining unique tickets, then
+           department centroid routing for the whole batch (one matrix product)
+        3. Vector searches issued concurrently, at most `concurrency` in flight
+        4. Cached routes for high-confidence matches
+        5. RAG-LLM calls for the misses, grouped into one bounded concurrent stage
+        
+        Args:
+            ticket_texts: Ticket texts to route
+            concurrency: Maximum vector searches in flight
+            llm_concurrency: Maximum LLM calls in flight (defaults to concurrency)
+            priorities: Priority class per ticket for the llm_scheduler
+            
+        Returns:
+            Routing decisions in input order
+        """
+        if concurrency < 1 or (llm_concurrency is not None and llm_concurrency < 1):
+            raise ValueError("concurrency must be at least 1")
+        if priorities is not None and len(priorities) != len(ticket_texts):
+            raise ValueError("priorities must have one entry per ticket")
+        
+        start_time = time.time()
+        decisions: List[Optional[RoutingDecision]] = [None] * len(ticket_texts)
+        ticket_ids = [self.generate_ticket_id(text) for text in ticket_texts]
+        fingerprints = [ticket_fingerprint(text) for text in ticket_texts]
+        
+        # Stage 1: exact-duplicate cache, then collapse repeats within the batch
+        stage_start = time.perf_counter()
+        self.decision_cache.validate(self._cache_generation())
+        leaders: Dict[str, int] = {}
+        followers: List[int] = []
+        for index, text in enumerate(ticket_texts):
+            if fingerprints[index] in leaders:
+                followers.append(index)
+                continue
+            cached_decision = self.decision_cache.get(fingerprints[index])
+            if cached_decision is not None:
+                decisions[index] = self._exact_cache_routing(ticket_ids[index], text, cached_decision, start_time)
+            else:
+                leaders[fingerprints[index]] = index
+        pending = list(leaders.values())
+        self._record_batch_stage("dedupe", len(ticket_texts), stage_start)
+        
+        # Stage 2: one embedding call for every unique uncached ticket
+        stage_start = time.perf_counter()
+        try:
+            embeddings = self.similarity_search.generate_mock_embeddings([ticket_texts[i] for i in pending])
+        except Exception as e:
+            logger.warning(f"Batch embedding failed ({e}) - embedding per search")
+            embeddings = None
+        self._record_batch_stage("embed", len(pending), stage_start)
+        
+        # Stage 2b: department centroids for the whole batch; matched tickets skip the search
+        if embeddings is not None and len(self.department_centroids):
+            stage_start = time.perf_counter()
+            matches = self.department_centroids.route_batch(embeddings)
+            unmatched = []
+            for row, (index, match) in enumerate(zip(pending, matches, strict=True)):
+                decision = await self._centroid_decide(
+                    ticket_ids[index], ticket_texts[index], fingerprints[index], match, start_time
+                )
+                if decision is None:
+                    unmatched.append(row)
+                else:
+                    decisions[index] = decision
+            self._record_batch_stage("centroid", len(pending), stage_start)
+            pending = [pending[row] for row in unmatched]
+            embeddings = embeddings[unmatched]
+        
+        # Stage 3: concurrent vector searches
+        search_slots = asyncio.Semaphore(concurrency)
+        
+        async def search(row: int, index: int):
+            async with search_slots:
+                return await self.similarity_search.search_similar_tickets_with_routing(
+                    query_text=ticket_texts[index],
+                    top_k=RAGIntelligentRouting.RETRIEVAL_TOP_K,
+                    query_embedding=None if embeddings is None else embeddings[row]
+                )
+        
+        stage_start = time.perf_counter()
+        search_results = await asyncio.gather(
+            *(search(row, index) for row, index in enumerate(pending)), return_exceptions=True
+        )
+        self._record_batch_stage("search", len(pending), stage_start)
+        
+        # Stage 4: cached routes; collect misses for the LLM stage
+        stage_start = time.perf_counter()
+        llm_pending = []
+        for index, similar_tickets in zip(pending, search_results, strict=True):
+            text = ticket_texts[index]
+            if isinstance(similar_tickets, Exception):
+                decisions[index] = await self._fallback_routing(
+                    ticket_ids[index], text, start_time, f"Error: {similar_tickets}"
+                )
+            elif not similar_tickets:
+                decisions[index] = await self._fallback_routing(
+                    ticket_ids[index], text, start_time, "No similar tickets found"
+                )
+            else:
+                top_match = similar_tickets[0]
+                historical_accuracy = await self._historical_accuracy(top_match)
+                if self._use_cached_route(top_match, historical_accuracy):
+                    decisions[index] = await self._cached_routing(
+                        ticket_ids[index], text, top_match, historical_accuracy, start_time
+                    )
+                    self.decision_cache.put(fingerprints[index], decisions[index])
+                else:
+                    llm_pending.append((index, similar_tickets, historical_accuracy))
+        # Analyze every miss's matches for its RAG prompt in one vectorized pass
+        recommendations = self.similarity_search.analyze_routing_confidence_batch(
+            [similar_tickets for _, similar_tickets, _ in llm_pending]
+        )
+        llm_pending = [(*item, recommendation)
+                       for item, recommendation in zip(llm_pending, recommendations, strict=True)]
+        self._record_batch_stage("decide", len(pending), stage_start)
+        
+        # Stage 5: RAG-LLM calls for the misses
+        llm_slots = asyncio.Semaphore(llm_concurrency or concurrency)
+        
+        async def classify(index: int, similar_tickets: List, historical_accuracy: float, recommendation):
+            async with llm_slots:
+                try:
+                    decision = await self._rag_llm_routing(
+                        ticket_ids[index], ticket_texts[index], similar_tickets, historical_accuracy, start_time,
+                        recommendation=recommendation, priority=priorities[index] if priorities else None
+                    )
+                except Exception as e:
+                    logger.error(f"Routing error for {ticket_ids[index]}: {e}")
+                    return await self._fallback_routing(
+                        ticket_ids[index], ticket_texts[index], start_time, f"Error: {str(e)}"
+                    )
+            if decision.routing_method != RoutingMethod.FALLBACK:
+                self.decision_cache.put(fingerprints[index], decision)
+            return decision
+        
+        stage_start = time.perf_counter()
+        llm_decisions = await asyncio.gather(*(classify(*item) for item in llm_pending))
+        for (index, *_), decision in zip(llm_pending, llm_decisions, strict=True):
+            decisions[index] = decision
+        self._record_batch_stage("llm", len(llm_pending), stage_start)
+        
+        # Repeats within the batch reuse their first occurrence's decision
+        for index in followers:
+            leader = decisions[leaders[fingerprints[index]]]
+            if leader.routing_method == RoutingMethod.FALLBACK:
+                decisions[index] = await self._fallback_routing(
+                    ticket_ids[index], ticket_texts[index], start_time,
+                    leader.reasoning.removeprefix("Fallback routing: ")
+                )
+            else:
+                decisions[index] = self._exact_cache_routing(ticket_ids[index], ticket_texts[index], leader, start_time)
+        
+        return decisions
+    
+    def _record_batch_stage(self, stage: str, items: int, started: float) -> None:
+        """Accumulate items processed and elapsed time since `started` (perf_counter) for a route_many stage."""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timing = self.batch_stage_timings.setdefault(stage, {"batches": 0, "items": 0, "total_ms": 0.0})
+        timing["batches"] += 1
+        timing["items"] += items
+        timing["total_ms"] += elapsed_ms
+    
+    def get_batch_stage_throughput(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-stage throughput of route_many batches.
+        
+        Returns:
+            {stage: {batches, items, total_ms, items_per_second}} for the
+            dedupe, embed, centroid (once fitted), search, decide and llm stages
+        """
+        return {
+            stage: {
+                **timing,
+                "items_per_second": timing["items"] / (timing["total_ms"] / 1000) if timing["total_ms"] > 0 else 0.0
+            }
+            for stage, timing in self.batch_stage_timings.items()
+        }
+    
+    async def _decide(self, ticket_id: str, ticket_text: str, fingerprint: str,
+                      similar_tickets: List, start_time: float, priority: Optional[str] = None,
+                      deadline: Optional[RequestDeadline] = None) -> RoutingDecision:
+        """Apply the confidence/accuracy decision to retrieved matches (steps 2-4)."""
+        if not similar_tickets:
+            # No similar tickets found - use RAG with empty context
+            return await self._fallback_routing(ticket_id, ticket_text, start_time, "No similar tickets found",
+                                                deadline)
+        
+        top_match = similar_tickets[0]
+        historical_accuracy = await self._historical_accuracy(top_match)
+        
+        if self._use_cached_route(top_match, historical_accuracy):
+            # HIGH CONFIDENCE: Use cached classification
+            decision = await self._cached_routing(
+                ticket_id, ticket_text, top_match, historical_accuracy, start_time, deadline
             )
+        else:
+            # LOW CONFIDENCE: Use RAG-enhanced LLM analysis
+            decision = await self._rag_llm_routing(
+                ticket_id, ticket_text, similar_tickets, historical_accuracy, start_time, priority=priority,
+                deadline=deadline
+            )
+        
+        # Fallback decisions (including failed LLM calls) are never cached, so transient errors are
+        # retried; neither are decisions degraded by the deadline, so a later duplicate gets the full treatment
+        if decision.routing_method != RoutingMethod.FALLBACK and not decision.degraded_stages:
+            self.decision_cache.put(fingerprint, decision)
+        return decision
+    
+    async def _centroid_decide(self, ticket_id: str, ticket_text: str, fingerprint: str,
+                               match: Optional[CentroidMatch], start_time: float) -> Optional[RoutingDecision]:
+        """Step 0b: route by department centroid if similarity, margin and accuracy all clear their thresholds."""
+        if match is None:
+            return None
+        if match.similarity < self.centroid_similarity_threshold or match.margin < self.centroid_margin:
+            return None
+        historical_accuracy = await self.accuracy_tracker.get_department_accuracy(match.department)
+        if historical_accuracy < self.accuracy_threshold:
+            return None
+        
+        decision = RoutingDecision(
+            ticket_id=ticket_id,
+            recommended_department=match.department,
+            confidence_score=min(match.similarity, 0.99),
+            routing_method=RoutingMethod.CENTROID,
+            
+            reasoning=f"Centroid route: similarity {match.similarity:.3f} to {match.department} "
+                      f"({match.samples} historical tickets), margin {match.margin:.3f} "
+                      f"over the next department, accuracy {historical_accuracy:.1%}",
+            top_similarity_score=match.similarity,
+            historical_accuracy=historical_accuracy,
+            cache_hit=True,
+            
+            processing_time_ms=(time.time() - start_time) * 1000,
+            timestamp=datetime.now(UTC),
+            
+            similar_tickets_found=0,
+            confidence_threshold_met=True,
+            accuracy_threshold_met=True,
+            top_match_department=match.department
+        )
+        
+        self.routing_logger.log_routing_decision(decision, ticket_text)
+        self.performance_monitor.record_routing_decision(decision)
+        self.decision_cache.put(fingerprint, decision)
+        return decision
+    
+    def load_department_centroids(self, embeddings: np.ndarray, departments: Sequence[str]) -> None:
+        """
+        Build the department centroid stage from historical embeddings.
+        
+        Args:
+            embeddings: (n, dimension) embeddings of historical tickets
+            departments: Actual department of each ticket
+        """
+        self.department_centroids.fit(embeddings, departments)
+        logger.info(f"🎯 Department centroids: {self.department_centroids.get_stats()}")
+    
+    async def record_outcome(self, ticket_text: str, actual_department: str,
+                             predicted_department: Optional[str] = None) -> None:
+        """
+        Feed back a ticket's confirmed department.
+        
+        Updates the department centroids incrementally and, when the routed
+        department is given, the department's historical accuracy.
+        
+        Args:
+            ticket_text: Ticket text
+            actual_department: Department that resolved the ticket
+            predicted_department: Department the ticket was routed to
+        """
+        self.department_centroids.add(self.similarity_search.generate_mock_embedding(ticket_text), actual_department)
+        if predicted_department is not None:
+            await self.accuracy_tracker.update_accuracy(
+                predicted_department, correct=predicted_department == actual_department
+            )
+    
+    async def _historical_accuracy(self, top_match) -> float:
+        """Step 2: historical accuracy for the top match's department"""
+        if top_match.actual_department:
+            return await self.accuracy_tracker.get_department_accuracy(top_match.actual_department)
+        return 0.0
+    
+    def _use_cached_route(self, top_match, historical_accuracy: float) -> bool:
+        """Step 3: both the similarity and accuracy thresholds are met"""
+        confidence_met = top_match.similarity_score >= self.confidence_threshold
+        accuracy_met = historical_accuracy >= self.accuracy_threshold
+        return confidence_met and accuracy_met
+    
+    def _cache_generation(self) -> tuple:
+        """Routing inputs a cached decision depends on."""
+        return (self.accuracy_tracker.version, self.confidence_threshold, self.accuracy_threshold,
+                self.department_centroids.version, self.centroid_similarity_threshold, self.centroid_margin)
+    
+    def _exact_cache_routing(self, ticket_id: str, ticket_text: str,
+                             cached: RoutingDecision, start_time: float) -> RoutingDecision:
+        """Reuse the decision made for an exact duplicate ticket"""
+        
+        processing_time = (time.time() - start_time) * 1000
+        
+        decision = replace(
+            cached,
+            ticket_id=ticket_id,
+            routing_method=RoutingMethod.EXACT_CACHE,
+            reasoning=f"Exact duplicate of {cached.ticket_id} ({cached.routing_method.value}): {cached.reasoning}",
+            cache_hit=True,
+            processing_time_ms=processing_time,
+            timestamp=datetime.now(UTC),
+            prompt_tokens=None
+        )
+        
+        # Log and track decision
+        self.routing_logger.log_routing_decision(decision, ticket_text)
+        self.performance_monitor.record_routing_decision(decision)
+        
+        return decision
     
     async def _cached_routing(self, ticket_id: str, ticket_text: str, 
-                            top_match, historical_accuracy: float, start_time: float) -> RoutingDecision:
+                            top_match, historical_accuracy: float, start_time: float,
+                            deadline: Optional[RequestDeadline] = None) -> RoutingDecision:
         """Handle cached routing decision"""
         
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -409,7 +1676,9 @@ class ConfidenceBasedRouter:
             
             similar_tickets_found=1,
             confidence_threshold_met=True,
-            accuracy_threshold_met=True
+            accuracy_threshold_met=True,
+            top_match_department=top_match.actual_department,
+            degraded_stages=self._degraded_stages(deadline)
         )
         
         # Log and track decision
@@ -420,11 +1689,42 @@ class ConfidenceBasedRouter:
     
     async def _rag_llm_routing(self, ticket_id: str, ticket_text: str,
                              similar_tickets: List, historical_accuracy: float, 
-                             start_time: float) -> RoutingDecision:
+                             start_time: float, recommendation=None,
+                             priority: Optional[str] = None,
+                             deadline: Optional[RequestDeadline] = None) -> RoutingDecision:
         """Handle RAG-enhanced LLM routing"""
         
-        # Use existing RAG system for enhanced analysis
-        rag_result = await self.rag_system.route_ticket_intelligently(ticket_text)
+        # Use existing RAG system for enhanced analysis, reusing the router's retrieval
+        if deadline is None:
+            rag_result = await self.rag_system.route_ticket_intelligently(
+                ticket_text, historical_matches=similar_tickets, recommendation=recommendation, priority=priority
+            )
+        else:
+            plan = deadline.plan("llm")
+            if plan == STAGE_SKIP:
+                return await self._fallback_routing(ticket_id, ticket_text, start_time,
+                                                    "SLA budget spent before the LLM call", deadline)
+            variant = "cheap" if plan == STAGE_DEGRADE else "full"
+            try:
+                with deadline.measure("llm", variant):
+                    rag_result = await asyncio.wait_for(
+                        self.rag_system.route_ticket_intelligently(
+                            ticket_text, historical_matches=similar_tickets, recommendation=recommendation,
+                            priority=priority, labels_only=plan == STAGE_DEGRADE
+                        ),
+                        timeout=deadline.remaining_seconds()
+                    )
+            except TimeoutError:
+                deadline.record("llm", STAGE_SKIP, "timed out at the SLA deadline")
+                return await self._fallback_routing(ticket_id, ticket_text, start_time,
+                                                    "LLM call timed out at the SLA deadline", deadline)
+        
+        # A failed or unparseable LLM answer comes back as "unknown": route by keyword instead, so the
+        # decision is neither cached nor shared with coalesced waiters and the next duplicate retries the LLM
+        if rag_result["recommended_department"] in ("", "unknown"):
+            return await self._fallback_routing(ticket_id, ticket_text, start_time,
+                                                f"LLM gave no department ({rag_result.get('reasoning', '')})",
+                                                deadline)
         
         processing_time = (time.time() - start_time) * 1000
         
@@ -444,7 +1744,10 @@ class ConfidenceBasedRouter:
             
             similar_tickets_found=len(similar_tickets),
             confidence_threshold_met=False,
-            accuracy_threshold_met=historical_accuracy >= self.accuracy_threshold
+            accuracy_threshold_met=historical_accuracy >= self.accuracy_threshold,
+            prompt_tokens=rag_result.get("prompt_tokens"),
+            top_match_department=similar_tickets[0].actual_department,
+            degraded_stages=self._degraded_stages(deadline)
         )
         
         # Log and track decision
@@ -454,7 +1757,8 @@ class ConfidenceBasedRouter:
         return decision
     
     async def _fallback_routing(self, ticket_id: str, ticket_text: str,
-                              start_time: float, reason: str) -> RoutingDecision:
+                              start_time: float, reason: str,
+                              deadline: Optional[RequestDeadline] = None) -> RoutingDecision:
         """Handle fallback routing when other methods fail"""
         
         processing_time = (time.time() - start_time) * 1000
@@ -478,7 +1782,8 @@ class ConfidenceBasedRouter:
             
             similar_tickets_found=0,
             confidence_threshold_met=False,
-            accuracy_threshold_met=False
+            accuracy_threshold_met=False,
+            degraded_stages=self._degraded_stages(deadline)
         )
         
         # Log and track decision
@@ -487,6 +1792,14 @@ class ConfidenceBasedRouter:
         
         return decision
     
+    def _degraded_stages(self, deadline: Optional[RequestDeadline]) -> List[Dict[str, Any]]:
+        """Snapshot of the deadline's degraded/skipped stages for a decision (counted once per decision)."""
+        if deadline is None or not deadline.skips:
+            return []
+        for skip in deadline.skips:
+            self.deadline_stats["degraded" if skip["action"] == STAGE_DEGRADE else "skipped"] += 1
+        return list(deadline.skips)
+    
     def _parse_confidence(self, confidence_str: str) -> float:
         """Convert confidence string to numeric score"""
         confidence_map = {"high": 0.90, "medium": 0.75, "low": 0.60}
@@ -509,7 +1822,40 @@ class ConfidenceBasedRouter:
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get comprehensive performance metrics"""
-        return self.performance_monitor.get_performance_summary()
+        metrics = self.performance_monitor.get_performance_summary()
+        metrics["retrieval_stages"] = self.similarity_search.get_stage_timing()
+        metrics["decision_cache"] = self.decision_cache.get_stats()
+        metrics["routing_log"] = self.routing_logger.get_stats()
+        metrics["accuracy_store"] = self.accuracy_tracker.get_stats()
+        metrics["batch_stages"] = self.get_batch_stage_throughput()
+        metrics["coalescing"] = {**self.coalescing_stats, "in_flight": len(self._in_flight)}
+        metrics["department_centroids"] = self.department_centroids.get_stats()
+        metrics["prompt_tokens"] = self.rag_system.prompt_builder.get_stats()
+        metrics["deadlines"] = {**self.deadline_stats, "budget_seconds": self.sla_budget_seconds,
+                                "expected_stage_ms": self.stage_costs.get_stats()}
+        scheduler = self.llm_scheduler
+        if scheduler is not None:
+            metrics["llm_scheduler"] = scheduler.get_stats()
+        return metrics
+    
+    @property
+    def llm_scheduler(self):
+        """Shared LLMScheduler of the RAG-LLM classifier, if any."""
+        return getattr(self.rag_system.llm_classifier, "scheduler", None)
+    
+    def export_prometheus(self) -> str:
+        """Prometheus text exposition of routing counters, cache-hit ratios, latency percentiles and LLM queue waits."""
+        text = self.performance_monitor.export_prometheus()
+        if self.llm_scheduler is not None:
+            text += self.llm_scheduler.export_prometheus()
+        return text
+    
+    async def close(self):
+        """Release the shared vector and LLM connections and drain the routing log and accuracy store at shutdown."""
+        await self.similarity_search.close()
+        await self.rag_system.llm_classifier.close()
+        await asyncio.to_thread(self.routing_logger.close)
+        await asyncio.to_thread(self.accuracy_tracker.close)
 
 
 async def test_confidence_routing_system():
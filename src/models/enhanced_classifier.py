@@ -20,8 +20,9 @@ import logging
 import time
 import json
 from pathlib import Path
+from contextlib import nullcontext
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 # External libraries
 import google.generativeai as genai
@@ -110,6 +111,7 @@ class EnhancedClassificationResult:
     # NEW: Quality assurance fields
     routing_override_history: List[str] = None  # Track manual overrides
     confidence_threshold_met: bool = True  # Met required confidence levels
+    gemini_failed: bool = False  # Gemini call or response parsing failed; Gemini fields are fallback values
     
     def __post_init__(self):
         """Post-initialization processing for derived fields."""
@@ -140,8 +142,25 @@ class EnhancedClassificationResult:
 class GeminiEnhancedClassifier:
     """Enhanced ticket classifier using Google Gemini LLM."""
     
-    def __init__(self, api_key: Optional[str] = None, traditional_model_path: str = "models/telco_ticket_classifier.pkl"):
-        """Initialize the enhanced classifier."""
+    # Reasoning prefixes of the fallback values _query_gemini returns when Gemini fails
+    GEMINI_PARSE_ERROR = "Failed to parse LLM response"
+    GEMINI_API_ERROR = "API error occurred"
+    
+    def __init__(self, api_key: Optional[str] = None, traditional_model_path: str = "models/telco_ticket_classifier.pkl",
+                 scheduler=None, duplicate_clusters=None):
+        """Initialize the enhanced classifier.
+        
+        Args:
+            api_key: Google API key (defaults to GOOGLE_API_KEY)
+            traditional_model_path: Pickled traditional ensemble
+            scheduler: Shared LLMScheduler; Gemini calls then wait for a "gemini"
+                slot in priority order (None = call immediately)
+            duplicate_clusters: NearDuplicateClusters; near-duplicates of a recent
+                ticket (e.g. an outage burst) reuse its classification instead of
+                calling Gemini (None = classify every ticket)
+        """
+        self.scheduler = scheduler
+        self.duplicate_clusters = duplicate_clusters
         # Get API key from parameter, environment variable, or fail
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         if not self.api_key:
@@ -311,9 +330,13 @@ RESPONSE FORMAT (JSON):
 """
         return prompt
     
-    def _query_gemini(self, ticket_text: str) -> Tuple[str, float, str, str, float, str, bool, float, float, str, str, str, bool]:
+    def _query_gemini(self, ticket_text: str, priority: Optional[str] = None) -> Tuple[str, float, str, str, float, str, bool, float, float, str, str, str, bool]:
         """Query Gemini for classification, sentiment analysis, and departmental routing.
         
+        Args:
+            ticket_text: Ticket to classify
+            priority: Preliminary priority class, orders the call in the scheduler
+        
         Returns:
             Tuple of (category, confidence, reasoning, department_allocation, routing_confidence, 
                      routing_reasoning, dispute_detected, dispute_confidence, sentiment_score, 
@@ -321,7 +344,9 @@ RESPONSE FORMAT (JSON):
         """
         try:
             prompt = self._create_gemini_prompt(ticket_text)
-            response = self.model.generate_content(prompt)
+            slot = self.scheduler.slot_sync("gemini", priority) if self.scheduler is not None else nullcontext()
+            with slot:
+                response = self.model.generate_content(prompt)
             
             # Parse JSON response
             response_text = response.text.strip()
@@ -423,12 +448,12 @@ RESPONSE FORMAT (JSON):
             
         except json.JSONDecodeError as e:
             logger.warning(f"Failed to parse Gemini response as JSON: {e}")
-            return ("OTHER", 0.2, f"Failed to parse LLM response: {str(e)}", "BILLING", 0.3, 
+            return ("OTHER", 0.2, f"{self.GEMINI_PARSE_ERROR}: {str(e)}", "BILLING", 0.3, 
                    "Error in routing analysis", False, 0.0, 0.0, "NEUTRAL", "Error in sentiment analysis", 
                    "P3_STANDARD", False)
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
-            return ("OTHER", 0.1, f"API error occurred: {str(e)}", "BILLING", 0.2, 
+            return ("OTHER", 0.1, f"{self.GEMINI_API_ERROR}: {str(e)}", "BILLING", 0.2, 
                    "Error in routing analysis", False, 0.0, 0.0, "NEUTRAL", "Error in sentiment analysis", 
                    "P3_STANDARD", False)
     
@@ -536,8 +561,40 @@ RESPONSE FORMAT (JSON):
         dept_teams = team_mapping.get(department, {"default": "General Support"})
         return dept_teams.get(category, dept_teams.get("default", "General Support"))
     
-    def classify_ticket(self, ticket_text: str) -> EnhancedClassificationResult:
-        """Enhanced ticket classification with reasoning and sentiment analysis."""
+    def classify_ticket(self, ticket_text: str, priority: Optional[str] = None) -> EnhancedClassificationResult:
+        """Enhanced ticket classification with reasoning and sentiment analysis.
+        
+        Args:
+            ticket_text: Ticket to classify
+            priority: Preliminary priority class (e.g. llm_scheduler.priority_for on the
+                rules-engine urgency); orders the Gemini call when a scheduler is set
+        """
+        if self.duplicate_clusters is None:
+            return self._classify_ticket(ticket_text, priority)
+        
+        start_time = time.time()
+        match = self.duplicate_clusters.attach(ticket_text)
+        if match.result is not None:
+            logger.info(f"🧲 Near-duplicate of cluster {match.cluster.cluster_id} "
+                        f"(similarity {match.similarity:.2f}), reusing its classification")
+            return replace(
+                match.result,
+                reasoning=f"Near-duplicate of cluster {match.cluster.cluster_id} representative "
+                          f"(similarity {match.similarity:.0%}): {match.result.reasoning}",
+                processing_time_ms=(time.time() - start_time) * 1000,
+                routing_override_history=[]
+            )
+        
+        result = None
+        try:
+            result = self._classify_ticket(ticket_text, priority)
+            return result
+        finally:
+            # A Gemini error fallback is not shared: the cluster is dropped and members classify themselves
+            self.duplicate_clusters.resolve(match, None if result is None or result.gemini_failed else result)
+    
+    def _classify_ticket(self, ticket_text: str, priority: Optional[str] = None) -> EnhancedClassificationResult:
+        """Classify one ticket with the traditional model and Gemini (see classify_ticket)."""
         start_time = time.time()
         
         # Get traditional model prediction (if available)
@@ -565,7 +622,8 @@ RESPONSE FORMAT (JSON):
         # Get Gemini prediction with sentiment analysis and departmental routing
         (gemini_pred, gemini_conf, reasoning, department_allocation, routing_confidence, 
          routing_reasoning, dispute_detected, dispute_confidence, sentiment_score, 
-         sentiment_label, sentiment_reasoning, priority_level, escalation_required) = self._query_gemini(ticket_text)
+         sentiment_label, sentiment_reasoning, priority_level, escalation_required) = self._query_gemini(ticket_text, priority)
+        gemini_failed = reasoning.startswith((self.GEMINI_PARSE_ERROR, self.GEMINI_API_ERROR))
         
         # Ensemble prediction
         final_pred, final_conf = self._ensemble_prediction(
@@ -724,7 +782,8 @@ RESPONSE FORMAT (JSON):
             escalation_triggered=False,
             # SLA fields (calculated in __post_init__)
             sla_response_time_hours=36,  # Will be updated by priority
-            sla_warning_triggered=False
+            sla_warning_triggered=False,
+            gemini_failed=gemini_failed
         )
     
     def batch_classify(self, ticket_texts: List[str]) -> List[EnhancedClassificationResult]:
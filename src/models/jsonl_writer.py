@@ -0,0 +1,274 @@
+"""
+Background JSONL Writer
+
+BufferedJsonlWriter appends dict entries to a JSONL file from a daemon
+thread, so producers (the routing coroutines) never wait on disk I/O:
+
+- Entries are batched and flushed when a batch fills or the flush interval
+  passes
+- Closed segments are rotated by size or age, gzipped and pruned to
+  `backup_count`
+- A full queue either drops the entry ("drop") or waits for space
+  ("block"; coroutines wait with awrite() so the event loop keeps running)
+
+Used by the router's RoutingLogger for routing_decisions.jsonl.
+
+Usage:
+    writer = BufferedJsonlWriter("routing_decisions.jsonl", backpressure="drop")
+    writer.write({"event_type": "routing_decision", ...})
+    writer.close()
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _event_loop_running() -> bool:
+    """Whether the calling thread is inside a running asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class BufferedJsonlWriter:
+    """
+    Background JSONL writer with batching, rotation and backpressure.
+
+    Producers enqueue dicts and return immediately; a daemon thread
+    serializes them and appends batches to the file, flushing when a batch
+    fills or the flush interval passes. Closed segments are rotated by size
+    or age and gzipped.
+
+    Backpressure when the queue is full:
+    - "drop": discard the entry and count it (never blocks the caller)
+    - "block": wait up to `block_timeout_seconds` for space, then drop.
+      write() only waits when no event loop is running in the calling
+      thread (inside one it behaves like "drop", so the loop never stalls);
+      coroutines that want to wait use awrite(), which yields while waiting
+    """
+
+    BACKPRESSURE_POLICIES = ("drop", "block")
+    BLOCK_POLL_SECONDS = 0.005
+
+    def __init__(self,
+                 path: str,
+                 max_queue_size: int = 10000,
+                 batch_size: int = 200,
+                 flush_interval_seconds: float = 1.0,
+                 max_bytes: int = 50 * 1024 * 1024,
+                 rotate_interval_seconds: Optional[float] = None,
+                 backup_count: int = 10,
+                 backpressure: str = "drop",
+                 block_timeout_seconds: float = 1.0):
+        """
+        Initialize and start the writer thread.
+
+        Args:
+            path: JSONL file to append to
+            max_queue_size: Entries buffered before backpressure applies
+            batch_size: Entries written per batch
+            flush_interval_seconds: Maximum delay before buffered entries hit disk
+            max_bytes: Rotate once the active file reaches this size (0 disables)
+            rotate_interval_seconds: Rotate segments older than this (None disables)
+            backup_count: Gzipped segments kept (oldest deleted first)
+            backpressure: "drop" or "block" when the queue is full
+            block_timeout_seconds: Longest a "block" producer waits for space
+        """
+        if backpressure not in self.BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure must be one of {self.BACKPRESSURE_POLICIES}, got {backpressure!r}")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_bytes = max_bytes
+        self.rotate_interval_seconds = rotate_interval_seconds
+        self.backup_count = backup_count
+        self.backpressure = backpressure
+        self.block_timeout_seconds = block_timeout_seconds
+
+        self._queue: queue.Queue[Optional[Dict[str, Any]]] = queue.Queue(maxsize=max_queue_size)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "batches": 0, "rotations": 0, "write_errors": 0}
+
+        self._file = None
+        self._segment_started = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"jsonl-writer:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def write(self, entry: Dict[str, Any]) -> bool:
+        """
+        Enqueue an entry for writing.
+
+        Returns:
+            True if queued, False if dropped under backpressure or after close
+        """
+        if self._closed:
+            return self._count_drop()
+
+        try:
+            if self.backpressure == "block" and not _event_loop_running():
+                self._queue.put(entry, timeout=self.block_timeout_seconds)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            return self._count_drop()
+
+        return self._count_enqueued()
+
+    async def awrite(self, entry: Dict[str, Any]) -> bool:
+        """
+        Enqueue an entry from a coroutine.
+
+        Under "block" backpressure, waits up to `block_timeout_seconds` for
+        space by polling with asyncio.sleep, so other tasks keep running.
+
+        Returns:
+            True if queued, False if dropped under backpressure or after close
+        """
+        if self.backpressure != "block":
+            return self.write(entry)
+
+        deadline = time.monotonic() + self.block_timeout_seconds
+        while not self._closed:
+            try:
+                self._queue.put_nowait(entry)
+                return self._count_enqueued()
+            except queue.Full:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(self.BLOCK_POLL_SECONDS, remaining))
+        return self._count_drop()
+
+    def _count_enqueued(self) -> bool:
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+        return True
+
+    def _count_drop(self) -> bool:
+        with self._stats_lock:
+            self.stats["dropped"] += 1
+        return False
+
+    def flush(self) -> None:
+        """Block until every queued entry has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write remaining entries, stop the thread and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and write/drop/rotation counters."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["max_queue_size"] = self._queue.maxsize
+        return stats
+
+    def _run(self) -> None:
+        """Writer thread: collect batches and append them to the file."""
+        running = True
+        while running:
+            try:
+                first = self._queue.get(timeout=self.flush_interval_seconds)
+            except queue.Empty:
+                self._maybe_rotate()
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+            entries = [entry for entry in batch if entry is not None]
+
+            try:
+                if entries:
+                    self._write_batch(entries)
+            except Exception as e:
+                logger.error(f"JSONL write to {self.path} failed ({len(entries)} entries): {e}")
+                with self._stats_lock:
+                    self.stats["write_errors"] += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, entries: List[Dict[str, Any]]) -> None:
+        self._maybe_rotate()
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+
+        self._file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._file.flush()
+
+        with self._stats_lock:
+            self.stats["written"] += len(entries)
+            self.stats["batches"] += 1
+
+    def _maybe_rotate(self) -> None:
+        """Rotate the active segment if it is too large or too old."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            self._segment_started = time.time()
+            return
+
+        too_big = self.max_bytes and os.path.getsize(self.path) >= self.max_bytes
+        too_old = (self.rotate_interval_seconds is not None and
+                   time.time() - self._segment_started >= self.rotate_interval_seconds)
+        if too_big or too_old:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Close the active segment, gzip it and prune old segments."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+        segment = f"{self.path}.{stamp}-{self.stats['rotations']:06d}"
+        os.replace(self.path, segment)
+        with open(segment, "rb") as source, gzip.open(f"{segment}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(segment)
+
+        self._segment_started = time.time()
+        with self._stats_lock:
+            self.stats["rotations"] += 1
+
+        self._prune_segments()
+
+    def _prune_segments(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        prefix = os.path.basename(self.path) + "."
+        segments = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith(".gz")
+        )
+        for name in segments[:max(0, len(segments) - self.backup_count)]:
+            os.remove(os.path.join(directory, name))
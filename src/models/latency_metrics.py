@@ -0,0 +1,190 @@
+"""
+Latency Metrics Shared by the Routing Components
+
+- LatencyRingBuffer: the most recent latencies with an O(1) running mean
+- WindowedLatencyHistogram: HDR-style log-bucket histogram over rolling
+  1m/5m/1h windows, for p50/p90/p99 without keeping every sample
+- prometheus_percentile_lines: renders a histogram's window percentiles as
+  Prometheus gauge lines
+
+Used by the router's PerformanceMonitor, the LLM scheduler's queue waits
+and the routing pipeline's per-stage latencies. Only numpy is needed, so
+importing this module does not pull in any routing stage.
+
+Usage:
+    histogram = WindowedLatencyHistogram()
+    histogram.record(elapsed_ms)
+    histogram.window_percentiles()   # {"1m": {"count", "p50", "p90", "p99"}, "5m": ..., "1h": ...}
+"""
+
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+# Percentile keys reported by WindowedLatencyHistogram.percentiles and exported to Prometheus
+PERCENTILE_KEYS = ("p50", "p90", "p99")
+
+
+class LatencyRingBuffer:
+    """
+    Fixed-size ring of the most recent latencies with an O(1) running mean.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize ring buffer.
+
+        Args:
+            capacity: Number of most recent samples retained
+        """
+        self.capacity = capacity
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def append(self, value: float) -> None:
+        """Add a sample, overwriting the oldest once full."""
+        if self._count == self.capacity:
+            self._sum -= self._values[self._next]
+        else:
+            self._count += 1
+        self._values[self._next] = value
+        self._sum += value
+        self._next = (self._next + 1) % self.capacity
+
+    def mean(self) -> float:
+        """Mean of retained samples."""
+        return self._sum / self._count if self._count else 0.0
+
+    def values(self) -> np.ndarray:
+        """Retained samples, oldest first."""
+        if self._count < self.capacity:
+            return self._values[:self._count].copy()
+        return np.roll(self._values, -self._next)
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class WindowedLatencyHistogram:
+    """
+    HDR-style latency histogram over rolling time windows.
+
+    Latencies fall into log-spaced buckets (~8% relative resolution between
+    `min_ms` and `max_ms`); counts are kept per time slot in a ring covering
+    the longest window. Recording is O(1) (a slot is zeroed when it is
+    reused); percentiles sum the slots inside the requested window.
+    """
+
+    # Rolling windows reported by default (label -> seconds)
+    WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+    def __init__(self,
+                 slot_seconds: int = 10,
+                 horizon_seconds: int = 3600,
+                 min_ms: float = 0.01,
+                 max_ms: float = 100_000.0,
+                 buckets: int = 200,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize histogram.
+
+        Args:
+            slot_seconds: Time resolution of the rolling windows
+            horizon_seconds: Longest window that can be queried
+            min_ms: Lower bound of the first bucket
+            max_ms: Upper bound of the last bucket
+            buckets: Number of log-spaced latency buckets
+            clock: Wall-clock time source (injectable for tests)
+        """
+        self.slot_seconds = slot_seconds
+        self.slots = max(1, horizon_seconds // slot_seconds)
+        self._clock = clock
+        self._log_min = np.log(min_ms)
+        self._log_step = (np.log(max_ms) - self._log_min) / buckets
+        self._buckets = buckets
+        # Upper edge of each bucket, used as the reported percentile value
+        self.bucket_upper_ms = np.exp(self._log_min + self._log_step * np.arange(1, buckets + 1))
+        self._counts = np.zeros((self.slots, buckets), dtype=np.int64)
+        self._slot_epoch = np.full(self.slots, -1, dtype=np.int64)
+        self.total_count = 0
+        self.total_sum_ms = 0.0
+
+    def _bucket(self, value_ms: float) -> int:
+        if value_ms <= 0:
+            return 0
+        index = int((np.log(value_ms) - self._log_min) / self._log_step)
+        return min(max(index, 0), self._buckets - 1)
+
+    def record(self, value_ms: float) -> None:
+        """Count one latency sample in the current time slot."""
+        epoch = int(self._clock() // self.slot_seconds)
+        slot = epoch % self.slots
+        if self._slot_epoch[slot] != epoch:
+            self._counts[slot] = 0
+            self._slot_epoch[slot] = epoch
+        self._counts[slot, self._bucket(value_ms)] += 1
+        self.total_count += 1
+        self.total_sum_ms += value_ms
+
+    def window_counts(self, window_seconds: int) -> np.ndarray:
+        """Bucket counts for samples recorded within the last `window_seconds`."""
+        current = int(self._clock() // self.slot_seconds)
+        oldest = current - max(1, window_seconds // self.slot_seconds) + 1
+        live = (self._slot_epoch >= oldest) & (self._slot_epoch <= current)
+        return self._counts[live].sum(axis=0)
+
+    def percentiles(self, window_seconds: int, quantiles=(0.5, 0.9, 0.99)) -> Dict[str, Any]:
+        """
+        Latency percentiles within a rolling window.
+
+        Returns:
+            {"count": n, "p50": ms, "p90": ms, "p99": ms} (percentiles None when empty)
+        """
+        counts = self.window_counts(window_seconds)
+        total = int(counts.sum())
+        result: Dict[str, Any] = {"count": total}
+        cumulative = np.cumsum(counts)
+        for q in quantiles:
+            key = f"p{round(q * 100, 6):g}"
+            if total == 0:
+                result[key] = None
+            else:
+                index = int(np.searchsorted(cumulative, q * total, side="left"))
+                result[key] = float(self.bucket_upper_ms[min(index, self._buckets - 1)])
+        return result
+
+    def window_percentiles(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Percentiles for each of WINDOWS.
+
+        Returns:
+            {window: {"count", "p50", "p90", "p99"}}
+        """
+        return {label: self.percentiles(seconds) for label, seconds in self.WINDOWS.items()}
+
+
+def prometheus_percentile_lines(metric: str, labels: Dict[str, str],
+                                windows: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Prometheus gauge lines for one series' rolling-window percentiles.
+
+    Args:
+        metric: Full metric name (e.g. "routing_latency_ms")
+        labels: Labels identifying the series, rendered before window and quantile
+        windows: {window: {"p50", "p90", "p99"}} as returned by window_percentiles
+
+    Returns:
+        One line per window and quantile; empty windows are left out
+    """
+    label_text = "".join(f'{name}="{value}",' for name, value in labels.items())
+    lines = []
+    for window, stats in windows.items():
+        for key in PERCENTILE_KEYS:
+            if stats[key] is None:
+                continue
+            quantile = int(key[1:]) / 100
+            lines.append(f'{metric}{{{label_text}window="{window}",quantile="{quantile:g}"}} {stats[key]:.3f}')
+    return lines
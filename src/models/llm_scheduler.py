@@ -0,0 +1,346 @@
+"""
+Priority-Aware LLM Work Scheduler
+
+LLM calls (OpenAI in LLMClassifier, Gemini in GeminiEnhancedClassifier,
+Ollama in OpenSourceLLM) share one scheduler instead of being issued
+first-come-first-served. Each provider has a fixed number of concurrency
+slots; when they are all busy, waiting requests are granted in order of:
+
+1. Priority class (P0_IMMEDIATE > P1_HIGH > P2_MEDIUM > P3_STANDARD), taken
+   from the preliminary priority or mapped from the rules-engine urgency
+2. Deadline (earliest first): enqueue time + the class's SLA response time
+   from BusinessRulesConfig.get_priority_sla, or an explicit deadline
+3. Arrival order
+
+Anti-starvation: a request is promoted one priority class for every
+`aging_seconds` it has waited (past P0 as well), so a steady stream of
+urgent work cannot hold standard tickets back indefinitely.
+
+Queue wait times per priority class are kept in rolling-window histograms
+and exported with get_stats() / export_prometheus().
+
+Usage:
+    scheduler = LLMScheduler(LLMSchedulerConfig(provider_slots={"openai": 16}))
+    async with scheduler.slot("openai", priority_for(urgency="Critical")):
+        response = await client.chat.completions.create(...)
+
+    with scheduler.slot_sync("gemini", "P1_HIGH"):   # From synchronous code
+        response = model.generate_content(prompt)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src.models.business_rules_config import BusinessRulesConfig
+from src.models.latency_metrics import WindowedLatencyHistogram, prometheus_percentile_lines
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+PRIORITY_CLASSES = ("P0_IMMEDIATE", "P1_HIGH", "P2_MEDIUM", "P3_STANDARD")
+DEFAULT_PRIORITY = "P3_STANDARD"
+
+# Rules-engine urgency → priority class
+URGENCY_PRIORITIES = {
+    "Critical": "P0_IMMEDIATE",
+    "High": "P1_HIGH",
+    "Medium": "P2_MEDIUM",
+    "Low": "P3_STANDARD",
+}
+
+
+def priority_for(urgency: Optional[str] = None, priority: Optional[str] = None) -> str:
+    """
+    Priority class for a ticket.
+
+    Args:
+        urgency: Rules-engine urgency (Critical/High/Medium/Low)
+        priority: Preliminary priority code; wins over `urgency` when valid
+
+    Returns:
+        One of PRIORITY_CLASSES (DEFAULT_PRIORITY when neither is known)
+    """
+    if priority in PRIORITY_CLASSES:
+        return priority
+    if urgency:
+        return URGENCY_PRIORITIES.get(urgency.strip().capitalize(), DEFAULT_PRIORITY)
+    return DEFAULT_PRIORITY
+
+
+@dataclass
+class LLMSchedulerConfig:
+    """Concurrency slots per provider and anti-starvation settings"""
+    provider_slots: Dict[str, int] = field(default_factory=lambda: {"openai": 16, "gemini": 4, "ollama": 2})
+    default_slots: int = 4          # Slots for providers not listed above
+    aging_seconds: float = 30.0     # Queue wait that promotes a request one priority class
+
+
+class _Waiter:
+    """A queued request for a provider slot."""
+    __slots__ = ("provider", "priority", "rank", "deadline", "enqueued_at", "seq", "grant", "granted", "cancelled")
+
+    def __init__(self, provider: str, priority: str, deadline: float, enqueued_at: float, seq: int,
+                 grant: Callable[[], None]):
+        self.provider = provider
+        self.priority = priority
+        self.rank = PRIORITY_CLASSES.index(priority)
+        self.deadline = deadline
+        self.enqueued_at = enqueued_at
+        self.seq = seq
+        self.grant = grant
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class _ProviderQueue:
+    """Slots and per-priority waiting heaps (earliest deadline first) of one provider."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.in_flight = 0
+        self.heaps: List[List[_Waiter]] = [[] for _ in PRIORITY_CLASSES]
+        self.queued = 0
+
+
+class LLMScheduler:
+    """
+    Shared priority scheduler for LLM calls across providers.
+
+    Thread-safe: asynchronous callers (any event loop) and synchronous
+    callers (threads) can share one scheduler and one provider's slots.
+    """
+
+    def __init__(self,
+                 config: Optional[LLMSchedulerConfig] = None,
+                 business_rules: Optional[BusinessRulesConfig] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize scheduler.
+
+        Args:
+            config: Slots and aging settings (defaults to LLMSchedulerConfig())
+            business_rules: Source of the per-priority SLA response times
+            clock: Monotonic time source in seconds (injectable for tests)
+        """
+        self.config = config or LLMSchedulerConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._providers: Dict[str, _ProviderQueue] = {}
+        self._seq = itertools.count()
+
+        rules = business_rules or BusinessRulesConfig()
+        self.sla_seconds = {
+            priority: float(rules.get_priority_sla(priority).get("response_hours", 24)) * 3600
+            for priority in PRIORITY_CLASSES
+        }
+
+        self.wait_histograms = {priority: WindowedLatencyHistogram() for priority in PRIORITY_CLASSES}
+        self.stats = {
+            priority: {"granted": 0, "promoted": 0, "deadline_missed": 0, "max_wait_ms": 0.0}
+            for priority in PRIORITY_CLASSES
+        }
+
+    def _queue(self, provider: str) -> _ProviderQueue:
+        queue = self._providers.get(provider)
+        if queue is None:
+            slots = self.config.provider_slots.get(provider, self.config.default_slots)
+            queue = self._providers[provider] = _ProviderQueue(max(1, slots))
+        return queue
+
+    def _enqueue(self, provider: str, priority: str, deadline: Optional[float],
+                 grant: Callable[[], None]) -> _Waiter:
+        """Queue a request and dispatch; the waiter may be granted before this returns."""
+        priority = priority_for(priority=priority)
+        now = self._clock()
+        waiter = _Waiter(provider, priority,
+                         deadline if deadline is not None else now + self.sla_seconds[priority],
+                         now, next(self._seq), grant)
+        with self._lock:
+            queue = self._queue(provider)
+            heapq.heappush(queue.heaps[waiter.rank], waiter)
+            queue.queued += 1
+            self._dispatch(queue)
+        return waiter
+
+    def _next_waiter(self, queue: _ProviderQueue, now: float) -> Optional[_Waiter]:
+        """Pop the waiter to grant next: best aged priority class, then deadline, then arrival."""
+        best_key, best_heap = None, None
+        for heap in queue.heaps:
+            while heap and heap[0].cancelled:
+                heapq.heappop(heap)
+            if not heap:
+                continue
+            head = heap[0]
+            # Unclamped, so a long wait also overtakes a steady stream of fresh P0 work
+            promoted_rank = head.rank - int((now - head.enqueued_at) // self.config.aging_seconds)
+            key = (promoted_rank, head.deadline, head.seq)
+            if best_key is None or key < best_key:
+                best_key, best_heap = key, heap
+        return heapq.heappop(best_heap) if best_heap is not None else None
+
+    def _dispatch(self, queue: _ProviderQueue) -> None:
+        """Grant free slots to waiting requests (caller holds the lock)."""
+        now = self._clock()
+        while queue.in_flight < queue.slots:
+            waiter = self._next_waiter(queue, now)
+            if waiter is None:
+                return
+            queue.queued -= 1
+            queue.in_flight += 1
+            waiter.granted = True
+            # Promoted: granted by age while more urgent requests are still waiting
+            promoted = any(not w.cancelled for heap in queue.heaps[:waiter.rank] for w in heap)
+            self._record_grant(waiter, now, promoted)
+            waiter.grant()
+
+    def _record_grant(self, waiter: _Waiter, now: float, promoted: bool) -> None:
+        wait_ms = (now - waiter.enqueued_at) * 1000
+        stats = self.stats[waiter.priority]
+        stats["granted"] += 1
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        if promoted:
+            stats["promoted"] += 1
+        if now > waiter.deadline:
+            stats["deadline_missed"] += 1
+        self.wait_histograms[waiter.priority].record(wait_ms)
+
+    def _withdraw(self, waiter: _Waiter) -> None:
+        """Give up a queued request, or its slot if it was granted in the meantime."""
+        with self._lock:
+            queue = self._providers[waiter.provider]
+            if waiter.granted:
+                queue.in_flight -= 1
+                self._dispatch(queue)
+            elif not waiter.cancelled:
+                waiter.cancelled = True
+                queue.queued -= 1
+
+    def release(self, provider: str) -> None:
+        """Free one slot of `provider` and grant it to the next waiting request."""
+        with self._lock:
+            queue = self._providers[provider]
+            queue.in_flight -= 1
+            self._dispatch(queue)
+
+    async def acquire(self, provider: str, priority: str = DEFAULT_PRIORITY,
+                      deadline: Optional[float] = None) -> None:
+        """
+        Wait for a slot of `provider` (release it with release()).
+
+        Args:
+            provider: Provider name (e.g. "openai", "gemini", "ollama")
+            priority: Priority class (see priority_for)
+            deadline: Absolute deadline on the scheduler clock (default: now + SLA)
+        """
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enqueue(provider, priority, deadline, grant)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            self._withdraw(waiter)
+            raise
+
+    def acquire_sync(self, provider: str, priority: str = DEFAULT_PRIORITY,
+                     deadline: Optional[float] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block the calling thread until a slot of `provider` is free.
+
+        Returns:
+            True when a slot was acquired, False if `timeout` seconds passed first
+        """
+        granted = threading.Event()
+        waiter = self._enqueue(provider, priority, deadline, granted.set)
+        if granted.wait(timeout):
+            return True
+        self._withdraw(waiter)
+        return False
+
+    @asynccontextmanager
+    async def slot(self, provider: str, priority: str = DEFAULT_PRIORITY, deadline: Optional[float] = None):
+        """Hold one slot of `provider` for the duration of the block."""
+        await self.acquire(provider, priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(provider)
+
+    @contextmanager
+    def slot_sync(self, provider: str, priority: str = DEFAULT_PRIORITY, deadline: Optional[float] = None):
+        """Hold one slot of `provider` for the duration of the block (synchronous callers)."""
+        self.acquire_sync(provider, priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(provider)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Slot usage per provider and queue wait statistics per priority class.
+
+        Returns:
+            {"providers": {name: {"slots", "in_flight", "queued"}},
+             "priorities": {class: {"granted", "promoted", "deadline_missed", "max_wait_ms",
+                                    "wait_ms": {window: {"count", "p50", "p90", "p99"}}}}}
+        """
+        with self._lock:
+            providers = {
+                name: {"slots": queue.slots, "in_flight": queue.in_flight, "queued": queue.queued}
+                for name, queue in self._providers.items()
+            }
+            priorities = {priority: dict(stats) for priority, stats in self.stats.items()}
+        for priority, histogram in self.wait_histograms.items():
+            priorities[priority]["wait_ms"] = histogram.window_percentiles()
+        return {"providers": providers, "priorities": priorities}
+
+    def export_prometheus(self, prefix: str = "llm_scheduler") -> str:
+        """
+        Render scheduler metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Text suitable for serving from a /metrics scrape endpoint
+        """
+        stats = self.get_stats()
+        lines = [
+            f"# HELP {prefix}_queue_wait_ms LLM slot queue wait percentiles per priority class.",
+            f"# TYPE {prefix}_queue_wait_ms gauge",
+        ]
+        for priority, entry in stats["priorities"].items():
+            lines += prometheus_percentile_lines(f"{prefix}_queue_wait_ms", {"priority": priority}, entry["wait_ms"])
+        for name, help_text in (("granted", "LLM slots granted"),
+                                ("promoted", "Requests promoted by queue age"),
+                                ("deadline_missed", "Requests granted after their deadline")):
+            lines += [f"# HELP {prefix}_{name}_total {help_text} per priority class.",
+                      f"# TYPE {prefix}_{name}_total counter"]
+            for priority, entry in stats["priorities"].items():
+                lines.append(f'{prefix}_{name}_total{{priority="{priority}"}} {entry[name]}')
+        lines += [
+            f"# HELP {prefix}_in_flight LLM calls holding a slot per provider.",
+            f"# TYPE {prefix}_in_flight gauge",
+        ]
+        for name, entry in stats["providers"].items():
+            lines.append(f'{prefix}_in_flight{{provider="{name}"}} {entry["in_flight"]}')
+        lines += [
+            f"# HELP {prefix}_queued LLM calls waiting for a slot per provider.",
+            f"# TYPE {prefix}_queued gauge",
+        ]
+        for name, entry in stats["providers"].items():
+            lines.append(f'{prefix}_queued{{provider="{name}"}} {entry["queued"]}')
+        return "\n".join(lines) + "\n"
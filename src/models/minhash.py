@@ -0,0 +1,62 @@
+"""
+MinHash Signatures for Near-Duplicate Ticket Text
+
+minhash_signature() estimates the Jaccard similarity of two tickets' word
+sets (or word n-gram shingles): the share of equal positions between two
+signatures approximates it. minhash_bands() splits a signature into LSH
+band keys, so candidates are found by a dictionary lookup instead of a
+comparison with every other ticket.
+
+Shared by the router's near-duplicate request coalescing
+(confidence_based_routing) and the streaming ticket clusters
+(near_duplicate_clusters).
+
+Usage:
+    signature = minhash_signature(ticket_text, shingle_size=2)
+    for band in minhash_bands(signature):
+        candidates.update(index.get(band, ()))
+"""
+
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+# MinHash permutations (multiply-shift hashing) shared by every signature
+MINHASH_PERMUTATIONS = 32
+MINHASH_BAND_ROWS = 4
+_minhash_rng = np.random.default_rng(0x5EED)
+_MINHASH_A = _minhash_rng.integers(1, 2**63, size=MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_MINHASH_B = _minhash_rng.integers(0, 2**63, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash_signature(ticket_text: str, shingle_size: int = 1) -> np.ndarray:
+    """
+    MinHash signature of the ticket's lower-cased word set.
+
+    The share of equal positions between two signatures estimates the
+    Jaccard similarity of the word sets, so punctuation, case and a few
+    added or changed words barely move it. With `shingle_size` > 1 the set
+    is of overlapping word n-grams instead, which also weighs word order.
+    """
+    words = re.findall(r"\w+", ticket_text.lower())
+    if shingle_size > 1 and words:
+        words = [" ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))]
+    words = set(words)
+    if not words:
+        return np.zeros(MINHASH_PERMUTATIONS, dtype=np.uint64)
+    hashes = np.frombuffer(
+        b"".join(hashlib.md5(word.encode(), usedforsecurity=False).digest()[:4] for word in words), dtype=np.uint32
+    ).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        permuted = (hashes[:, None] * _MINHASH_A + _MINHASH_B) >> np.uint64(32)
+    return permuted.min(axis=0)
+
+
+def minhash_bands(signature: np.ndarray) -> List[tuple]:
+    """LSH band keys: signatures agreeing on any whole band are near-duplicate candidates."""
+    return [
+        (start, signature[start:start + MINHASH_BAND_ROWS].tobytes())
+        for start in range(0, len(signature), MINHASH_BAND_ROWS)
+    ]
@@ -35,6 +35,7 @@ class VectorDBProvider(Enum):
     """Available Vector DB providers"""
     PINECONE = "pinecone"
     CHROMADB = "chromadb"
+    LOCAL = "local"
 
 @dataclass
 class ProviderConfig:
@@ -152,6 +153,23 @@ class MultiProviderConfig:
                         "data_sovereignty": "local",
                         "scalability": "development"
                     }
+                },
+                "local": {
+                    "name": "Local In-Process Vector Index",
+                    "enabled": True,
+                    "priority": 3,
+                    "cost_per_query": 0.0,
+                    "avg_response_time_ms": 5,
+                    "availability_check": True,
+                    "fallback_providers": ["chromadb", "pinecone"],
+                    "metadata": {
+                        "index_name": "call-centre-tickets",
+                        "persist_dir": "data/vector_index",
+                        "hnsw_threshold": 20000,
+                        "api_key_required": False,
+                        "data_sovereignty": "local",
+                        "scalability": "single-node"
+                    }
                 }
             },
             "user_preferences": {
@@ -204,6 +222,8 @@ class MultiProviderConfig:
                     self._check_chromadb_availability(config)
                 elif provider_id == "pinecone":
                     self._check_pinecone_availability(config)
+                elif provider_id == "local":
+                    self._check_local_index_availability(config)
             except Exception as e:
                 logger.warning(f"Provider {provider_id} validation failed: {e}")
                 config["enabled"] = False
@@ -244,6 +264,20 @@ class MultiProviderConfig:
         config["metadata"]["status"] = "available" if available else "no_api_key"
         return available
     
+    def _check_local_index_availability(self, config: Dict) -> bool:
+        """Check if the local vector index can persist to its directory"""
+        persist_dir = config["metadata"].get("persist_dir")
+        if persist_dir is None:
+            config["metadata"]["status"] = "available"
+            return True
+        # Nearest existing ancestor must be writable (the index creates the rest)
+        path = Path(persist_dir).resolve()
+        while not path.exists():
+            path = path.parent
+        available = os.access(path, os.W_OK)
+        config["metadata"]["status"] = "available" if available else "not_writable"
+        return available
+    
     def get_available_llm_providers(self) -> List[Dict[str, Any]]:
         """Get list of available LLM providers"""
         providers = []
@@ -300,6 +334,11 @@ class MultiProviderConfig:
         """Get current preferred Vector DB provider"""
         return self.config["user_preferences"]["preferred_vector_db"]
     
+    def get_vector_db_config(self, provider_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get a Vector DB provider's configuration (the preferred one by default)"""
+        provider_id = provider_id or self.get_preferred_vector_db()
+        return self.config.get("vector_db_providers", {}).get(provider_id, {})
+    
     def get_cost_comparison(self) -> Dict[str, Any]:
         """Get cost comparison between providers"""
         llm_costs = {}
@@ -387,6 +426,11 @@ Vector DB Providers:
    - Automatic initialization with sample data
    - Local storage: ./chroma_db/
 
+3. Local index (Local, Free):
+   - Built in (NumPy brute force, HNSW graph for large indexes)
+   - Set preferred_vector_db to "local"
+   - Local storage: ./data/vector_index/
+
 🎯 Quick Start (Zero Cost):
 1. pip install chromadb
 2. ollama pull llama3.2:3b
@@ -27,6 +27,8 @@ try:
     from src.models.chromadb_client import ChromaVectorDB
     from src.models.multi_provider_config import MultiProviderConfig, MultiProviderResult
     from src.vector_db.pinecone_client import PineconeClient
+    from src.vector_db.local_index import LocalIndexConfig, LocalVectorIndex
+    from src.models.rag_intelligent_routing import IntelligentSimilaritySearch
 except ImportError as e:
     logging.warning(f"Import warning: {e}")
 
@@ -111,6 +113,16 @@ class MultiProviderManager:
                 logger.info("✅ Initialized ChromaDB Vector DB provider")
         except Exception as e:
             logger.warning(f"Failed to initialize ChromaDB Vector DB: {e}")
+        
+        # Local in-process index (new)
+        try:
+            local_config = self.config.get_vector_db_config('local')
+            if local_config.get('enabled', False):
+                local_index = LocalVectorIndex(LocalIndexConfig.from_provider_config(local_config))
+                self.providers['vector_db']['local'] = local_index.open()
+                logger.info("✅ Initialized local Vector DB provider")
+        except Exception as e:
+            logger.warning(f"Failed to initialize local Vector DB: {e}")
     
     def classify_ticket(self, 
                        ticket_text: str,
@@ -213,6 +225,20 @@ class MultiProviderManager:
                         'original_ticket': best_result.original_ticket
                     })()
             
+            elif provider == 'local':
+                query = IntelligentSimilaritySearch.generate_mock_embedding(ticket_text, client.config.dimension)
+                results = client.search(query, top_k=3)
+                if results:
+                    best_result = results[0]
+                    metadata = best_result['metadata']
+                    return type('VectorResult', (), {
+                        'department': metadata.get('actual_department') or metadata.get('department'),
+                        'confidence': best_result['score'],
+                        'cost_estimate': 0.0,  # In-process index is free
+                        'provider': provider,
+                        'original_ticket': metadata.get('text', '')
+                    })()
+            
             elif provider == 'pinecone':
                 # Implement Pinecone search (placeholder)
                 # In real implementation, would use existing Pinecone client
@@ -298,7 +324,7 @@ class MultiProviderManager:
             }
         
         # Vector DB provider status
-        for provider_id in ['pinecone', 'chromadb']:
+        for provider_id in ['pinecone', 'chromadb', 'local']:
             available = provider_id in self.providers.get('vector_db', {})
             config = self.config.config.get('vector_db_providers', {}).get(provider_id, {})
             status['vector_db_providers'][provider_id] = {
@@ -343,7 +369,7 @@ class MultiProviderManager:
                     'cost_per_query': llm_data['cost_per_query'] + vdb_data['cost_per_query'],
                     'monthly_cost': monthly_cost,
                     'annual_cost': annual_cost,
-                    'data_sovereignty': 'local' if llm_id == 'ollama' and vdb_id == 'chromadb' else 'cloud'
+                    'data_sovereignty': 'local' if llm_id == 'ollama' and vdb_id in ('chromadb', 'local') else 'cloud'
                 })
         
         # Sort by cost (cheapest first)
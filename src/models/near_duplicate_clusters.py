@@ -0,0 +1,291 @@
+"""
+Streaming Near-Duplicate Ticket Clusters
+
+When a tower goes down, hundreds of NETWORK tickets naming the same suburb
+arrive within minutes, and each would otherwise cost its own Gemini call.
+NearDuplicateClusters groups such bursts as they stream in:
+
+- Ticket text is normalized (lower case, digit runs collapsed so account
+  numbers, times and phone numbers do not count) and shingled into word
+  n-grams; a MinHash signature of the shingle set estimates Jaccard
+  similarity (minhash_signature / minhash_bands from src/models/minhash.py,
+  shared with the router's request coalescing).
+- LSH bands index the representative (first ticket) of every active
+  cluster, so a new ticket is only compared with candidate clusters.
+- A ticket whose estimated similarity to a representative reaches the
+  threshold joins that cluster and reuses the representative's
+  classification; otherwise it starts a new cluster as its representative.
+  Tickets that join while the representative is still being classified
+  wait for its result, up to `wait_seconds`.
+- The window slides: a cluster stays active while tickets keep joining it
+  and expires `window_seconds` after its last member.
+
+Per-cluster stats and the number of LLM calls avoided are reported by
+get_stats() and export_prometheus().
+
+Usage:
+    clusters = NearDuplicateClusters(similarity_threshold=0.7, window_seconds=900)
+    match = clusters.attach(ticket_text)
+    if match.result is None:
+        result = classify(ticket_text)
+        clusters.resolve(match, result)
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.models.minhash import minhash_bands, minhash_signature
+
+logger = logging.getLogger(__name__)
+
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_ticket_text(ticket_text: str) -> str:
+    """Lower-case the ticket, collapse digit runs to 0 and whitespace to single spaces."""
+    return " ".join(_DIGITS.sub("0", ticket_text.lower()).split())
+
+
+@dataclass(eq=False)
+class TicketCluster:
+    """Near-duplicate tickets sharing their representative's classification."""
+    cluster_id: str
+    representative_text: str
+    signature: np.ndarray
+    created_at: float
+    last_seen: float
+    size: int = 1
+    reused: int = 0                     # Members served the representative's result
+    similarity_sum: float = 0.0         # Over joined members, for the mean
+    result: Any = None                  # Representative's classification, once resolved
+    resolved: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        label = getattr(self.result, "predicted_category", None) if self.result is not None else None
+        joined = self.size - 1
+        return {
+            "cluster_id": self.cluster_id,
+            "representative": self.representative_text[:100],
+            "label": label,
+            "size": self.size,
+            "reused": self.reused,
+            "mean_similarity": self.similarity_sum / joined if joined else None,
+            "created_at": self.created_at,
+            "last_seen": self.last_seen,
+            "resolved": self.resolved.is_set(),
+        }
+
+
+@dataclass
+class ClusterMatch:
+    """Outcome of attaching one ticket."""
+    cluster: TicketCluster
+    representative: bool                # This ticket started the cluster and must resolve it
+    similarity: float                   # Estimated Jaccard similarity to the representative (1.0 if representative)
+    result: Any = None                  # Reusable classification (None: classify the ticket)
+
+
+class NearDuplicateClusters:
+    """
+    MinHash LSH clusters of recent tickets over a sliding time window.
+
+    Thread-safe; one instance is shared by every caller of a classifier.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.7, window_seconds: float = 900.0,
+                 shingle_size: int = 2, wait_seconds: float = 15.0, max_clusters: int = 10_000,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize clusters.
+
+        Args:
+            similarity_threshold: Minimum estimated Jaccard similarity to join a cluster
+            window_seconds: A cluster expires this long after its last member
+            shingle_size: Words per shingle
+            wait_seconds: How long a member waits for the representative's result
+            max_clusters: Active clusters kept (least recently joined are evicted first)
+            clock: Time source in seconds (injectable for tests)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.window_seconds = window_seconds
+        self.shingle_size = shingle_size
+        self.wait_seconds = wait_seconds
+        self.max_clusters = max_clusters
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Active clusters by cluster_id, least recently joined first
+        self._clusters: OrderedDict[str, TicketCluster] = OrderedDict()
+        self._bands: Dict[tuple, List[TicketCluster]] = {}
+        self._next_id = 0
+        self.stats = {
+            "tickets": 0,
+            "clusters_created": 0,
+            "joined": 0,
+            "llm_calls_avoided": 0,
+            "waits": 0,
+            "wait_timeouts": 0,
+            "unresolved": 0,            # Representatives that failed; their clusters were dropped
+            "expired": 0,
+        }
+
+    def signature(self, ticket_text: str) -> np.ndarray:
+        """MinHash signature of the normalized, shingled ticket."""
+        return minhash_signature(normalize_ticket_text(ticket_text), self.shingle_size)
+
+    def attach(self, ticket_text: str) -> ClusterMatch:
+        """
+        Join the most similar active cluster, or start a new one.
+
+        Returns:
+            ClusterMatch; when `result` is None the caller classifies the ticket
+            and, if it is the representative, passes the result to resolve()
+        """
+        signature = self.signature(ticket_text)
+        now = self._clock()
+        with self._lock:
+            self.stats["tickets"] += 1
+            self._expire(now)
+            cluster, similarity = self._best_candidate(signature)
+            if cluster is None:
+                cluster = self._create(ticket_text, signature, now)
+                return ClusterMatch(cluster, representative=True, similarity=1.0)
+
+            cluster.size += 1
+            cluster.similarity_sum += similarity
+            cluster.last_seen = now
+            self._clusters.move_to_end(cluster.cluster_id)
+            self.stats["joined"] += 1
+            pending = not cluster.resolved.is_set()
+            if pending:
+                self.stats["waits"] += 1
+
+        if pending and not cluster.resolved.wait(self.wait_seconds):
+            with self._lock:
+                self.stats["wait_timeouts"] += 1
+            return ClusterMatch(cluster, representative=False, similarity=similarity)
+
+        with self._lock:
+            if cluster.result is None:
+                return ClusterMatch(cluster, representative=False, similarity=similarity)
+            cluster.reused += 1
+            self.stats["llm_calls_avoided"] += 1
+        return ClusterMatch(cluster, representative=False, similarity=similarity, result=cluster.result)
+
+    def resolve(self, match: ClusterMatch, result: Any) -> None:
+        """
+        Publish the representative's classification to its cluster.
+
+        Args:
+            match: ClusterMatch from attach() (ignored unless it is the representative)
+            result: Classification to reuse; None (e.g. the call failed) drops the
+                    cluster, so waiting members classify themselves
+        """
+        if not match.representative:
+            return
+        cluster = match.cluster
+        with self._lock:
+            cluster.result = result
+            if result is None:
+                self.stats["unresolved"] += 1
+                self._remove(cluster)
+        cluster.resolved.set()
+
+    def _best_candidate(self, signature: np.ndarray):
+        """Active cluster whose representative is most similar, if it clears the threshold."""
+        best, best_similarity = None, self.similarity_threshold
+        seen = set()
+        for band in minhash_bands(signature):
+            for cluster in self._bands.get(band, ()):
+                if cluster.cluster_id in seen:
+                    continue
+                seen.add(cluster.cluster_id)
+                similarity = float(np.mean(cluster.signature == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = cluster, similarity
+        return best, best_similarity
+
+    def _create(self, ticket_text: str, signature: np.ndarray, now: float) -> TicketCluster:
+        self._next_id += 1
+        cluster = TicketCluster(f"C{self._next_id:06d}", ticket_text, signature, now, now)
+        self._clusters[cluster.cluster_id] = cluster
+        for band in minhash_bands(signature):
+            self._bands.setdefault(band, []).append(cluster)
+        self.stats["clusters_created"] += 1
+        while len(self._clusters) > self.max_clusters:
+            self._remove(next(iter(self._clusters.values())))
+        return cluster
+
+    def _remove(self, cluster: TicketCluster) -> None:
+        if self._clusters.pop(cluster.cluster_id, None) is None:
+            return
+        for band in minhash_bands(cluster.signature):
+            members = self._bands.get(band)
+            if members is None:
+                continue
+            members.remove(cluster)
+            if not members:
+                del self._bands[band]
+
+    def _expire(self, now: float) -> None:
+        """Drop clusters whose last member is older than the window (oldest first)."""
+        cutoff = now - self.window_seconds
+        while self._clusters:
+            oldest = next(iter(self._clusters.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            self._remove(oldest)
+            self.stats["expired"] += 1
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Totals plus the largest active clusters.
+
+        Args:
+            top: Number of clusters to list (by size)
+        """
+        with self._lock:
+            self._expire(self._clock())
+            tickets = self.stats["tickets"]
+            largest = sorted(self._clusters.values(), key=lambda c: c.size, reverse=True)[:top]
+            return {
+                **self.stats,
+                "active_clusters": len(self._clusters),
+                "llm_calls_avoided_rate": self.stats["llm_calls_avoided"] / tickets if tickets else 0.0,
+                "clusters": [cluster.to_dict() for cluster in largest],
+            }
+
+    def export_prometheus(self, prefix: str = "duplicate_clusters") -> str:
+        """
+        Render cluster metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Text suitable for serving from a /metrics scrape endpoint
+        """
+        stats = self.get_stats()
+        lines = []
+        for name, help_text in (("tickets", "Tickets checked for near-duplicates"),
+                                ("joined", "Tickets that joined an active cluster"),
+                                ("llm_calls_avoided", "Classifications reused from a cluster representative"),
+                                ("clusters_created", "Clusters started")):
+            lines += [f"# HELP {prefix}_{name}_total {help_text}.",
+                      f"# TYPE {prefix}_{name}_total counter",
+                      f"{prefix}_{name}_total {stats[name]}"]
+        lines += [f"# HELP {prefix}_active Active clusters in the window.",
+                  f"# TYPE {prefix}_active gauge",
+                  f"{prefix}_active {stats['active_clusters']}",
+                  f"# HELP {prefix}_cluster_size Members of the largest active clusters.",
+                  f"# TYPE {prefix}_cluster_size gauge"]
+        for cluster in stats["clusters"]:
+            lines.append(f'{prefix}_cluster_size{{cluster="{cluster["cluster_id"]}",'
+                         f'label="{cluster["label"] or ""}"}} {cluster["size"]}')
+        return "\n".join(lines) + "\n"
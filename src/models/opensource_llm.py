@@ -18,6 +18,7 @@ import logging
 import time
 import json
 import requests
+from contextlib import nullcontext
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
@@ -43,7 +44,8 @@ class OpenSourceLLM:
     def __init__(self, 
                  model_name: str = "llama3.2:3b",
                  ollama_url: str = "http://localhost:11434",
-                 fallback_handler=None):
+                 fallback_handler=None,
+                 scheduler=None):
         """
         Initialize OpenSourceLLM client
         
@@ -51,7 +53,10 @@ class OpenSourceLLM:
             model_name: Ollama model to use (e.g., "llama3.2:3b", "mistral:7b")
             ollama_url: Ollama server URL
             fallback_handler: Fallback LLM handler if Ollama unavailable
+            scheduler: Shared LLMScheduler; Ollama calls wait for an "ollama" slot
+                in priority order (None = call immediately)
         """
+        self.scheduler = scheduler
         self.model_name = model_name
         self.ollama_url = ollama_url
         self.fallback_handler = fallback_handler
@@ -91,7 +96,8 @@ class OpenSourceLLM:
     def generate_text(self, 
                      prompt: str, 
                      max_tokens: int = 500,
-                     temperature: float = 0.1) -> LLMResponse:
+                     temperature: float = 0.1,
+                     priority: Optional[str] = None) -> LLMResponse:
         """
         Generate text using Ollama or fallback
         
@@ -99,6 +105,7 @@ class OpenSourceLLM:
             prompt: Input prompt for the LLM
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature (0.0 = deterministic)
+            priority: Ticket priority class, orders the call in the scheduler
             
         Returns:
             LLMResponse with generated text and metadata
@@ -107,7 +114,9 @@ class OpenSourceLLM:
         
         if self.available:
             try:
-                return self._ollama_generate(prompt, max_tokens, temperature, start_time)
+                slot = self.scheduler.slot_sync("ollama", priority) if self.scheduler is not None else nullcontext()
+                with slot:
+                    return self._ollama_generate(prompt, max_tokens, temperature, start_time)
             except Exception as e:
                 logger.error(f"Ollama generation failed: {e}")
                 # Fall through to fallback
@@ -172,12 +181,13 @@ class OpenSourceLLM:
             source="ollama"
         )
     
-    def classify_ticket(self, ticket_text: str) -> Tuple[str, str, float, Dict]:
+    def classify_ticket(self, ticket_text: str, priority: Optional[str] = None) -> Tuple[str, str, float, Dict]:
         """
         Classify customer service ticket using local LLM
         
         Args:
             ticket_text: Customer service ticket description
+            priority: Ticket priority class, orders the call in the scheduler
             
         Returns:
             Tuple of (department, reasoning, confidence, metadata)
@@ -204,7 +214,7 @@ REASONING: [brief explanation of why this department was chosen]
 
 Response:"""
 
-        response = self.generate_text(prompt, max_tokens=200, temperature=0.1)
+        response = self.generate_text(prompt, max_tokens=200, temperature=0.1, priority=priority)
         
         # Parse the structured response
         try:
@@ -5,27 +5,45 @@ Intelligent ticket classification using historical routing outcomes for few-shot
 
 import asyncio
 import hashlib
-import random
-import math
-from typing import List, Optional, Dict
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Dict, Sequence
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+import numpy as np
+
 try:
+    import httpx
     import openai
-    from openai import OpenAI
+    from openai import AsyncOpenAI
     OPENAI_AVAILABLE = True
+    # Transient failures worth retrying (timeouts are APIConnectionErrors)
+    RETRYABLE_LLM_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
 except ImportError:
+    httpx = None
     openai = None
-    OpenAI = None
+    AsyncOpenAI = None
     OPENAI_AVAILABLE = False
+    RETRYABLE_LLM_ERRORS = (ConnectionError, TimeoutError)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+import backoff
 
 from dotenv import load_dotenv
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.vector_db.pinecone_client import PineconeClient
+from src.vector_db.pinecone_client import PineconeClient, VectorDBHealth
 
 # Load environment variables
 load_dotenv()
@@ -35,6 +53,27 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Distinct ticket texts whose mock embeddings are kept in memory
+EMBEDDING_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=EMBEDDING_CACHE_SIZE)
+def _mock_embedding_for_digest(digest: str, dimension: int) -> np.ndarray:
+    """
+    Unit-norm float32 mock embedding seeded from a text digest.
+    
+    Uses a private numpy Generator per call, so concurrent callers never
+    share RNG state. Cached arrays are read-only.
+    """
+    rng = np.random.default_rng(int(digest, 16))
+    embedding = rng.standard_normal(dimension, dtype=np.float32)
+    norm = np.linalg.norm(embedding)
+    if norm > 0:
+        embedding /= norm
+    embedding.flags.writeable = False
+    return embedding
+
+
 class RoutingConfidence(Enum):
     """Confidence levels for routing decisions"""
     HIGH = "high"        # >0.90 similarity, >90% historical accuracy
@@ -86,6 +125,58 @@ class RoutingRecommendation:
     use_cached_route: bool
 
 
+# Columnar layout of the matches analyze_routing_confidence aggregates
+MATCH_DTYPE = np.dtype([
+    ("set_index", np.int32),            # Ticket (match set) the row belongs to
+    ("department", np.int32),           # Code into MatchSetBatch.departments (-1 = unknown)
+    ("similarity", np.float64),
+    ("resolution_hours", np.float64),   # NaN when unknown
+    ("satisfaction", np.float64),       # NaN when unknown
+    ("prediction_correct", np.bool_),
+])
+
+
+@dataclass
+class MatchSetBatch:
+    """Top matches of many tickets packed into one structured array"""
+    rows: np.ndarray            # MATCH_DTYPE rows, grouped by set_index in rank order
+    departments: List[str]      # Department vocabulary for rows["department"]
+    top_similarity: np.ndarray  # Each set's best similarity (NaN for an empty set)
+    
+    @property
+    def sets(self) -> int:
+        return len(self.top_similarity)
+    
+    @classmethod
+    def pack(cls, match_sets: Sequence[List[HistoricalMatch]], top_n: int = 3) -> "MatchSetBatch":
+        """
+        Pack the top `top_n` matches of each set.
+        
+        Args:
+            match_sets: Ranked matches per ticket
+            top_n: Matches kept per ticket
+        """
+        vocabulary: Dict[str, int] = {}
+        rows = np.empty(sum(min(len(matches), top_n) for matches in match_sets), dtype=MATCH_DTYPE)
+        top_similarity = np.full(len(match_sets), np.nan)
+        row = 0
+        for set_index, matches in enumerate(match_sets):
+            if matches:
+                top_similarity[set_index] = matches[0].similarity_score
+            for match in matches[:top_n]:
+                department = match.actual_department
+                rows[row] = (
+                    set_index,
+                    vocabulary.setdefault(department, len(vocabulary)) if department else -1,
+                    match.similarity_score,
+                    np.nan if match.resolution_time_hours is None else match.resolution_time_hours,
+                    np.nan if match.customer_satisfaction is None else match.customer_satisfaction,
+                    bool(match.ai_prediction_correct),
+                )
+                row += 1
+        return cls(rows=rows, departments=list(vocabulary), top_similarity=top_similarity)
+
+
 class IntelligentSimilaritySearch:
     """
     Enhanced similarity search with routing intelligence for RAG-based prompting.
@@ -95,11 +186,30 @@ class IntelligentSimilaritySearch:
     - Calculates confidence based on historical success
     - Provides routing recommendations with evidence
     - Supports both cached routing and LLM prompting decisions
+    - Long-lived vector client: the index is initialized once and only
+      re-initialized when a failed query is followed by a failed health check
     """
     
+    # Healthy enough to keep the current index connection after a failed query
+    USABLE_HEALTH = (VectorDBHealth.HEALTHY, VectorDBHealth.DEGRADED)
+    
     def __init__(self, vector_client: Optional[PineconeClient] = None):
-        """Initialize similarity search with routing intelligence"""
-        self.vector_client = vector_client or PineconeClient()
+        """
+        Initialize similarity search with routing intelligence.
+        
+        Args:
+            vector_client: Optional vector client (PineconeClient, or a
+                LocalVectorIndex for an in-process index); a PineconeClient is
+                created on first search when omitted. Share one instance
+                between routers so they reuse the same index connection.
+        """
+        self._vector_client = vector_client
+        self._index_ready = False
+        self._init_lock = asyncio.Lock()
+        
+        # Connection lifecycle and per-stage latency (see get_stage_timing)
+        self.connection_stats = {"initializations": 0, "reinitializations": 0}
+        self.stage_timings: Dict[str, Dict[str, float]] = {}
         
         # Configuration thresholds (adjusted for realistic similarity ranges)
         self.similarity_thresholds = {
@@ -114,23 +224,127 @@ class IntelligentSimilaritySearch:
             RoutingConfidence.LOW: 0.60       # 60%+ historical accuracy
         }
     
-    def generate_mock_embedding(self, text: str, dimension: int = 1536) -> List[float]:
-        """Generate consistent mock embedding for testing"""
-        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-        random.seed(seed)
+    @property
+    def vector_client(self) -> PineconeClient:
+        """Vector client, created lazily on first access."""
+        if self._vector_client is None:
+            self._vector_client = PineconeClient()
+        return self._vector_client
+    
+    @vector_client.setter
+    def vector_client(self, client: PineconeClient):
+        self._vector_client = client
+        self._index_ready = False
+    
+    async def _ensure_index(self) -> None:
+        """Initialize the index connection once; concurrent callers wait on the first."""
+        if self._index_ready:
+            return
+        
+        async with self._init_lock:
+            if not self._index_ready:
+                await self.vector_client.initialize_index()
+                self._index_ready = True
+                self.connection_stats["initializations"] += 1
+    
+    async def _query_with_recovery(self, query_embedding: List[float], top_k: int):
+        """
+        Query the index, re-initializing the connection only on health failure.
+        
+        A failed query triggers a forced health check. If the index still
+        reports usable health the error is raised as-is; otherwise the
+        connection is reset, re-initialized and the query retried once.
+        """
+        try:
+            return await self.vector_client.query_vectors(
+                query_vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True
+            )
+        except Exception as e:
+            health = await self.vector_client.health_check(force_check=True)
+            if health in self.USABLE_HEALTH:
+                raise
+            
+            logger.warning(f"Vector index unhealthy after query failure ({e}) - re-initializing connection")
+            await self.reset_connection()
+            await self._ensure_index()
+            self.connection_stats["reinitializations"] += 1
+            
+            return await self.vector_client.query_vectors(
+                query_vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True
+            )
+    
+    async def reset_connection(self) -> None:
+        """Drop the index connection; the next search re-initializes it."""
+        self._index_ready = False
+        if self._vector_client is not None:
+            await self._vector_client.close()
+    
+    async def close(self) -> None:
+        """Release the vector client at shutdown."""
+        await self.reset_connection()
+    
+    def _record_stage(self, stage: str, started: float) -> None:
+        """Accumulate elapsed time since `started` (perf_counter) for a stage."""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timing = self.stage_timings.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        timing["count"] += 1
+        timing["total_ms"] += elapsed_ms
+        timing["max_ms"] = max(timing["max_ms"], elapsed_ms)
+    
+    def get_stage_timing(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-stage search latency.
+        
+        Returns:
+            {stage: {count, total_ms, avg_ms, max_ms}} for the connect, embed
+            and query stages, plus connection initialization counts
+        """
+        summary = {
+            stage: {**timing, "avg_ms": timing["total_ms"] / timing["count"]}
+            for stage, timing in self.stage_timings.items()
+        }
+        summary["connection"] = dict(self.connection_stats)
+        return summary
+    
+    @staticmethod
+    def generate_mock_embedding(text: str, dimension: int = 1536) -> np.ndarray:
+        """
+        Generate consistent mock embedding for testing.
         
-        embedding = [random.gauss(0, 1) for _ in range(dimension)]
-        norm = math.sqrt(sum(x * x for x in embedding))
-        if norm > 0:
-            embedding = [x / norm for x in embedding]
+        Returns:
+            Read-only unit-norm float32 array, cached by text hash
+        """
+        digest = hashlib.md5(text.encode(), usedforsecurity=False).hexdigest()
+        return _mock_embedding_for_digest(digest, dimension)
+    
+    @classmethod
+    def generate_mock_embeddings(cls, texts: Sequence[str], dimension: int = 1536) -> np.ndarray:
+        """
+        Generate mock embeddings for many texts at once.
         
-        return embedding
+        Returns:
+            (len(texts), dimension) float32 matrix, one unit-norm row per text
+        """
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            embeddings[row] = cls.generate_mock_embedding(text, dimension)
+        return embeddings
+    
+    @staticmethod
+    def embedding_cache_info():
+        """Hit/miss counters for the mock embedding LRU cache."""
+        return _mock_embedding_for_digest.cache_info()
     
     async def search_similar_tickets_with_routing(
         self, 
         query_text: str,
         top_k: int = 5,
-        include_routing_intelligence: bool = True
+        include_routing_intelligence: bool = True,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[HistoricalMatch]:
         """
         Search for similar tickets with routing intelligence.
@@ -139,23 +353,28 @@ class IntelligentSimilaritySearch:
             query_text: New ticket text to find similar tickets for
             top_k: Number of similar tickets to retrieve
             include_routing_intelligence: Whether to include routing metadata
+            query_embedding: Precomputed query embedding (e.g. from a batch
+                embedding call); skips the embed stage when provided
             
         Returns:
             List of historical matches with routing intelligence
         """
         try:
-            # Initialize vector client
-            await self.vector_client.initialize_index()
+            # Reuse the long-lived index connection (initialized on first search)
+            stage_start = time.perf_counter()
+            await self._ensure_index()
+            self._record_stage("connect", stage_start)
             
             # Generate query embedding (mock for demo)
-            query_embedding = self.generate_mock_embedding(query_text)
+            if query_embedding is None:
+                stage_start = time.perf_counter()
+                query_embedding = self.generate_mock_embedding(query_text)
+                self._record_stage("embed", stage_start)
             
             # Search vector database
-            results = await self.vector_client.query_vectors(
-                query_vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
+            stage_start = time.perf_counter()
+            results = await self._query_with_recovery(query_embedding, top_k)
+            self._record_stage("query", stage_start)
             
             # Extract matches
             matches = getattr(results, 'matches', results.get('matches', []))
@@ -200,8 +419,6 @@ class IntelligentSimilaritySearch:
         except Exception as e:
             logger.error(f"Similarity search failed: {e}")
             return []
-        finally:
-            await self.vector_client.close()
     
     def analyze_routing_confidence(
         self, 
@@ -216,6 +433,77 @@ class IntelligentSimilaritySearch:
         Returns:
             Routing recommendation with confidence and reasoning
         """
+        return self.analyze_routing_confidence_batch([historical_matches])[0]
+    
+    def analyze_routing_confidence_batch(
+        self,
+        match_sets: Sequence[List[HistoricalMatch]]
+    ) -> List[RoutingRecommendation]:
+        """
+        Analyze many tickets' historical matches in one pass.
+        
+        The top 3 matches of every ticket are packed into one structured array;
+        per-ticket totals and per-(ticket, department) similarity sums are
+        group-by sums over it, so the aggregation cost does not grow with the
+        number of Python objects per department.
+        
+        Args:
+            match_sets: Similar tickets per ticket, best match first
+            
+        Returns:
+            One routing recommendation per ticket, in input order
+        """
+        batch = MatchSetBatch.pack(match_sets, top_n=3)  # Focus on top 3 matches
+        rows = batch.rows[batch.rows["department"] >= 0]
+        sets, vocabulary_size = batch.sets, max(len(batch.departments), 1)
+        set_index = rows["set_index"]
+        
+        # Per-ticket totals over matches with a known department
+        valid = np.bincount(set_index, minlength=sets)
+        resolution = np.bincount(set_index, weights=np.nan_to_num(rows["resolution_hours"]), minlength=sets)
+        satisfaction = np.bincount(set_index, weights=np.nan_to_num(rows["satisfaction"]), minlength=sets)
+        successes = np.bincount(set_index, weights=rows["prediction_correct"], minlength=sets)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            success_rate = np.where(valid > 0, successes / valid, 0.0)
+            avg_resolution = np.where(valid > 0, resolution / valid, 0.0)
+            avg_satisfaction = np.where(valid > 0, satisfaction / valid, 0.0)
+        
+        # Department score per (ticket, department): similarity sum × match count.
+        # Ties go to the department seen first in rank order.
+        keys = set_index.astype(np.int64) * vocabulary_size + rows["department"]
+        groups, first_row, group_of_row = np.unique(keys, return_index=True, return_inverse=True)
+        group_score = np.bincount(group_of_row, weights=rows["similarity"]) * np.bincount(group_of_row)
+        group_set = groups // vocabulary_size
+        order = np.lexsort((first_row, -group_score, group_set))
+        decided_sets, best = np.unique(group_set[order], return_index=True)
+        recommended = np.full(sets, -1, dtype=np.int64)
+        recommended[decided_sets] = groups[order[best]] % vocabulary_size
+        
+        # Confidence level from the top similarity and the historical success rate
+        top_similarity = np.nan_to_num(batch.top_similarity)
+        thresholds, accuracies = self.similarity_thresholds, self.accuracy_thresholds
+        high = ((top_similarity >= thresholds[RoutingConfidence.HIGH])
+                & (success_rate >= accuracies[RoutingConfidence.HIGH]))
+        medium = ((top_similarity >= thresholds[RoutingConfidence.MEDIUM])
+                  & (success_rate >= accuracies[RoutingConfidence.MEDIUM]))
+        low = top_similarity >= thresholds[RoutingConfidence.LOW]
+        
+        return [
+            self._recommendation(
+                historical_matches,
+                batch.departments[recommended[i]] if recommended[i] >= 0 else "unknown",
+                float(top_similarity[i]), float(success_rate[i]),
+                float(avg_resolution[i]), float(avg_satisfaction[i]),
+                RoutingConfidence.HIGH if high[i] else RoutingConfidence.MEDIUM if medium[i]
+                else RoutingConfidence.LOW if low[i] else RoutingConfidence.UNKNOWN
+            )
+            for i, historical_matches in enumerate(match_sets)
+        ]
+    
+    def _recommendation(self, historical_matches: List[HistoricalMatch], recommended_dept: str,
+                        top_similarity: float, success_rate: float, avg_resolution: float,
+                        avg_satisfaction: float, confidence: RoutingConfidence) -> RoutingRecommendation:
+        """Assemble one ticket's recommendation from its aggregated evidence"""
         if not historical_matches:
             return RoutingRecommendation(
                 recommended_department="unknown",
@@ -230,81 +518,19 @@ class IntelligentSimilaritySearch:
                 use_cached_route=False
             )
         
-        # Analyze the top match (highest similarity)
-        top_match = historical_matches[0]
-        
-        # Calculate department consensus from top matches
-        departments = {}
-        total_resolution_time = 0
-        total_satisfaction = 0
-        successful_predictions = 0
-        valid_matches = 0
-        
-        for match in historical_matches[:3]:  # Focus on top 3 matches
-            if match.actual_department:
-                dept = match.actual_department
-                if dept not in departments:
-                    departments[dept] = {
-                        'count': 0,
-                        'total_similarity': 0,
-                        'resolution_times': [],
-                        'satisfactions': [],
-                        'success_count': 0
-                    }
-                
-                departments[dept]['count'] += 1
-                departments[dept]['total_similarity'] += match.similarity_score
-                
-                if match.resolution_time_hours is not None:
-                    departments[dept]['resolution_times'].append(match.resolution_time_hours)
-                    total_resolution_time += match.resolution_time_hours
-                
-                if match.customer_satisfaction is not None:
-                    departments[dept]['satisfactions'].append(match.customer_satisfaction)
-                    total_satisfaction += match.customer_satisfaction
-                
-                if match.ai_prediction_correct:
-                    departments[dept]['success_count'] += 1
-                    successful_predictions += 1
-                
-                valid_matches += 1
-        
-        # Determine recommended department (highest weighted score)
-        if not departments:
-            recommended_dept = "unknown"
-            success_rate = 0
-        else:
-            best_dept = max(departments.keys(), key=lambda d: 
-                departments[d]['total_similarity'] * departments[d]['count'])
-            recommended_dept = best_dept
-            success_rate = successful_predictions / valid_matches if valid_matches > 0 else 0
-        
-        # Calculate average metrics
-        avg_resolution = total_resolution_time / valid_matches if valid_matches > 0 else 0
-        avg_satisfaction = total_satisfaction / valid_matches if valid_matches > 0 else 0
-        
-        # Determine confidence level
-        top_similarity = top_match.similarity_score
-        
-        if (top_similarity >= self.similarity_thresholds[RoutingConfidence.HIGH] and 
-            success_rate >= self.accuracy_thresholds[RoutingConfidence.HIGH]):
-            confidence = RoutingConfidence.HIGH
+        if confidence == RoutingConfidence.HIGH:
             use_cached = True
             reasoning = f"High confidence: {top_similarity:.3f} similarity, {success_rate:.1%} historical success"
             
-        elif (top_similarity >= self.similarity_thresholds[RoutingConfidence.MEDIUM] and 
-              success_rate >= self.accuracy_thresholds[RoutingConfidence.MEDIUM]):
-            confidence = RoutingConfidence.MEDIUM
+        elif confidence == RoutingConfidence.MEDIUM:
             use_cached = True  
             reasoning = f"Medium confidence: {top_similarity:.3f} similarity, {success_rate:.1%} historical success"
             
-        elif top_similarity >= self.similarity_thresholds[RoutingConfidence.LOW]:
-            confidence = RoutingConfidence.LOW
+        elif confidence == RoutingConfidence.LOW:
             use_cached = False
             reasoning = f"Low confidence: {top_similarity:.3f} similarity - recommend LLM analysis"
             
         else:
-            confidence = RoutingConfidence.UNKNOWN
             use_cached = False
             reasoning = f"Very low similarity ({top_similarity:.3f}) - use LLM with few-shot examples"
         
@@ -322,26 +548,127 @@ class IntelligentSimilaritySearch:
         )
 
 
+@dataclass
+class LLMClientConfig:
+    """Connection, timeout, concurrency and retry settings for LLMClassifier"""
+    base_url: Optional[str] = None              # OpenAI-compatible endpoint (default: OPENAI_BASE_URL or api.openai.com)
+    timeout_seconds: float = 20.0               # Per-call timeout
+    max_concurrency: int = 16                   # Completions in flight per classifier
+    max_connections: int = 32                   # Shared HTTP connection pool size
+    max_keepalive_connections: int = 16
+    max_retries: int = 3                        # Retries after the first attempt
+    backoff_factor_seconds: float = 0.5         # Exponential backoff base (full jitter)
+    backoff_max_seconds: float = 8.0
+
+
 class LLMClassifier:
     """
     OpenAI GPT-based classifier using RAG prompts with routing intelligence.
+    
+    Uses the async OpenAI client over one pooled HTTP connection set, so
+    many classifications can run in parallel on the event loop. Calls are
+    bounded by `max_concurrency`, time out after `timeout_seconds` and are
+    retried on connection errors, timeouts, rate limits and 5xx responses
+    with jittered exponential backoff. Each attempt takes its own slot, so
+    a call waiting out its backoff does not hold one.
+    
+    With a shared LLMScheduler, calls take the scheduler's `provider` slots
+    instead (ordered by priority and deadline, see src/models/llm_scheduler.py).
     """
     
-    def __init__(self):
-        """Initialize OpenAI client if available"""
-        self.client = None
-        if OPENAI_AVAILABLE:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                try:
-                    self.client = OpenAI(api_key=api_key)
-                except Exception as e:
-                    logger.warning(f"OpenAI client initialization failed: {e}")
+    def __init__(self, config: Optional[LLMClientConfig] = None, api_key: Optional[str] = None, client=None,
+                 scheduler=None, provider: str = "openai"):
+        """
+        Initialize the async OpenAI client if available.
+        
+        Args:
+            config: Client settings (defaults to LLMClientConfig())
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            client: Pre-built AsyncOpenAI-compatible client (skips client creation)
+            scheduler: Shared LLMScheduler (None = FIFO under `max_concurrency`)
+            provider: Scheduler provider whose slots the calls use
+        """
+        self.config = config or LLMClientConfig()
+        self.client = client
+        self.scheduler = scheduler
+        self.provider = provider
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "peak_in_flight": 0}
+        self._in_flight = 0
+        self._semaphore = None
+        self._semaphore_loop = None
+        
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if self.client is None and OPENAI_AVAILABLE and api_key:
+            try:
+                self.client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=self.config.base_url or os.getenv("OPENAI_BASE_URL"),
+                    timeout=self.config.timeout_seconds,
+                    max_retries=0,  # Retried below with jitter and shared accounting
+                    http_client=openai.DefaultAsyncHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=self.config.max_connections,
+                            max_keepalive_connections=self.config.max_keepalive_connections
+                        )
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"OpenAI client initialization failed: {e}")
+        
+        self._create_with_retry = backoff.on_exception(
+            backoff.expo,
+            RETRYABLE_LLM_ERRORS,
+            max_tries=self.config.max_retries + 1,
+            factor=self.config.backoff_factor_seconds,
+            max_value=self.config.backoff_max_seconds,
+            jitter=backoff.full_jitter,
+            on_backoff=self._on_backoff
+        )(self._create_in_slot)
+    
+    def _slots(self) -> asyncio.Semaphore:
+        """Concurrency semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    def _on_backoff(self, details) -> None:
+        self.stats["retries"] += 1
+        logger.warning(f"⚠️ LLM call failed ({details['exception']}), retry {details['tries']} "
+                       f"in {details['wait']:.2f}s")
+    
+    async def _create_in_slot(self, rag_prompt: str, model: str, priority: Optional[str],
+                              deadline: Optional[float]):
+        """One attempt, holding a concurrency (or scheduler) slot only while the request runs."""
+        slot = (self.scheduler.slot(self.provider, priority, deadline) if self.scheduler is not None
+                else self._slots())
+        async with slot:
+            self._in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+            try:
+                return await self._create_completion(rag_prompt, model)
+            finally:
+                self._in_flight -= 1
+    
+    async def _create_completion(self, rag_prompt: str, model: str):
+        return await self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a professional call centre ticket classifier."},
+                {"role": "user", "content": rag_prompt}
+            ],
+            max_tokens=200,
+            temperature=0.1,  # Low temperature for consistent classification
+            timeout=self.config.timeout_seconds
+        )
     
     async def classify_with_rag_prompt(
         self, 
         rag_prompt: str,
-        model: str = "gpt-3.5-turbo"
+        model: str = "gpt-3.5-turbo",
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None
     ) -> Dict[str, str]:
         """
         Use OpenAI GPT to classify ticket with RAG prompt.
@@ -349,6 +676,8 @@ class LLMClassifier:
         Args:
             rag_prompt: RAG prompt with historical routing intelligence
             model: OpenAI model to use
+            priority: Ticket priority class for the scheduler (P0_IMMEDIATE..P3_STANDARD)
+            deadline: Scheduler deadline (default: now + the priority's SLA)
             
         Returns:
             Classification result with department, confidence, and reasoning
@@ -362,15 +691,8 @@ class LLMClassifier:
             }
         
         try:
-            response = await self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a professional call centre ticket classifier."},
-                    {"role": "user", "content": rag_prompt}
-                ],
-                max_tokens=200,
-                temperature=0.1  # Low temperature for consistent classification
-            )
+            self.stats["calls"] += 1
+            response = await self._create_with_retry(rag_prompt, model, priority, deadline)
             
             content = response.choices[0].message.content.strip()
             
@@ -389,12 +711,272 @@ class LLMClassifier:
             return result
             
         except Exception as e:
+            self.stats["failures"] += 1
             logger.error(f"OpenAI classification failed: {e}")
             return {
                 "department": "unknown",
                 "confidence": "low", 
                 "reasoning": f"Classification failed: {str(e)}"
             }
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Call, retry and failure counters plus current and peak in-flight calls"""
+        return {**self.stats, "in_flight": self._in_flight}
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        if self.client is not None and hasattr(self.client, "close"):
+            await self.client.close()
+
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _get_tokenizer():
+    """
+    tiktoken's cl100k_base encoding, loaded on first use.
+    
+    Loading may download the encoding file, so it is deferred from import
+    time; returns None when tiktoken is not installed or the encoding
+    cannot be loaded (e.g. offline), and estimate_tokens falls back to its
+    character-based estimate.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ tiktoken encoding unavailable ({e}) - estimating tokens from characters")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the prompt tokens in `text` without calling the API.
+    
+    Uses tiktoken's cl100k_base encoding when it loads; otherwise counts
+    roughly one token per 4 characters of each word plus one per
+    punctuation mark or symbol, which tracks BPE counts for English text.
+    """
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text))
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PIECES.findall(text))
+
+
+@dataclass
+class PromptBuild:
+    """A rendered RAG prompt and how it fit the token budget"""
+    prompt: str
+    tokens: int
+    examples_used: int
+    examples_dropped: int      # Valid examples left out by the budget or max_examples
+    query_truncated: bool
+
+
+class RAGPromptBuilder:
+    """
+    Token-budgeted few-shot prompt builder.
+    
+    - Each historical ticket is rendered once into a compact snippet and
+      cached by ticket ID together with its token estimate
+    - Examples are chosen greedily by marginal value: similarity, discounted
+      for departments already shown, so the budget drops the least useful
+      example first
+    - The new ticket text is only truncated when the fixed instructions and
+      the ticket alone would exceed the budget
+    """
+    
+    HEADER = (
+        "You are an intelligent call centre ticket classifier with access to historical routing outcomes.\n"
+        "\n"
+        "Here are similar historical tickets and their ACTUAL routing outcomes (not predictions):\n"
+    )
+    FOOTER = (
+        "Based on these historical routing outcomes and their success patterns:\n"
+        "\n"
+        'Now classify this NEW ticket: "{query}"\n'
+        "\n"
+        "Provide your classification in this format:\n"
+        "Department: [department_name]\n"
+        "Confidence: [high/medium/low]\n"
+        "Reasoning: [brief explanation based on historical patterns]\n"
+        "\n"
+        "Consider the historical resolution success, customer satisfaction, and escalation patterns shown above."
+    )
+    
+    def __init__(self,
+                 token_budget: int = 1500,
+                 redundancy_discount: float = 0.5,
+                 snippet_chars: int = 150,
+                 snippet_cache_size: int = 4096):
+        """
+        Initialize prompt builder.
+        
+        Args:
+            token_budget: Maximum estimated prompt tokens
+            redundancy_discount: Value multiplier per earlier example of the same department
+            snippet_chars: Characters of historical ticket text quoted per example
+            snippet_cache_size: Pre-rendered snippets kept (LRU by ticket ID)
+        """
+        self.token_budget = token_budget
+        self.redundancy_discount = redundancy_discount
+        self.snippet_chars = snippet_chars
+        self.snippet_cache_size = snippet_cache_size
+        self._snippets: OrderedDict[str, tuple] = OrderedDict()
+        self._header_tokens = estimate_tokens(self.HEADER)
+        self._footer_tokens = estimate_tokens(self.FOOTER.format(query=""))
+        self._zero_shot_tokens = estimate_tokens(RAGPromptTemplate.create_zero_shot_prompt(""))
+        self.stats = {
+            "prompts": 0, "total_tokens": 0, "max_tokens": 0, "examples_used": 0,
+            "examples_dropped": 0, "queries_truncated": 0, "snippet_hits": 0, "snippet_misses": 0
+        }
+    
+    def _render_snippet(self, match: HistoricalMatch) -> str:
+        lines = [
+            f'Ticket: "{match.text[:self.snippet_chars]}..."',
+            f"ACTUAL Department: {match.actual_department}",
+        ]
+        if match.resolution_time_hours is not None:
+            lines.append(f"Resolution Time: {match.resolution_time_hours}h")
+        if match.customer_satisfaction is not None:
+            lines.append(f"Customer Satisfaction: {match.customer_satisfaction}/10")
+        if match.first_contact_resolution is not None:
+            lines.append(f"First Contact Resolution: {'Yes' if match.first_contact_resolution else 'No'}")
+        if match.escalation_path:
+            lines.append(f"Escalation Path: {' -> '.join(match.escalation_path)}")
+        if match.ai_prediction_correct is not None:
+            lines.append(f"Previous AI Prediction: {'Correct' if match.ai_prediction_correct else 'Incorrect'}")
+        return "\n".join(lines) + "\n"
+    
+    def snippet(self, match: HistoricalMatch) -> tuple:
+        """Pre-rendered (snippet, tokens) for a historical ticket, cached by ticket ID."""
+        key = match.ticket_id if match.ticket_id and match.ticket_id != "unknown" else None
+        if key is not None and key in self._snippets:
+            self._snippets.move_to_end(key)
+            self.stats["snippet_hits"] += 1
+            return self._snippets[key]
+        
+        self.stats["snippet_misses"] += 1
+        text = self._render_snippet(match)
+        entry = (text, estimate_tokens(text))
+        if key is not None and self.snippet_cache_size > 0:
+            self._snippets[key] = entry
+            if len(self._snippets) > self.snippet_cache_size:
+                self._snippets.popitem(last=False)
+        return entry
+    
+    def _order_by_marginal_value(self, matches: List[HistoricalMatch]) -> List[HistoricalMatch]:
+        """Greedy order: next is the match whose similarity, discounted per already-chosen same department, is highest."""
+        remaining = list(matches)
+        chosen_per_department: Dict[str, int] = {}
+        ordered = []
+        while remaining:
+            best = max(
+                remaining,
+                key=lambda m: m.similarity_score
+                * self.redundancy_discount ** chosen_per_department.get(m.actual_department, 0)
+            )
+            remaining.remove(best)
+            ordered.append(best)
+            chosen_per_department[best.actual_department] = chosen_per_department.get(best.actual_department, 0) + 1
+        return ordered
+    
+    def _fit_query(self, query_ticket: str, available_tokens: int) -> tuple:
+        """Truncate the ticket text (keeping its start) to at most `available_tokens`."""
+        tokens = estimate_tokens(query_ticket)
+        if tokens <= available_tokens:
+            return query_ticket, tokens, False
+        text = query_ticket
+        while text and tokens > available_tokens:
+            text = text[:max(0, int(len(text) * available_tokens / tokens) - 1)]
+            tokens = estimate_tokens(text + "...")
+        return text + "...", tokens, True
+    
+    def build(self, query_ticket: str, historical_matches: List[HistoricalMatch],
+              max_examples: int = 3) -> PromptBuild:
+        """
+        Build the few-shot prompt within the token budget.
+        
+        Args:
+            query_ticket: New ticket to classify
+            historical_matches: Candidate examples (all are considered, not just the first max_examples)
+            max_examples: Maximum number of examples to include
+            
+        Returns:
+            PromptBuild with the prompt and its estimated token count
+        """
+        valid_matches = [m for m in historical_matches
+                         if m.actual_department and m.actual_department != "unknown"]
+        
+        fixed_tokens = self._header_tokens + self._footer_tokens
+        query, query_tokens, truncated = self._fit_query(query_ticket, max(0, self.token_budget - fixed_tokens))
+        remaining = self.token_budget - fixed_tokens - query_tokens
+        
+        examples = []
+        for match in self._order_by_marginal_value(valid_matches):
+            if len(examples) == max_examples:
+                break
+            snippet_text, snippet_tokens = self.snippet(match)
+            cost = snippet_tokens + estimate_tokens(f"\nExample {len(examples) + 1}:\n")
+            if cost > remaining:
+                continue  # A shorter, less valuable example may still fit
+            examples.append(snippet_text)
+            remaining -= cost
+        
+        prompt = self._render(query, examples)
+        # Estimates of the parts may not add up exactly; trim from the least useful end
+        while examples and estimate_tokens(prompt) > self.token_budget:
+            examples.pop()
+            prompt = self._render(query, examples)
+        
+        if not examples:
+            query, _, zero_shot_truncated = self._fit_query(
+                query_ticket, max(0, self.token_budget - self._zero_shot_tokens)
+            )
+            truncated = truncated or zero_shot_truncated
+            prompt = RAGPromptTemplate.create_zero_shot_prompt(query)
+        used = len(examples)
+        
+        build = PromptBuild(
+            prompt=prompt,
+            tokens=estimate_tokens(prompt),
+            examples_used=used,
+            examples_dropped=len(valid_matches) - used,
+            query_truncated=truncated
+        )
+        self._record(build)
+        return build
+    
+    def _render(self, query: str, examples: List[str]) -> str:
+        parts = [self.HEADER]
+        for number, snippet_text in enumerate(examples, 1):
+            parts.append(f"\nExample {number}:\n")
+            parts.append(snippet_text)
+        parts.append("\n")
+        parts.append(self.FOOTER.format(query=query))
+        return "".join(parts)
+    
+    def _record(self, build: PromptBuild) -> None:
+        self.stats["prompts"] += 1
+        self.stats["total_tokens"] += build.tokens
+        self.stats["max_tokens"] = max(self.stats["max_tokens"], build.tokens)
+        self.stats["examples_used"] += build.examples_used
+        self.stats["examples_dropped"] += build.examples_dropped
+        self.stats["queries_truncated"] += int(build.query_truncated)
+        logger.debug(f"📏 RAG prompt: {build.tokens} tokens, {build.examples_used} examples "
+                     f"({build.examples_dropped} dropped){' - query truncated' if build.query_truncated else ''}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Prompt token and snippet cache metrics"""
+        prompts = self.stats["prompts"]
+        return {
+            **self.stats,
+            "avg_tokens": self.stats["total_tokens"] / prompts if prompts else 0.0,
+            "token_budget": self.token_budget,
+            "tokenizer": "tiktoken" if _get_tokenizer() is not None else "heuristic"
+        }
 
 
 class RAGPromptTemplate:
@@ -417,69 +999,10 @@ class RAGPromptTemplate:
             max_examples: Maximum number of examples to include
             
         Returns:
-            Formatted prompt with few-shot examples and routing intelligence
+            Formatted prompt with few-shot examples and routing intelligence,
+            within the default RAGPromptBuilder token budget
         """
-        
-        # Filter matches with routing intelligence
-        valid_matches = [m for m in historical_matches[:max_examples] 
-                        if m.actual_department and m.actual_department != "unknown"]
-        
-        if not valid_matches:
-            return RAGPromptTemplate.create_zero_shot_prompt(query_ticket)
-        
-        prompt_parts = [
-            "You are an intelligent call centre ticket classifier with access to historical routing outcomes.",
-            "",
-            "Here are similar historical tickets and their ACTUAL routing outcomes (not predictions):",
-            ""
-        ]
-        
-        # Add few-shot examples with routing intelligence
-        for i, match in enumerate(valid_matches, 1):
-            example_parts = [
-                f"Example {i}:",
-                f'Ticket: "{match.text[:150]}..."',
-                f"✅ ACTUAL Department: {match.actual_department}",
-            ]
-            
-            # Add routing intelligence context
-            if match.resolution_time_hours is not None:
-                example_parts.append(f"⏱️ Resolution Time: {match.resolution_time_hours}h")
-            
-            if match.customer_satisfaction is not None:
-                example_parts.append(f"😊 Customer Satisfaction: {match.customer_satisfaction}/10")
-            
-            if match.first_contact_resolution is not None:
-                fcr_status = "Yes" if match.first_contact_resolution else "No"
-                example_parts.append(f"🎯 First Contact Resolution: {fcr_status}")
-            
-            if match.escalation_path:
-                escalation = " → ".join(match.escalation_path)
-                example_parts.append(f"🔄 Escalation Path: {escalation}")
-            
-            # Add AI performance context
-            if match.ai_prediction_correct is not None:
-                ai_accuracy = "Correct" if match.ai_prediction_correct else "Incorrect"
-                example_parts.append(f"🤖 Previous AI Prediction: {ai_accuracy}")
-            
-            prompt_parts.extend(example_parts)
-            prompt_parts.append("")  # Blank line
-        
-        # Add classification instructions
-        prompt_parts.extend([
-            "Based on these historical routing outcomes and their success patterns:",
-            "",
-            f'Now classify this NEW ticket: "{query_ticket}"',
-            "",
-            "Provide your classification in this format:",
-            "Department: [department_name]",
-            "Confidence: [high/medium/low]", 
-            "Reasoning: [brief explanation based on historical patterns]",
-            "",
-            "Consider the historical resolution success, customer satisfaction, and escalation patterns shown above."
-        ])
-        
-        return "\n".join(prompt_parts)
+        return DEFAULT_PROMPT_BUILDER.build(query_ticket, historical_matches, max_examples).prompt
     
     @staticmethod
     def create_zero_shot_prompt(query_ticket: str) -> str:
@@ -505,6 +1028,10 @@ Confidence: [high/medium/low]
 Reasoning: [brief explanation]"""
 
 
+# Shared builder (and snippet cache) behind RAGPromptTemplate
+DEFAULT_PROMPT_BUILDER = RAGPromptBuilder()
+
+
 async def test_rag_similarity_search():
     """Test the enhanced similarity search with routing intelligence"""
     
@@ -662,15 +1189,34 @@ class RAGIntelligentRouting:
     Complete RAG-based intelligent routing system with confidence-based decisions.
     """
     
-    def __init__(self):
-        """Initialize the complete RAG system"""
-        self.similarity_search = IntelligentSimilaritySearch()
-        self.llm_classifier = LLMClassifier()
+    # Matches retrieved per ticket (top 3 feed the prompt and consensus)
+    RETRIEVAL_TOP_K = 5
+    
+    def __init__(self, similarity_search: Optional[IntelligentSimilaritySearch] = None,
+                 prompt_builder: Optional[RAGPromptBuilder] = None,
+                 llm_scheduler=None):
+        """
+        Initialize the complete RAG system.
+        
+        Args:
+            similarity_search: Optional shared similarity search (and its
+                vector connection); a new one is created when omitted
+            prompt_builder: Token-budgeted prompt builder (defaults to the
+                shared DEFAULT_PROMPT_BUILDER and its snippet cache)
+            llm_scheduler: Shared LLMScheduler for the LLM calls (None = FIFO)
+        """
+        self.similarity_search = similarity_search or IntelligentSimilaritySearch()
+        self.prompt_builder = prompt_builder or DEFAULT_PROMPT_BUILDER
+        self.llm_classifier = LLMClassifier(scheduler=llm_scheduler)
     
     async def route_ticket_intelligently(
         self, 
         ticket_text: str,
-        use_cached_threshold: float = 0.75  # Use cached route if confidence >= this
+        use_cached_threshold: float = 0.75,  # Use cached route if confidence >= this
+        historical_matches: Optional[List[HistoricalMatch]] = None,
+        recommendation: Optional[RoutingRecommendation] = None,
+        priority: Optional[str] = None,
+        labels_only: bool = False
     ) -> Dict[str, any]:
         """
         Complete intelligent routing using RAG with confidence-based decisions.
@@ -678,19 +1224,30 @@ class RAGIntelligentRouting:
         Args:
             ticket_text: New ticket to route
             use_cached_threshold: Similarity threshold for using cached routes
+            historical_matches: Top-k matches already retrieved by the caller;
+                skips the embedding and vector search when provided
+            recommendation: Analysis of `historical_matches` already made by
+                the caller (e.g. with analyze_routing_confidence_batch)
+            priority: Ticket priority class, orders the LLM call in the scheduler
+            labels_only: Send the cheaper zero-shot prompt (department labels, no
+                historical examples), e.g. when the SLA budget is nearly spent
             
         Returns:
             Complete routing decision with evidence and reasoning
         """
         
-        # Step 1: Search for similar tickets with routing intelligence
-        similar_tickets = await self.similarity_search.search_similar_tickets_with_routing(
-            query_text=ticket_text,
-            top_k=5
-        )
+        # Step 1: Search for similar tickets with routing intelligence (unless the caller already did)
+        if historical_matches is None:
+            similar_tickets = await self.similarity_search.search_similar_tickets_with_routing(
+                query_text=ticket_text,
+                top_k=self.RETRIEVAL_TOP_K
+            )
+        else:
+            similar_tickets = historical_matches
         
         # Step 2: Analyze confidence based on historical outcomes
-        recommendation = self.similarity_search.analyze_routing_confidence(similar_tickets)
+        if recommendation is None:
+            recommendation = self.similarity_search.analyze_routing_confidence(similar_tickets)
         
         # Step 3: Decision logic - cached route vs LLM analysis
         if (recommendation.similarity_threshold_met and 
@@ -701,20 +1258,20 @@ class RAGIntelligentRouting:
             department = recommendation.recommended_department
             confidence = recommendation.confidence.value
             reasoning = f"Cached: {recommendation.reasoning}"
+            prompt_tokens = None
             
         else:
             # Use RAG-enhanced LLM classification
             routing_method = "rag_llm"
             
-            # Generate RAG prompt with historical intelligence
-            rag_prompt = RAGPromptTemplate.create_few_shot_prompt_with_routing_intelligence(
-                query_ticket=ticket_text,
-                historical_matches=similar_tickets[:3],  # Top 3 matches
-                max_examples=3
-            )
+            # Generate RAG prompt with historical intelligence (best 3 of the retrieved matches, within budget)
+            prompt_build = self.prompt_builder.build(ticket_text, similar_tickets, max_examples=0 if labels_only else 3)
+            prompt_tokens = prompt_build.tokens
             
             # Get LLM classification
-            llm_result = await self.llm_classifier.classify_with_rag_prompt(rag_prompt)
+            llm_result = await self.llm_classifier.classify_with_rag_prompt(
+                prompt_build.prompt, **({"priority": priority} if priority else {})
+            )
             
             department = llm_result.get("department", "unknown")
             confidence = llm_result.get("confidence", "low")
@@ -726,6 +1283,8 @@ class RAGIntelligentRouting:
             "confidence_level": confidence,
             "routing_method": routing_method,
             "reasoning": reasoning,
+            "retrieval_reused": historical_matches is not None,
+            "prompt_tokens": prompt_tokens,
             
             # Evidence and context
             "historical_matches_found": len(similar_tickets),
@@ -0,0 +1,194 @@
+"""
+Request-Scoped Deadlines for Ticket Routing
+
+One RequestDeadline is created per ticket from the processing-time SLA
+(processing_time_sla.ai_classification_minutes in business_rules.json) and
+passed through the stages that decide it: rules → ML → vector search → LLM.
+Before a stage starts it asks the deadline for a plan:
+
+- run:      the expected cost of the full stage fits the remaining budget
+- degrade:  only the cheaper variant fits (e.g. top_k=1 retrieval, a
+            labels-only prompt without few-shot examples)
+- skip:     neither fits; the caller moves on to its fallback
+
+Expected costs come from a StageCostModel shared across requests: seeded
+with DEFAULT_STAGE_COSTS_MS and updated from observed stage durations, so
+a provider slowdown makes later requests degrade before they overrun.
+Every degrade or skip is recorded with its reason, for the routing decision.
+
+Usage:
+    deadline = RequestDeadline.for_sla(business_rules, cost_model=costs)
+    plan = deadline.plan("llm")
+    if plan == STAGE_RUN:
+        with deadline.measure("llm"):
+            result = await classifier.classify_with_rag_prompt(prompt)
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGE_RUN = "run"
+STAGE_DEGRADE = "degrade"
+STAGE_SKIP = "skip"
+STAGE_OVERRUN = "overrun"   # Nothing fits but there is no fallback, so the full stage runs anyway
+
+# Expected stage cost in ms: (full variant, cheaper variant or None)
+DEFAULT_STAGE_COSTS_MS: Dict[str, Tuple[float, Optional[float]]] = {
+    "rules": (5.0, None),
+    "ml": (50.0, None),
+    "vector_search": (300.0, 150.0),    # top_k=RETRIEVAL_TOP_K vs top_k=1
+    "llm": (8000.0, 3000.0),            # Few-shot RAG prompt vs labels-only prompt
+}
+
+
+class StageCostModel:
+    """
+    Expected duration per stage variant (exponentially weighted moving average).
+
+    Thread-safe; one model is shared by every request of a router or API process.
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, Tuple[float, Optional[float]]]] = None,
+                 smoothing: float = 0.2):
+        """
+        Initialize cost model.
+
+        Args:
+            defaults: Prior (full_ms, cheap_ms) per stage (default: DEFAULT_STAGE_COSTS_MS)
+            smoothing: Weight of each new observation in the moving average
+        """
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._estimates: Dict[Tuple[str, str], float] = {}
+        for stage, (full_ms, cheap_ms) in (defaults or DEFAULT_STAGE_COSTS_MS).items():
+            self._estimates[(stage, "full")] = full_ms
+            if cheap_ms is not None:
+                self._estimates[(stage, "cheap")] = cheap_ms
+
+    def estimate(self, stage: str, variant: str = "full") -> Optional[float]:
+        """Expected ms for a stage variant (None = unknown, e.g. no cheaper variant)."""
+        return self._estimates.get((stage, variant))
+
+    def observe(self, stage: str, variant: str, elapsed_ms: float) -> None:
+        """Fold one observed stage duration into the estimate."""
+        key = (stage, variant)
+        with self._lock:
+            previous = self._estimates.get(key)
+            self._estimates[key] = (elapsed_ms if previous is None
+                                    else previous + self.smoothing * (elapsed_ms - previous))
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Current estimate (ms) per stage and variant"""
+        stats: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for (stage, variant), estimate in self._estimates.items():
+                stats.setdefault(stage, {})[variant] = round(estimate, 3)
+        return stats
+
+
+class RequestDeadline:
+    """Remaining processing budget of one ticket, and the stages it degraded or skipped."""
+
+    def __init__(self, budget_seconds: float, cost_model: Optional[StageCostModel] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Start the deadline clock.
+
+        Args:
+            budget_seconds: Total processing budget for the ticket
+            cost_model: Expected stage costs (default: a fresh StageCostModel)
+            clock: Monotonic time source in seconds (injectable for tests)
+        """
+        self.budget_seconds = budget_seconds
+        self.cost_model = cost_model or StageCostModel()
+        self._clock = clock
+        self.expires_at = clock() + budget_seconds
+        self.skips: List[Dict[str, Any]] = []
+
+    @classmethod
+    def for_sla(cls, business_rules=None, stage: str = "ai_classification",
+                **options) -> "RequestDeadline":
+        """
+        Deadline from the processing-time SLA of a stage.
+
+        Args:
+            business_rules: BusinessRulesConfig (default: production config)
+            stage: processing_time_sla stage (minutes)
+            **options: Other RequestDeadline arguments
+        """
+        if business_rules is None:
+            from src.models.business_rules_config import BusinessRulesConfig
+            business_rules = BusinessRulesConfig()
+        return cls(business_rules.get_processing_time_sla(stage) * 60.0, **options)
+
+    def remaining_ms(self) -> float:
+        """Budget left in milliseconds (negative once overrun)."""
+        return (self.expires_at - self._clock()) * 1000
+
+    def remaining_seconds(self) -> float:
+        """Budget left in seconds, floored at 0 (for timeouts)."""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self._clock() >= self.expires_at
+
+    def fits(self, stage: str, variant: str = "full") -> bool:
+        """Whether the expected cost of a stage variant fits the remaining budget."""
+        expected = self.cost_model.estimate(stage, variant)
+        return expected is None or expected <= self.remaining_ms()
+
+    def plan(self, stage: str, can_skip: bool = True) -> str:
+        """
+        Decide how to run `stage` with the budget left.
+
+        Args:
+            stage: Stage name (see DEFAULT_STAGE_COSTS_MS)
+            can_skip: Whether the caller has a fallback to skip to
+
+        Returns:
+            STAGE_RUN, STAGE_DEGRADE (cheaper variant) or STAGE_SKIP (STAGE_RUN
+            when nothing fits and `can_skip` is False, recorded as an overrun);
+            anything but a plain run is recorded with its reason
+        """
+        remaining = self.remaining_ms()
+        full = self.cost_model.estimate(stage, "full")
+        if full is None or full <= remaining:
+            return STAGE_RUN
+
+        cheap = self.cost_model.estimate(stage, "cheap")
+        if cheap is not None and cheap <= remaining:
+            self.record(stage, STAGE_DEGRADE,
+                        f"{remaining:.0f} ms left < {full:.0f} ms expected; cheaper variant "
+                        f"({cheap:.0f} ms expected)")
+            return STAGE_DEGRADE
+
+        if not can_skip:
+            self.record(stage, STAGE_OVERRUN, f"{remaining:.0f} ms left < {full:.0f} ms expected; no fallback")
+            return STAGE_RUN
+        self.record(stage, STAGE_SKIP, f"{remaining:.0f} ms left < {cheap or full:.0f} ms expected")
+        return STAGE_SKIP
+
+    def record(self, stage: str, action: str, reason: str) -> None:
+        """Note that `stage` was degraded or skipped, and why."""
+        self.skips.append({
+            "stage": stage,
+            "action": action,
+            "reason": reason,
+            "remaining_ms": round(self.remaining_ms(), 3),
+        })
+        logger.info(f"⏱️ Deadline {action} of {stage}: {reason}")
+
+    @contextmanager
+    def measure(self, stage: str, variant: str = "full"):
+        """Time a stage and feed its duration to the cost model (also on failure)."""
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.cost_model.observe(stage, variant, (self._clock() - started) * 1000)
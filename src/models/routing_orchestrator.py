@@ -0,0 +1,530 @@
+"""
+Tiered Routing Orchestrator
+
+Runs the routing stages cheapest first and stops at the first stage whose
+answer meets that stage's configured confidence:
+
+    rules (TelcoRulesEngine)                 ~5 ms, free
+    ml (TicketClassificationPipeline)        ~50 ms, free
+        (either can be a StageWorkerPool, to run outside the event loop's process)
+    vector_cache (ConfidenceBasedRouter)     one vector query, no LLM call
+    llm (GeminiEnhancedClassifier or         seconds, paid per call
+         MultiProviderManager)
+
+The pipeline is declarative: config/routing_pipeline.json lists the stages
+in order with their type, minimum confidence and cost per call, so stages
+can be reordered, disabled or re-thresholded without code changes. When no
+stage clears its threshold the most confident answer seen is returned.
+
+Each component answers in its own vocabulary (rules: department keys such
+as billing_team; ml and Gemini: categories; router and MultiProviderManager:
+departments such as billing_corrections), so every stage names a label map
+that translates its answers into the pipeline's categories. An answer with
+no mapping counts as no answer and the ticket moves to the next stage.
+
+Every stage reports calls, early exits (hit rate), latency percentiles and
+cost, and the orchestrator reports the fraction of tickets that never
+reached an LLM stage.
+
+Usage:
+    orchestrator = RoutingOrchestrator.from_config(components={
+        "rules": rules_engine, "ml": pipeline, "vector_cache": router, "llm": gemini,
+    })
+    decision = await orchestrator.route(ticket_text)
+    print(decision.label, decision.stage, orchestrator.get_stats()["llm_avoided_rate"])
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.models.business_rules_config import DEFAULT_RULES_SHORT_CIRCUIT_CONFIDENCE, BusinessRulesConfig
+from src.models.latency_metrics import WindowedLatencyHistogram, prometheus_percentile_lines
+from src.models.request_deadline import STAGE_OVERRUN, STAGE_SKIP, RequestDeadline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIPELINE_CONFIG = Path(__file__).parent.parent.parent / "config" / "routing_pipeline.json"
+
+LLM_STAGE_TYPES = {"llm"}
+
+
+@dataclass
+class StageConfig:
+    """One stage of the declarative pipeline (an entry of routing_pipeline.json)."""
+    name: str
+    type: str                       # Key of STAGE_TYPES
+    # Exit here when the stage's confidence reaches this; None takes the component's own
+    # threshold (rules: rules_short_circuit_confidence from the business rules)
+    min_confidence: Optional[float]
+    cost_per_call: float = 0.0      # USD per call, used when the stage reports no cost itself
+    enabled: bool = True
+    component: Optional[str] = None  # Component key (default: the stage type)
+    # Component label (or label key, e.g. a rule id) -> pipeline category; None uses labels as is
+    label_map: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any], label_maps: Optional[Dict[str, Dict[str, str]]] = None,
+                  categories: Sequence[str] = ()) -> "StageConfig":
+        """
+        Build a stage from its routing_pipeline.json entry.
+
+        Args:
+            entry: Stage entry
+            label_maps: Named label maps the entry's "label_map" may refer to
+            categories: Pipeline categories; every label map passes them through unchanged
+        """
+        stage_type = entry["type"]
+        if stage_type not in STAGE_TYPES:
+            raise ValueError(f"Unknown routing stage type '{stage_type}' (expected one of {sorted(STAGE_TYPES)})")
+        if "min_confidence" not in entry and not hasattr(STAGE_TYPES[stage_type], "default_min_confidence"):
+            raise ValueError(f"Routing stage type '{stage_type}' needs a min_confidence")
+
+        label_map = entry.get("label_map")
+        if isinstance(label_map, str):
+            if label_map not in (label_maps or {}):
+                raise ValueError(f"Unknown label map '{label_map}' for routing stage '{entry.get('name', stage_type)}'")
+            label_map = label_maps[label_map]
+        if label_map is not None:
+            label_map = {**{category: category for category in categories}, **label_map}
+
+        return cls(
+            name=entry.get("name", stage_type),
+            type=stage_type,
+            min_confidence=float(entry["min_confidence"]) if "min_confidence" in entry else None,
+            cost_per_call=float(entry.get("cost_per_call", 0.0)),
+            enabled=bool(entry.get("enabled", True)),
+            component=entry.get("component"),
+            label_map=label_map,
+        )
+
+
+def load_pipeline_config(path: Optional[Path] = None) -> List[StageConfig]:
+    """
+    Read the stage list from a pipeline config file.
+
+    Args:
+        path: JSON file with a "stages" list, and optionally the pipeline "categories"
+              and the named "label_maps" stages refer to (default: config/routing_pipeline.json)
+
+    Returns:
+        Enabled and disabled stages in configured order
+    """
+    with open(path or DEFAULT_PIPELINE_CONFIG, encoding="utf-8") as handle:
+        config = json.load(handle)
+    label_maps = config.get("label_maps", {})
+    categories = config.get("categories", [])
+    return [StageConfig.from_dict(entry, label_maps, categories) for entry in config["stages"]]
+
+
+@dataclass
+class StageOutcome:
+    """A stage's answer for one ticket."""
+    label: str
+    confidence: float
+    detail: Any = None              # The component's own result (RuleMatch, RoutingDecision, ...)
+    cost: Optional[float] = None    # Reported cost, if the component tracks it
+    label_keys: Tuple[str, ...] = ()  # Looked up in the stage's label map before the label (e.g. the rule id)
+
+
+class RulesStage:
+    """
+    TelcoRulesEngine.evaluate_ticket (or StageWorkerPool.evaluate_ticket, awaited);
+    the label is the rule's department, and the rule id is looked up first.
+    """
+    deadline_stage = "rules"
+
+    def __init__(self, rules_engine):
+        self.rules_engine = rules_engine
+
+    def default_min_confidence(self) -> float:
+        """
+        rules_short_circuit_confidence (the threshold the API uses) from the engine's
+        business rules, or from the default BusinessRulesConfig (e.g. for a StageWorkerPool).
+        """
+        business_config = getattr(self.rules_engine, "business_config", None)
+        if business_config is None:
+            try:
+                business_config = BusinessRulesConfig()
+            except Exception as e:
+                logger.warning(f"⚠️ Business rules config unavailable, rules stage using the default threshold: {e}")
+                return DEFAULT_RULES_SHORT_CIRCUIT_CONFIDENCE
+        return business_config.get_rules_short_circuit_confidence()
+
+    async def run(self, ticket_text: str, priority: Optional[str],
+                  deadline: Optional[RequestDeadline]) -> Optional[StageOutcome]:
+        if inspect.iscoroutinefunction(self.rules_engine.evaluate_ticket):
+            match = await self.rules_engine.evaluate_ticket(ticket_text)
+        else:
+            match = self.rules_engine.evaluate_ticket(ticket_text)
+        if match is None:
+            return None
+        return StageOutcome(match.department, match.confidence, match, label_keys=(match.rule_id,))
+
+
+class MLStage:
+    """
+    TicketClassificationPipeline.predict_proba (in a thread, or awaited on a
+    StageWorkerPool); the label is the most probable category.
+    """
+    deadline_stage = "ml"
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def _classes(self):
+        classes = getattr(self.pipeline, "classes_", None)
+        return classes if classes is not None else self.pipeline.models["logistic_regression"].classes_
+
+    async def run(self, ticket_text: str, priority: Optional[str],
+                  deadline: Optional[RequestDeadline]) -> Optional[StageOutcome]:
+        if inspect.iscoroutinefunction(self.pipeline.predict_proba):
+            probabilities = (await self.pipeline.predict_proba([ticket_text]))[0]
+        else:
+            probabilities = (await asyncio.to_thread(self.pipeline.predict_proba, [ticket_text]))[0]
+        best = int(np.argmax(probabilities))
+        return StageOutcome(str(self._classes()[best]), float(probabilities[best]),
+                            dict(zip(map(str, self._classes()), map(float, probabilities), strict=True)))
+
+
+class VectorCacheStage:
+    """
+    ConfidenceBasedRouter.route_from_cache: exact cache, centroids or a cached route, never the LLM;
+    the label is the router's department (the historical ticket's actual_department).
+    """
+    deadline_stage = None   # The router plans (and degrades) its own vector search
+
+    def __init__(self, router):
+        self.router = router
+
+    async def run(self, ticket_text: str, priority: Optional[str],
+                  deadline: Optional[RequestDeadline]) -> Optional[StageOutcome]:
+        decision = await self.router.route_from_cache(ticket_text, deadline=deadline)
+        if decision is None:
+            return None
+        return StageOutcome(decision.recommended_department, decision.confidence_score, decision)
+
+
+class LLMStage:
+    """
+    Any classifier with classify_ticket(ticket_text): GeminiEnhancedClassifier
+    (label: predicted_category, a category; department_allocation is a
+    different, coarser scheme and is not used) or MultiProviderManager
+    (label: department, cost from its cost_estimate).
+    """
+    deadline_stage = "llm"
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        # Only GeminiEnhancedClassifier orders its calls by priority (llm_scheduler)
+        self._takes_priority = "priority" in inspect.signature(classifier.classify_ticket).parameters
+
+    async def run(self, ticket_text: str, priority: Optional[str],
+                  deadline: Optional[RequestDeadline]) -> Optional[StageOutcome]:
+        if priority is not None and self._takes_priority:
+            result = await asyncio.to_thread(self.classifier.classify_ticket, ticket_text, priority=priority)
+        else:
+            result = await asyncio.to_thread(self.classifier.classify_ticket, ticket_text)
+        label = getattr(result, "department", None) or getattr(result, "predicted_category", None)
+        if label is None:
+            return None
+        return StageOutcome(label, float(result.confidence), result, getattr(result, "cost_estimate", None))
+
+
+# Stage type (routing_pipeline.json "type") -> adapter over the component
+STAGE_TYPES: Dict[str, Callable[[Any], Any]] = {
+    "rules": RulesStage,
+    "ml": MLStage,
+    "vector_cache": VectorCacheStage,
+    "llm": LLMStage,
+}
+
+
+@dataclass
+class OrchestratedDecision:
+    """Result of one ticket through the tiered pipeline."""
+    label: Optional[str]            # None only when no stage produced an answer
+    confidence: float
+    stage: Optional[str]            # Stage whose answer was used
+    exited_early: bool              # Answer met its stage's min_confidence
+    reached_llm: bool
+    processing_time_ms: float
+    cost_estimate: float
+    detail: Any = None
+    # One entry per stage considered: {"stage", "outcome" (exit/pass/miss/unmapped/skip/error), "confidence", "latency_ms"}
+    trace: List[Dict[str, Any]] = field(default_factory=list)
+    # Stages degraded or skipped to stay within the SLA budget (see request_deadline)
+    degraded_stages: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class _StageStats:
+    """Counters and latency histogram of one stage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.exits = 0
+        self.misses = 0     # Stage ran but had no answer
+        self.unmapped = 0   # Answer outside the stage's label map
+        self.skipped = 0    # Not run: SLA budget
+        self.errors = 0
+        self.cost = 0.0
+        self.latency = WindowedLatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "exits": self.exits,
+            "hit_rate": self.exits / self.calls if self.calls else 0.0,
+            "misses": self.misses,
+            "unmapped": self.unmapped,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "total_cost": round(self.cost, 6),
+            "avg_cost": self.cost / self.calls if self.calls else 0.0,
+            "avg_latency_ms": self.latency.total_sum_ms / self.latency.total_count if self.latency.total_count else 0.0,
+            "latency_ms": self.latency.window_percentiles(),
+        }
+
+
+class RoutingOrchestrator:
+    """
+    Tiered early-exit routing over the configured stages.
+
+    Thread-safe statistics; one orchestrator is shared by every request.
+    """
+
+    def __init__(self, stages: List[StageConfig], components: Dict[str, Any],
+                 sla_budget_seconds: Optional[float] = None, stage_costs=None):
+        """
+        Initialize orchestrator.
+
+        Args:
+            stages: Pipeline (see load_pipeline_config); disabled stages are dropped
+            components: Component per stage type or StageConfig.component key
+                        (rules engine, ML pipeline, router, LLM classifier); enabled
+                        stages without a component are dropped with a warning
+            sla_budget_seconds: Per-ticket budget when route() gets no deadline (None = unbounded)
+            stage_costs: StageCostModel shared by the deadlines (default: a fresh one per deadline)
+        """
+        self.stages = []
+        for config in stages:
+            if not config.enabled:
+                continue
+            component = components.get(config.component or config.type)
+            if component is None:
+                logger.warning(f"⚠️ Routing stage '{config.name}' has no component, dropped from the pipeline")
+                continue
+            stage = STAGE_TYPES[config.type](component)
+            if config.min_confidence is None:
+                config = replace(config, min_confidence=stage.default_min_confidence())
+            self.stages.append((config, stage))
+        if not self.stages:
+            raise ValueError("Routing pipeline has no runnable stages")
+
+        self.sla_budget_seconds = sla_budget_seconds
+        self.stage_costs = stage_costs
+        self._lock = threading.Lock()
+        self._stats = {config.name: _StageStats() for config, _ in self.stages}
+        self._tickets = 0
+        self._reached_llm = 0
+        self._unanswered = 0
+        self._total_cost = 0.0
+        logger.info(f"🪜 Routing pipeline: {' → '.join(config.name for config, _ in self.stages)}")
+
+    @classmethod
+    def from_config(cls, path: Optional[Path] = None, components: Optional[Dict[str, Any]] = None,
+                    **options) -> "RoutingOrchestrator":
+        """
+        Create an orchestrator from a pipeline config file.
+
+        Args:
+            path: Pipeline config (default: config/routing_pipeline.json)
+            components: See __init__
+            **options: Other RoutingOrchestrator arguments
+        """
+        return cls(load_pipeline_config(path), components or {}, **options)
+
+    async def route(self, ticket_text: str, priority: Optional[str] = None,
+                    deadline: Optional[RequestDeadline] = None) -> OrchestratedDecision:
+        """
+        Run the stages in order until one is confident enough.
+
+        Args:
+            ticket_text: Ticket to route
+            priority: Priority class passed to the LLM stage (see llm_scheduler.priority_for)
+            deadline: Remaining SLA budget (default: a new one of `sla_budget_seconds`, if set);
+                      stages whose expected cost no longer fits are skipped, except the last
+
+        Returns:
+            OrchestratedDecision from the first stage meeting its min_confidence,
+            else from the most confident stage that answered
+        """
+        start_time = time.time()
+        if deadline is None and self.sla_budget_seconds is not None:
+            deadline = RequestDeadline(self.sla_budget_seconds, self.stage_costs)
+
+        trace: List[Dict[str, Any]] = []
+        best = None
+        exit_stage = None
+        reached_llm = False
+        cost = 0.0
+
+        for position, (config, stage) in enumerate(self.stages):
+            stats = self._stats[config.name]
+            last = position == len(self.stages) - 1
+            if self._skip_for_deadline(config, stage, deadline, last):
+                with self._lock:
+                    stats.skipped += 1
+                trace.append({"stage": config.name, "outcome": "skip", "confidence": None, "latency_ms": 0.0})
+                continue
+
+            reached_llm = reached_llm or config.type in LLM_STAGE_TYPES
+            stage_start = time.perf_counter()
+            try:
+                outcome = await stage.run(ticket_text, priority, deadline)
+                error = None
+            except Exception as e:
+                outcome, error = None, e
+                logger.warning(f"⚠️ Routing stage '{config.name}' failed: {e}")
+            latency_ms = (time.perf_counter() - stage_start) * 1000
+            unmapped = None
+            if outcome is not None and config.label_map is not None:
+                outcome, unmapped = self._map_label(config, outcome)
+            if deadline is not None and stage.deadline_stage is not None:
+                deadline.cost_model.observe(stage.deadline_stage, "full", latency_ms)
+
+            stage_cost = config.cost_per_call if outcome is None or outcome.cost is None else outcome.cost
+            cost += stage_cost
+            exited = outcome is not None and outcome.confidence >= config.min_confidence
+            with self._lock:
+                stats.calls += 1
+                stats.cost += stage_cost
+                stats.latency.record(latency_ms)
+                if error is not None:
+                    stats.errors += 1
+                elif unmapped is not None:
+                    stats.unmapped += 1
+                elif outcome is None:
+                    stats.misses += 1
+                elif exited:
+                    stats.exits += 1
+
+            trace.append({
+                "stage": config.name,
+                "outcome": "error" if error is not None else "unmapped" if unmapped is not None else
+                           "miss" if outcome is None else "exit" if exited else "pass",
+                "confidence": outcome.confidence if outcome is not None else None,
+                "latency_ms": round(latency_ms, 3),
+            })
+            if outcome is not None and (best is None or outcome.confidence > best[1].confidence):
+                best = (config.name, outcome)
+            if exited:
+                best, exit_stage = (config.name, outcome), config.name
+                break
+
+        with self._lock:
+            self._tickets += 1
+            self._reached_llm += reached_llm
+            self._unanswered += best is None
+            self._total_cost += cost
+
+        decision = OrchestratedDecision(
+            label=best[1].label if best else None,
+            confidence=best[1].confidence if best else 0.0,
+            stage=best[0] if best else None,
+            exited_early=exit_stage is not None,
+            reached_llm=reached_llm,
+            processing_time_ms=(time.time() - start_time) * 1000,
+            cost_estimate=cost,
+            detail=best[1].detail if best else None,
+            trace=trace,
+            degraded_stages=list(deadline.skips) if deadline is not None else [],
+        )
+        if best is None:
+            logger.warning("⚠️ No routing stage produced an answer")
+        else:
+            logger.info(f"🪜 Routed by {decision.stage}: {decision.label} (confidence: {decision.confidence:.3f}, "
+                        f"{'early exit' if decision.exited_early else 'best answer'})")
+        return decision
+
+    @staticmethod
+    def _map_label(config: StageConfig, outcome: StageOutcome) -> Tuple[Optional[StageOutcome], Optional[str]]:
+        """Translate the outcome's label into a pipeline category; (None, label) when the map has no entry."""
+        for key in (*outcome.label_keys, outcome.label):
+            if key in config.label_map:
+                return replace(outcome, label=config.label_map[key]), None
+        logger.debug(f"Routing stage '{config.name}' answered '{outcome.label}', not in its label map")
+        return None, outcome.label
+
+    @staticmethod
+    def _skip_for_deadline(config: StageConfig, stage, deadline: Optional[RequestDeadline], last: bool) -> bool:
+        """Whether the stage's expected cost no longer fits (the last stage always runs, as an overrun)."""
+        if deadline is None or stage.deadline_stage is None or deadline.fits(stage.deadline_stage):
+            return False
+        expected = deadline.cost_model.estimate(stage.deadline_stage)
+        reason = f"{deadline.remaining_ms():.0f} ms left < {expected:.0f} ms expected"
+        if last:
+            deadline.record(config.name, STAGE_OVERRUN, f"{reason}; no later stage")
+            return False
+        deadline.record(config.name, STAGE_SKIP, reason)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-stage calls, hit rate, latency and cost, and the share of tickets that never reached an LLM."""
+        with self._lock:
+            tickets = self._tickets
+            return {
+                "tickets": tickets,
+                "reached_llm": self._reached_llm,
+                "llm_avoided_rate": (tickets - self._reached_llm) / tickets if tickets else 0.0,
+                "unanswered": self._unanswered,
+                "total_cost": round(self._total_cost, 6),
+                "avg_cost_per_ticket": self._total_cost / tickets if tickets else 0.0,
+                "stages": {
+                    config.name: {"type": config.type, "min_confidence": config.min_confidence,
+                                  **self._stats[config.name].to_dict()}
+                    for config, _ in self.stages
+                },
+            }
+
+    def export_prometheus(self, prefix: str = "routing_pipeline") -> str:
+        """
+        Render pipeline metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Text suitable for serving from a /metrics scrape endpoint
+        """
+        stats = self.get_stats()
+        lines = []
+        for name, help_text in (("calls", "Tickets a stage ran for"),
+                                ("exits", "Tickets a stage decided (early exit)"),
+                                ("skipped", "Tickets a stage was skipped for (SLA budget)"),
+                                ("unmapped", "Stage answers outside its label map"),
+                                ("errors", "Stage failures")):
+            lines += [f"# HELP {prefix}_stage_{name}_total {help_text}.",
+                      f"# TYPE {prefix}_stage_{name}_total counter"]
+            for stage, entry in stats["stages"].items():
+                lines.append(f'{prefix}_stage_{name}_total{{stage="{stage}"}} {entry[name]}')
+        lines += [f"# HELP {prefix}_stage_cost_total Estimated stage cost (USD).",
+                  f"# TYPE {prefix}_stage_cost_total counter"]
+        for stage, entry in stats["stages"].items():
+            lines.append(f'{prefix}_stage_cost_total{{stage="{stage}"}} {entry["total_cost"]:.6f}')
+        lines += [f"# HELP {prefix}_stage_latency_ms Stage latency percentiles.",
+                  f"# TYPE {prefix}_stage_latency_ms gauge"]
+        for stage, entry in stats["stages"].items():
+            lines += prometheus_percentile_lines(f"{prefix}_stage_latency_ms", {"stage": stage}, entry["latency_ms"])
+        lines += [f"# HELP {prefix}_llm_avoided_ratio Share of tickets that never reached an LLM stage.",
+                  f"# TYPE {prefix}_llm_avoided_ratio gauge",
+                  f"{prefix}_llm_avoided_ratio {stats['llm_avoided_rate']:.6f}"]
+        return "\n".join(lines) + "\n"
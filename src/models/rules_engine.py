@@ -12,7 +12,7 @@ Now supports configuration-driven thresholds via BusinessRulesConfig for:
 
 import re
 import yaml
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Pattern
 from dataclasses import dataclass, field
 import logging
 
@@ -58,6 +58,21 @@ class RoutingRule:
         if self.keywords is None:
             self.keywords = []
 
+@dataclass(frozen=True)
+class CompiledRule:
+    """Routing rule with its pattern and keywords pre-processed for evaluation."""
+    rule: RoutingRule
+    regex: Optional[Pattern]
+    literal: str
+    keywords: tuple
+    max_confidence: float
+    order: int                          # Position in TelcoRulesEngine.rules (breaks confidence ties)
+
+
+# Minimum confidence for a rule match to be returned
+MIN_MATCH_CONFIDENCE = 0.85
+
+
 class TelcoRulesEngine:
     """
     Telco domain-specific rules engine for deterministic ticket routing.
@@ -82,8 +97,15 @@ class TelcoRulesEngine:
             rules_config_path: Optional path to YAML rules configuration
             business_config: Optional BusinessRulesConfig for dynamic thresholds
         """
+        # Bumped whenever the rule list changes; the evaluation plan is rebuilt to match
+        self._rules_version = 0
+        self._compiled_version = -1
         self.rules: List[RoutingRule] = []
         self.business_config = business_config
+        # Flat, pre-compiled lookups (see BusinessRulesConfig.compiled)
+        self._compiled_config = business_config.compiled if business_config else None
+        # Compiled evaluation plan (see compile_rules)
+        self._compiled_patterns: List[CompiledRule] = []
         self.rule_stats = {
             "total_evaluations": 0,
             "total_matches": 0,
@@ -113,8 +135,9 @@ class TelcoRulesEngine:
         Returns:
             SLA hours (integer)
         """
-        if self.business_config and self.business_config.is_feature_enabled("use_config_driven_thresholds"):
-            return self.business_config.get_sla_hours(rule_id)
+        compiled = self._compiled_config
+        if compiled is not None and compiled.use_config_driven_thresholds:
+            return compiled.rule_sla_hours.get(rule_id, compiled.default_sla_hours)
         return default
     
     def _get_confidence(self, rule_id: str, department: str, default: float) -> float:
@@ -129,8 +152,9 @@ class TelcoRulesEngine:
         Returns:
             Confidence threshold (0.0 - 1.0)
         """
-        if self.business_config and self.business_config.is_feature_enabled("use_config_driven_thresholds"):
-            return self.business_config.get_confidence_threshold(department)
+        compiled = self._compiled_config
+        if compiled is not None and compiled.use_config_driven_thresholds:
+            return compiled.department_confidence.get(department, compiled.standard_confidence)
         return default
     
     def _load_default_telco_rules(self):
@@ -318,6 +342,57 @@ class TelcoRulesEngine:
         config_mode = "config-driven" if self.business_config else "hard-coded"
         logger.info(f"Loaded {len(self.rules)} default telco routing rules ({config_mode} mode)")
     
+    @property
+    def rules(self) -> List[RoutingRule]:
+        """Routing rules in priority order (earlier rules win confidence ties)."""
+        return self._rules
+    
+    @rules.setter
+    def rules(self, rules: List[RoutingRule]) -> None:
+        self._rules = rules
+        self.invalidate_compiled_rules()
+    
+    def add_rule(self, rule: RoutingRule) -> None:
+        """Append a rule; the evaluation plan is recompiled on the next evaluation."""
+        self._rules.append(rule)
+        self.invalidate_compiled_rules()
+    
+    def invalidate_compiled_rules(self) -> None:
+        """
+        Mark the compiled evaluation plan stale.
+        
+        Assigning `rules` and add_rule() call this; call it after editing,
+        appending or replacing rules in place.
+        """
+        self._rules_version += 1
+    
+    def compile_rules(self) -> None:
+        """
+        Pre-compile rule patterns into an ordered evaluation plan.
+        
+        Regexes are compiled once, keywords lower-cased once, and rules are
+        sorted by the highest confidence they can reach, then by list order.
+        Called automatically after the rules are invalidated.
+        """
+        plan = []
+        for order, rule in enumerate(self.rules):
+            keywords = tuple((kw, kw.lower()) for kw in (rule.keywords or []))
+            max_confidence = rule.confidence
+            if keywords:
+                max_confidence = max(max_confidence, min(0.99, rule.confidence + len(keywords) * 0.01))
+            plan.append(CompiledRule(
+                rule=rule,
+                regex=re.compile(rule.pattern, re.IGNORECASE) if rule.regex else None,
+                literal=rule.pattern.lower(),
+                keywords=keywords,
+                max_confidence=max_confidence,
+                order=order
+            ))
+        
+        plan.sort(key=lambda compiled: (-compiled.max_confidence, compiled.order))
+        self._compiled_patterns = plan
+        self._compiled_version = self._rules_version
+    
     def load_rules_from_yaml(self, file_path: str):
         """Load routing rules from YAML configuration file."""
         try:
@@ -329,6 +404,7 @@ class TelcoRulesEngine:
                 rule = RoutingRule(**rule_data)
                 self.rules.append(rule)
             
+            self.invalidate_compiled_rules()
             logger.info(f"Loaded {len(self.rules)} rules from {file_path}")
         except Exception as e:
             logger.error(f"Failed to load rules from {file_path}: {e}")
@@ -347,34 +423,52 @@ class TelcoRulesEngine:
         """
         self.rule_stats["total_evaluations"] += 1
         
+        if self._compiled_version != self._rules_version:
+            self.compile_rules()
+        
         best_match = None
+        best_order = -1
         highest_confidence = 0.0
         
         ticket_lower = ticket_text.lower()
         
-        for rule in self.rules:
+        for compiled in self._compiled_patterns:
+            # Rules are ordered by best achievable confidence, so once the
+            # current match cannot be reached the remaining rules are skipped.
+            # A rule that can only tie wins only if it comes first in the rule
+            # list, as in a plain first-best pass over self.rules.
+            if compiled.max_confidence < highest_confidence or \
+                    compiled.max_confidence < MIN_MATCH_CONFIDENCE:
+                break
+            if compiled.max_confidence == highest_confidence and compiled.order > best_order:
+                continue
+            
+            rule = compiled.rule
             match_confidence = 0.0
             matched_keywords = []
             
             # Pattern matching (regex or simple string)
-            if rule.regex:
-                if re.search(rule.pattern, ticket_lower, re.IGNORECASE):
-                    match_confidence = rule.confidence
-            else:
-                if rule.pattern.lower() in ticket_lower:
+            if compiled.regex is not None:
+                if compiled.regex.search(ticket_lower):
                     match_confidence = rule.confidence
+            elif compiled.literal in ticket_lower:
+                match_confidence = rule.confidence
             
             # Keyword boosting
-            if rule.keywords and match_confidence > 0:
-                keyword_matches = sum(1 for kw in rule.keywords if kw.lower() in ticket_lower)
-                if keyword_matches > 0:
-                    matched_keywords = [kw for kw in rule.keywords if kw.lower() in ticket_lower]
+            if compiled.keywords and match_confidence > 0:
+                matched_keywords = [
+                    kw for kw, kw_lower in compiled.keywords if kw_lower in ticket_lower
+                ]
+                if matched_keywords:
                     # Boost confidence by 1% per matched keyword (max 5% boost)
-                    match_confidence = min(0.99, match_confidence + (keyword_matches * 0.01))
+                    match_confidence = min(0.99, match_confidence + (len(matched_keywords) * 0.01))
             
             # Check if this is the best match so far
-            if match_confidence > highest_confidence and match_confidence >= 0.85:  # Minimum threshold
+            if match_confidence < MIN_MATCH_CONFIDENCE or match_confidence < highest_confidence:
+                continue
+            if match_confidence > highest_confidence or compiled.order < best_order:
                 highest_confidence = match_confidence
+                best_order = compiled.order
                 
                 best_match = RuleMatch(
                     rule_id=rule.id,
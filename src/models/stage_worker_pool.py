@@ -0,0 +1,312 @@
+"""
+Process Pool for CPU-Bound Classification Stages
+
+Rules evaluation (regex passes), TF-IDF transforms and random forest
+traversal are CPU-bound Python: inside one uvicorn worker they serialize on
+the GIL and starve the event loop that drives the I/O-bound LLM calls.
+StageWorkerPool runs them in a pool of pre-warmed worker processes instead:
+
+- Each worker compiles the rules engine and loads the ML pipeline once, in
+  the pool initializer, and runs a warm-up ticket before the pool is used.
+  A .joblib artifact (TicketClassificationPipeline.save_model_mmap) is loaded
+  with mmap_mode='r', so arrays kept as NumPy (TF-IDF idf, logistic
+  regression coefficients) are shared page-cache pages across workers.
+- A batch travels through shared memory: the parent packs the UTF-8 ticket
+  texts and their offsets into one SharedMemory block and allocates another
+  for the probability matrix; workers read their slice of texts and write
+  their rows of probabilities in place, so only block names and row ranges
+  are pickled.
+- The async methods await the pool futures (run_in_executor), so callers such
+  as RoutingOrchestrator keep the event loop free while the stages run; a
+  pool first used from a coroutine is started in a worker thread.
+- Workers are started with forkserver (spawn where unavailable): forking a
+  parent that already runs threads (event loop executors, HTTP clients) can
+  deadlock the child.
+
+evaluate_ticket and predict_proba mirror TelcoRulesEngine and
+TicketClassificationPipeline as coroutines, so the pool can be passed to
+RoutingOrchestrator as its "rules" and "ml" components.
+
+Usage:
+    with StageWorkerPool(workers=4, model_path="models/telco_ticket_classifier.joblib") as pool:
+        matches = await pool.evaluate_tickets(ticket_texts)
+        probabilities = await pool.predict_proba(ticket_texts)
+
+Core scaling (1..N workers) is reported by scripts/benchmarks/benchmark_stage_pool.py.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TICKET = "My internet keeps dropping and I was double charged on my bill"
+
+# Per-process state built by _init_worker (rules engine, ML pipeline)
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(model_path: Optional[str], mmap_mode: Optional[str], use_business_rules: bool) -> None:
+    """Pool initializer: build the stages once per worker process."""
+    from src.models.rules_engine import TelcoRulesEngine
+
+    business_config = None
+    if use_business_rules:
+        try:
+            from src.models.business_rules_config import BusinessRulesConfig
+            business_config = BusinessRulesConfig()
+        except Exception as e:
+            logger.warning(f"⚠️ Business rules config unavailable in worker, rules engine using defaults: {e}")
+    rules_engine = TelcoRulesEngine(business_config=business_config)
+    rules_engine.compile_rules()
+    _worker_state["rules"] = rules_engine
+
+    if model_path is not None:
+        from src.models.ticket_classifier import TicketClassificationPipeline
+        pipeline = TicketClassificationPipeline()
+        pipeline.load_model(model_path, mmap_mode=mmap_mode)
+        _worker_state["pipeline"] = pipeline
+
+
+def _warm_worker() -> Tuple[int, Optional[List[str]]]:
+    """Run one ticket through every stage; returns the worker pid and the model classes."""
+    _worker_state["rules"].evaluate_ticket(WARMUP_TICKET)
+    pipeline = _worker_state.get("pipeline")
+    if pipeline is None:
+        return os.getpid(), None
+    pipeline.predict_proba([WARMUP_TICKET])
+    return os.getpid(), [str(c) for c in pipeline.models["logistic_regression"].classes_]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open a block created by the parent; only the parent tracks (and unlinks) it."""
+    return shared_memory.SharedMemory(name=name, track=False)
+
+
+def _read_texts(block: shared_memory.SharedMemory, count: int, start: int, stop: int) -> List[str]:
+    """Decode tickets [start, stop) from a block written by _pack_texts."""
+    offsets = np.ndarray((count + 1,), dtype=np.int64, buffer=block.buf)
+    base = (count + 1) * 8
+    data = block.buf
+    return [bytes(data[base + offsets[i]:base + offsets[i + 1]]).decode("utf-8") for i in range(start, stop)]
+
+
+def _rules_chunk(texts_name: str, count: int, start: int, stop: int) -> list:
+    """Worker task: rules matches for tickets [start, stop)."""
+    block = _attach(texts_name)
+    try:
+        texts = _read_texts(block, count, start, stop)
+    finally:
+        block.close()
+    engine = _worker_state["rules"]
+    return [engine.evaluate_ticket(text) for text in texts]
+
+
+def _proba_chunk(texts_name: str, output_name: str, count: int, classes: int, start: int, stop: int) -> int:
+    """Worker task: write the probabilities of tickets [start, stop) into the output block."""
+    block = _attach(texts_name)
+    try:
+        texts = _read_texts(block, count, start, stop)
+    finally:
+        block.close()
+    probabilities = _worker_state["pipeline"].predict_proba(texts)
+
+    output = _attach(output_name)
+    try:
+        np.ndarray((count, classes), dtype=np.float64, buffer=output.buf)[start:stop] = probabilities
+    finally:
+        output.close()
+    return stop - start
+
+
+def _pack_texts(texts: Sequence[str]) -> shared_memory.SharedMemory:
+    """Copy tickets into a new shared block: int64 offsets (count + 1), then the UTF-8 bytes."""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    base = offsets.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(1, base + int(offsets[-1])))
+    block.buf[:base] = offsets.tobytes()
+    block.buf[base:base + int(offsets[-1])] = b"".join(encoded)
+    return block
+
+
+def _release(block: shared_memory.SharedMemory) -> None:
+    block.close()
+    block.unlink()
+
+
+def _default_mp_context() -> multiprocessing.context.BaseContext:
+    """forkserver where the platform has it, spawn otherwise (never fork a threaded parent)."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+class StageWorkerPool:
+    """
+    Pre-warmed worker processes for the rules and ML stages.
+
+    The async methods are safe to call concurrently from one event loop;
+    the pool is started on first use, in a worker thread so the event loop
+    is not blocked (or explicitly with start(), e.g. at app startup).
+    """
+
+    def __init__(self, workers: Optional[int] = None, model_path: Optional[str] = None,
+                 mmap_mode: Optional[str] = "r", use_business_rules: bool = True,
+                 chunk_size: int = 64, mp_context=None):
+        """
+        Initialize pool.
+
+        Args:
+            workers: Worker processes (default: CPU count)
+            model_path: ML pipeline (.joblib from save_model_mmap, or a save_model
+                        pickle); None = rules stage only
+            mmap_mode: Memory-map mode for .joblib artifacts (None = load into each worker)
+            use_business_rules: Build the rules engine with the business rules config
+            chunk_size: Maximum tickets per worker task
+            mp_context: multiprocessing context (default: forkserver, or spawn
+                        where forkserver is unavailable)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.model_path = str(model_path) if model_path is not None else None
+        self.mmap_mode = mmap_mode
+        self.use_business_rules = use_business_rules
+        self.chunk_size = chunk_size
+        self.mp_context = mp_context or _default_mp_context()
+        self.classes_: Optional[np.ndarray] = None
+        self.worker_pids: List[int] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._start_lock = threading.Lock()
+        self.stats = {
+            "batches": 0,
+            "tickets": 0,
+            "tasks": 0,
+            "rules_time_ms": 0.0,
+            "ml_time_ms": 0.0,
+            "warmup_time_ms": 0.0,
+        }
+
+    def start(self) -> "StageWorkerPool":
+        """Spawn the workers and wait until each has loaded and warmed its stages."""
+        with self._start_lock:
+            if self._executor is not None:
+                return self
+            started = time.perf_counter()
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self.mp_context, initializer=_init_worker,
+                initargs=(self.model_path, self.mmap_mode, self.use_business_rules)
+            )
+            # One warm-up task per worker: all are submitted before any finishes, so every process is spawned
+            warmups = [executor.submit(_warm_worker) for _ in range(self.workers)]
+            results = [future.result() for future in warmups]
+            self.worker_pids = sorted({pid for pid, _ in results})
+            classes = results[0][1]
+            self.classes_ = np.array(classes) if classes is not None else None
+            self._executor = executor
+            self.stats["warmup_time_ms"] = (time.perf_counter() - started) * 1000
+        logger.info(f"🏭 Stage worker pool ready: {len(self.worker_pids)} processes "
+                    f"({'rules + ML' if self.classes_ is not None else 'rules only'}, "
+                    f"warm-up {self.stats['warmup_time_ms']:.0f} ms)")
+        return self
+
+    async def _ensure_started(self) -> None:
+        """Start the pool off the event loop if it is not running yet."""
+        if self._executor is None:
+            await asyncio.to_thread(self.start)
+
+    def _chunks(self, count: int) -> List[Tuple[int, int]]:
+        """Row ranges spreading `count` tickets over the workers (at most chunk_size each)."""
+        size = min(self.chunk_size, max(1, -(-count // self.workers)))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    async def evaluate_tickets(self, texts: Sequence[str]) -> List[Any]:
+        """
+        Rules matches for a batch of tickets.
+
+        Returns:
+            RuleMatch (or None) per ticket, in input order
+        """
+        if not texts:
+            return []
+        await self._ensure_started()
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        block = _pack_texts(texts)
+        try:
+            chunks = self._chunks(len(texts))
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, _rules_chunk, block.name, len(texts), start, stop)
+                for start, stop in chunks
+            ))
+        finally:
+            _release(block)
+        self._record(len(texts), len(chunks), "rules_time_ms", started)
+        return [match for chunk in results for match in chunk]
+
+    async def evaluate_ticket(self, ticket_text: str) -> Any:
+        """Rules match for one ticket (TelcoRulesEngine.evaluate_ticket as a coroutine)."""
+        return (await self.evaluate_tickets([ticket_text]))[0]
+
+    async def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Ensemble probabilities for a batch (TicketClassificationPipeline.predict_proba as a coroutine).
+
+        Returns:
+            (len(texts), len(classes_)) array; columns follow classes_
+        """
+        await self._ensure_started()
+        if self.classes_ is None:
+            raise RuntimeError("Stage worker pool has no ML model (model_path not set)")
+        count, classes = len(texts), len(self.classes_)
+        if count == 0:
+            return np.zeros((0, classes))
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        block = _pack_texts(texts)
+        output = shared_memory.SharedMemory(create=True, size=count * classes * 8)
+        try:
+            chunks = self._chunks(count)
+            await asyncio.gather(*(
+                loop.run_in_executor(self._executor, _proba_chunk, block.name, output.name, count, classes,
+                                     start, stop)
+                for start, stop in chunks
+            ))
+            probabilities = np.ndarray((count, classes), dtype=np.float64, buffer=output.buf).copy()
+        finally:
+            _release(block)
+            _release(output)
+        self._record(count, len(chunks), "ml_time_ms", started)
+        return probabilities
+
+    def _record(self, tickets: int, tasks: int, stage_key: str, started: float) -> None:
+        self.stats["batches"] += 1
+        self.stats["tickets"] += tickets
+        self.stats["tasks"] += tasks
+        self.stats[stage_key] += (time.perf_counter() - started) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batches, tickets and stage time through the pool"""
+        return {**self.stats, "workers": self.workers, "worker_pids": list(self.worker_pids),
+                "started": self._executor is not None}
+
+    def close(self) -> None:
+        """Shut the worker processes down."""
+        with self._start_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def __enter__(self) -> "StageWorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,336 @@
+"""
+Offline Threshold Optimizer for Cached Routing
+
+ConfidenceBasedRouter reuses the top match's department (a cached route, no
+LLM call) when its similarity ≥ confidence_threshold AND its department's
+historical accuracy ≥ accuracy_threshold. This module replays labelled
+historical decisions over a grid of both thresholds and reports, per grid
+point, the cache-hit rate, routing accuracy, expected LLM calls and latency
+saved, plus the Pareto frontier of hit rate against accuracy.
+
+The sweep is vectorized: decisions are binned once into a 2-D histogram over
+the grid and reverse cumulative sums give every grid point's totals, so cost
+is O(decisions + grid points) rather than their product.
+
+Usage:
+    data = LabelledDecisions.from_records(records_from_routing_log(iter_routing_log(paths), labels))
+    sweep = sweep_thresholds(data)
+    best = choose_thresholds(sweep, min_accuracy=0.95)
+    write_thresholds("config/business_rules.json", best["confidence_threshold"], best["accuracy_threshold"])
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from src.models.business_rules_config import ThresholdValidationError
+
+logger = logging.getLogger(__name__)
+
+# Threshold grid (validation_rules bound routing thresholds to [0.5, 1.0])
+DEFAULT_GRID = np.round(np.arange(0.50, 1.0 + 1e-9, 0.01), 2)
+
+# Used when the decisions carry no latency for a routing method
+DEFAULT_LLM_LATENCY_MS = 8000.0
+DEFAULT_CACHED_LATENCY_MS = 50.0
+
+
+def iter_routing_log(paths: Sequence[Union[str, Path]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield routing_decision entries from JSONL logs (.jsonl or rotated .jsonl.gz).
+
+    Lines that are not valid JSON (e.g. partially written at the end of a live
+    log) are skipped.
+    """
+    for path in paths:
+        path = Path(path)
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("event_type") == "routing_decision":
+                    yield entry
+
+
+def records_from_routing_log(entries: Iterable[Mapping[str, Any]],
+                             labels: Optional[Mapping[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Turn routing log entries into labelled decision records.
+
+    Only cached-route and RAG-LLM decisions are threshold decisions; exact-cache,
+    coalesced and fallback entries are skipped. The actual department comes from
+    `labels` (ticket_id → department) or an "actual_department" field on the entry.
+
+    Args:
+        entries: Routing log entries (see iter_routing_log)
+        labels: Actual department per ticket ID
+
+    Returns:
+        Records for LabelledDecisions.from_records
+    """
+    labels = labels or {}
+    records = []
+    for entry in entries:
+        routing = entry.get("routing", {})
+        evidence = entry.get("evidence", {})
+        method = routing.get("method")
+        if method not in ("cached_route", "rag_llm"):
+            continue
+        top_match_department = evidence.get("top_match_department")
+        if top_match_department is None and method == "cached_route":
+            top_match_department = routing.get("department")
+        records.append({
+            "top_similarity": evidence.get("top_similarity"),
+            "historical_accuracy": evidence.get("historical_accuracy"),
+            "top_match_department": top_match_department,
+            "routed_department": routing.get("department"),
+            "actual_department": labels.get(entry.get("ticket_id")) or entry.get("actual_department"),
+            "method": method,
+            "processing_time_ms": entry.get("performance", {}).get("processing_time_ms"),
+        })
+    return records
+
+
+@dataclass
+class LabelledDecisions:
+    """Column arrays of labelled historical decisions."""
+    top_similarity: np.ndarray
+    historical_accuracy: np.ndarray
+    cached_correct: np.ndarray  # 1.0 if the top match's department was the actual one
+    llm_correct: np.ndarray  # 1.0/0.0, or the observed LLM accuracy where the LLM was not asked
+    llm_latency_ms: np.ndarray
+    cached_latency_ms: np.ndarray
+    skipped: int = 0  # Records without a label or top match
+
+    def __len__(self) -> int:
+        return len(self.top_similarity)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]],
+                     llm_latency_ms: Optional[float] = None,
+                     cached_latency_ms: Optional[float] = None) -> "LabelledDecisions":
+        """
+        Build column arrays from labelled decision records.
+
+        Each record needs top_similarity, historical_accuracy, top_match_department
+        and actual_department; routed_department, method and processing_time_ms are
+        used when present. Missing LLM outcomes are imputed with the observed LLM
+        accuracy and missing latencies with the observed (or given) per-method latency.
+
+        Args:
+            records: Labelled decisions (see records_from_routing_log)
+            llm_latency_ms: LLM route latency where none was observed
+            cached_latency_ms: Cached route latency where none was observed
+        """
+        rows = []
+        skipped = 0
+        for record in records:
+            actual = record.get("actual_department")
+            if not actual or not record.get("top_match_department") or record.get("top_similarity") is None:
+                skipped += 1
+                continue
+            method = record.get("method")
+            latency = record.get("processing_time_ms")
+            rows.append((
+                float(record["top_similarity"]),
+                float(record.get("historical_accuracy") or 0.0),
+                float(record["top_match_department"] == actual),
+                float(record.get("routed_department") == actual) if method == "rag_llm" else np.nan,
+                latency if method == "rag_llm" and latency is not None else np.nan,
+                latency if method == "cached_route" and latency is not None else np.nan,
+            ))
+        if skipped:
+            logger.info(f"📭 Skipped {skipped} decisions without a label or top match")
+
+        columns = np.array(rows, dtype=np.float64).reshape(-1, 6).T
+        similarity, accuracy, cached_correct, llm_correct, llm_latency, cached_latency = columns
+
+        observed_llm_accuracy = np.nanmean(llm_correct) if np.isfinite(llm_correct).any() else 1.0
+        llm_correct[np.isnan(llm_correct)] = observed_llm_accuracy
+        llm_latency[np.isnan(llm_latency)] = _fill_value(llm_latency, llm_latency_ms, DEFAULT_LLM_LATENCY_MS)
+        cached_latency[np.isnan(cached_latency)] = _fill_value(cached_latency, cached_latency_ms,
+                                                               DEFAULT_CACHED_LATENCY_MS)
+        return cls(similarity, accuracy, cached_correct, llm_correct, llm_latency, cached_latency, skipped)
+
+
+def _fill_value(values: np.ndarray, given: Optional[float], default: float) -> float:
+    if given is not None:
+        return given
+    return float(np.nanmedian(values)) if np.isfinite(values).any() else default
+
+
+@dataclass
+class ThresholdSweep:
+    """Outcomes at every (confidence_threshold, accuracy_threshold) grid point; arrays are (C, A)."""
+    confidence_grid: np.ndarray
+    accuracy_grid: np.ndarray
+    decisions: int
+    cache_hits: np.ndarray
+    accuracy: np.ndarray
+    latency_saved_ms: np.ndarray
+
+    @property
+    def cache_hit_rate(self) -> np.ndarray:
+        return self.cache_hits / max(self.decisions, 1)
+
+    @property
+    def expected_llm_calls(self) -> np.ndarray:
+        return self.decisions - self.cache_hits
+
+    def point(self, i: int, j: int) -> Dict[str, float]:
+        """Summary of grid point (confidence_grid[i], accuracy_grid[j])."""
+        return {
+            "confidence_threshold": float(self.confidence_grid[i]),
+            "accuracy_threshold": float(self.accuracy_grid[j]),
+            "cache_hit_rate": float(self.cache_hit_rate[i, j]),
+            "accuracy": float(self.accuracy[i, j]),
+            "expected_llm_calls": int(self.expected_llm_calls[i, j]),
+            "llm_calls_saved": int(self.cache_hits[i, j]),
+            "latency_saved_ms": float(self.latency_saved_ms[i, j]),
+        }
+
+    def pareto_frontier(self) -> List[Dict[str, float]]:
+        """
+        Grid points no other point beats on both cache-hit rate and accuracy.
+
+        Among points with identical outcomes the highest thresholds are kept.
+
+        Returns:
+            Frontier points ordered by increasing cache-hit rate
+        """
+        hits = self.cache_hits.ravel()
+        accuracy = self.accuracy.ravel()
+        i, j = np.unravel_index(np.arange(hits.size), self.cache_hits.shape)
+        # Best candidates first: more hits, then higher accuracy, then stricter thresholds
+        order = np.lexsort((-j, -i, -accuracy, -hits))
+        best_so_far = np.maximum.accumulate(accuracy[order])
+        keep = np.ones(order.size, dtype=bool)
+        keep[1:] = accuracy[order][1:] > best_so_far[:-1]
+        frontier = [self.point(i[k], j[k]) for k in order[keep]]
+        return frontier[::-1]
+
+
+def sweep_thresholds(data: LabelledDecisions,
+                     confidence_grid: Sequence[float] = DEFAULT_GRID,
+                     accuracy_grid: Sequence[float] = DEFAULT_GRID) -> ThresholdSweep:
+    """
+    Evaluate every threshold pair on the grid against labelled decisions.
+
+    A decision is a cache hit at (c, a) when top_similarity ≥ c and
+    historical_accuracy ≥ a, matching ConfidenceBasedRouter._use_cached_route.
+
+    Args:
+        data: Labelled decisions
+        confidence_grid: Candidate confidence (similarity) thresholds
+        accuracy_grid: Candidate historical accuracy thresholds
+
+    Returns:
+        ThresholdSweep over the sorted grids
+    """
+    confidence_grid = np.sort(np.asarray(confidence_grid, dtype=np.float64))
+    accuracy_grid = np.sort(np.asarray(accuracy_grid, dtype=np.float64))
+    rows, cols = len(confidence_grid) + 1, len(accuracy_grid) + 1
+
+    # Bin k holds decisions meeting exactly the first k thresholds of a grid
+    ci = np.searchsorted(confidence_grid, data.top_similarity, side="right")
+    ai = np.searchsorted(accuracy_grid, data.historical_accuracy, side="right")
+    flat = ci * cols + ai
+
+    def at_or_above(weights) -> np.ndarray:
+        histogram = np.bincount(flat, weights=weights, minlength=rows * cols).reshape(rows, cols)
+        totals = histogram[::-1, ::-1].cumsum(axis=0).cumsum(axis=1)[::-1, ::-1]
+        return totals[1:, 1:]
+
+    cache_hits = np.rint(at_or_above(None)).astype(np.int64)
+    decisions = len(data)
+    correct = at_or_above(data.cached_correct) + data.llm_correct.sum() - at_or_above(data.llm_correct)
+    return ThresholdSweep(
+        confidence_grid=confidence_grid,
+        accuracy_grid=accuracy_grid,
+        decisions=decisions,
+        cache_hits=cache_hits,
+        accuracy=correct / max(decisions, 1),
+        latency_saved_ms=at_or_above(data.llm_latency_ms - data.cached_latency_ms),
+    )
+
+
+def evaluate_thresholds(data: LabelledDecisions, confidence_threshold: float,
+                        accuracy_threshold: float) -> Dict[str, float]:
+    """Outcome of a single threshold pair (e.g. the thresholds currently configured)."""
+    sweep = sweep_thresholds(data, [confidence_threshold], [accuracy_threshold])
+    return sweep.point(0, 0)
+
+
+def choose_thresholds(sweep: ThresholdSweep, min_accuracy: float) -> Optional[Dict[str, float]]:
+    """
+    Frontier point with the highest cache-hit rate whose accuracy is at least `min_accuracy`.
+
+    Returns:
+        Chosen point, or None when no grid point is accurate enough
+    """
+    eligible = [point for point in sweep.pareto_frontier() if point["accuracy"] >= min_accuracy - 1e-12]
+    return max(eligible, key=lambda point: point["cache_hit_rate"]) if eligible else None
+
+
+def write_thresholds(config_file: Union[str, Path], confidence_threshold: float, accuracy_threshold: float,
+                     updated_by: str = "threshold_optimizer") -> None:
+    """
+    Write cached-route thresholds into routing_thresholds of a business rules file.
+
+    Edits the values in place so the file's layout and comments are kept, checks
+    the result against its validation_rules and replaces the file atomically.
+
+    Raises:
+        ThresholdValidationError: If a threshold is outside the allowed range
+    """
+    path = Path(config_file)
+    text = path.read_text(encoding="utf-8")
+    rules = json.loads(text).get("validation_rules", {})
+    low = rules.get("min_confidence_threshold", 0.0)
+    high = rules.get("max_confidence_threshold", 1.0)
+
+    updates = {"cached_route_similarity": confidence_threshold, "cached_route_accuracy": accuracy_threshold}
+    for key, value in updates.items():
+        if not low <= value <= high:
+            raise ThresholdValidationError(key=f"routing_thresholds.{key}", value=value,
+                                           min_value=low, max_value=high)
+        literal = f"{value:.2f}" if round(value, 2) == value else f"{value:.4f}".rstrip("0")
+        text = _set_json_value(text, "routing_thresholds", key, literal)
+
+    text = _set_json_value(text, "metadata", "last_updated",
+                           json.dumps(datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")))
+    text = _set_json_value(text, "metadata", "updated_by", json.dumps(updated_by))
+    json.loads(text)  # Never write a file the config loader would reject
+
+    staging = path.with_name(path.name + ".tmp")
+    staging.write_text(text, encoding="utf-8")
+    os.replace(staging, path)
+    logger.info(f"📝 Cached-route thresholds set to {confidence_threshold:g}/{accuracy_threshold:g} in {path}")
+
+
+def _set_json_value(text: str, section: str, key: str, literal: str) -> str:
+    """Replace (or add) a scalar `key` inside the top-level object `section` of JSON text."""
+    opening = re.search(rf'^([ \t]*)"{re.escape(section)}"\s*:\s*\{{', text, re.MULTILINE)
+    if opening is None:
+        raise KeyError(f"Section {section!r} not found")
+    end = text.index("}", opening.end())  # Sections are flat objects
+    body = text[opening.end():end]
+
+    existing = re.search(rf'("{re.escape(key)}"\s*:\s*)("(?:[^"\\]|\\.)*"|[-0-9.eE+]+|true|false|null)', body)
+    if existing:
+        body = body[:existing.start(2)] + literal + body[existing.end(2):]
+    else:
+        indent = opening.group(1) + "  "
+        body = body.rstrip() + f',\n{indent}"{key}": {literal}\n{opening.group(1)}'
+    return text[:opening.end()] + body + text[end:]
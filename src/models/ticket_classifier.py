@@ -13,7 +13,7 @@ from sklearn.metrics import classification_report, accuracy_score, confusion_mat
 from sklearn.pipeline import Pipeline
 import pickle
 import time
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 import logging
 
 # Setup logging
@@ -240,10 +240,36 @@ class TicketClassificationPipeline:
         
         logger.info(f"💾 Model saved to {filepath}")
     
-    def load_model(self, filepath: str) -> None:
-        """Load a trained model pipeline."""
-        with open(filepath, 'rb') as f:
-            model_data = pickle.load(f)
+    def save_model_mmap(self, filepath: str) -> None:
+        """
+        Save the trained model pipeline as a joblib artifact whose NumPy arrays
+        can be memory-mapped by load_model (shared pages across worker processes).
+        """
+        import joblib
+        
+        model_data = {
+            'models': self.models,
+            'ensemble_weights': self.ensemble_weights,
+            'training_history': self.training_history
+        }
+        joblib.dump(model_data, filepath)
+        
+        logger.info(f"💾 Memory-mappable model saved to {filepath}")
+    
+    def load_model(self, filepath: str, mmap_mode: Optional[str] = None) -> None:
+        """
+        Load a trained model pipeline.
+        
+        Args:
+            filepath: Pickle from save_model, or .joblib artifact from save_model_mmap
+            mmap_mode: Memory-map the artifact's arrays ('r' = read-only; .joblib only)
+        """
+        if str(filepath).endswith('.joblib'):
+            import joblib
+            model_data = joblib.load(filepath, mmap_mode=mmap_mode)
+        else:
+            with open(filepath, 'rb') as f:
+                model_data = pickle.load(f)
         
         self.models = model_data['models']
         self.ensemble_weights = model_data['ensemble_weights']
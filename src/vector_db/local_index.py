@@ -0,0 +1,860 @@
+"""
+Local In-Process Vector Index
+
+LocalVectorIndex is a drop-in for PineconeClient when the historical tickets
+fit on one machine: it implements the same async surface (initialize_index,
+upsert_vectors, query_vectors, delete_vectors, get_index_stats, health_check,
+close) without a network round trip, an API key or a per-query cost.
+
+- Vectors are unit-normalized into one contiguous float32 matrix, so cosine
+  similarity is a dot product.
+- Below `hnsw_threshold` vectors a query is exact brute force: one
+  matrix-vector product and an argpartition for the top k.
+- From `hnsw_threshold` vectors on, an HNSW graph (hierarchical navigable
+  small world; Malkov & Yashunin) over the same matrix answers queries in
+  roughly logarithmic time. New vectors are inserted into the graph as they
+  are upserted; deleted and replaced vectors are tombstoned and the index is
+  compacted once tombstones pass `compact_ratio`.
+- Metadata filters use Pinecone's filter language ({"field": value},
+  $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin/$exists, $and/$or). A filtered HNSW
+  query widens its search until it finds top_k matches and falls back to
+  brute force for very selective filters.
+- The index persists to `persist_dir/index_name/` (vectors.npy, state.json,
+  graph.npz) on close() and at most every `autosave_interval_seconds` after
+  upserts and deletes, and is reloaded by initialize_index(). A save
+  snapshots the index under the lock and writes the files without it, so
+  queries are not held up by disk I/O.
+- The async methods run loading, graph builds and saves in a worker thread
+  (asyncio.to_thread); a query waits for the index lock off the event loop
+  while an upsert or compaction holds it.
+
+Usage:
+    index = LocalVectorIndex(LocalIndexConfig(dimension=1536, persist_dir="data/vector_index"))
+    await index.initialize_index()
+    await index.upsert_vectors([(ticket_id, embedding, metadata), ...])
+    results = await index.query_vectors(embedding, top_k=5, filter_metadata={"actual_department": "BILLING"})
+
+Select it with preferred_vector_db "local" in config/provider_config.json.
+Recall and latency against brute force are reported by
+scripts/benchmarks/benchmark_local_index.py.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from src.vector_db.pinecone_client import PineconeClient, VectorDBHealth, VectorMetadata
+
+logger = logging.getLogger(__name__)
+
+_COMPARISONS = {
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+}
+
+
+def _field_matches(value: Any, condition: Any) -> bool:
+    """One field condition; list-valued metadata matches when any element does."""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    values = value if isinstance(value, list) else [value]
+    for op, operand in condition.items():
+        if op == "$exists":
+            if (value is not None) != bool(operand):
+                return False
+        elif value is None:
+            return False
+        elif op == "$eq":
+            if operand not in values:
+                return False
+        elif op == "$ne":
+            if operand in values:
+                return False
+        elif op == "$in":
+            if not any(v in operand for v in values):
+                return False
+        elif op == "$nin":
+            if any(v in operand for v in values):
+                return False
+        elif op in _COMPARISONS:
+            try:
+                if not _COMPARISONS[op](value, operand):
+                    return False
+            except TypeError:
+                return False
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter_metadata: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter.
+
+    Args:
+        metadata: Stored metadata of one vector
+        filter_metadata: e.g. {"actual_department": "BILLING", "customer_satisfaction": {"$gte": 7}}
+
+    Returns:
+        True if every condition holds
+    """
+    if not filter_metadata:
+        return True
+    for key, condition in filter_metadata.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _field_matches(metadata.get(key), condition):
+            return False
+    return True
+
+
+def _write_atomic(path: Path, write) -> None:
+    """Write through a temporary file and rename it over `path`."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as handle:
+        write(handle)
+    os.replace(tmp, path)
+
+
+class HNSWGraph:
+    """
+    Hierarchical navigable small world graph over the rows of a unit-norm
+    float32 matrix (similarity = dot product).
+
+    Nodes are matrix rows, added in row order. Layer 0 neighbor lists live in
+    one (capacity, 2m) int32 array; the sparse upper layers in dicts.
+    """
+
+    def __init__(self, m: int = 16, ef_construction: int = 100, seed: int = 0):
+        """
+        Initialize an empty graph.
+
+        Args:
+            m: Neighbors per node on the upper layers (2m on layer 0)
+            ef_construction: Candidate list size while inserting
+            seed: Seed for the level assignment
+        """
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self._level_mult = 1.0 / math.log(m)
+        self._rng = np.random.default_rng(seed)
+        self.count = 0
+        self.entry_point = -1
+        self.levels = np.zeros(0, dtype=np.int8)
+        self.layer0 = np.full((0, self.m0), -1, dtype=np.int32)
+        self.degree0 = np.zeros(0, dtype=np.int32)
+        self.upper: List[Dict[int, np.ndarray]] = []     # upper[level - 1][node] -> neighbor rows
+
+    @property
+    def max_level(self) -> int:
+        return int(self.levels[self.entry_point]) if self.entry_point >= 0 else -1
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self.levels)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        grown = len(self.levels)
+        self.levels = np.concatenate([self.levels, np.zeros(capacity - grown, dtype=np.int8)])
+        self.layer0 = np.concatenate([self.layer0, np.full((capacity - grown, self.m0), -1, dtype=np.int32)])
+        self.degree0 = np.concatenate([self.degree0, np.zeros(capacity - grown, dtype=np.int32)])
+
+    def neighbors(self, node: int, level: int) -> np.ndarray:
+        if level == 0:
+            return self.layer0[node, :self.degree0[node]]
+        return self.upper[level - 1][node]
+
+    def _set_neighbors(self, node: int, level: int, neighbors: np.ndarray) -> None:
+        if level == 0:
+            self.layer0[node, :len(neighbors)] = neighbors
+            self.layer0[node, len(neighbors):] = -1
+            self.degree0[node] = len(neighbors)
+        else:
+            self.upper[level - 1][node] = np.asarray(neighbors, dtype=np.int32)
+
+    def _search_layer(self, vectors: np.ndarray, query: np.ndarray, entry_points: Sequence[int],
+                      ef: int, level: int) -> List[Tuple[float, int]]:
+        """Best-first search of one layer; returns up to ef (similarity, node), most similar first."""
+        visited = np.zeros(self.count, dtype=bool)
+        entry = np.asarray(entry_points, dtype=np.int64)
+        visited[entry] = True
+        scored = list(zip((vectors[entry] @ query).tolist(), entry.tolist(), strict=True))
+        candidates = [(-s, n) for s, n in scored]
+        heapq.heapify(candidates)
+        results = heapq.nlargest(ef, scored)
+        heapq.heapify(results)
+        push, pop, pushpop = heapq.heappush, heapq.heappop, heapq.heappushpop
+        neighbors_of = self.neighbors
+
+        while candidates:
+            negative, node = pop(candidates)
+            worst = results[0][0]
+            if -negative < worst and len(results) >= ef:
+                break
+            neighbors = neighbors_of(node, level)
+            neighbors = neighbors[~visited[neighbors]]
+            if not len(neighbors):
+                continue
+            visited[neighbors] = True
+            similarities = vectors[neighbors] @ query
+            if len(results) >= ef:
+                keep = similarities > worst
+                neighbors, similarities = neighbors[keep], similarities[keep]
+            for similarity, neighbor in zip(similarities.tolist(), neighbors.tolist(), strict=True):
+                if len(results) < ef:
+                    push(results, (similarity, neighbor))
+                elif similarity > results[0][0]:
+                    pushpop(results, (similarity, neighbor))
+                else:
+                    continue
+                push(candidates, (-similarity, neighbor))
+        return sorted(results, reverse=True)
+
+    @staticmethod
+    def _select(vectors: np.ndarray, similarities: np.ndarray, nodes: np.ndarray, m: int) -> np.ndarray:
+        """
+        Neighbor selection heuristic: walk candidates from most similar and keep
+        one only if it is closer to the base than to every neighbor kept so far,
+        so links spread across clusters instead of bunching inside one.
+        """
+        if len(nodes) <= m:
+            return nodes
+        candidates = vectors[nodes]
+        pairwise = candidates @ candidates.T
+        closest_kept = np.full(len(nodes), -np.inf, dtype=np.float32)   # Max similarity to a kept neighbor
+        selected: List[int] = []
+        for i in range(len(nodes)):
+            if closest_kept[i] < similarities[i]:
+                selected.append(i)
+                if len(selected) == m:
+                    break
+                np.maximum(closest_kept, pairwise[i], out=closest_kept)
+        return nodes[selected]
+
+    def _link(self, vectors: np.ndarray, node: int, new: int, level: int) -> None:
+        """Add the reverse edge node -> new, pruning node's list if it overflows."""
+        limit = self.m0 if level == 0 else self.m
+        neighbors = self.neighbors(node, level)
+        if len(neighbors) < limit:
+            self._set_neighbors(node, level, np.append(neighbors, new))
+            return
+        candidates = np.append(neighbors, new)
+        similarities = vectors[candidates] @ vectors[node]
+        order = np.argsort(-similarities)
+        self._set_neighbors(node, level, self._select(vectors, similarities[order], candidates[order], limit))
+
+    def add(self, vectors: np.ndarray, node: int) -> None:
+        """Insert row `node` (the next row after the last one added)."""
+        self._reserve(node + 1)
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self.levels[node] = level
+        while len(self.upper) < level:
+            self.upper.append({})
+        for upper_level in range(1, level + 1):
+            self.upper[upper_level - 1][node] = np.zeros(0, dtype=np.int32)
+        self.count = node + 1
+        if self.entry_point < 0:
+            self.entry_point = node
+            return
+
+        query = vectors[node]
+        top = self.max_level
+        entry = [self.entry_point]
+        for current in range(top, level, -1):
+            entry = [self._search_layer(vectors, query, entry, 1, current)[0][1]]
+        for current in range(min(level, top), -1, -1):
+            found = self._search_layer(vectors, query, entry, self.ef_construction, current)
+            similarities = np.array([s for s, _ in found], dtype=np.float32)
+            nodes = np.array([n for _, n in found], dtype=np.int32)
+            selected = self._select(vectors, similarities, nodes, self.m)
+            self._set_neighbors(node, current, selected)
+            for neighbor in selected.tolist():
+                self._link(vectors, neighbor, node, current)
+            entry = nodes.tolist()
+        if level > top:
+            self.entry_point = node
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, ef: int) -> List[Tuple[float, int]]:
+        """Approximate nearest rows to `query`: up to ef (similarity, row), most similar first."""
+        if self.entry_point < 0:
+            return []
+        entry = [self.entry_point]
+        for level in range(self.max_level, 0, -1):
+            entry = [self._search_layer(vectors, query, entry, 1, level)[0][1]]
+        return self._search_layer(vectors, query, entry, ef, 0)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Graph as arrays for np.savez."""
+        arrays = {
+            "params": np.array([self.m, self.ef_construction, self.count, self.entry_point], dtype=np.int64),
+            "levels": self.levels[:self.count],
+            "layer0": self.layer0[:self.count],
+            "degree0": self.degree0[:self.count],
+        }
+        for level, layer in enumerate(self.upper, start=1):
+            nodes = np.array(sorted(layer), dtype=np.int32)
+            padded = np.full((len(nodes), self.m), -1, dtype=np.int32)
+            for row, node in enumerate(nodes.tolist()):
+                padded[row, :len(layer[node])] = layer[node]
+            arrays[f"upper_{level}_nodes"] = nodes
+            arrays[f"upper_{level}_neighbors"] = padded
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, seed: int = 0) -> "HNSWGraph":
+        """Rebuild a graph saved by to_arrays()."""
+        m, ef_construction, count, entry_point = (int(v) for v in arrays["params"])
+        graph = cls(m=m, ef_construction=ef_construction, seed=seed + count)
+        graph.count, graph.entry_point = count, entry_point
+        graph.levels = np.array(arrays["levels"], dtype=np.int8)
+        graph.layer0 = np.array(arrays["layer0"], dtype=np.int32)
+        graph.degree0 = np.array(arrays["degree0"], dtype=np.int32)
+        level = 1
+        while f"upper_{level}_nodes" in arrays:
+            neighbors = arrays[f"upper_{level}_neighbors"]
+            graph.upper.append({int(node): row[row >= 0].astype(np.int32)
+                                for node, row in zip(arrays[f"upper_{level}_nodes"], neighbors, strict=True)})
+            level += 1
+        return graph
+
+
+class LocalIndexConfig(BaseModel):
+    """Local vector index configuration settings"""
+    index_name: str = Field(default="call-centre-tickets", description="Index name (subdirectory of persist_dir)")
+    dimension: int = Field(default=1536, description="Vector dimension (OpenAI embeddings)")
+    metric: str = Field(default="cosine", description="Distance metric (cosine only)")
+    persist_dir: Optional[str] = Field(default="data/vector_index",
+                                       description="Directory the index is saved to; None keeps it in memory")
+    autosave: bool = Field(default=True, description="Save on close and after upserts and deletes")
+    autosave_interval_seconds: float = Field(default=30.0,
+                                             description="Minimum time between autosaves (0 = after every change)")
+    hnsw_threshold: int = Field(default=20_000, description="Vectors from which queries use the HNSW graph")
+    hnsw_m: int = Field(default=16, description="HNSW neighbors per node (2x on layer 0)")
+    hnsw_ef_construction: int = Field(default=64, description="HNSW candidate list size while inserting")
+    hnsw_ef_search: int = Field(default=64, description="HNSW candidate list size while querying")
+    compact_ratio: float = Field(default=0.25, description="Tombstoned fraction of rows that triggers compaction")
+    seed: int = Field(default=0, description="Seed for HNSW level assignment")
+
+    @classmethod
+    def from_provider_config(cls, provider_config: Dict[str, Any]) -> "LocalIndexConfig":
+        """Settings from the "local" entry of vector_db_providers in config/provider_config.json."""
+        metadata = provider_config.get("metadata", {})
+        return cls(**{name: metadata[name] for name in cls.model_fields if name in metadata})
+
+
+class LocalVectorIndex:
+    """
+    In-process vector index with the async surface of PineconeClient.
+
+    Brute-force cosine search for small indexes, an HNSW graph for large ones.
+    Thread-safe; the async methods keep the caller's event loop free.
+    """
+
+    create_enhanced_metadata = staticmethod(PineconeClient.create_enhanced_metadata)
+
+    def __init__(self, config: Optional[LocalIndexConfig] = None):
+        """Initialize the index (loaded from disk by initialize_index)."""
+        self.config = config or LocalIndexConfig()
+        if self.config.metric != "cosine":
+            raise ValueError(f"Local vector index supports the cosine metric only, not {self.config.metric}")
+        self.index = None                       # Set once initialized, as on PineconeClient
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()      # Serializes file writes (held without _lock)
+        self._version = 0                       # Bumped by every change
+        self._saved_version = 0
+        self._last_save = -math.inf
+        self._vectors = np.zeros((0, self.config.dimension), dtype=np.float32)
+        self._ids: List[Optional[str]] = []     # Row -> vector id (None once tombstoned)
+        self._metadata: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}          # Vector id -> row
+        self._graph: Optional[HNSWGraph] = None
+        self._loaded = False
+        self._health_status = VectorDBHealth.UNKNOWN
+        self.stats = {
+            "brute_force_queries": 0,
+            "hnsw_queries": 0,
+            "filter_fallbacks": 0,             # Filtered HNSW queries answered by brute force
+            "query_time_ms": 0.0,
+            "upserted": 0,
+            "deleted": 0,
+            "compactions": 0,
+        }
+
+    @property
+    def path(self) -> Optional[Path]:
+        if self.config.persist_dir is None:
+            return None
+        return Path(self.config.persist_dir) / self.config.index_name
+
+    @property
+    def size(self) -> int:
+        """Live (not deleted) vectors."""
+        return len(self._rows)
+
+    @property
+    def backend(self) -> str:
+        return "hnsw" if self._graph is not None else "brute_force"
+
+    async def initialize_index(self, create_if_not_exists: bool = True) -> None:
+        """Load the saved index, or start an empty one."""
+        await asyncio.to_thread(self.open, create_if_not_exists)
+
+    def open(self, create_if_not_exists: bool = True) -> "LocalVectorIndex":
+        """Synchronous initialize_index, for callers outside an event loop."""
+        with self._lock:
+            if not self._loaded:
+                path = self.path
+                if path is not None and (path / "state.json").exists():
+                    self._load(path)
+                elif not create_if_not_exists:
+                    raise ValueError(f"Index {self.config.index_name} does not exist")
+                self._loaded = True
+            self.index = self
+        logger.info(f"🗂️ Local vector index {self.config.index_name} ready: "
+                    f"{self.size} vectors ({self.backend})")
+        return self
+
+    async def upsert_enhanced_vectors(
+        self,
+        vectors_with_metadata: List[Tuple[str, List[float], VectorMetadata]],
+        batch_size: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Upsert vectors with enhanced VectorMetadata objects.
+
+        Args:
+            vectors_with_metadata: List of (id, vector, VectorMetadata) tuples
+            batch_size: Batch size for processing
+
+        Returns:
+            Upsert response summary
+        """
+        formatted_vectors = []
+        for vec_id, vector, metadata in vectors_with_metadata:
+            if isinstance(metadata, VectorMetadata):
+                metadata = {k: v for k, v in metadata.__dict__.items() if v is not None and not k.startswith('_')}
+            formatted_vectors.append((vec_id, vector, metadata))
+        return await self.upsert_vectors(formatted_vectors, batch_size)
+
+    async def upsert_vectors(
+        self,
+        vectors: List[Tuple[str, Union[List[float], np.ndarray], Dict[str, Any]]],
+        batch_size: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Insert or replace vectors in batches.
+
+        Args:
+            vectors: List of (id, vector, metadata) tuples
+            batch_size: Number of vectors per batch (a failing batch is reported, not raised)
+
+        Returns:
+            Upsert response summary
+        """
+        if not self.index:
+            await self.initialize_index()
+
+        results = await asyncio.to_thread(self.upsert, vectors, batch_size)
+        await self._autosave()
+        logger.info(f"Upserted {results['upserted_count']}/{len(vectors)} vectors into local index")
+        return results
+
+    def upsert(self, vectors: List[Tuple[str, Union[List[float], np.ndarray], Dict[str, Any]]],
+               batch_size: int = 100) -> Dict[str, Any]:
+        """Synchronous upsert_vectors, without the autosave."""
+        results = {"upserted_count": 0, "failed_batches": []}
+        with self._lock:
+            for i in range(0, len(vectors), batch_size):
+                batch = vectors[i:i + batch_size]
+                try:
+                    self._upsert_batch(batch)
+                    results["upserted_count"] += len(batch)
+                except Exception as e:
+                    logger.error(f"Failed to upsert batch {i // batch_size + 1}: {e}")
+                    results["failed_batches"].append({"batch_start": i, "batch_size": len(batch), "error": str(e)})
+            self._sync_graph()
+            self._maybe_compact()
+            if results["upserted_count"]:
+                self._version += 1
+            self.stats["upserted"] += results["upserted_count"]
+        return results
+
+    def _upsert_batch(self, batch) -> None:
+        matrix = np.asarray([values for _, values, _ in batch], dtype=np.float32).reshape(len(batch), -1)
+        if matrix.shape[1] != self.config.dimension:
+            raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension "
+                             f"{self.config.dimension}")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+
+        graph_rows = self._graph.count if self._graph is not None else 0
+        for (vec_id, _, metadata), vector in zip(batch, matrix, strict=True):
+            row = self._rows.get(vec_id)
+            if row is not None and row >= graph_rows:
+                # Not in the graph yet: overwrite in place
+                self._vectors[row] = vector
+                self._metadata[row] = dict(metadata or {})
+                continue
+            if row is not None:
+                self._ids[row] = None
+            row = len(self._ids)
+            self._reserve(row + 1)
+            self._vectors[row] = vector
+            self._ids.append(vec_id)
+            self._metadata.append(dict(metadata or {}))
+            self._rows[vec_id] = row
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        grown = np.zeros((max(rows, 2 * capacity, 1024), self.config.dimension), dtype=np.float32)
+        grown[:capacity] = self._vectors
+        self._vectors = grown
+
+    def _sync_graph(self) -> None:
+        """Build the graph once the index reaches hnsw_threshold, then keep it covering every row."""
+        if self._graph is None:
+            if self.size < self.config.hnsw_threshold:
+                return
+            self._graph = HNSWGraph(self.config.hnsw_m, self.config.hnsw_ef_construction, self.config.seed)
+            started = time.perf_counter()
+            logger.info(f"🕸️ Building HNSW graph over {len(self._ids)} vectors")
+        else:
+            started = None
+        for row in range(self._graph.count, len(self._ids)):
+            self._graph.add(self._vectors, row)
+        if started is not None:
+            logger.info(f"🕸️ HNSW graph built in {time.perf_counter() - started:.1f}s")
+
+    def _maybe_compact(self) -> None:
+        """Drop tombstoned rows (and rebuild the graph) once they pass compact_ratio."""
+        rows = len(self._ids)
+        tombstones = rows - self.size
+        if not tombstones or tombstones < self.config.compact_ratio * rows:
+            return
+        live = [row for row, vec_id in enumerate(self._ids) if vec_id is not None]
+        self._vectors = np.ascontiguousarray(self._vectors[live])
+        self._ids = [self._ids[row] for row in live]
+        self._metadata = [self._metadata[row] for row in live]
+        self._rows = {vec_id: row for row, vec_id in enumerate(self._ids)}
+        self._graph = None
+        self._sync_graph()
+        self.stats["compactions"] += 1
+        logger.info(f"🧹 Compacted local index: dropped {tombstones} deleted rows")
+
+    def search(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        include_values: bool = False,
+        include_metadata: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Synchronous query (query_vectors without the response wrapper).
+
+        Returns:
+            Matches ({"id", "score"[, "metadata"][, "values"]}), most similar first
+        """
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        if query.shape[0] != self.config.dimension:
+            raise ValueError(f"Query dimension {query.shape[0]} does not match index dimension "
+                             f"{self.config.dimension}")
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+
+        started = time.perf_counter()
+        with self._lock:
+            if top_k <= 0 or not self.size:
+                hits = []
+            elif self._graph is not None:
+                hits = self._hnsw_search(query, top_k, filter_metadata)
+            else:
+                hits = self._brute_force_search(query, top_k, filter_metadata)
+            matches = []
+            for score, row in hits:
+                match = {"id": self._ids[row], "score": score}
+                if include_metadata:
+                    match["metadata"] = dict(self._metadata[row])
+                if include_values:
+                    match["values"] = self._vectors[row].tolist()
+                matches.append(match)
+        self.stats["query_time_ms"] += (time.perf_counter() - started) * 1000
+        return matches
+
+    def _brute_force_search(self, query: np.ndarray, top_k: int,
+                            filter_metadata: Optional[Dict[str, Any]]) -> List[Tuple[float, int]]:
+        """Exact top k by cosine similarity over every live row."""
+        self.stats["brute_force_queries"] += 1
+        rows = len(self._ids)
+        scores = self._vectors[:rows] @ query
+        if rows != self.size:
+            scores[[row for row, vec_id in enumerate(self._ids) if vec_id is None]] = -np.inf
+
+        if not filter_metadata:
+            k = min(top_k, self.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[row]), int(row)) for row in top]
+
+        hits = []
+        for row in np.argsort(-scores).tolist():
+            if self._ids[row] is None:
+                break
+            if matches_filter(self._metadata[row], filter_metadata):
+                hits.append((float(scores[row]), row))
+                if len(hits) == top_k:
+                    break
+        return hits
+
+    def _hnsw_search(self, query: np.ndarray, top_k: int,
+                     filter_metadata: Optional[Dict[str, Any]]) -> List[Tuple[float, int]]:
+        """
+        Graph search, widening ef until top_k live (and filter-matching) rows
+        are found; brute force once ef reaches 16x hnsw_ef_search.
+
+        Each retry scales ef by the share of candidates that passed, so a
+        filter matching one ticket in eight needs about one retry, not several.
+        """
+        ef = max(self.config.hnsw_ef_search, top_k)
+        ef_limit = max(16 * self.config.hnsw_ef_search, top_k)
+        while True:
+            found = self._graph.search(self._vectors, query, ef)
+            hits = [(similarity, row) for similarity, row in found
+                    if self._ids[row] is not None
+                    and (not filter_metadata or matches_filter(self._metadata[row], filter_metadata))]
+            if len(hits) >= top_k or ef >= self._graph.count:
+                self.stats["hnsw_queries"] += 1
+                return hits[:top_k]
+            if ef >= ef_limit:
+                self.stats["filter_fallbacks"] += 1
+                return self._brute_force_search(query, top_k, filter_metadata)
+            passed = len(hits) / len(found)
+            ef = min(ef_limit, max(2 * ef, math.ceil(1.5 * top_k / passed) if passed else ef_limit))
+
+    async def query_vectors(
+        self,
+        query_vector: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        include_values: bool = False,
+        include_metadata: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Query for similar vectors with metadata filtering.
+
+        Args:
+            query_vector: Query vector embeddings
+            top_k: Number of similar vectors to return
+            filter_metadata: Metadata filters (e.g., {"department": "billing"})
+            include_values: Whether to include (unit-normalized) vector values in response
+            include_metadata: Whether to include metadata in response
+
+        Returns:
+            {"matches": [{"id", "score", "metadata"}, ...], "namespace": ""}
+        """
+        if not self.index:
+            await self.initialize_index()
+        args = (query_vector, top_k, filter_metadata, include_values, include_metadata)
+        if self._lock.acquire(blocking=False):
+            try:
+                matches = self.search(*args)
+            finally:
+                self._lock.release()
+        else:
+            # An upsert or compaction holds the index: wait for it off the event loop
+            matches = await asyncio.to_thread(self.search, *args)
+        logger.debug(f"Found {len(matches)} matches for query ({self.backend})")
+        return {"matches": matches, "namespace": ""}
+
+    async def delete_vectors(self, ids: List[str]) -> Dict[str, Any]:
+        """Delete vectors by IDs (tombstoned until the next compaction)."""
+        if not self.index:
+            await self.initialize_index()
+        deleted = await asyncio.to_thread(self.delete, ids)
+        await self._autosave()
+        logger.info(f"Deleted {deleted} vectors")
+        return {"deleted_count": deleted}
+
+    def delete(self, ids: List[str]) -> int:
+        """Synchronous delete_vectors without the autosave; returns the number deleted."""
+        with self._lock:
+            deleted = 0
+            for vec_id in ids:
+                row = self._rows.pop(vec_id, None)
+                if row is not None:
+                    self._ids[row] = None
+                    self._metadata[row] = {}
+                    deleted += 1
+            self._maybe_compact()
+            if deleted:
+                self._version += 1
+            self.stats["deleted"] += deleted
+        return deleted
+
+    async def get_index_stats(self) -> Dict[str, Any]:
+        """Get index statistics and health information."""
+        if not self.index:
+            await self.initialize_index()
+        return {
+            "total_vector_count": self.size,
+            "dimension": self.config.dimension,
+            "index_fullness": 0.0,
+            "namespaces": {"": {"vector_count": self.size}},
+            "backend": self.backend,
+            "deleted_rows": len(self._ids) - self.size,
+        }
+
+    async def health_check(self, force_check: bool = False) -> VectorDBHealth:
+        """
+        Perform health check on the index.
+
+        Args:
+            force_check: Accepted for PineconeClient compatibility (the check is always immediate)
+
+        Returns:
+            Health status
+        """
+        try:
+            if not self.index:
+                await self.initialize_index()
+            stats = await self.get_index_stats()
+            consistent = stats["total_vector_count"] <= len(self._ids) <= len(self._vectors)
+            self._health_status = VectorDBHealth.HEALTHY if consistent else VectorDBHealth.DEGRADED
+        except Exception as e:
+            logger.error(f"Health check failed: {e}")
+            self._health_status = VectorDBHealth.UNHEALTHY
+        return self._health_status
+
+    async def close(self):
+        """Save unsaved changes and release the index handle (vectors stay in memory for the next initialize_index)."""
+        if self.index is not None and self.config.autosave and self.dirty:
+            await asyncio.to_thread(self.save)
+        self.index = None
+        self._health_status = VectorDBHealth.UNKNOWN
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the index has changes that are not saved yet."""
+        return self._version != self._saved_version
+
+    async def _autosave(self) -> None:
+        """Save in a worker thread if autosave is on and the last save is autosave_interval_seconds old."""
+        if (self.config.autosave and self.dirty
+                and time.monotonic() - self._last_save >= self.config.autosave_interval_seconds):
+            await asyncio.to_thread(self.save)
+
+    def save(self) -> None:
+        """
+        Write vectors, ids, metadata and the HNSW graph to persist_dir/index_name/.
+
+        The index is copied under the lock and written without it, so queries
+        and updates carry on during the disk I/O.
+        """
+        path = self.path
+        if path is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                version = self._version
+                rows = len(self._ids)
+                vectors = self._vectors[:rows].copy()
+                state = {"dimension": self.config.dimension, "metric": self.config.metric,
+                         "ids": list(self._ids), "metadata": list(self._metadata)}
+                graph = ({name: np.array(array) for name, array in self._graph.to_arrays().items()}
+                         if self._graph is not None else None)
+
+            path.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path / "vectors.npy", lambda f: np.save(f, vectors))
+            _write_atomic(path / "state.json", lambda f: f.write(json.dumps(state).encode("utf-8")))
+            graph_path = path / "graph.npz"
+            if graph is not None:
+                _write_atomic(graph_path, lambda f: np.savez(f, **graph))
+            elif graph_path.exists():
+                graph_path.unlink()
+            self._saved_version = version
+            self._last_save = time.monotonic()
+
+    def _load(self, path: Path) -> None:
+        state = json.loads((path / "state.json").read_text(encoding="utf-8"))
+        if state["dimension"] != self.config.dimension:
+            raise ValueError(f"Saved index {path} has dimension {state['dimension']}, "
+                             f"expected {self.config.dimension}")
+        vectors = np.load(path / "vectors.npy")
+        if len(vectors) != len(state["ids"]):
+            raise ValueError(f"Saved index {path} is inconsistent: {len(vectors)} vectors, "
+                             f"{len(state['ids'])} ids")
+        self._vectors = np.array(vectors, dtype=np.float32)
+        self._ids = state["ids"]
+        self._metadata = state["metadata"]
+        self._rows = {vec_id: row for row, vec_id in enumerate(self._ids) if vec_id is not None}
+        self._graph = None
+        graph_path = path / "graph.npz"
+        if graph_path.exists():
+            with np.load(graph_path) as arrays:
+                graph = HNSWGraph.from_arrays(arrays, self.config.seed)
+            if graph.count <= len(self._ids):
+                self._graph = graph
+        self._sync_graph()
+        logger.info(f"📂 Loaded local vector index from {path}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Query counts by backend, upserts, deletes and index size"""
+        queries = self.stats["brute_force_queries"] + self.stats["hnsw_queries"] + self.stats["filter_fallbacks"]
+        return {
+            **self.stats,
+            "queries": queries,
+            "avg_query_time_ms": self.stats["query_time_ms"] / queries if queries else 0.0,
+            "vectors": self.size,
+            "deleted_rows": len(self._ids) - self.size,
+            "graph_nodes": self._graph.count if self._graph is not None else 0,
+            "backend": self.backend,
+        }
+
+    def export_prometheus(self, prefix: str = "local_vector_index") -> str:
+        """
+        Render index metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Text suitable for serving from a /metrics scrape endpoint
+        """
+        stats = self.get_stats()
+        lines = [f"# HELP {prefix}_queries_total Queries by search backend.",
+                 f"# TYPE {prefix}_queries_total counter"]
+        for backend in ("brute_force", "hnsw"):
+            lines.append(f'{prefix}_queries_total{{backend="{backend}"}} {stats[backend + "_queries"]}')
+        lines.append(f'{prefix}_queries_total{{backend="filter_fallback"}} {stats["filter_fallbacks"]}')
+        for name, help_text in (("upserted", "Vectors upserted"), ("deleted", "Vectors deleted"),
+                                ("compactions", "Compactions of tombstoned rows")):
+            lines += [f"# HELP {prefix}_{name}_total {help_text}.",
+                      f"# TYPE {prefix}_{name}_total counter",
+                      f"{prefix}_{name}_total {stats[name]}"]
+        for name, help_text in (("vectors", "Live vectors in the index"),
+                                ("deleted_rows", "Tombstoned rows awaiting compaction"),
+                                ("graph_nodes", "Rows in the HNSW graph")):
+            lines += [f"# HELP {prefix}_{name} {help_text}.",
+                      f"# TYPE {prefix}_{name} gauge",
+                      f"{prefix}_{name} {stats[name]}"]
+        return "\n".join(lines) + "\n"
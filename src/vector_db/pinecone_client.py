@@ -12,7 +12,7 @@ This module provides a robust Pinecone client wrapper with:
 import os
 import time
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
@@ -101,6 +101,7 @@ class PineconeConfig(BaseModel):
     metric: str = Field(default="cosine", description="Distance metric")
     cloud: str = Field(default="gcp", description="Cloud provider")
     region: str = Field(default="us-west1", description="Cloud region")
+    pool_threads: int = Field(default=4, description="Connection pool size for index data-plane requests")
     
     class Config:
         env_prefix = "PINECONE_"
@@ -168,8 +169,8 @@ class PineconeClient:
                 # Wait for index to be ready
                 await self._wait_for_index_ready()
             
-            # Connect to index
-            self.index = self.pc.Index(self.config.index_name)
+            # Connect to index (pooled connections are reused across queries)
+            self.index = self.pc.Index(self.config.index_name, pool_threads=self.config.pool_threads)
             logger.info(f"Connected to index: {self.config.index_name}")
             
         except Exception as e:
@@ -375,7 +376,7 @@ class PineconeClient:
     )
     async def query_vectors(
         self,
-        query_vector: List[float],
+        query_vector: Union[List[float], np.ndarray],
         top_k: int = 5,
         filter_metadata: Optional[Dict[str, Any]] = None,
         include_values: bool = False,
@@ -397,6 +398,10 @@ class PineconeClient:
         if not self.index:
             await self.initialize_index()
         
+        # Pinecone expects a plain list of floats
+        if isinstance(query_vector, np.ndarray):
+            query_vector = query_vector.tolist()
+        
         try:
             response = self.index.query(
                 vector=query_vector,
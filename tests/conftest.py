@@ -0,0 +1,54 @@
+"""
+Shared test helpers
+
+- FakeClock: manually advanced clock for components with an injectable time source
+- historical_match: HistoricalMatch factory for stubbed similarity searches
+
+Usage:
+    from conftest import FakeClock, historical_match
+
+    clock = FakeClock()
+    clock.now += 61
+    historical_match(0.95, department="technical_support_l2")
+"""
+
+from src.models.rag_intelligent_routing import HistoricalMatch
+
+
+class FakeClock:
+    """Manually advanced clock (set or advance `now`)."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def historical_match(similarity: float, department: str = "billing_corrections",
+                     ticket_id: str = "HIST-1", text: str = "I was charged twice for my monthly plan",
+                     **fields) -> HistoricalMatch:
+    """
+    Historical ticket as returned by a similarity search.
+
+    Args:
+        similarity: Similarity score to the query
+        department: Department the ticket was resolved by
+        ticket_id: Historical ticket id
+        text: Historical ticket text
+        **fields: Overrides for the remaining HistoricalMatch fields
+    """
+    values = {
+        "resolution_time_hours": 2.0,
+        "customer_satisfaction": 8.0,
+        "first_contact_resolution": True,
+        "escalation_path": None,
+        "ai_prediction_correct": True,
+        "ai_confidence_score": 0.9,
+        "customer_tier": None,
+        "urgency_level": None,
+        "sentiment_score": None,
+    }
+    values.update(fields)
+    return HistoricalMatch(ticket_id=ticket_id, similarity_score=similarity, text=text,
+                           actual_department=department, **values)
@@ -0,0 +1,264 @@
+"""
+Tests for the rules engine short-circuit stage in the classification API
+
+Tests:
+- Compiled rules pass matches the uncompiled evaluation, including confidence ties
+- High-confidence rule matches skip the ML model
+- Batch requests only send the unmatched remainder to the model
+- Decision stage metrics exposed on /metrics
+- Rule -> category map loaded on first use, with clear errors for a broken config
+"""
+
+import json
+import re
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import Mock, patch
+
+import src.api.main as api
+from src.models.rules_engine import RoutingRule, TelcoRulesEngine
+
+OUTAGE_TICKET = "Our service is down and we cannot connect since this morning"
+DISPUTE_TICKET = "I want to dispute this charge on my account, it is wrong"
+REFUND_TICKET = "I was charged twice for the same bill, please refund me"
+UNMATCHED_TICKET = "My bill is too high this month"
+
+
+def _reference_match(engine: TelcoRulesEngine, ticket_text: str):
+    """Uncompiled first-best evaluation, as before compile_rules existed."""
+    best, best_confidence = None, 0.0
+    text = ticket_text.lower()
+    for rule in engine.rules:
+        if rule.regex:
+            matched = re.search(rule.pattern, text, re.IGNORECASE)
+        else:
+            matched = rule.pattern.lower() in text
+        confidence = rule.confidence if matched else 0.0
+        keyword_hits = sum(1 for kw in rule.keywords if kw.lower() in text)
+        if confidence and keyword_hits:
+            confidence = min(0.99, confidence + keyword_hits * 0.01)
+        if confidence > best_confidence and confidence >= 0.85:
+            best, best_confidence = rule.id, confidence
+    return best, best_confidence
+
+
+@pytest.fixture
+def mock_model():
+    """Create a mock model that echoes one prediction per ticket."""
+    mock_pipeline = Mock()
+    mock_pipeline.predict.side_effect = lambda texts: ['BILLING'] * len(texts)
+    mock_pipeline.predict_proba.side_effect = lambda texts: np.tile([0.1, 0.8, 0.1], (len(texts), 1))
+    return mock_pipeline
+
+
+@pytest.fixture(autouse=True)
+def fresh_stage_metrics():
+    """Reset decision stage counters around each test."""
+    api.stage_metrics.reset()
+    yield
+    api.stage_metrics.reset()
+
+
+class TestCompiledRulesPass:
+    """Test the compiled evaluation plan in TelcoRulesEngine."""
+
+    @pytest.mark.parametrize("ticket_text", [
+        OUTAGE_TICKET,
+        DISPUTE_TICKET,
+        UNMATCHED_TICKET,
+        "Payment failed, my card was declined when I tried to pay",
+        "Thank you for the excellent service, I am not going to cancel service",
+        "Someone hacked my account and I got a password reset email",
+    ])
+    def test_matches_uncompiled_evaluation(self, ticket_text):
+        engine = TelcoRulesEngine()
+        match = engine.evaluate_ticket(ticket_text)
+
+        expected_rule, expected_confidence = _reference_match(engine, ticket_text)
+        assert (match.rule_id if match else None) == expected_rule
+        if match:
+            assert match.confidence == pytest.approx(expected_confidence)
+
+    def test_ties_keep_rule_list_order(self):
+        engine = TelcoRulesEngine()
+
+        match = engine.evaluate_ticket("I cannot pay my bill and I forgot my password")
+
+        assert (match.rule_id, match.confidence) == ("R005_PASSWORD_RESET", pytest.approx(0.92))
+
+    def test_matches_uncompiled_evaluation_over_rule_pairs(self):
+        """Every pair of rule trigger phrases resolves to the same rule as the uncompiled pass."""
+        engine = TelcoRulesEngine()
+        phrases = [alternative.replace(".*", " ") for rule in engine.rules for alternative in rule.pattern.split("|")]
+
+        mismatches = []
+        for first in phrases:
+            for second in phrases:
+                ticket_text = f"{first} and {second}"
+                match = engine.evaluate_ticket(ticket_text)
+                actual = (match.rule_id, match.confidence) if match else (None, 0.0)
+                expected = _reference_match(engine, ticket_text)
+                if actual[0] != expected[0] or actual[1] != pytest.approx(expected[1]):
+                    mismatches.append((ticket_text, actual, expected))
+
+        assert mismatches == []
+
+    def test_plan_recompiled_when_rules_change(self):
+        engine = TelcoRulesEngine()
+        engine.add_rule(RoutingRule(id="R999_CUSTOM", pattern="zebra", department="crm_team", confidence=0.999))
+        assert engine.evaluate_ticket("a zebra dispute").rule_id == "R999_CUSTOM"
+
+        engine.rules[-1] = RoutingRule(id="R998_CUSTOM", pattern="zebra", department="crm_team", confidence=0.999)
+        engine.invalidate_compiled_rules()
+        assert engine.evaluate_ticket("a zebra dispute").rule_id == "R998_CUSTOM"
+
+        engine.rules = engine.rules[:-1]
+        assert engine.evaluate_ticket("a zebra dispute").rule_id == "R001_DISPUTE_EXPLICIT"
+
+
+class TestSingleClassification:
+    """Test /classify with the rules short-circuit stage."""
+
+    def test_high_confidence_rule_skips_model(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model):
+            response = client.post("/classify", json={"ticket_text": DISPUTE_TICKET, "ticket_id": "T1"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["decision_stage"] == "rules"
+        assert data["rule_id"] == "R001_DISPUTE_EXPLICIT"
+        assert data["department"] == "credit_management"
+        assert data["predicted_category"] == "BILLING"
+        mock_model.predict.assert_not_called()
+
+    def test_rule_category_override(self, mock_model):
+        """Hard-coded rule confidences let the outage rule short-circuit to NETWORK."""
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_engine', TelcoRulesEngine()):
+            response = client.post("/classify", json={"ticket_text": OUTAGE_TICKET})
+
+        data = response.json()
+        assert data["rule_id"] == "R007_SERVICE_OUTAGE"
+        assert data["predicted_category"] == "NETWORK"
+
+    def test_rules_decide_without_loaded_model(self):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', None):
+            response = client.post("/classify", json={"ticket_text": DISPUTE_TICKET})
+
+        assert response.status_code == 200
+        assert response.json()["predicted_category"] == "BILLING"
+
+    def test_unmatched_ticket_uses_model(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model):
+            response = client.post("/classify", json={"ticket_text": UNMATCHED_TICKET})
+
+        data = response.json()
+        assert data["decision_stage"] == "ml"
+        assert data["rule_id"] is None
+        mock_model.predict.assert_called_once_with([UNMATCHED_TICKET])
+
+    def test_threshold_above_rule_confidence_uses_model(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999):
+            response = client.post("/classify", json={"ticket_text": DISPUTE_TICKET})
+
+        assert response.json()["decision_stage"] == "ml"
+
+
+class TestBatchClassification:
+    """Test /classify/batch sends only the remainder to the model."""
+
+    def test_only_unmatched_tickets_reach_model(self, mock_model):
+        client = TestClient(api.app)
+        tickets = [
+            {"ticket_text": REFUND_TICKET, "ticket_id": "A"},
+            {"ticket_text": UNMATCHED_TICKET, "ticket_id": "B"},
+            {"ticket_text": DISPUTE_TICKET, "ticket_id": "C"},
+        ]
+
+        with patch('src.api.main.model_pipeline', mock_model):
+            response = client.post("/classify/batch", json={"tickets": tickets})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["ticket_id"] for r in results] == ["A", "B", "C"]
+        assert [r["decision_stage"] for r in results] == ["rules", "ml", "rules"]
+        mock_model.predict.assert_called_once_with([UNMATCHED_TICKET])
+
+    def test_all_rules_batch_skips_model(self, mock_model):
+        client = TestClient(api.app)
+        tickets = [{"ticket_text": REFUND_TICKET}, {"ticket_text": DISPUTE_TICKET}]
+
+        with patch('src.api.main.model_pipeline', mock_model):
+            response = client.post("/classify/batch", json={"tickets": tickets})
+
+        assert response.json()["successful_classifications"] == 2
+        mock_model.predict.assert_not_called()
+
+    def test_remainder_without_model_unavailable(self):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', None):
+            response = client.post("/classify/batch", json={"tickets": [{"ticket_text": UNMATCHED_TICKET}]})
+
+        assert response.status_code == 503
+
+
+class TestDecisionStageMetrics:
+    """Test short-circuit rate and latency reporting."""
+
+    def test_metrics_report_short_circuit_rate(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model):
+            client.post("/classify", json={"ticket_text": DISPUTE_TICKET})
+            client.post("/classify", json={"ticket_text": UNMATCHED_TICKET})
+
+        stages = client.get("/metrics").json()["decision_stages"]
+        assert stages["short_circuit_rate"] == pytest.approx(0.5)
+        assert stages["stages"]["rules"]["tickets_evaluated"] == 2
+        assert stages["stages"]["rules"]["tickets_decided"] == 1
+        assert stages["stages"]["ml"]["tickets_decided"] == 1
+
+    def test_latency_saved_estimate(self):
+        metrics = api.DecisionStageMetrics()
+        metrics.record_rules_pass(tickets=4, decided=3, elapsed_ms=4.0)
+        metrics.record_ml(tickets=1, elapsed_ms=50.0)
+
+        # 3 tickets skipped a 50ms model call; 1 ticket paid 1ms of rules overhead
+        assert metrics.get_summary()["estimated_latency_saved_ms"] == pytest.approx(149.0)
+
+
+class TestRuleCategoryMap:
+    """Test loading the rules stage label map from the routing pipeline config."""
+
+    def test_loaded_on_first_use(self):
+        with patch('src.api.main.rule_category_map', None):
+            assert api.get_rule_category_map() == api.load_rule_category_map()
+            assert api.rule_category_map is not None
+
+    def test_config_without_rules_stage(self, tmp_path):
+        path = tmp_path / "routing_pipeline.json"
+        path.write_text(json.dumps({"stages": [{"type": "ml"}], "label_maps": {}}))
+
+        with pytest.raises(ValueError, match="has no rules stage"):
+            api.load_rule_category_map(path)
+
+    def test_unknown_label_map(self, tmp_path):
+        path = tmp_path / "routing_pipeline.json"
+        path.write_text(json.dumps({"stages": [{"type": "rules", "label_map": "missing"}], "label_maps": {}}))
+
+        with pytest.raises(ValueError, match="Unknown label map 'missing'"):
+            api.load_rule_category_map(path)
@@ -11,11 +11,18 @@ Tests:
 
 import pytest
 import json
+import os
+from dataclasses import FrozenInstanceError
 from unittest.mock import patch
 
 from src.models.business_rules_config import (
+    PIPELINE_CONFIDENCE_KEYS,
     BusinessRulesConfig,
+    CompiledBusinessRules,
     ThresholdValidationError,
+    clear_config_cache,
+    get_config_cache_stats,
+    preload_region_configs,
     load_production_config,
     load_development_config,
     load_test_config,
@@ -371,5 +378,196 @@ class TestErrorHandling:
         assert config.get_confidence_threshold("nonexistent_dept") == 0.80
 
 
+def _nested_confidence(config, department=None):
+    """Reference implementation: pre-compilation get_confidence_threshold."""
+    thresholds = config.get("routing_thresholds", {})
+    if department:
+        key = f"{department}_confidence"
+        if key in thresholds:
+            return float(thresholds[key])
+    return float(thresholds.get("standard_confidence", 0.80))
+
+
+def _nested_sla_hours(config, rule_id):
+    """Reference implementation: pre-compilation get_sla_hours."""
+    sla_config = config.get("department_sla_hours", {})
+    return int(sla_config.get(rule_id, sla_config.get("default_sla_hours", 24)))
+
+
+def _nested_processing_time_sla(config, stage="total"):
+    """Reference implementation: pre-compilation get_processing_time_sla."""
+    sla_config = config.get("processing_time_sla", {})
+    key = f"{stage}_routing_minutes" if stage == "total" else f"{stage}_minutes"
+    return int(sla_config.get(key, 15))
+
+
+class TestCompiledLookups:
+    """Compiled lookup tables must agree with the nested-dict getters."""
+    
+    @pytest.fixture(params=["repo", "temp_dev_za"])
+    def config(self, request, temp_config_with_overrides):
+        if request.param == "repo":
+            return BusinessRulesConfig()
+        return BusinessRulesConfig(
+            environment="dev",
+            region="za",
+            config_path=temp_config_with_overrides
+        )
+    
+    def test_confidence_equivalence(self, config):
+        """Department thresholds match the nested lookup for every key."""
+        departments = [None, "", "nonexistent_dept", "standard"] + [
+            key[:-len("_confidence")]
+            for key in config.config.get("routing_thresholds", {})
+            if key.endswith("_confidence") and key not in PIPELINE_CONFIDENCE_KEYS
+        ]
+        for department in departments:
+            assert config.get_confidence_threshold(department) == \
+                _nested_confidence(config.config, department)
+    
+    def test_sla_hours_equivalence(self, config):
+        """Rule SLA hours match the nested lookup, including fallback."""
+        rule_ids = list(config.config.get("department_sla_hours", {})) + ["R999_UNKNOWN"]
+        for rule_id in rule_ids:
+            if rule_id.startswith("_"):
+                continue
+            assert config.get_sla_hours(rule_id) == _nested_sla_hours(config.config, rule_id)
+    
+    def test_processing_time_equivalence(self, config):
+        """Processing-stage SLAs match, including the 'total' alias."""
+        for stage in ["total", "ai_classification", "service_desk_review",
+                      "total_routing", "max_processing_timeout", "unknown_stage"]:
+            assert config.get_processing_time_sla(stage) == \
+                _nested_processing_time_sla(config.config, stage)
+    
+    def test_feature_flags_exposed_as_attributes(self, config):
+        """Well-known feature flags are attributes; arbitrary flags still resolve."""
+        compiled = config.compiled
+        flags = config.config.get("feature_flags", {})
+        assert compiled.use_config_driven_thresholds == bool(
+            flags.get("use_config_driven_thresholds", False)
+        )
+        assert config.is_feature_enabled("nonexistent_feature") is False
+    
+    def test_compiled_rules_are_frozen(self, config):
+        """Compiled lookups cannot be mutated after load."""
+        with pytest.raises(FrozenInstanceError):
+            config.compiled.standard_confidence = 0.1
+        with pytest.raises(TypeError):
+            config.compiled.rule_sla_hours["R001_DISPUTE_EXPLICIT"] = 99
+    
+    def test_from_config_skips_comment_keys(self):
+        """Comment keys never appear in the flattened tables."""
+        compiled = CompiledBusinessRules.from_config({
+            "routing_thresholds": {"_comment": "x", "billing_confidence": 0.9},
+            "department_sla_hours": {"_comment": "y", "R001": 4},
+        })
+        assert dict(compiled.department_confidence) == {"billing": 0.9}
+        assert dict(compiled.rule_sla_hours) == {"R001": 4}
+        assert compiled.default_sla_hours == 24
+    
+    def test_rules_short_circuit_is_not_a_department(self, config):
+        """The short-circuit knob has its own getter and stays out of the department map."""
+        assert config.get_rules_short_circuit_confidence() == 0.90
+        assert "rules_short_circuit" not in config.compiled.department_confidence
+        assert config.get_confidence_threshold("rules_short_circuit") == config.get_confidence_threshold()
+
+
+class TestConfigCache:
+    """Test the process-wide merged configuration cache."""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        clear_config_cache()
+        yield
+        clear_config_cache()
+    
+    def test_repeated_construction_hits_cache(self, temp_config_with_overrides):
+        """Same (path, env, region) is read from disk once."""
+        first = BusinessRulesConfig(region="za", config_path=temp_config_with_overrides)
+        second = BusinessRulesConfig(region="za", config_path=temp_config_with_overrides)
+        
+        stats = get_config_cache_stats()
+        assert stats["loads"] == 1
+        assert stats["hits"] == 1
+        assert second.compiled is first.compiled
+        assert second.get_sla_hours("R001_DISPUTE_EXPLICIT") == 8
+    
+    def test_keys_are_separate_per_environment_and_region(self, temp_config_with_overrides):
+        """Different environment/region combinations are cached independently."""
+        base = BusinessRulesConfig(config_path=temp_config_with_overrides)
+        dev = BusinessRulesConfig(environment="dev", config_path=temp_config_with_overrides)
+        za = BusinessRulesConfig(region="za", config_path=temp_config_with_overrides)
+        
+        assert get_config_cache_stats()["entries"] == 3
+        assert base.get_confidence_threshold() == 0.80
+        assert dev.get_confidence_threshold() == 0.70
+        assert za.get_sla_hours("R001_DISPUTE_EXPLICIT") == 8
+    
+    def test_region_file_change_invalidates_entry(self, temp_config_with_overrides):
+        """Editing a contributing file triggers a reload."""
+        BusinessRulesConfig(region="za", config_path=temp_config_with_overrides)
+        
+        region_file = temp_config_with_overrides / "regions" / "za.json"
+        with open(region_file, 'w') as f:
+            json.dump({"department_sla_hours": {"R001_DISPUTE_EXPLICIT": 12}}, f)
+        stat = region_file.stat()
+        os.utime(region_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        
+        reloaded = BusinessRulesConfig(region="za", config_path=temp_config_with_overrides)
+        
+        stats = get_config_cache_stats()
+        assert reloaded.get_sla_hours("R001_DISPUTE_EXPLICIT") == 12
+        assert stats["loads"] == 2
+        assert stats["invalidations"] == 1
+    
+    def test_new_environment_file_invalidates_entry(self, temp_config_dir):
+        """A previously missing override file appearing triggers a reload."""
+        assert BusinessRulesConfig(
+            environment="dev", config_path=temp_config_dir
+        ).get_confidence_threshold() == 0.80
+        
+        with open(temp_config_dir / "business_rules.dev.json", 'w') as f:
+            json.dump({"routing_thresholds": {"standard_confidence": 0.65}}, f)
+        
+        assert BusinessRulesConfig(
+            environment="dev", config_path=temp_config_dir
+        ).get_confidence_threshold() == 0.65
+    
+    def test_use_cache_false_bypasses_cache(self, temp_config_dir):
+        """use_cache=False always reads from disk and leaves the cache untouched."""
+        BusinessRulesConfig(config_path=temp_config_dir, use_cache=False)
+        BusinessRulesConfig(config_path=temp_config_dir, use_cache=False)
+        
+        stats = get_config_cache_stats()
+        assert stats["loads"] == 0
+        assert stats["entries"] == 0
+    
+    def test_invalid_config_is_not_cached(self, temp_config_dir):
+        """Validation failures raise every time and are never cached."""
+        config_file = temp_config_dir / "business_rules.json"
+        with open(config_file) as f:
+            config = json.load(f)
+        config["routing_thresholds"]["standard_confidence"] = 0.30
+        with open(config_file, 'w') as f:
+            json.dump(config, f)
+        
+        for _ in range(2):
+            with pytest.raises(ThresholdValidationError):
+                BusinessRulesConfig(config_path=temp_config_dir)
+        
+        assert get_config_cache_stats()["entries"] == 0
+    
+    def test_preload_region_configs_discovers_regions(self, temp_config_with_overrides):
+        """Preloading discovers config/regions/*.json and warms the cache."""
+        loaded = preload_region_configs(config_path=temp_config_with_overrides)
+        
+        assert set(loaded) == {None, "za"}
+        assert get_config_cache_stats()["loads"] == 2
+        
+        BusinessRulesConfig(region="za", config_path=temp_config_with_overrides)
+        assert get_config_cache_stats()["hits"] == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,724 @@
+"""
+Tests for the confidence-based routing system
+
+Tests:
+- Exact-duplicate decision cache (LRU bound, TTL, invalidation)
+- Router reuse of decisions for duplicate tickets
+- PerformanceMonitor reporting of exact vs similarity cache hits
+- Routing decision log through the background JSONL writer
+- Per-method latency percentiles and Prometheus export
+- SQLite-backed accuracy store (persistence, read-through cache, time decay)
+- Concurrent batch routing (route_many)
+- Single-flight coalescing of concurrent identical requests
+- Cached-route thresholds from the business rules and top-match logging
+- Department centroid model and the router's zero-network centroid stage
+"""
+
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.models import confidence_based_routing
+from src.models.business_rules_config import BusinessRulesConfig
+from src.models.confidence_based_routing import (
+    DEFAULT_ACCURACY_DB_PATH,
+    AccuracyTracker,
+    ConfidenceBasedRouter,
+    DecisionCache,
+    DepartmentCentroids,
+    PerformanceMonitor,
+    RoutingDecision,
+    RoutingMethod,
+    ticket_fingerprint,
+)
+from src.models.rag_intelligent_routing import IntelligentSimilaritySearch
+
+from conftest import FakeClock, historical_match
+
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    """Router whose similarity search returns one high-similarity match and counts calls."""
+    monkeypatch.chdir(tmp_path)
+    router = ConfidenceBasedRouter(confidence_threshold=0.90, accuracy_threshold=0.85)
+    router.search_calls = 0
+
+    async def fake_search(query_text, top_k=5, include_routing_intelligence=True, query_embedding=None):
+        router.search_calls += 1
+        return [historical_match(0.95)]
+
+    router.similarity_search.search_similar_tickets_with_routing = fake_search
+    return router
+
+
+def _route(router, *texts):
+    async def route_all():
+        return [await router.route_with_confidence(text) for text in texts]
+    return asyncio.run(route_all())
+
+
+class TestTicketFingerprint:
+    """Test normalized-text fingerprints."""
+
+    def test_case_and_whitespace_insensitive(self):
+        assert ticket_fingerprint("My  Bill is WRONG\n") == ticket_fingerprint("my bill is wrong")
+
+    def test_different_text_differs(self):
+        assert ticket_fingerprint("my bill is wrong") != ticket_fingerprint("my bill is right")
+
+
+class TestDecisionCache:
+    """Test the bounded, expiring decision cache."""
+
+    def test_lru_eviction(self):
+        cache = DecisionCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = DecisionCache(ttl_seconds=10, clock=clock)
+        cache.put("a", "A")
+
+        clock.now = 9.9
+        assert cache.get("a") == "A"
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_generation_change_invalidates(self):
+        cache = DecisionCache()
+        cache.validate((0, 0.9))
+        cache.put("a", "A")
+
+        cache.validate((0, 0.9))
+        assert cache.get("a") == "A"
+
+        cache.validate((1, 0.9))
+        assert cache.get("a") is None
+        assert cache.get_stats()["invalidations"] == 1
+
+    def test_zero_size_disables(self):
+        cache = DecisionCache(max_entries=0)
+        cache.put("a", "A")
+
+        assert cache.get("a") is None
+
+
+class TestRouterExactCache:
+    """Test exact-duplicate reuse in ConfidenceBasedRouter."""
+
+    def test_duplicate_ticket_skips_retrieval(self, router):
+        first, second = _route(router, "I was charged twice this month", "  i was CHARGED twice this month ")
+
+        assert first.routing_method == RoutingMethod.CACHED_ROUTE
+        assert second.routing_method == RoutingMethod.EXACT_CACHE
+        assert second.recommended_department == first.recommended_department
+        assert second.cache_hit is True
+        assert router.search_calls == 1
+
+    def test_accuracy_update_invalidates(self, router):
+        _route(router, "I was charged twice this month")
+        asyncio.run(router.accuracy_tracker.update_accuracy("billing_corrections", correct=True))
+        (decision,) = _route(router, "I was charged twice this month")
+
+        assert decision.routing_method == RoutingMethod.CACHED_ROUTE
+        assert router.search_calls == 2
+
+    def test_threshold_change_invalidates(self, router):
+        _route(router, "I was charged twice this month")
+        router.confidence_threshold = 0.99
+        (decision,) = _route(router, "I was charged twice this month")
+
+        assert decision.routing_method == RoutingMethod.RAG_LLM
+        assert router.search_calls == 2
+
+    def test_fallback_decisions_not_cached(self, router):
+        async def no_matches(query_text, top_k=5, include_routing_intelligence=True, query_embedding=None):
+            router.search_calls += 1
+            return []
+
+        router.similarity_search.search_similar_tickets_with_routing = no_matches
+        decisions = _route(router, "Something odd happened", "Something odd happened")
+
+        assert all(d.routing_method == RoutingMethod.FALLBACK for d in decisions)
+        assert router.search_calls == 2
+
+    def test_failed_llm_call_not_cached(self, router):
+        class FlakyCompletions:
+            """Fails the first completion, answers the next ones."""
+            calls = 0
+
+            async def create(self, **kwargs):
+                self.calls += 1
+                if self.calls == 1:
+                    raise ValueError("upstream returned 400")
+                content = "Department: technical_support_l2\nConfidence: high\nReasoning: outage history"
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        async def weak_match(query_text, top_k=5, include_routing_intelligence=True, query_embedding=None):
+            return [historical_match(0.60, department="technical_support_l2")]
+
+        completions = FlakyCompletions()
+        router.rag_system.llm_classifier.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        router.similarity_search.search_similar_tickets_with_routing = weak_match
+        first, second, third = _route(router, *["Internet down since 9am"] * 3)
+
+        assert first.routing_method == RoutingMethod.FALLBACK
+        assert "Classification failed: upstream returned 400" in first.reasoning
+        assert second.routing_method == RoutingMethod.RAG_LLM
+        assert second.recommended_department == "technical_support_l2"
+        assert third.routing_method == RoutingMethod.EXACT_CACHE
+        assert completions.calls == 2
+
+
+class TestExactCacheMetrics:
+    """Test exact hits are reported apart from similarity cache hits."""
+
+    def test_monitor_separates_exact_hits(self, router):
+        _route(router, "I was charged twice this month", "I was charged twice this month", "Refund my double charge")
+
+        metrics = router.get_performance_metrics()
+        assert metrics["cache_performance"]["cache_hits"] == 2
+        assert metrics["cache_performance"]["exact_cache_hits"] == 1
+        assert metrics["routing_distribution"]["exact_cache"] == 1
+        assert metrics["decision_cache"]["hits"] == 1
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestRoutingLogger:
+    """Test the router's decision log."""
+
+    def test_router_logs_through_writer(self, router, tmp_path):
+        _route(router, "I was charged twice this month")
+        router.routing_logger.flush()
+
+        entries = _read_jsonl(tmp_path / "routing_decisions.jsonl")
+        assert entries[0]["event_type"] == "routing_decision"
+        assert router.get_performance_metrics()["routing_log"]["queue_depth"] == 0
+
+        asyncio.run(router.close())
+
+
+def _decision(method: RoutingMethod, processing_time_ms: float) -> RoutingDecision:
+    return RoutingDecision(
+        ticket_id="T1",
+        recommended_department="billing_corrections",
+        confidence_score=0.9,
+        routing_method=method,
+        reasoning="test",
+        top_similarity_score=0.9,
+        historical_accuracy=None,
+        cache_hit=method in (RoutingMethod.CACHED_ROUTE, RoutingMethod.EXACT_CACHE),
+        processing_time_ms=processing_time_ms,
+        timestamp=datetime.now(),
+        similar_tickets_found=1,
+        confidence_threshold_met=True,
+        accuracy_threshold_met=True,
+    )
+
+
+class TestPerformanceMonitorPercentiles:
+    """Test per-method percentiles and the Prometheus exporter."""
+
+    def test_percentiles_per_method(self):
+        monitor = PerformanceMonitor(clock=FakeClock())
+        for _ in range(10):
+            monitor.record_routing_decision(_decision(RoutingMethod.EXACT_CACHE, 1.0))
+            monitor.record_routing_decision(_decision(RoutingMethod.RAG_LLM, 800.0))
+
+        percentiles = monitor.get_performance_summary()["latency_percentiles"]
+        assert percentiles["exact_cache"]["1m"]["p99"] == pytest.approx(1.0, rel=0.1)
+        assert percentiles["rag_llm"]["5m"]["p50"] == pytest.approx(800.0, rel=0.1)
+        assert percentiles["all"]["1h"]["count"] == 20
+        assert percentiles["fallback"]["1m"]["count"] == 0
+        assert monitor.get_performance_summary()["performance"]["avg_processing_time_ms"] == pytest.approx(400.5)
+
+    def test_prometheus_export(self):
+        monitor = PerformanceMonitor(clock=FakeClock())
+        monitor.record_routing_decision(_decision(RoutingMethod.CACHED_ROUTE, 20.0))
+        monitor.record_routing_decision(_decision(RoutingMethod.RAG_LLM, 900.0))
+
+        text = monitor.export_prometheus()
+        assert "# TYPE routing_decisions_total counter" in text
+        assert 'routing_decisions_total{method="cached_route"} 1' in text
+        assert 'routing_cache_hit_ratio{cache="similarity"} 0.500000' in text
+        assert 'routing_latency_ms{method="rag_llm",window="1m",quantile="0.99"}' in text
+        assert 'routing_latency_observations_total{method="all"} 2' in text
+        assert 'routing_latency_ms{method="fallback"' not in text
+
+    def test_router_exports_prometheus(self, router):
+        _route(router, "I was charged twice this month")
+
+        assert 'routing_decisions_total{method="cached_route"} 1' in router.export_prometheus()
+
+
+class TestAccuracyTracker:
+    """Test the SQLite WAL accuracy store."""
+
+    def test_seeded_defaults(self, tmp_path):
+        tracker = AccuracyTracker(db_path=str(tmp_path / "acc.db"))
+
+        assert asyncio.run(tracker.get_department_accuracy("billing_corrections")) == pytest.approx(175 / 189)
+        assert asyncio.run(tracker.get_pattern_accuracy("account_locked")) == pytest.approx(50 / 52)
+        assert asyncio.run(tracker.get_department_accuracy("unknown_team")) == 0.5
+        tracker.close()
+
+    def test_wal_mode(self, tmp_path):
+        tracker = AccuracyTracker(db_path=str(tmp_path / "acc.db"))
+
+        assert tracker._reader.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        tracker.close()
+
+    def test_default_store_in_memory(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        tracker = AccuracyTracker()
+        router = ConfidenceBasedRouter()
+        tracker.close()
+        asyncio.run(router.close())
+
+        assert tracker.db_path is None
+        assert router.accuracy_tracker.db_path is None
+        assert asyncio.run(tracker.get_department_accuracy("billing_corrections")) == pytest.approx(175 / 189)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_persistence_opt_in_through_feature_flag(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(confidence_based_routing, "DEFAULT_ACCURACY_DB_PATH", str(tmp_path / "store" / "acc.db"))
+        (tmp_path / "business_rules.json").write_text(json.dumps({"feature_flags": {"persist_routing_accuracy": True}}))
+
+        persistent = ConfidenceBasedRouter.from_business_rules(BusinessRulesConfig(config_path=tmp_path))
+        in_memory = ConfidenceBasedRouter.from_business_rules(BusinessRulesConfig())
+        asyncio.run(persistent.close())
+        asyncio.run(in_memory.close())
+
+        assert (tmp_path / "store" / "acc.db").is_file()
+        assert in_memory.accuracy_tracker.db_path is None
+
+    def test_default_path_anchored_to_project_root(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        assert DEFAULT_ACCURACY_DB_PATH == os.path.join(project_root, "data", "routing_accuracy.db")
+
+    def test_concurrent_first_updates_not_lost(self):
+        barrier = threading.Barrier(2)
+
+        def clock():
+            # Both updaters reach this point before either applies its outcome (unless one holds the lock)
+            if threading.current_thread().name.startswith("updater"):
+                try:
+                    barrier.wait(timeout=0.2)
+                except threading.BrokenBarrierError:
+                    pass
+            return 1000.0
+
+        tracker = AccuracyTracker(db_path=None, seed_defaults=False, clock=clock)
+        updaters = [
+            threading.Thread(target=lambda: asyncio.run(tracker.update_accuracy("crm_team", correct=True)),
+                             name=f"updater-{i}")
+            for i in range(2)
+        ]
+        for thread in updaters:
+            thread.start()
+        for thread in updaters:
+            thread.join()
+
+        assert tracker.get_accuracy_stats("crm_team")["total"] == 2
+        assert tracker.version == 2
+
+    def test_updates_survive_restart(self, tmp_path):
+        path = str(tmp_path / "acc.db")
+        tracker = AccuracyTracker(db_path=path, seed_defaults=False)
+        for correct in (True, True, False, True):
+            asyncio.run(tracker.update_accuracy("crm_team", correct=correct, pattern_id="crm_upgrade"))
+        tracker.close()
+
+        reopened = AccuracyTracker(db_path=path)
+        assert asyncio.run(reopened.get_department_accuracy("crm_team")) == pytest.approx(0.75)
+        assert asyncio.run(reopened.get_pattern_accuracy("crm_upgrade")) == pytest.approx(0.75)
+        # Existing store is not re-seeded
+        assert asyncio.run(reopened.get_department_accuracy("billing_corrections")) == 0.5
+        reopened.close()
+
+    def test_updates_batched_and_coalesced(self, tmp_path):
+        tracker = AccuracyTracker(db_path=str(tmp_path / "acc.db"), seed_defaults=False,
+                                  flush_interval_seconds=0.2)
+        for _ in range(50):
+            asyncio.run(tracker.update_accuracy("crm_team", correct=True))
+        tracker.flush()
+
+        stats = tracker.get_stats()
+        assert stats["updates"] == 50
+        assert stats["batches"] < 50
+        assert stats["rows_written"] < 50
+        assert stats["pending_writes"] == 0
+        tracker.close()
+
+    def test_reads_served_from_cache(self, tmp_path):
+        tracker = AccuracyTracker(db_path=str(tmp_path / "acc.db"), seed_defaults=False)
+        for _ in range(3):
+            asyncio.run(tracker.get_department_accuracy("crm_team"))
+
+        assert tracker.get_stats()["cache_misses"] == 1
+        assert tracker.get_stats()["cache_hits"] == 2
+        tracker.close()
+
+    def test_time_decay_favours_recent_outcomes(self):
+        clock = FakeClock()
+        tracker = AccuracyTracker(db_path=None, seed_defaults=False,
+                                  decay_half_lives={"1h": 3600.0}, clock=clock)
+        for _ in range(10):
+            asyncio.run(tracker.update_accuracy("crm_team", correct=False))
+        clock.now = 3600 * 10  # ten half-lives later
+        for _ in range(10):
+            asyncio.run(tracker.update_accuracy("crm_team", correct=True))
+
+        assert asyncio.run(tracker.get_department_accuracy("crm_team")) == pytest.approx(0.5)
+        assert asyncio.run(tracker.get_department_accuracy("crm_team", window="1h")) > 0.99
+        stats = tracker.get_accuracy_stats("crm_team")
+        assert stats["windows"]["1h"]["effective_samples"] == pytest.approx(10.0, abs=0.01)
+
+    def test_unknown_window_rejected(self):
+        tracker = AccuracyTracker(db_path=None)
+
+        with pytest.raises(ValueError, match="Unknown accuracy window"):
+            asyncio.run(tracker.get_department_accuracy("billing_corrections", window="1y"))
+
+    def test_update_bumps_version(self):
+        tracker = AccuracyTracker(db_path=None)
+        asyncio.run(tracker.update_accuracy("billing_corrections", correct=True))
+
+        assert tracker.version == 1
+
+    def test_router_exposes_store_stats(self, router, tmp_path):
+        persistent = ConfidenceBasedRouter(accuracy_db_path=str(tmp_path / "acc.db"))
+        _route(router, "I was charged twice this month")
+
+        assert router.get_performance_metrics()["accuracy_store"]["persistent"] is False
+        assert persistent.get_performance_metrics()["accuracy_store"]["persistent"] is True
+        asyncio.run(router.close())
+        asyncio.run(persistent.close())
+
+
+class TestRouteMany:
+    """Test concurrent batch routing."""
+
+    @pytest.fixture
+    def batch_router(self, router):
+        """Router whose searches and LLM calls sleep briefly and record peak concurrency."""
+        router.in_flight = {"search": 0, "llm": 0}
+        router.peak = {"search": 0, "llm": 0}
+        router.embedded = []
+        router.llm_calls = 0
+
+        def enter(stage):
+            router.in_flight[stage] += 1
+            router.peak[stage] = max(router.peak[stage], router.in_flight[stage])
+
+        async def fake_search(query_text, top_k=5, include_routing_intelligence=True, query_embedding=None):
+            router.search_calls += 1
+            router.embedded.append(query_embedding is not None)
+            enter("search")
+            await asyncio.sleep(0.01)
+            router.in_flight["search"] -= 1
+            if "charged" in query_text:
+                return [historical_match(0.95)]
+            if "unknown" in query_text:
+                return []
+            return [historical_match(0.60, department="technical_support_l2")]
+
+        async def fake_llm(rag_prompt, model="gpt-3.5-turbo"):
+            router.llm_calls += 1
+            enter("llm")
+            await asyncio.sleep(0.01)
+            router.in_flight["llm"] -= 1
+            return {"department": "technical_support_l2", "confidence": "medium", "reasoning": "history"}
+
+        router.similarity_search.search_similar_tickets_with_routing = fake_search
+        router.rag_system.llm_classifier.classify_with_rag_prompt = fake_llm
+        return router
+
+    def test_decisions_in_input_order(self, batch_router):
+        texts = ["I was charged twice", "Internet drops at night", "unknown issue", "Wifi keeps failing"]
+
+        decisions = asyncio.run(batch_router.route_many(texts, concurrency=4))
+
+        assert [d.ticket_id for d in decisions] == [batch_router.generate_ticket_id(t) for t in texts]
+        assert [d.routing_method for d in decisions] == [
+            RoutingMethod.CACHED_ROUTE, RoutingMethod.RAG_LLM, RoutingMethod.FALLBACK, RoutingMethod.RAG_LLM
+        ]
+
+    def test_concurrency_bounded(self, batch_router):
+        texts = [f"Internet drops at night ({i})" for i in range(12)]
+
+        asyncio.run(batch_router.route_many(texts, concurrency=3, llm_concurrency=2))
+
+        assert batch_router.peak["search"] == 3
+        assert batch_router.peak["llm"] == 2
+        assert batch_router.llm_calls == 12
+
+    def test_queries_use_batch_embeddings(self, batch_router):
+        asyncio.run(batch_router.route_many(["I was charged twice", "Internet drops at night"]))
+
+        assert batch_router.embedded == [True, True]
+
+    def test_repeats_routed_once(self, batch_router):
+        texts = ["Internet drops at night", "internet drops  at NIGHT", "unknown issue", "unknown issue"]
+
+        decisions = asyncio.run(batch_router.route_many(texts))
+
+        assert batch_router.search_calls == 2
+        assert batch_router.llm_calls == 1
+        assert decisions[1].routing_method == RoutingMethod.EXACT_CACHE
+        assert decisions[3].routing_method == RoutingMethod.FALLBACK
+
+    def test_previously_routed_tickets_skip_search(self, batch_router):
+        _route(batch_router, "I was charged twice")
+        batch_router.search_calls = 0
+
+        (decision,) = asyncio.run(batch_router.route_many(["I was charged twice"]))
+
+        assert decision.routing_method == RoutingMethod.EXACT_CACHE
+        assert batch_router.search_calls == 0
+
+    def test_stage_throughput_reported(self, batch_router):
+        asyncio.run(batch_router.route_many(["I was charged twice", "Internet drops at night"]))
+
+        stages = batch_router.get_performance_metrics()["batch_stages"]
+        assert set(stages) == {"dedupe", "embed", "search", "decide", "llm"}
+        assert stages["search"]["items"] == 2
+        assert stages["llm"]["items"] == 1
+        assert stages["search"]["items_per_second"] > 0
+
+    def test_invalid_concurrency_rejected(self, batch_router):
+        with pytest.raises(ValueError, match="concurrency must be at least 1"):
+            asyncio.run(batch_router.route_many(["x"], concurrency=0))
+
+
+class TestSingleFlightCoalescing:
+    """Test concurrent identical requests share one routing computation."""
+
+    @pytest.fixture
+    def slow_router(self, router):
+        async def slow_search(query_text, top_k=5, include_routing_intelligence=True, query_embedding=None):
+            router.search_calls += 1
+            await asyncio.sleep(0.02)
+            return [historical_match(0.95)]
+
+        router.similarity_search.search_similar_tickets_with_routing = slow_search
+        return router
+
+    @staticmethod
+    def _concurrently(router, *texts):
+        async def route_all():
+            return await asyncio.gather(*(router.route_with_confidence(text) for text in texts))
+        return asyncio.run(route_all())
+
+    def test_identical_requests_share_one_search(self, slow_router):
+        decisions = self._concurrently(slow_router, *["Internet down since 9am"] * 5)
+
+        assert slow_router.search_calls == 1
+        assert [d.routing_method for d in decisions].count(RoutingMethod.COALESCED) == 4
+        assert {d.recommended_department for d in decisions} == {"billing_corrections"}
+        metrics = slow_router.get_performance_metrics()
+        assert metrics["coalescing"] == {"leaders": 1, "exact_joins": 4, "near_duplicate_joins": 0, "in_flight": 0}
+        assert metrics["routing_distribution"]["coalesced"] == 4
+
+    def test_near_duplicates_join_only_when_enabled(self, slow_router):
+        texts = ["fibre internet down in sandton since 9am no connection at all today",
+                 "fibre internet down in sandton since 9am no connection at all"]
+
+        self._concurrently(slow_router, *texts)
+        assert slow_router.search_calls == 2
+
+        slow_router.decision_cache.clear()
+        slow_router.coalesce_near_duplicates = True
+        slow_router.search_calls = 0
+        self._concurrently(slow_router, *texts)
+        assert slow_router.search_calls == 1
+        assert slow_router.coalescing_stats["near_duplicate_joins"] == 1
+
+    def test_failed_leader_falls_back_waiters(self, slow_router):
+        async def failing_search(query_text, top_k=5, include_routing_intelligence=True, query_embedding=None):
+            await asyncio.sleep(0.02)
+            raise ConnectionError("index unavailable")
+
+        slow_router.similarity_search.search_similar_tickets_with_routing = failing_search
+        decisions = self._concurrently(slow_router, "Internet down", "Internet down")
+
+        assert all(d.routing_method == RoutingMethod.FALLBACK for d in decisions)
+        assert slow_router.get_performance_metrics()["coalescing"]["in_flight"] == 0
+
+    def test_sequential_requests_not_coalesced(self, router):
+        router.decision_cache = DecisionCache(max_entries=0)
+        _route(router, "Internet down", "Internet down")
+
+        assert router.search_calls == 2
+        assert router.coalescing_stats["exact_joins"] == 0
+
+
+class TestRouterThresholdConfig:
+    """Test thresholds from the business rules and the evidence logged for tuning them."""
+
+    def test_from_business_rules_uses_cached_route_thresholds(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "business_rules.json").write_text(json.dumps({
+            "routing_thresholds": {"cached_route_similarity": 0.88, "cached_route_accuracy": 0.8}
+        }))
+
+        router = ConfidenceBasedRouter.from_business_rules(BusinessRulesConfig(config_path=tmp_path),
+                                                           decision_cache_size=0)
+
+        assert (router.confidence_threshold, router.accuracy_threshold) == (0.88, 0.8)
+        assert router.decision_cache.max_entries == 0
+
+    def test_routing_log_records_top_match_department(self, router, tmp_path):
+        router.confidence_threshold = 0.99
+        (decision,) = _route(router, "I was charged twice this month")
+        router.routing_logger.close()
+
+        (entry,) = _read_jsonl(tmp_path / "routing_decisions.jsonl")
+        assert decision.routing_method == RoutingMethod.RAG_LLM
+        assert entry["evidence"]["top_match_department"] == "billing_corrections"
+
+
+def _clustered_embeddings(centers, per_center, noise, seed=0):
+    """Unit embeddings scattered around each center, with their center index."""
+    rng = np.random.default_rng(seed)
+    labels = np.repeat(np.arange(len(centers)), per_center)
+    embeddings = centers[labels] + rng.normal(scale=noise, size=(len(labels), centers.shape[1]))
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True), labels
+
+
+class TestDepartmentCentroids:
+    """Test the per-department prototype model."""
+
+    DEPARTMENTS = ["billing_corrections", "technical_support_l2", "account_security"]
+
+    def _fitted(self, prototypes=1, dimension=64):
+        centers = np.eye(dimension)[:3]
+        embeddings, labels = _clustered_embeddings(centers, per_center=20, noise=0.05)
+        centroids = DepartmentCentroids(dimension=dimension, prototypes_per_department=prototypes)
+        centroids.fit(embeddings, [self.DEPARTMENTS[label] for label in labels])
+        return centroids, centers
+
+    def test_routes_to_nearest_department_with_margin(self):
+        centroids, centers = self._fitted()
+
+        match = centroids.route(centers[1])
+
+        assert match.department == "technical_support_l2"
+        assert match.similarity > 0.9
+        assert match.margin > 0.8
+        assert match.samples == 20
+        assert centroids.matrix.dtype == np.float32
+        assert centroids.matrix.shape == (3, 64)
+
+    def test_batch_matches_single_queries(self):
+        centroids, centers = self._fitted(prototypes=3)
+        queries, _ = _clustered_embeddings(centers, per_center=4, noise=0.2, seed=1)
+
+        batch = centroids.route_batch(queries)
+
+        for match, query in zip(batch, queries, strict=True):
+            single = centroids.route(query)
+            assert match.department == single.department
+            assert match.margin == pytest.approx(single.margin, abs=1e-6)
+        assert centroids.get_stats()["prototypes"] == 9
+
+    def test_needs_two_routable_departments(self):
+        centroids = DepartmentCentroids(dimension=4, min_samples=2)
+        centroids.add(np.array([1.0, 0, 0, 0]), "billing_corrections")
+        centroids.add(np.array([1.0, 0, 0, 0]), "billing_corrections")
+        centroids.add(np.array([0, 1.0, 0, 0]), "account_security")
+
+        assert centroids.route(np.array([1.0, 0, 0, 0])) is None
+
+        centroids.add(np.array([0, 1.0, 0, 0]), "account_security")
+        assert centroids.route(np.array([1.0, 0, 0, 0])).department == "billing_corrections"
+
+    def test_incremental_add_moves_centroid(self):
+        centroids = DepartmentCentroids(dimension=2, min_samples=1)
+        centroids.fit(np.array([[1.0, 0.0], [0.0, 1.0]]), ["billing_corrections", "account_security"])
+        version = centroids.version
+
+        centroids.add(np.array([2.0, 0.0]), "account_security")
+
+        np.testing.assert_allclose(centroids.matrix[1], np.array([1, 1]) / np.sqrt(2), rtol=1e-6)
+        assert centroids.version == version + 1
+
+    def test_rejects_zero_prototypes(self):
+        with pytest.raises(ValueError, match="prototypes_per_department must be at least 1"):
+            DepartmentCentroids(prototypes_per_department=0)
+
+
+class TestRouterCentroidStage:
+    """Test routing by department centroid before any vector query."""
+
+    QUERY = "My card was charged twice for the same invoice"
+
+    @pytest.fixture
+    def centroid_router(self, router):
+        embed = IntelligentSimilaritySearch.generate_mock_embedding
+        billing = np.stack([embed(self.QUERY)] * 5)
+        security = np.stack([embed(f"Locked out of my account attempt {i}") for i in range(5)])
+        router.load_department_centroids(np.vstack([billing, security]),
+                                         ["billing_corrections"] * 5 + ["account_security"] * 5)
+        return router
+
+    def test_confident_centroid_skips_vector_search(self, centroid_router):
+        (decision,) = _route(centroid_router, self.QUERY)
+
+        assert decision.routing_method == RoutingMethod.CENTROID
+        assert decision.recommended_department == "billing_corrections"
+        assert centroid_router.search_calls == 0
+        assert centroid_router.get_performance_metrics()["routing_distribution"]["centroid"] == 1
+
+    def test_low_margin_falls_through_to_search(self, centroid_router):
+        centroid_router.centroid_margin = 1.5
+        (decision,) = _route(centroid_router, self.QUERY)
+
+        assert decision.routing_method == RoutingMethod.CACHED_ROUTE
+        assert centroid_router.search_calls == 1
+
+    def test_unfitted_router_never_uses_centroids(self, router):
+        (decision,) = _route(router, self.QUERY)
+
+        assert decision.routing_method == RoutingMethod.CACHED_ROUTE
+        assert router.get_performance_metrics()["department_centroids"]["prototypes"] == 0
+
+    def test_route_many_routes_batch_by_centroid(self, centroid_router):
+        decisions = asyncio.run(centroid_router.route_many([self.QUERY, "Something else entirely"]))
+
+        assert decisions[0].routing_method == RoutingMethod.CENTROID
+        assert decisions[1].routing_method == RoutingMethod.CACHED_ROUTE
+        assert centroid_router.search_calls == 1
+        assert centroid_router.get_batch_stage_throughput()["centroid"]["items"] == 2
+
+    def test_record_outcome_refreshes_centroids_and_accuracy(self, router):
+        async def feedback():
+            for i in range(5):
+                await router.record_outcome(f"Refund request {i}", "billing_corrections",
+                                            predicted_department="billing_corrections")
+                await router.record_outcome(f"Password reset {i}", "account_security")
+        asyncio.run(feedback())
+
+        stats = router.get_performance_metrics()["department_centroids"]
+        assert (stats["departments"], stats["samples"]) == (2, 10)
+        assert router.accuracy_tracker.get_stats()["updates"] >= 5
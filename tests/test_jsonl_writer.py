@@ -0,0 +1,159 @@
+"""
+Tests for the background JSONL writer
+
+Tests:
+- Entries written in order across batches
+- Size and time rotation, gzipped segments, backup_count pruning
+- "drop" and "block" backpressure, including awrite() inside an event loop
+"""
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+import pytest
+
+from src.models.jsonl_writer import BufferedJsonlWriter
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestBufferedJsonlWriter:
+    """Test batching, rotation and backpressure."""
+
+    def test_entries_written_in_order(self, tmp_path):
+        path = tmp_path / "decisions.jsonl"
+        writer = BufferedJsonlWriter(str(path), batch_size=7, flush_interval_seconds=0.05)
+
+        for i in range(25):
+            assert writer.write({"seq": i}) is True
+        writer.flush()
+
+        assert [entry["seq"] for entry in _read_jsonl(path)] == list(range(25))
+        stats = writer.get_stats()
+        assert stats["written"] == 25
+        assert stats["queue_depth"] == 0
+        writer.close()
+
+    def test_size_rotation_gzips_segments(self, tmp_path):
+        path = tmp_path / "decisions.jsonl"
+        writer = BufferedJsonlWriter(str(path), batch_size=1, max_bytes=100, flush_interval_seconds=0.05)
+
+        for i in range(20):
+            writer.write({"seq": i, "padding": "x" * 20})
+        writer.close()
+
+        segments = sorted(tmp_path.glob("decisions.jsonl.*.gz"))
+        assert segments
+        assert writer.get_stats()["rotations"] == len(segments)
+
+        seqs = []
+        for segment in segments:
+            with gzip.open(segment, "rt", encoding="utf-8") as handle:
+                seqs.extend(json.loads(line)["seq"] for line in handle)
+        if path.exists():
+            seqs.extend(entry["seq"] for entry in _read_jsonl(path))
+        assert seqs == list(range(20))
+
+    def test_time_rotation(self, tmp_path):
+        path = tmp_path / "decisions.jsonl"
+        writer = BufferedJsonlWriter(str(path), rotate_interval_seconds=0.05, flush_interval_seconds=0.02)
+
+        writer.write({"seq": 0})
+        writer.flush()
+        time.sleep(0.15)
+        writer.write({"seq": 1})
+        writer.close()
+
+        assert len(list(tmp_path.glob("decisions.jsonl.*.gz"))) >= 1
+
+    def test_backup_count_prunes_old_segments(self, tmp_path):
+        path = tmp_path / "decisions.jsonl"
+        writer = BufferedJsonlWriter(str(path), batch_size=1, max_bytes=10, backup_count=2,
+                                     flush_interval_seconds=0.02)
+
+        for i in range(10):
+            writer.write({"seq": i})
+            writer.flush()
+        writer.close()
+
+        assert len(list(tmp_path.glob("decisions.jsonl.*.gz"))) == 2
+
+    def test_drop_policy_counts_dropped(self, tmp_path):
+        release = threading.Event()
+        writer = BufferedJsonlWriter(str(tmp_path / "d.jsonl"), max_queue_size=2, batch_size=1)
+        original_write_batch = writer._write_batch
+        writer._write_batch = lambda entries: (release.wait(), original_write_batch(entries))
+
+        accepted = [writer.write({"seq": i}) for i in range(10)]
+
+        assert accepted.count(False) >= 7
+        assert writer.get_stats()["dropped"] == accepted.count(False)
+        assert 1 <= writer.get_stats()["queue_depth"] <= 2
+        release.set()
+        writer.close()
+
+    def test_block_policy_waits_then_drops(self, tmp_path):
+        release = threading.Event()
+        writer = BufferedJsonlWriter(str(tmp_path / "d.jsonl"), max_queue_size=1, batch_size=1,
+                                     backpressure="block", block_timeout_seconds=0.05)
+        original_write_batch = writer._write_batch
+        writer._write_batch = lambda entries: (release.wait(), original_write_batch(entries))
+
+        writer.write({"seq": 0})  # taken by the stalled writer thread
+        time.sleep(0.05)
+        assert writer.write({"seq": 1}) is True  # fills the queue
+        started = time.perf_counter()
+        assert writer.write({"seq": 2}) is False
+        assert time.perf_counter() - started >= 0.04
+
+        release.set()
+        writer.close()
+        assert [entry["seq"] for entry in _read_jsonl(tmp_path / "d.jsonl")] == [0, 1]
+
+    def test_block_policy_never_stalls_event_loop(self, tmp_path):
+        release = threading.Event()
+        writer = BufferedJsonlWriter(str(tmp_path / "d.jsonl"), max_queue_size=1, batch_size=1,
+                                     backpressure="block", block_timeout_seconds=1.0)
+        original_write_batch = writer._write_batch
+        writer._write_batch = lambda entries: (release.wait(), original_write_batch(entries))
+        writer.write({"seq": 0})  # taken by the stalled writer thread
+        time.sleep(0.05)
+        writer.write({"seq": 1})  # fills the queue
+
+        async def produce():
+            started = time.perf_counter()
+            refused = writer.write({"seq": 2})                         # Inside the loop: drops instead of waiting
+            sync_elapsed = time.perf_counter() - started
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while not release.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            async def unblock():
+                await asyncio.sleep(0.05)
+                release.set()
+
+            accepted, *_ = await asyncio.gather(writer.awrite({"seq": 3}), ticker(), unblock())
+            return refused, sync_elapsed, accepted, ticks
+
+        refused, sync_elapsed, accepted, ticks = asyncio.run(produce())
+        writer.close()
+
+        assert refused is False
+        assert sync_elapsed < 0.05
+        assert accepted is True
+        assert ticks >= 5                                               # The loop kept running while awrite waited
+        assert [entry["seq"] for entry in _read_jsonl(tmp_path / "d.jsonl")] == [0, 1, 3]
+
+    def test_invalid_policy_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="backpressure must be one of"):
+            BufferedJsonlWriter(str(tmp_path / "d.jsonl"), backpressure="spill")
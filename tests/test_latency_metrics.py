@@ -0,0 +1,98 @@
+"""
+Tests for the shared latency metrics
+
+Tests:
+- Ring buffer running mean over the most recent samples
+- Rolling-window histogram percentiles, window ageing and slot reuse
+- Prometheus percentile lines
+"""
+
+import pytest
+
+from src.models.latency_metrics import LatencyRingBuffer, WindowedLatencyHistogram, prometheus_percentile_lines
+
+from conftest import FakeClock
+
+
+class TestLatencyRingBuffer:
+    """Test the fixed-size processing time buffer."""
+
+    def test_mean_tracks_last_capacity_samples(self):
+        buffer = LatencyRingBuffer(capacity=3)
+        for value in (1.0, 2.0, 3.0, 10.0):
+            buffer.append(value)
+
+        assert len(buffer) == 3
+        assert buffer.mean() == pytest.approx(5.0)
+        assert list(buffer.values()) == [2.0, 3.0, 10.0]
+
+    def test_empty_mean(self):
+        assert LatencyRingBuffer().mean() == 0.0
+
+
+class TestWindowedLatencyHistogram:
+    """Test rolling-window percentiles."""
+
+    def test_percentiles_within_bucket_resolution(self):
+        histogram = WindowedLatencyHistogram(clock=FakeClock())
+        for value in range(1, 1001):
+            histogram.record(float(value))
+
+        stats = histogram.percentiles(60)
+        assert stats["count"] == 1000
+        assert stats["p50"] == pytest.approx(500, rel=0.1)
+        assert stats["p90"] == pytest.approx(900, rel=0.1)
+        assert stats["p99"] == pytest.approx(990, rel=0.1)
+
+    def test_windows_age_out(self):
+        clock = FakeClock()
+        histogram = WindowedLatencyHistogram(clock=clock)
+        histogram.record(5.0)
+        clock.now = 120
+        histogram.record(50.0)
+
+        assert histogram.percentiles(60)["count"] == 1
+        assert histogram.percentiles(300)["count"] == 2
+
+        clock.now = 3600 + 60
+        assert histogram.percentiles(3600)["count"] == 1
+
+    def test_reused_slot_is_reset(self):
+        clock = FakeClock()
+        histogram = WindowedLatencyHistogram(clock=clock)
+        histogram.record(5.0)
+        clock.now = 3600  # same ring slot, one hour later
+        histogram.record(5.0)
+
+        assert histogram.percentiles(3600)["count"] == 1
+        assert histogram.total_count == 2
+
+    def test_empty_window(self):
+        stats = WindowedLatencyHistogram(clock=FakeClock()).percentiles(60)
+
+        assert stats == {"count": 0, "p50": None, "p90": None, "p99": None}
+
+    def test_window_percentiles_cover_every_window(self):
+        histogram = WindowedLatencyHistogram(clock=FakeClock())
+        histogram.record(5.0)
+
+        windows = histogram.window_percentiles()
+
+        assert list(windows) == ["1m", "5m", "1h"]
+        assert all(stats["count"] == 1 for stats in windows.values())
+
+
+class TestPrometheusPercentileLines:
+    """Test the gauge lines rendered from window percentiles."""
+
+    def test_lines_per_window_and_quantile(self):
+        windows = {"1m": {"count": 2, "p50": 20.0, "p90": 900.0, "p99": 900.0},
+                   "5m": {"count": 0, "p50": None, "p90": None, "p99": None}}
+
+        lines = prometheus_percentile_lines("routing_latency_ms", {"method": "rag_llm"}, windows)
+
+        assert lines == [
+            'routing_latency_ms{method="rag_llm",window="1m",quantile="0.5"} 20.000',
+            'routing_latency_ms{method="rag_llm",window="1m",quantile="0.9"} 900.000',
+            'routing_latency_ms{method="rag_llm",window="1m",quantile="0.99"} 900.000',
+        ]
@@ -0,0 +1,243 @@
+"""
+Tests for the priority-aware LLM scheduler
+
+Tests:
+- Priority classes from rules-engine urgency or preliminary priority
+- Priority, then deadline, then arrival ordering per provider
+- Age-based anti-starvation
+- Per-provider slots shared by async and threaded callers
+- Cancelled waiters and queue wait metrics
+- LLMClassifier and ConfidenceBasedRouter integration
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.confidence_based_routing import ConfidenceBasedRouter, RoutingMethod
+from src.models.llm_scheduler import LLMScheduler, LLMSchedulerConfig, priority_for
+from src.models.rag_intelligent_routing import LLMClassifier
+
+from conftest import FakeClock, historical_match
+
+
+def _scheduler(slots=1, aging_seconds=30.0, clock=time.monotonic):
+    return LLMScheduler(LLMSchedulerConfig(provider_slots={"openai": slots, "gemini": slots},
+                                           aging_seconds=aging_seconds), clock=clock)
+
+
+async def _grant_order(scheduler, requests, provider="openai"):
+    """Queue `requests` ((name, priority, deadline)) behind a held slot and return the grant order."""
+    order = []
+    await scheduler.acquire(provider)
+
+    async def request(name, priority, deadline):
+        async with scheduler.slot(provider, priority, deadline):
+            order.append(name)
+
+    tasks = []
+    for name, priority, deadline in requests:
+        tasks.append(asyncio.create_task(request(name, priority, deadline)))
+        await asyncio.sleep(0)
+    scheduler.release(provider)
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestPriorityFor:
+    def test_urgency_and_preliminary_priority(self):
+        assert priority_for(urgency="Critical") == "P0_IMMEDIATE"
+        assert priority_for(urgency="low") == "P3_STANDARD"
+        assert priority_for(urgency="High", priority="P2_MEDIUM") == "P2_MEDIUM"
+        assert priority_for(priority="P9_UNKNOWN") == "P3_STANDARD"
+        assert priority_for() == "P3_STANDARD"
+
+
+class TestOrdering:
+    def test_sla_deadlines_come_from_business_rules(self):
+        scheduler = _scheduler()
+
+        assert scheduler.sla_seconds["P0_IMMEDIATE"] == 3600
+        assert scheduler.sla_seconds["P3_STANDARD"] == 36 * 3600
+
+    def test_urgent_request_overtakes_queued_standard_work(self):
+        order = asyncio.run(_grant_order(_scheduler(), [
+            ("feedback-1", "P3_STANDARD", None),
+            ("feedback-2", "P3_STANDARD", None),
+            ("outage", "P1_HIGH", None),
+            ("breach", "P0_IMMEDIATE", None),
+        ]))
+
+        assert order == ["breach", "outage", "feedback-1", "feedback-2"]
+
+    def test_earlier_deadline_first_within_a_class(self):
+        order = asyncio.run(_grant_order(_scheduler(), [
+            ("late", "P2_MEDIUM", 10_000.0),
+            ("soon", "P2_MEDIUM", 5.0),
+            ("default", "P2_MEDIUM", None),
+        ]))
+
+        assert order == ["soon", "late", "default"]
+
+    def test_long_wait_overtakes_fresh_urgent_work(self):
+        clock = FakeClock(now=1000.0)
+        scheduler = _scheduler(aging_seconds=10.0, clock=clock)
+        order = []
+
+        async def scenario():
+            await scheduler.acquire("openai")
+
+            async def request(name, priority):
+                async with scheduler.slot("openai", priority):
+                    order.append(name)
+
+            old = asyncio.create_task(request("old-standard", "P3_STANDARD"))
+            await asyncio.sleep(0)
+            clock.now += 45.0  # Promoted 4 classes: ahead of a fresh P0
+            fresh = asyncio.create_task(request("fresh-breach", "P0_IMMEDIATE"))
+            await asyncio.sleep(0)
+            scheduler.release("openai")
+            await asyncio.gather(old, fresh)
+
+        asyncio.run(scenario())
+
+        assert order == ["old-standard", "fresh-breach"]
+        assert scheduler.get_stats()["priorities"]["P3_STANDARD"]["promoted"] == 1
+
+
+class TestSlots:
+    def test_providers_have_independent_slots(self):
+        scheduler = _scheduler(slots=1)
+
+        async def scenario():
+            await scheduler.acquire("openai")
+            await asyncio.wait_for(scheduler.acquire("gemini"), timeout=1)
+            return scheduler.get_stats()["providers"]
+
+        providers = asyncio.run(scenario())
+
+        assert providers["openai"]["in_flight"] == 1
+        assert providers["gemini"]["in_flight"] == 1
+
+    def test_threads_share_slots_with_bounded_concurrency(self):
+        scheduler = _scheduler(slots=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def call():
+            with scheduler.slot_sync("gemini", "P2_MEDIUM"):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.01)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 2
+        assert scheduler.get_stats()["priorities"]["P2_MEDIUM"]["granted"] == 8
+
+    def test_sync_acquire_times_out_without_leaking(self):
+        scheduler = _scheduler(slots=1)
+        assert scheduler.acquire_sync("gemini")
+
+        assert not scheduler.acquire_sync("gemini", timeout=0.01)
+        scheduler.release("gemini")
+
+        assert scheduler.acquire_sync("gemini", timeout=1)
+        assert scheduler.get_stats()["providers"]["gemini"] == {"slots": 1, "in_flight": 1, "queued": 0}
+
+    def test_cancelled_waiter_releases_nothing_and_is_skipped(self):
+        scheduler = _scheduler(slots=1)
+
+        async def scenario():
+            await scheduler.acquire("openai")
+            waiter = asyncio.create_task(scheduler.acquire("openai", "P0_IMMEDIATE"))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            scheduler.release("openai")
+            await asyncio.wait_for(scheduler.acquire("openai"), timeout=1)
+            return scheduler.get_stats()["providers"]["openai"]
+
+        assert asyncio.run(scenario()) == {"slots": 1, "in_flight": 1, "queued": 0}
+
+
+class TestWaitMetrics:
+    def test_wait_percentiles_and_prometheus_per_priority(self):
+        scheduler = _scheduler()
+        asyncio.run(_grant_order(scheduler, [("a", "P0_IMMEDIATE", None), ("b", "P3_STANDARD", None)]))
+
+        stats = scheduler.get_stats()["priorities"]
+        text = scheduler.export_prometheus()
+
+        assert stats["P0_IMMEDIATE"]["wait_ms"]["1m"]["count"] == 1
+        assert stats["P3_STANDARD"]["granted"] == 2  # Includes the slot held while queueing
+        assert 'llm_scheduler_queue_wait_ms{priority="P0_IMMEDIATE",window="1m",quantile="0.5"}' in text
+        assert 'llm_scheduler_granted_total{priority="P3_STANDARD"} 2' in text
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.order = []
+
+    async def create(self, messages, **kwargs):
+        self.order.append(messages[-1]["content"])
+        await asyncio.sleep(0.005)
+        content = "Department: security\nConfidence: high\nReasoning: test"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class TestIntegration:
+    def test_llm_classifier_calls_in_priority_order(self):
+        completions = FakeCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        classifier = LLMClassifier(client=client, scheduler=_scheduler(slots=1))
+
+        async def scenario():
+            calls = [asyncio.create_task(classifier.classify_with_rag_prompt(f"feedback {i}", priority="P3_STANDARD"))
+                     for i in range(3)]
+            await asyncio.sleep(0)
+            calls.append(asyncio.create_task(classifier.classify_with_rag_prompt("breach", priority="P0_IMMEDIATE")))
+            return await asyncio.gather(*calls)
+
+        results = asyncio.run(scenario())
+
+        assert all(result["department"] == "security" for result in results)
+        assert completions.order == ["feedback 0", "breach", "feedback 1", "feedback 2"]
+
+    def test_router_passes_priority_and_reports_queue_waits(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        scheduler = _scheduler(slots=4)
+        router = ConfidenceBasedRouter(llm_scheduler=scheduler)
+        router.rag_system.llm_classifier.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+        low_similarity = historical_match(0.6, "technical_support_l2", text="Fiber drops")
+
+        async def fake_search(query_text, top_k=5, query_embedding=None):
+            return [low_similarity]
+
+        router.similarity_search.search_similar_tickets_with_routing = fake_search
+
+        async def route():
+            decision = await router.route_with_confidence("Someone accessed my account", priority="P0_IMMEDIATE")
+            many = await router.route_many(["Fiber down", "Thanks for the help"],
+                                           priorities=["P1_HIGH", "P3_STANDARD"])
+            await router.close()
+            return [decision, *many]
+
+        decisions = asyncio.run(route())
+
+        assert [d.routing_method for d in decisions] == [RoutingMethod.RAG_LLM] * 3
+        granted = {p: s["granted"] for p, s in router.get_performance_metrics()["llm_scheduler"]["priorities"].items()}
+        assert granted == {"P0_IMMEDIATE": 1, "P1_HIGH": 1, "P2_MEDIUM": 0, "P3_STANDARD": 1}
+        assert "llm_scheduler_queue_wait_ms" in router.export_prometheus()
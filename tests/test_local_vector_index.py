@@ -0,0 +1,303 @@
+"""
+Tests for the local in-process vector index
+
+Tests:
+- Brute-force cosine search equals an exact NumPy ranking; upserts replace, deletes remove
+- Pinecone-style metadata filters ($eq/$in/$gte/$exists/$or, list-valued fields)
+- HNSW graph above the threshold: recall against brute force, filtered queries, compaction
+- Persistence: vectors, metadata and graph reloaded by initialize_index
+- Autosave debounced until close(), files written without holding the query lock
+- Queries on a busy index wait off the event loop
+- PineconeClient surface: stats, health, IntelligentSimilaritySearch on top of the index
+- Selectable as the "local" provider in MultiProviderConfig
+"""
+
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.models.multi_provider_config import MultiProviderConfig, VectorDBProvider
+from src.models.rag_intelligent_routing import IntelligentSimilaritySearch
+from src.vector_db import local_index
+from src.vector_db.local_index import LocalIndexConfig, LocalVectorIndex, matches_filter
+from src.vector_db.pinecone_client import VectorDBHealth
+
+DIMENSION = 32
+DEPARTMENTS = ["BILLING", "NETWORK", "TECHNICAL", "SALES"]
+
+
+def _embeddings(count, seed=0, clusters=12):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, DIMENSION))
+    vectors = centres[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, DIMENSION))
+    return vectors.astype(np.float32)
+
+
+def _records(vectors):
+    return [(f"T{i}", vector, {"actual_department": DEPARTMENTS[i % 4], "customer_satisfaction": i % 10})
+            for i, vector in enumerate(vectors)]
+
+
+def _index(vectors=None, **config):
+    index = LocalVectorIndex(LocalIndexConfig(dimension=DIMENSION, persist_dir=config.pop("persist_dir", None),
+                                              **config))
+    asyncio.run(index.initialize_index())
+    if vectors is not None:
+        asyncio.run(index.upsert_vectors(_records(vectors)))
+    return index
+
+
+def _ids(result):
+    return [match["id"] for match in result["matches"]]
+
+
+class TestMetadataFilters:
+    def test_pinecone_filter_language(self):
+        metadata = {"actual_department": "BILLING", "customer_satisfaction": 8, "agent_tags": ["refund", "vip"]}
+
+        assert matches_filter(metadata, {"actual_department": "BILLING"})
+        assert matches_filter(metadata, {"customer_satisfaction": {"$gte": 7, "$lt": 9}})
+        assert matches_filter(metadata, {"agent_tags": "vip", "actual_department": {"$in": ["BILLING", "SALES"]}})
+        assert matches_filter(metadata, {"$or": [{"actual_department": "NETWORK"}, {"agent_tags": {"$in": ["refund"]}}]})
+        assert not matches_filter(metadata, {"agent_tags": {"$nin": ["vip"]}})
+        assert not matches_filter(metadata, {"resolution_type": {"$exists": True}})
+        assert not matches_filter(metadata, {"customer_satisfaction": {"$gt": "high"}})
+        with pytest.raises(ValueError, match="Unsupported filter operator"):
+            matches_filter(metadata, {"customer_satisfaction": {"$regex": "8"}})
+
+
+class TestBruteForce:
+    def test_ranking_matches_exact_cosine(self):
+        vectors = _embeddings(200)
+        index = _index(vectors)
+        query = vectors[7] + 0.1
+
+        result = asyncio.run(index.query_vectors(query, top_k=5))
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+        assert _ids(result) == [f"T{i}" for i in exact]
+        assert result["matches"][0]["metadata"]["actual_department"] == DEPARTMENTS[exact[0] % 4]
+        assert index.backend == "brute_force"
+        assert index.stats["brute_force_queries"] == 1
+
+    def test_filtered_query_returns_only_matches(self):
+        vectors = _embeddings(200)
+        index = _index(vectors)
+
+        result = asyncio.run(index.query_vectors(vectors[5], top_k=10, filter_metadata={
+            "actual_department": "NETWORK", "customer_satisfaction": {"$gte": 5}}))
+
+        assert len(result["matches"]) == 10
+        assert all(m["metadata"]["actual_department"] == "NETWORK" and m["metadata"]["customer_satisfaction"] >= 5
+                   for m in result["matches"])
+        assert _ids(result)[0] == "T5"
+
+    def test_upsert_replaces_and_delete_removes(self):
+        vectors = _embeddings(50)
+        index = _index(vectors)
+
+        asyncio.run(index.upsert_vectors([("T3", vectors[40], {"actual_department": "SALES"})]))
+        replaced = asyncio.run(index.query_vectors(vectors[40], top_k=2))
+        deleted = asyncio.run(index.delete_vectors(["T3", "missing"]))
+        after = asyncio.run(index.query_vectors(vectors[40], top_k=2))
+
+        assert set(_ids(replaced)) == {"T3", "T40"}
+        assert index.size == 49
+        assert deleted == {"deleted_count": 1}
+        assert _ids(after)[0] == "T40"
+        assert "T3" not in _ids(after)
+
+    def test_wrong_dimension_reported_as_failed_batch(self):
+        index = _index()
+
+        result = asyncio.run(index.upsert_vectors([("bad", [1.0, 2.0], {})]))
+
+        assert result["upserted_count"] == 0
+        assert len(result["failed_batches"]) == 1
+        with pytest.raises(ValueError, match="dimension"):
+            index.search([1.0, 2.0])
+
+
+class TestHNSW:
+    def test_recall_against_brute_force(self):
+        data = _embeddings(1540, seed=1)
+        vectors, queries = data[:1500], data[1500:]                    # Held-out tickets from the same topics
+        exact = _index(vectors)
+        graph = _index(vectors, hnsw_threshold=1000, hnsw_ef_search=32)
+
+        recall = np.mean([
+            len(set(_ids(asyncio.run(graph.query_vectors(q, top_k=10)))) &
+                set(_ids(asyncio.run(exact.query_vectors(q, top_k=10))))) / 10
+            for q in queries
+        ])
+
+        assert graph.backend == "hnsw"
+        assert graph.get_stats()["graph_nodes"] == 1500
+        assert recall >= 0.95
+        assert graph.stats["hnsw_queries"] == 40
+
+    def test_filtered_query_widens_search(self):
+        vectors = _embeddings(1200, seed=3)
+        index = _index(vectors, hnsw_threshold=1000, hnsw_ef_search=16)
+
+        result = asyncio.run(index.query_vectors(vectors[5], top_k=10, filter_metadata={"customer_satisfaction": 5}))
+        rare = asyncio.run(index.query_vectors(vectors[5], top_k=3, filter_metadata={
+            "customer_satisfaction": 4, "actual_department": "NETWORK"}))
+
+        assert len(result["matches"]) == 10
+        assert _ids(result)[0] == "T5"
+        assert all(m["metadata"]["customer_satisfaction"] == 5 for m in result["matches"])
+        assert rare["matches"] == []                                  # No NETWORK ticket has CSAT 4
+        assert index.stats["filter_fallbacks"] == 1
+
+    def test_deletes_compact_and_rebuild_graph(self):
+        vectors = _embeddings(1200, seed=4)
+        index = _index(vectors, hnsw_threshold=800)
+
+        asyncio.run(index.delete_vectors([f"T{i}" for i in range(0, 1200, 4)]))   # 25% tombstoned
+        result = asyncio.run(index.query_vectors(vectors[0], top_k=5))
+
+        stats = index.get_stats()
+        assert stats["compactions"] == 1
+        assert stats["deleted_rows"] == 0
+        assert stats["vectors"] == stats["graph_nodes"] == 900
+        assert "T0" not in _ids(result)
+        assert len(result["matches"]) == 5
+
+
+class TestPersistence:
+    def test_index_and_graph_reload(self, tmp_path):
+        vectors = _embeddings(1100, seed=5)
+        index = _index(vectors, persist_dir=str(tmp_path), hnsw_threshold=1000)
+        before = asyncio.run(index.query_vectors(vectors[9], top_k=5, filter_metadata={"actual_department": "NETWORK"}))
+        asyncio.run(index.close())
+
+        reloaded = _index(persist_dir=str(tmp_path), hnsw_threshold=1000)
+        after = asyncio.run(reloaded.query_vectors(vectors[9], top_k=5, filter_metadata={"actual_department": "NETWORK"}))
+
+        assert sorted(p.name for p in (tmp_path / "call-centre-tickets").iterdir()) == \
+            ["graph.npz", "state.json", "vectors.npy"]
+        assert reloaded.size == 1100
+        assert reloaded.get_stats()["graph_nodes"] == 1100
+        assert after == before
+
+    def test_autosave_debounced_until_close(self, tmp_path):
+        vectors = _embeddings(3)
+        index = _index(vectors[:1], persist_dir=str(tmp_path), autosave_interval_seconds=3600)
+        state_path = tmp_path / "call-centre-tickets" / "state.json"
+
+        asyncio.run(index.upsert_vectors(_records(vectors)[1:]))
+        assert json.loads(state_path.read_text())["ids"] == ["T0"]
+        assert index.dirty
+
+        asyncio.run(index.close())
+        assert json.loads(state_path.read_text())["ids"] == ["T0", "T1", "T2"]
+        assert not index.dirty
+
+    def test_save_writes_without_query_lock(self, tmp_path, monkeypatch):
+        index = _index(_embeddings(5), persist_dir=str(tmp_path))
+        write_atomic = local_index._write_atomic
+        lock_free = []
+
+        def try_lock():
+            acquired = index._lock.acquire(timeout=1)
+            if acquired:
+                index._lock.release()
+            lock_free.append(acquired)
+
+        def probing_write(path, write):
+            # Another thread must be able to query while the files are written
+            probe = threading.Thread(target=try_lock)
+            probe.start()
+            probe.join()
+            write_atomic(path, write)
+
+        monkeypatch.setattr(local_index, "_write_atomic", probing_write)
+        index.save()
+
+        assert lock_free == [True, True]
+
+    def test_missing_index_without_create(self, tmp_path):
+        index = LocalVectorIndex(LocalIndexConfig(dimension=DIMENSION, persist_dir=str(tmp_path)))
+
+        with pytest.raises(ValueError, match="does not exist"):
+            asyncio.run(index.initialize_index(create_if_not_exists=False))
+
+
+class TestPineconeSurface:
+    def test_stats_health_and_prometheus(self):
+        index = _index(_embeddings(20))
+
+        stats = asyncio.run(index.get_index_stats())
+
+        assert stats["total_vector_count"] == 20
+        assert stats["namespaces"][""]["vector_count"] == 20
+        assert asyncio.run(index.health_check(force_check=True)) == VectorDBHealth.HEALTHY
+        index.search(_embeddings(1)[0])
+        assert 'local_vector_index_queries_total{backend="brute_force"} 1' in index.export_prometheus()
+
+    def test_similarity_search_on_local_index(self):
+        texts = ["Double charge on my invoice", "Fibre line down since the storm", "Cannot log in to the app"]
+        index = LocalVectorIndex(LocalIndexConfig(persist_dir=None))
+        asyncio.run(index.upsert_enhanced_vectors([
+            (f"HIST-{i}", IntelligentSimilaritySearch.generate_mock_embedding(text),
+             index.create_enhanced_metadata(f"HIST-{i}", text, "2025-10-01T00:00:00",
+                                            actual_department=department))
+            for i, (text, department) in enumerate(zip(texts, ["BILLING", "NETWORK", "TECHNICAL"], strict=True))
+        ]))
+        search = IntelligentSimilaritySearch(vector_client=index)
+
+        matches = asyncio.run(search.search_similar_tickets_with_routing(texts[1], top_k=2))
+
+        assert matches[0].ticket_id == "HIST-1"
+        assert matches[0].actual_department == "NETWORK"
+        assert matches[0].similarity_score == pytest.approx(1.0, abs=1e-5)
+
+
+class TestEventLoop:
+    def test_query_waits_for_busy_index_off_the_loop(self):
+        vectors = _embeddings(20)
+        index = _index(vectors)
+        held, release = threading.Event(), threading.Event()
+
+        def hold_index():
+            with index._lock:
+                held.set()
+                release.wait(timeout=2)
+
+        async def query_while_held():
+            holder = threading.Thread(target=hold_index)
+            holder.start()
+            held.wait()
+            query = asyncio.create_task(index.query_vectors(vectors[3], top_k=1))
+            ticks = 0
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            pending = not query.done()
+            release.set()
+            result = await query
+            holder.join()
+            return ticks, pending, result
+
+        ticks, pending, result = asyncio.run(query_while_held())
+
+        assert (ticks, pending) == (5, True)
+        assert result["matches"][0]["id"] == "T3"
+
+
+class TestProviderSelection:
+    def test_local_provider_in_default_config(self, tmp_path):
+        config = MultiProviderConfig(str(tmp_path / "provider_config.json"))
+
+        assert VectorDBProvider("local") is VectorDBProvider.LOCAL
+        assert config.set_preferred_vector_db("local")
+        local = config.get_vector_db_config()
+        assert local["metadata"]["status"] == "available"
+
+        index_config = LocalIndexConfig.from_provider_config(local)
+        assert (index_config.persist_dir, index_config.hnsw_threshold) == ("data/vector_index", 20_000)
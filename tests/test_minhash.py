@@ -0,0 +1,56 @@
+"""
+Tests for MinHash near-duplicate signatures
+
+Tests:
+- Case and punctuation do not change the signature
+- Near-duplicates score high, unrelated texts low
+- Word n-gram shingles weigh word order
+- LSH bands of equal signatures match
+"""
+
+import numpy as np
+
+from src.models.minhash import MINHASH_BAND_ROWS, MINHASH_PERMUTATIONS, minhash_bands, minhash_signature
+
+
+class TestMinHashSignature:
+    """Test near-duplicate signatures."""
+
+    @staticmethod
+    def _similarity(a, b):
+        return float(np.mean(minhash_signature(a) == minhash_signature(b)))
+
+    def test_punctuation_and_case_ignored(self):
+        assert self._similarity("Internet down in Sandton since 9am!!", "internet down in sandton, since 9am") == 1.0
+
+    def test_near_duplicates_score_high(self):
+        a = "fibre internet down in sandton since 9am no connection at all today"
+        b = "fibre internet down in sandton since 9am no connection at all"
+
+        assert self._similarity(a, b) >= 0.8
+
+    def test_unrelated_texts_score_low(self):
+        a = "please cancel my contract and refund the last invoice"
+        b = "fibre internet down in sandton since 9am no connection at all"
+
+        assert self._similarity(a, b) < 0.3
+
+    def test_empty_text(self):
+        assert not minhash_signature("  ...  ").any()
+
+    def test_shingles_weigh_word_order(self):
+        a = minhash_signature("outage in sandton since nine", shingle_size=2)
+        b = minhash_signature("since nine in sandton outage", shingle_size=2)
+
+        assert float(np.mean(a == b)) < 0.5
+        assert self._similarity("outage in sandton since nine", "since nine in sandton outage") == 1.0
+
+
+class TestMinHashBands:
+    """Test LSH band keys."""
+
+    def test_equal_signatures_share_every_band(self):
+        bands = minhash_bands(minhash_signature("fibre internet down in sandton"))
+
+        assert len(bands) == MINHASH_PERMUTATIONS // MINHASH_BAND_ROWS
+        assert bands == minhash_bands(minhash_signature("Fibre internet down in Sandton!"))
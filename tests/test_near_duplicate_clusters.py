@@ -0,0 +1,191 @@
+"""
+Tests for streaming near-duplicate ticket clusters
+
+Tests:
+- Normalized, shingled MinHash: account numbers and times ignored, a different suburb is not a duplicate
+- Members reuse the representative's classification; LLM calls avoided counted
+- Sliding window: clusters expire after their last member
+- Members wait for a representative still being classified; failed representatives drop the cluster
+- GeminiEnhancedClassifier reuses cluster results instead of calling Gemini; Gemini error fallbacks are not reused
+"""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.enhanced_classifier import EnhancedClassificationResult, GeminiEnhancedClassifier
+from src.models.near_duplicate_clusters import NearDuplicateClusters, normalize_ticket_text
+
+from conftest import FakeClock
+
+OUTAGE = "No signal in Sandton since 8am, my account is 12345, please fix urgently"
+OUTAGE_2 = "No signal in Sandton since 9am, my account is 99881, please fix urgently"
+OUTAGE_3 = "Hi, no signal in Sandton since 8am, my account is 5555, please fix urgently. Thanks"
+OTHER_SUBURB = "No signal in Rosebank since 8am, my account is 12345, please fix urgently"
+
+
+def _classified(clusters, text, result):
+    match = clusters.attach(text)
+    if match.result is None:
+        clusters.resolve(match, result)
+    return match
+
+
+class TestNearDuplicateClusters:
+    def test_normalization_collapses_digits(self):
+        assert normalize_ticket_text("  Account 12345 at 8AM ") == "account 0 at 0am"
+
+    def test_burst_reuses_representative_classification(self):
+        clusters = NearDuplicateClusters()
+
+        first = _classified(clusters, OUTAGE, "NETWORK")
+        second = clusters.attach(OUTAGE_2)
+        third = clusters.attach(OUTAGE_3)
+
+        assert first.representative
+        assert first.result is None
+        assert (second.result, third.result) == ("NETWORK", "NETWORK")
+        assert second.cluster is first.cluster
+        assert second.similarity == 1.0
+        stats = clusters.get_stats()
+        assert (stats["llm_calls_avoided"], stats["active_clusters"]) == (2, 1)
+        assert stats["clusters"][0]["size"] == 3
+        assert stats["clusters"][0]["reused"] == 2
+
+    def test_different_suburb_starts_new_cluster(self):
+        clusters = NearDuplicateClusters()
+        _classified(clusters, OUTAGE, "NETWORK")
+
+        match = clusters.attach(OTHER_SUBURB)
+
+        assert match.representative
+        assert match.result is None
+        assert clusters.attach("I was charged twice on my bill").representative
+
+    def test_window_slides_with_each_member(self):
+        clock = FakeClock(now=1000.0)
+        clusters = NearDuplicateClusters(window_seconds=60, clock=clock)
+        _classified(clusters, OUTAGE, "NETWORK")
+
+        clock.now += 50
+        assert clusters.attach(OUTAGE_2).result == "NETWORK"   # Extends the window
+        clock.now += 50
+        assert clusters.attach(OUTAGE_3).result == "NETWORK"
+        clock.now += 61
+        assert clusters.attach(OUTAGE).representative
+        assert clusters.get_stats()["expired"] == 1
+
+    def test_member_waits_for_pending_representative(self):
+        clusters = NearDuplicateClusters(wait_seconds=5)
+        leader = clusters.attach(OUTAGE)
+        results = []
+
+        follower = threading.Thread(target=lambda: results.append(clusters.attach(OUTAGE_2).result))
+        follower.start()
+        time.sleep(0.05)
+        clusters.resolve(leader, "NETWORK")
+        follower.join(timeout=5)
+
+        assert results == ["NETWORK"]
+        assert clusters.get_stats()["waits"] == 1
+
+    def test_failed_representative_drops_cluster(self):
+        clusters = NearDuplicateClusters(wait_seconds=0.01)
+        leader = clusters.attach(OUTAGE)
+
+        assert clusters.attach(OUTAGE_2).result is None    # Timed out waiting
+        clusters.resolve(leader, None)
+
+        assert clusters.attach(OUTAGE_2).representative
+        stats = clusters.get_stats()
+        assert (stats["wait_timeouts"], stats["unresolved"], stats["llm_calls_avoided"]) == (1, 1, 0)
+
+    def test_prometheus_export(self):
+        clusters = NearDuplicateClusters()
+        _classified(clusters, OUTAGE, "NETWORK")
+        clusters.attach(OUTAGE_2)
+
+        text = clusters.export_prometheus()
+
+        assert "duplicate_clusters_llm_calls_avoided_total 1" in text
+        assert 'duplicate_clusters_cluster_size{cluster="C000001",label=""} 2' in text
+
+
+def _result(category="NETWORK"):
+    return EnhancedClassificationResult(
+        predicted_category=category, confidence=0.9, reasoning="Tower outage", traditional_prediction=category,
+        traditional_confidence=0.5, gemini_prediction=category, gemini_confidence=0.9, all_probabilities={},
+        processing_time_ms=1500.0,
+    )
+
+
+class TestGeminiClusterReuse:
+    def test_near_duplicates_skip_gemini(self):
+        classifier = object.__new__(GeminiEnhancedClassifier)
+        classifier.duplicate_clusters = NearDuplicateClusters()
+        calls = []
+
+        def classify(ticket_text, priority=None):
+            calls.append(ticket_text)
+            return _result()
+
+        classifier._classify_ticket = classify
+
+        first = classifier.classify_ticket(OUTAGE)
+        second = classifier.classify_ticket(OUTAGE_2, priority="P1_HIGH")
+        other = classifier.classify_ticket(OTHER_SUBURB)
+
+        assert calls == [OUTAGE, OTHER_SUBURB]
+        assert second.predicted_category == "NETWORK"
+        assert second.reasoning.startswith("Near-duplicate of cluster C000001")
+        assert second.processing_time_ms < first.processing_time_ms
+        assert other.reasoning == "Tower outage"
+        assert classifier.duplicate_clusters.get_stats()["llm_calls_avoided"] == 1
+
+    def test_failed_classification_releases_cluster(self):
+        classifier = object.__new__(GeminiEnhancedClassifier)
+        classifier.duplicate_clusters = NearDuplicateClusters()
+
+        def fail(ticket_text, priority=None):
+            raise RuntimeError("quota exceeded")
+
+        classifier._classify_ticket = fail
+        with pytest.raises(RuntimeError):
+            classifier.classify_ticket(OUTAGE)
+
+        assert classifier.duplicate_clusters.get_stats()["unresolved"] == 1
+
+    def test_gemini_error_fallback_not_shared(self, tmp_path):
+        class FlakyGemini:
+            """Raises on the first call (like a quota error), answers afterwards."""
+            calls = 0
+
+            def generate_content(self, prompt):
+                self.calls += 1
+                if self.calls == 1:
+                    raise RuntimeError("429 quota exceeded")
+                return SimpleNamespace(text=json.dumps({
+                    "category": "NETWORK", "confidence": 0.92, "reasoning": "Tower outage",
+                    "department_allocation": "CRM", "routing_confidence": 0.9, "routing_reasoning": "Outage",
+                    "sentiment_label": "NEGATIVE", "sentiment_score": -0.6, "sentiment_reasoning": "Upset",
+                    "priority_level": "P1_HIGH", "escalation_required": False,
+                }))
+
+        classifier = GeminiEnhancedClassifier(api_key="test-key", traditional_model_path=str(tmp_path / "none.pkl"),
+                                              duplicate_clusters=NearDuplicateClusters())
+        classifier.model = FlakyGemini()
+
+        failed = classifier.classify_ticket(OUTAGE)
+        retried = classifier.classify_ticket(OUTAGE_2)
+        reused = classifier.classify_ticket(OUTAGE_3)
+
+        assert failed.gemini_failed
+        assert failed.reasoning.startswith("API error occurred: 429")
+        assert not retried.gemini_failed
+        assert retried.gemini_prediction == "NETWORK"
+        assert reused.reasoning.startswith("Near-duplicate of cluster C000002")
+        assert classifier.model.calls == 2
+        assert classifier.duplicate_clusters.get_stats()["unresolved"] == 1
@@ -0,0 +1,718 @@
+"""
+Tests for RAG intelligent routing retrieval
+
+Tests:
+- Long-lived, lazily initialized vector connection
+- Re-initialization only on health failure
+- Shared similarity search across ConfidenceBasedRouter and RAGIntelligentRouting
+- Per-stage retrieval timing
+- One top-k retrieval per routed ticket, reused for the RAG prompt
+- Vectorized, cached mock embeddings
+- Async LLM client against a local OpenAI-compatible stand-in server
+- Token-budgeted RAG prompt builder
+- Vectorized (batch) routing confidence analysis
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import src.models.rag_intelligent_routing as rag_routing
+from scripts.benchmarks.openai_stand_in import OpenAIStandInServer
+from src.models.confidence_based_routing import ConfidenceBasedRouter, RoutingMethod
+from src.models.rag_intelligent_routing import (
+    IntelligentSimilaritySearch,
+    MatchSetBatch,
+    LLMClassifier,
+    LLMClientConfig,
+    RAGIntelligentRouting,
+    RAGPromptBuilder,
+    estimate_tokens,
+)
+from src.vector_db.pinecone_client import VectorDBHealth
+
+from conftest import historical_match
+
+
+class FakeVectorClient:
+    """In-memory stand-in for PineconeClient that counts control-plane calls."""
+
+    def __init__(self, matches=None, health=VectorDBHealth.HEALTHY):
+        self.matches = matches if matches is not None else [
+            {
+                "score": 0.95,
+                "metadata": {
+                    "ticket_id": "HIST-001",
+                    "text": "I was charged twice for my monthly plan",
+                    "actual_department": "billing_corrections",
+                    "prediction_was_correct": True,
+                },
+            }
+        ]
+        self.health = health
+        self.initialize_calls = 0
+        self.close_calls = 0
+        self.query_calls = 0
+        self.fail_next_queries = 0
+
+    async def initialize_index(self):
+        self.initialize_calls += 1
+
+    async def query_vectors(self, query_vector, top_k=5, include_metadata=True, **kwargs):
+        self.query_calls += 1
+        if self.fail_next_queries:
+            self.fail_next_queries -= 1
+            raise ConnectionError("connection reset")
+        return {"matches": self.matches[:top_k]}
+
+    async def health_check(self, force_check=False):
+        return self.health
+
+    async def close(self):
+        self.close_calls += 1
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestPersistentVectorConnection:
+    """Test the long-lived vector connection in IntelligentSimilaritySearch."""
+
+    def test_client_created_lazily(self, monkeypatch):
+        """Constructing the search does not require Pinecone credentials."""
+        monkeypatch.delenv("PINECONE_API_KEY", raising=False)
+
+        search = IntelligentSimilaritySearch()
+
+        assert search._vector_client is None
+
+    def test_index_initialized_once_across_searches(self):
+        client = FakeVectorClient()
+        search = IntelligentSimilaritySearch(vector_client=client)
+
+        async def run_searches():
+            for _ in range(5):
+                await search.search_similar_tickets_with_routing("double charge on my bill")
+
+        _run(run_searches())
+
+        assert client.initialize_calls == 1
+        assert client.close_calls == 0
+        assert client.query_calls == 5
+
+    def test_concurrent_first_searches_initialize_once(self):
+        client = FakeVectorClient()
+        search = IntelligentSimilaritySearch(vector_client=client)
+
+        async def run_searches():
+            await asyncio.gather(*(
+                search.search_similar_tickets_with_routing(f"ticket {i}") for i in range(10)
+            ))
+
+        _run(run_searches())
+
+        assert client.initialize_calls == 1
+
+    def test_reinitializes_on_health_failure(self):
+        client = FakeVectorClient(health=VectorDBHealth.UNHEALTHY)
+        client.fail_next_queries = 1
+        search = IntelligentSimilaritySearch(vector_client=client)
+
+        matches = _run(search.search_similar_tickets_with_routing("double charge on my bill"))
+
+        assert len(matches) == 1
+        assert client.initialize_calls == 2
+        assert search.connection_stats["reinitializations"] == 1
+
+    def test_healthy_index_keeps_connection_on_query_error(self):
+        client = FakeVectorClient(health=VectorDBHealth.HEALTHY)
+        client.fail_next_queries = 1
+        search = IntelligentSimilaritySearch(vector_client=client)
+
+        matches = _run(search.search_similar_tickets_with_routing("double charge on my bill"))
+
+        assert matches == []
+        assert client.initialize_calls == 1
+        assert search.connection_stats["reinitializations"] == 0
+
+    def test_close_resets_connection(self):
+        client = FakeVectorClient()
+        search = IntelligentSimilaritySearch(vector_client=client)
+
+        async def search_close_search():
+            await search.search_similar_tickets_with_routing("first")
+            await search.close()
+            await search.search_similar_tickets_with_routing("second")
+
+        _run(search_close_search())
+
+        assert client.close_calls == 1
+        assert client.initialize_calls == 2
+
+
+class TestStageTiming:
+    """Test per-stage retrieval latency reporting."""
+
+    def test_stage_timing_recorded(self):
+        search = IntelligentSimilaritySearch(vector_client=FakeVectorClient())
+
+        _run(search.search_similar_tickets_with_routing("double charge on my bill"))
+        _run(search.search_similar_tickets_with_routing("double charge on my bill"))
+
+        timing = search.get_stage_timing()
+        for stage in ("connect", "embed", "query"):
+            assert timing[stage]["count"] == 2
+            assert timing[stage]["avg_ms"] >= 0
+        assert timing["connection"]["initializations"] == 1
+
+
+class TestSharedSimilaritySearch:
+    """Test the router and RAG system share one similarity search."""
+
+    def test_router_shares_search_with_rag_system(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        router = ConfidenceBasedRouter()
+
+        assert router.rag_system.similarity_search is router.similarity_search
+
+    def test_shared_connection_initialized_once(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        client = FakeVectorClient(matches=[])
+        router = ConfidenceBasedRouter()
+        router.similarity_search.vector_client = client
+
+        async def route_tickets():
+            await router.route_with_confidence("My internet keeps dropping")
+            await router.route_with_confidence("Cannot login to my account")
+            await router.close()
+
+        _run(route_tickets())
+
+        assert client.initialize_calls == 1
+        assert "retrieval_stages" in router.get_performance_metrics()
+
+    def test_rag_system_accepts_injected_search(self):
+        search = IntelligentSimilaritySearch(vector_client=FakeVectorClient())
+
+        assert RAGIntelligentRouting(similarity_search=search).similarity_search is search
+
+
+class TestSingleRetrieval:
+    """Test one retrieval per ticket through router, analysis and prompt."""
+
+    @pytest.fixture
+    def low_similarity_matches(self):
+        return [
+            {
+                "score": 0.60 - i * 0.05,
+                "metadata": {
+                    "ticket_id": f"HIST-{i}",
+                    "text": f"Fiber connection drops during video calls ({i})",
+                    "actual_department": "technical_support_l2",
+                    "prediction_was_correct": True,
+                },
+            }
+            for i in range(5)
+        ]
+
+    def test_llm_routed_ticket_retrieves_once(self, tmp_path, monkeypatch, low_similarity_matches):
+        monkeypatch.chdir(tmp_path)
+        client = FakeVectorClient(matches=low_similarity_matches)
+        router = ConfidenceBasedRouter()
+        router.similarity_search.vector_client = client
+        prompts = []
+
+        async def capture_prompt(rag_prompt, model="gpt-3.5-turbo"):
+            prompts.append(rag_prompt)
+            return {"department": "technical_support_l2", "confidence": "medium", "reasoning": "history"}
+
+        router.rag_system.llm_classifier.classify_with_rag_prompt = capture_prompt
+
+        async def route_tickets():
+            return [await router.route_with_confidence(f"My internet keeps dropping ({i})") for i in range(3)]
+
+        decisions = _run(route_tickets())
+
+        assert all(d.routing_method == RoutingMethod.RAG_LLM for d in decisions)
+        assert client.query_calls == 3
+        assert router.get_performance_metrics()["retrieval_stages"]["embed"]["count"] == 3
+        assert all(d.similar_tickets_found == 5 for d in decisions)
+        assert "Fiber connection drops" in prompts[0]
+
+    def test_rag_system_reuses_passed_matches(self, low_similarity_matches):
+        client = FakeVectorClient(matches=low_similarity_matches)
+        search = IntelligentSimilaritySearch(vector_client=client)
+        rag_system = RAGIntelligentRouting(similarity_search=search)
+
+        async def retrieve_then_route():
+            matches = await search.search_similar_tickets_with_routing("connection drops", top_k=5)
+            return await rag_system.route_ticket_intelligently("connection drops", historical_matches=matches)
+
+        result = _run(retrieve_then_route())
+
+        assert client.query_calls == 1
+        assert result["retrieval_reused"] is True
+        assert result["historical_matches_found"] == 5
+
+    def test_rag_system_searches_without_matches(self, low_similarity_matches):
+        client = FakeVectorClient(matches=low_similarity_matches)
+        rag_system = RAGIntelligentRouting(similarity_search=IntelligentSimilaritySearch(vector_client=client))
+
+        result = _run(rag_system.route_ticket_intelligently("connection drops"))
+
+        assert client.query_calls == 1
+        assert result["retrieval_reused"] is False
+
+
+class TestMockEmbedding:
+    """Test the numpy mock embedding generator."""
+
+    def test_deterministic_unit_norm_float32(self):
+        embedding = IntelligentSimilaritySearch.generate_mock_embedding("slow internet", dimension=256)
+
+        assert embedding.dtype == np.float32
+        assert embedding.shape == (256,)
+        assert np.linalg.norm(embedding) == pytest.approx(1.0, abs=1e-5)
+        np.testing.assert_array_equal(
+            embedding, IntelligentSimilaritySearch.generate_mock_embedding("slow internet", dimension=256)
+        )
+
+    def test_different_texts_differ(self):
+        a = IntelligentSimilaritySearch.generate_mock_embedding("slow internet")
+        b = IntelligentSimilaritySearch.generate_mock_embedding("double billing")
+
+        assert not np.array_equal(a, b)
+
+    def test_cached_embedding_is_read_only(self):
+        embedding = IntelligentSimilaritySearch.generate_mock_embedding("slow internet")
+
+        with pytest.raises(ValueError, match="read-only"):
+            embedding[0] = 1.0
+
+    def test_repeat_text_hits_cache(self):
+        IntelligentSimilaritySearch.generate_mock_embedding("cache me once")
+        hits_before = IntelligentSimilaritySearch.embedding_cache_info().hits
+
+        IntelligentSimilaritySearch.generate_mock_embedding("cache me once")
+
+        assert IntelligentSimilaritySearch.embedding_cache_info().hits == hits_before + 1
+
+    def test_global_random_state_untouched(self):
+        state = random.getstate()
+
+        IntelligentSimilaritySearch.generate_mock_embedding("fresh text for rng check")
+
+        assert random.getstate() == state
+
+    def test_batch_matches_single(self):
+        texts = ["slow internet", "double billing", "password reset"]
+
+        batch = IntelligentSimilaritySearch.generate_mock_embeddings(texts, dimension=128)
+
+        assert batch.shape == (3, 128)
+        for row, text in zip(batch, texts, strict=True):
+            np.testing.assert_array_equal(row, IntelligentSimilaritySearch.generate_mock_embedding(text, 128))
+
+    def test_thread_safe_generation(self):
+        texts = [f"ticket {i % 20} in thread" for i in range(200)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda t: IntelligentSimilaritySearch.generate_mock_embedding(t, 64), texts))
+
+        for text, embedding in zip(texts, results, strict=True):
+            np.testing.assert_array_equal(embedding, IntelligentSimilaritySearch.generate_mock_embedding(text, 64))
+
+
+@pytest.fixture
+def llm_server():
+    """Local OpenAI-compatible stand-in server."""
+    with OpenAIStandInServer(latency_ms=20) as server:
+        yield server
+
+
+def _classifier(server, **config):
+    config.setdefault("backoff_factor_seconds", 0.01)
+    return LLMClassifier(LLMClientConfig(base_url=server.base_url, **config), api_key="stand-in")
+
+
+class TestAsyncLLMClassifier:
+    """Test LLMClassifier end to end against the local stand-in server."""
+
+    def test_classification_parsed(self, llm_server):
+        classifier = _classifier(llm_server)
+
+        async def classify():
+            try:
+                return await classifier.classify_with_rag_prompt("Ticket: my internet drops")
+            finally:
+                await classifier.close()
+
+        result = _run(classify())
+
+        assert result == {"department": "technical_support_l2", "confidence": "medium",
+                          "reasoning": "Stand-in classification"}
+        assert llm_server.stats["requests"] == 1
+
+    def test_connections_reused(self, llm_server):
+        classifier = _classifier(llm_server)
+
+        async def classify_sequentially():
+            for i in range(5):
+                await classifier.classify_with_rag_prompt(f"Ticket {i}")
+            await classifier.close()
+
+        _run(classify_sequentially())
+
+        assert llm_server.stats["requests"] == 5
+        assert llm_server.stats["connections"] == 1
+
+    def test_concurrency_bounded(self, llm_server):
+        classifier = _classifier(llm_server, max_concurrency=3)
+
+        async def classify_many():
+            results = await asyncio.gather(*(classifier.classify_with_rag_prompt(f"Ticket {i}") for i in range(12)))
+            await classifier.close()
+            return results
+
+        results = _run(classify_many())
+
+        assert all(r["department"] == "technical_support_l2" for r in results)
+        assert llm_server.stats["peak_in_flight"] == 3
+        assert classifier.get_stats()["peak_in_flight"] == 3
+
+    def test_retries_transient_errors(self, llm_server):
+        llm_server.fail_next(2, status=503)
+        classifier = _classifier(llm_server)
+
+        async def classify():
+            result = await classifier.classify_with_rag_prompt("Ticket")
+            await classifier.close()
+            return result
+
+        result = _run(classify())
+
+        assert result["department"] == "technical_support_l2"
+        assert classifier.get_stats()["retries"] == 2
+        assert llm_server.stats["requests"] == 3
+
+    def test_backoff_releases_slot(self, llm_server, monkeypatch):
+        monkeypatch.setattr(rag_routing.backoff, "full_jitter", lambda wait: wait)  # Backoff of exactly 0.3s
+        llm_server.fail_next(1, status=503)
+        classifier = _classifier(llm_server, max_concurrency=1, backoff_factor_seconds=0.3)
+        finished = []
+
+        async def classify(name, delay):
+            await asyncio.sleep(delay)
+            await classifier.classify_with_rag_prompt(f"Ticket {name}")
+            finished.append(name)
+
+        async def classify_both():
+            await asyncio.gather(classify("retried", 0.0), classify("waiting", 0.1))
+            await classifier.close()
+
+        _run(classify_both())
+
+        assert finished == ["waiting", "retried"]           # Ran during the backoff instead of queueing behind it
+        assert classifier.get_stats()["retries"] == 1
+        assert classifier.get_stats()["peak_in_flight"] == 1
+
+    def test_gives_up_after_max_retries(self, llm_server):
+        llm_server.fail_next(5, status=500)
+        classifier = _classifier(llm_server, max_retries=1)
+
+        async def classify():
+            result = await classifier.classify_with_rag_prompt("Ticket")
+            await classifier.close()
+            return result
+
+        result = _run(classify())
+
+        assert result["department"] == "unknown"
+        assert "Classification failed" in result["reasoning"]
+        assert llm_server.stats["requests"] == 2
+        assert classifier.get_stats()["failures"] == 1
+
+    def test_client_errors_not_retried(self, llm_server):
+        llm_server.fail_next(1, status=400)
+        classifier = _classifier(llm_server)
+
+        async def classify():
+            result = await classifier.classify_with_rag_prompt("Ticket")
+            await classifier.close()
+            return result
+
+        assert _run(classify())["department"] == "unknown"
+        assert llm_server.stats["requests"] == 1
+
+    def test_per_call_timeout(self, llm_server):
+        llm_server.fail_next(1, status=500, delay_ms=1000)
+        classifier = _classifier(llm_server, timeout_seconds=0.1, max_retries=0)
+
+        async def classify():
+            started = time.perf_counter()
+            result = await classifier.classify_with_rag_prompt("Ticket")
+            elapsed = time.perf_counter() - started
+            await classifier.close()
+            return result, elapsed
+
+        result, elapsed = _run(classify())
+
+        assert result["department"] == "unknown"
+        assert elapsed < 0.8
+
+    def test_mock_response_without_api_key(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+        classifier = LLMClassifier()
+
+        assert classifier.client is None
+        assert _run(classifier.classify_with_rag_prompt("Ticket"))["department"] == "technical_support_l2"
+
+    def test_router_runs_llm_calls_in_parallel(self, tmp_path, monkeypatch, llm_server):
+        monkeypatch.chdir(tmp_path)
+        llm_server.latency_ms = 100
+        router = ConfidenceBasedRouter()
+        router.similarity_search.vector_client = FakeVectorClient(matches=[
+            {
+                "score": 0.60,
+                "metadata": {"ticket_id": "HIST-1", "text": "Fiber drops", "actual_department": "technical_support_l2"},
+            }
+        ])
+        router.rag_system.llm_classifier = _classifier(llm_server)
+
+        async def route_batch():
+            started = time.perf_counter()
+            decisions = await router.route_many([f"My fiber keeps dropping ({i})" for i in range(8)])
+            elapsed = time.perf_counter() - started
+            await router.close()
+            return decisions, elapsed
+
+        decisions, elapsed = _run(route_batch())
+
+        assert all(d.routing_method == RoutingMethod.RAG_LLM for d in decisions)
+        assert llm_server.stats["peak_in_flight"] > 1
+        assert elapsed < 8 * 0.1
+
+
+class TestRAGPromptBuilder:
+    """Test the token-budgeted prompt builder."""
+
+    @pytest.fixture
+    def matches(self):
+        return [
+            historical_match(0.90, "technical_support_l2", ticket_id="H1"),
+            historical_match(0.88, "technical_support_l2", ticket_id="H2"),
+            historical_match(0.80, "network_operations", ticket_id="H3"),
+            historical_match(0.70, "unknown", ticket_id="H4"),
+        ]
+
+    def test_estimate_tokens_grows_with_text(self):
+        assert estimate_tokens("") == 0
+        assert 0 < estimate_tokens("short ticket") < estimate_tokens("short ticket " * 20)
+
+    def test_tokenizer_loaded_lazily_with_fallback(self, monkeypatch, request):
+        loads = []
+
+        def get_encoding(name):
+            loads.append(name)
+            if len(loads) == 1:
+                raise OSError("cannot download cl100k_base")
+            return SimpleNamespace(encode=lambda text: text.split())
+
+        monkeypatch.setattr(rag_routing, "tiktoken", SimpleNamespace(get_encoding=get_encoding))
+        rag_routing._get_tokenizer.cache_clear()
+        request.addfinalizer(rag_routing._get_tokenizer.cache_clear)
+        heuristic = estimate_tokens("internet down since nine")
+        estimate_tokens("again")
+        assert loads == ["cl100k_base"]                                # Failure cached, not retried per call
+
+        rag_routing._get_tokenizer.cache_clear()
+        assert estimate_tokens("internet down since nine") == 4
+        assert heuristic == sum((len(word) + 3) // 4 for word in "internet down since nine".split())
+        assert RAGPromptBuilder().get_stats()["tokenizer"] == "tiktoken"
+
+    def test_marginal_value_prefers_new_department(self, matches):
+        build = RAGPromptBuilder().build("My internet is down", matches, max_examples=2)
+
+        assert build.examples_used == 2
+        assert "ACTUAL Department: network_operations" in build.prompt
+        assert build.prompt.index("technical_support_l2") < build.prompt.index("network_operations")
+        assert "unknown" not in build.prompt
+
+    def test_budget_drops_least_useful_examples(self, matches):
+        builder = RAGPromptBuilder()
+        full = builder.build("My internet is down", matches)
+        snippet_tokens = builder.snippet(matches[0])[1]
+
+        builder.token_budget = full.tokens - snippet_tokens
+        trimmed = builder.build("My internet is down", matches)
+
+        assert trimmed.examples_used == full.examples_used - 1
+        assert trimmed.tokens <= builder.token_budget
+        # The third pick (second technical_support_l2 example) is the one dropped
+        assert "network_operations" in trimmed.prompt
+        assert trimmed.prompt.count("ACTUAL Department: technical_support_l2") == 1
+
+    def test_long_query_truncated_to_budget(self, matches):
+        builder = RAGPromptBuilder(token_budget=400)
+
+        build = builder.build("my line keeps dropping " * 500, matches)
+
+        assert build.query_truncated is True
+        assert build.tokens <= 400
+
+    def test_snippets_cached_by_ticket_id(self, matches):
+        builder = RAGPromptBuilder()
+        builder.build("ticket one", matches)
+        builder.build("ticket two", matches)
+
+        stats = builder.get_stats()
+        assert stats["snippet_misses"] == 3
+        assert stats["snippet_hits"] == 3
+        assert stats["prompts"] == 2
+        assert stats["avg_tokens"] > 0
+
+    def test_no_valid_examples_uses_zero_shot(self):
+        build = RAGPromptBuilder().build("My internet is down", [historical_match(0.9, "unknown", ticket_id="H1")])
+
+        assert build.examples_used == 0
+        assert "Available departments" in build.prompt
+
+    def test_router_reports_prompt_tokens(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        router = ConfidenceBasedRouter()
+        router.rag_system.prompt_builder = RAGPromptBuilder()
+        router.similarity_search.vector_client = FakeVectorClient(matches=[
+            {
+                "score": 0.60,
+                "metadata": {"ticket_id": "HIST-1", "text": "Fiber drops", "actual_department": "technical_support_l2"},
+            }
+        ])
+
+        async def route():
+            decision = await router.route_with_confidence("My fiber keeps dropping")
+            await router.close()
+            return decision
+
+        decision = _run(route())
+
+        assert decision.prompt_tokens > 0
+        assert router.get_performance_metrics()["prompt_tokens"]["total_tokens"] == decision.prompt_tokens
+
+
+def _reference_analysis(matches):
+    """Department, success rate and averages as the per-ticket dict loop computed them."""
+    departments, resolution, satisfaction, successes, valid = {}, 0, 0, 0, 0
+    for match in matches[:3]:
+        if match.actual_department:
+            stats = departments.setdefault(match.actual_department, [0, 0.0])
+            stats[0] += 1
+            stats[1] += match.similarity_score
+            resolution += match.resolution_time_hours or 0
+            satisfaction += match.customer_satisfaction or 0
+            successes += bool(match.ai_prediction_correct)
+            valid += 1
+    if not departments:
+        return "unknown", 0, 0, 0
+    best = max(departments, key=lambda d: departments[d][1] * departments[d][0])
+    return best, successes / valid, resolution / valid, satisfaction / valid
+
+
+class TestBatchRoutingConfidence:
+    """Test the vectorized routing confidence analysis."""
+
+    @staticmethod
+    def _random_sets(count, seed=3):
+        rng = random.Random(seed)
+        departments = ["billing_corrections", "technical_support_l2", "sales", None]
+        sets = []
+        for i in range(count):
+            matches = []
+            for rank in range(rng.randint(0, 5)):
+                match = historical_match(round(rng.uniform(0.3, 1.0), 3), rng.choice(departments), ticket_id=f"H{i}-{rank}")
+                match.ai_prediction_correct = rng.choice([True, False, None])
+                match.resolution_time_hours = rng.choice([None, rng.uniform(1, 48)])
+                match.customer_satisfaction = rng.choice([None, rng.uniform(1, 10)])
+                matches.append(match)
+            matches.sort(key=lambda m: -m.similarity_score)
+            sets.append(matches)
+        return sets
+
+    def test_batch_matches_reference_loop(self):
+        search = IntelligentSimilaritySearch(vector_client=FakeVectorClient())
+        sets = self._random_sets(300)
+
+        recommendations = search.analyze_routing_confidence_batch(sets)
+
+        assert len(recommendations) == len(sets)
+        for matches, recommendation in zip(sets, recommendations, strict=True):
+            department, success_rate, resolution, satisfaction = _reference_analysis(matches)
+            assert recommendation.recommended_department == department
+            assert recommendation.success_rate == pytest.approx(success_rate)
+            assert recommendation.avg_resolution_time == pytest.approx(resolution)
+            assert recommendation.avg_satisfaction == pytest.approx(satisfaction)
+            assert recommendation.historical_matches == matches
+            assert recommendation == search.analyze_routing_confidence(matches)
+
+    def test_ties_go_to_first_department_in_rank_order(self):
+        search = IntelligentSimilaritySearch(vector_client=FakeVectorClient())
+        matches = [historical_match(0.9, "sales", ticket_id="H1"), historical_match(0.9, "billing_corrections", ticket_id="H2")]
+
+        assert search.analyze_routing_confidence(matches).recommended_department == "sales"
+
+    def test_confidence_tiers(self):
+        search = IntelligentSimilaritySearch(vector_client=FakeVectorClient())
+        sets = [[historical_match(similarity, "sales", ticket_id="H")] for similarity in (0.9, 0.75, 0.6, 0.4)]
+        sets.append([])
+
+        recommendations = search.analyze_routing_confidence_batch(sets)
+
+        assert [r.confidence.value for r in recommendations] == ["high", "medium", "low", "unknown", "unknown"]
+        assert [r.use_cached_route for r in recommendations] == [True, True, False, False, False]
+        assert recommendations[-1].reasoning == "No similar historical tickets found"
+
+    def test_pack_keeps_top_matches_only(self):
+        sets = [[historical_match(0.9 - i / 10, "sales", ticket_id=f"H{i}") for i in range(5)], [], [historical_match(0.5, None, ticket_id="X")]]
+
+        batch = MatchSetBatch.pack(sets, top_n=3)
+
+        assert batch.sets == 3
+        assert batch.rows["set_index"].tolist() == [0, 0, 0, 2]
+        assert batch.rows["department"].tolist() == [0, 0, 0, -1]
+        assert batch.departments == ["sales"]
+        assert np.isnan(batch.top_similarity[1])
+
+    def test_route_many_analyzes_misses_in_one_batch(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        router = ConfidenceBasedRouter()
+        router.similarity_search.vector_client = FakeVectorClient(matches=[
+            {
+                "score": 0.60,
+                "metadata": {"ticket_id": "HIST-1", "text": "Fiber drops", "actual_department": "technical_support_l2"},
+            }
+        ])
+        batch_sizes = []
+        analyze_batch = router.similarity_search.analyze_routing_confidence_batch
+
+        def counting_batch(match_sets):
+            batch_sizes.append(len(match_sets))
+            return analyze_batch(match_sets)
+
+        monkeypatch.setattr(router.similarity_search, "analyze_routing_confidence_batch", counting_batch)
+
+        async def route():
+            decisions = await router.route_many(["My fiber keeps dropping", "Router light is red", "No signal"])
+            await router.close()
+            return decisions
+
+        decisions = _run(route())
+
+        assert [d.routing_method for d in decisions] == [RoutingMethod.RAG_LLM] * 3
+        assert batch_sizes == [3]
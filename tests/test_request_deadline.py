@@ -0,0 +1,264 @@
+"""
+Tests for request-scoped deadlines and deadline-aware degradation
+
+Tests:
+- Run / degrade / skip plans from the remaining budget and expected stage costs
+- Stage cost estimates learnt from observed durations
+- Router: top_k=1 retrieval, labels-only prompt and fallback when the budget is short
+- Router: timed-out LLM calls fall back at the deadline; reasons recorded on the decision
+- API: SLA budget from business rules, rule fallback when the model does not fit (single and batch)
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import Mock, patch
+
+import src.api.main as api
+from src.models.business_rules_config import BusinessRulesConfig
+from src.models.confidence_based_routing import ConfidenceBasedRouter, RoutingMethod
+from src.models.request_deadline import (STAGE_DEGRADE, STAGE_RUN, STAGE_SKIP, RequestDeadline,
+                                         StageCostModel)
+
+from conftest import FakeClock, historical_match
+
+
+class TestRequestDeadline:
+    def test_plan_runs_degrades_then_skips(self):
+        clock = FakeClock(now=100.0)
+        deadline = RequestDeadline(10.0, clock=clock)
+
+        assert deadline.plan("llm") == STAGE_RUN
+        clock.now += 5.0     # 5 s left: labels-only prompt (3 s) fits, few-shot (8 s) does not
+        assert deadline.plan("llm") == STAGE_DEGRADE
+        clock.now += 4.0     # 1 s left
+        assert deadline.plan("llm") == STAGE_SKIP
+
+        assert [(s["stage"], s["action"]) for s in deadline.skips] == [("llm", "degrade"), ("llm", "skip")]
+        assert deadline.skips[-1]["remaining_ms"] == pytest.approx(1000.0)
+
+    def test_stage_without_fallback_overruns(self):
+        clock = FakeClock(now=100.0)
+        deadline = RequestDeadline(0.01, clock=clock)
+
+        assert deadline.plan("ml", can_skip=False) == STAGE_RUN
+        assert deadline.skips[0]["action"] == "overrun"
+
+    def test_budget_from_processing_time_sla(self):
+        deadline = RequestDeadline.for_sla(BusinessRulesConfig())
+
+        assert deadline.budget_seconds == 5 * 60
+        assert 299_000 < deadline.remaining_ms() <= 300_000
+
+    def test_cost_model_learns_from_observations(self):
+        clock = FakeClock(now=100.0)
+        costs = StageCostModel(smoothing=0.5)
+        deadline = RequestDeadline(60.0, costs, clock=clock)
+
+        with deadline.measure("llm"):
+            clock.now += 20.0
+
+        assert costs.estimate("llm") == pytest.approx(14_000.0)
+        assert costs.get_stats()["llm"]["cheap"] == 3000.0
+
+
+class StubLLM:
+    def __init__(self, delay=0.0):
+        self.prompts = []
+        self.delay = delay
+
+    async def classify_with_rag_prompt(self, rag_prompt, model="gpt-3.5-turbo"):
+        self.prompts.append(rag_prompt)
+        await asyncio.sleep(self.delay)
+        return {"department": "technical_support_l2", "confidence": "medium", "reasoning": "history"}
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    router = ConfidenceBasedRouter(sla_budget_seconds=60.0)
+    router.searches = []
+
+    async def fake_search(query_text, top_k=5, query_embedding=None):
+        router.searches.append(top_k)
+        return [historical_match(0.6 - i * 0.05, "technical_support_l2", text="Fiber drops during calls") for i in range(top_k)]
+
+    router.similarity_search.search_similar_tickets_with_routing = fake_search
+    router.rag_system.llm_classifier = StubLLM()
+    return router
+
+
+def _route(router, text, **kwargs):
+    async def scenario():
+        try:
+            return await router.route_with_confidence(text, **kwargs)
+        finally:
+            await router.close()
+    return asyncio.run(scenario())
+
+
+class TestRouterDegradation:
+    def test_ample_budget_runs_every_stage(self, router):
+        decision = _route(router, "My fiber keeps dropping")
+
+        assert decision.routing_method == RoutingMethod.RAG_LLM
+        assert decision.degraded_stages == []
+        assert router.searches == [5]
+        assert "Example 1" in router.rag_system.llm_classifier.prompts[0]
+
+    def test_short_budget_degrades_search_and_prompt(self, router):
+        decision = _route(router, "My fiber keeps dropping", deadline=RequestDeadline(4.0, router.stage_costs))
+
+        assert decision.routing_method == RoutingMethod.RAG_LLM
+        assert [(s["stage"], s["action"]) for s in decision.degraded_stages] == [("llm", "degrade")]
+        assert "Example 1" not in router.rag_system.llm_classifier.prompts[0]
+        assert "Available departments" in router.rag_system.llm_classifier.prompts[0]
+
+        decision = _route(router, "Router light is red", deadline=RequestDeadline(0.2, router.stage_costs))
+
+        assert decision.routing_method == RoutingMethod.FALLBACK
+        assert [(s["stage"], s["action"]) for s in decision.degraded_stages] == [
+            ("vector_search", "degrade"), ("llm", "skip")
+        ]
+        assert router.searches[-1] == 1
+        assert "SLA budget spent before the LLM call" in decision.reasoning
+
+    def test_spent_budget_skips_to_fallback(self, router):
+        decision = _route(router, "My fiber keeps dropping", deadline=RequestDeadline(0.0, router.stage_costs))
+
+        assert decision.routing_method == RoutingMethod.FALLBACK
+        assert decision.degraded_stages[0]["stage"] == "vector_search"
+        assert router.searches == []
+        assert router.get_performance_metrics()["deadlines"]["skipped"] == 1
+
+    def test_slow_llm_times_out_at_deadline(self, router):
+        router.rag_system.llm_classifier = StubLLM(delay=5.0)
+        costs = StageCostModel(defaults={"vector_search": (1.0, None), "llm": (1.0, None)}, smoothing=1.0)
+
+        started = time.perf_counter()
+        decision = _route(router, "My fiber keeps dropping", deadline=RequestDeadline(0.2, costs))
+
+        assert time.perf_counter() - started < 2.0
+        assert decision.routing_method == RoutingMethod.FALLBACK
+        assert decision.degraded_stages[-1]["reason"] == "timed out at the SLA deadline"
+        assert costs.estimate("llm") > 150.0  # The slowdown raises the expected LLM cost
+
+    def test_degraded_decisions_are_not_cached(self, router):
+        _route(router, "My fiber keeps dropping", deadline=RequestDeadline(4.0, router.stage_costs))
+
+        decision = _route(router, "My fiber keeps dropping")
+
+        assert decision.routing_method == RoutingMethod.RAG_LLM
+        assert decision.degraded_stages == []
+
+    def test_router_budget_from_business_rules(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        assert ConfidenceBasedRouter.from_business_rules().sla_budget_seconds == 5 * 60
+        assert ConfidenceBasedRouter().sla_budget_seconds is None
+
+
+@pytest.fixture
+def mock_model():
+    mock_pipeline = Mock()
+    mock_pipeline.predict.side_effect = lambda texts: ['BILLING'] * len(texts)
+    mock_pipeline.predict_proba.side_effect = lambda texts: np.tile([0.1, 0.8, 0.1], (len(texts), 1))
+    return mock_pipeline
+
+
+class TestApiDeadline:
+    # Matches R001 (confidence below a 0.999 short-circuit threshold)
+    DISPUTE_TICKET = "I want to dispute this charge on my account, it is wrong"
+
+    @pytest.fixture(autouse=True)
+    def rules_engine_loaded(self):
+        """Load the rules engine (and its configured globals) before patching them."""
+        api.get_rules_engine()
+
+    def test_model_runs_within_budget(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999):
+            data = client.post("/classify", json={"ticket_text": self.DISPUTE_TICKET}).json()
+
+        assert data["decision_stage"] == "ml"
+        assert data["degraded_stages"] == []
+
+    def test_spent_budget_falls_back_to_best_rule(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999), \
+                patch('src.api.main.classification_budget_seconds', 0.0):
+            data = client.post("/classify", json={"ticket_text": self.DISPUTE_TICKET}).json()
+
+        assert data["decision_stage"] == "rules"
+        assert data["rule_id"] == "R001_DISPUTE_EXPLICIT"
+        assert data["degraded_stages"][0]["stage"] == "ml"
+        assert data["degraded_stages"][0]["action"] == "skip"
+        mock_model.predict.assert_not_called()
+
+    def test_spent_budget_without_rule_runs_model(self, mock_model):
+        client = TestClient(api.app)
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.classification_budget_seconds', 0.0):
+            data = client.post("/classify", json={"ticket_text": "My bill is too high this month"}).json()
+
+        assert data["decision_stage"] == "ml"
+        assert data["degraded_stages"][0]["action"] == "overrun"
+
+    def test_spent_budget_evaluates_rules_once(self, mock_model):
+        client = TestClient(api.app)
+        engine = api.get_rules_engine()
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999), \
+                patch('src.api.main.classification_budget_seconds', 0.0), \
+                patch.object(engine, 'evaluate_ticket', wraps=engine.evaluate_ticket) as evaluate:
+            client.post("/classify", json={"ticket_text": self.DISPUTE_TICKET})
+
+        evaluate.assert_called_once_with(self.DISPUTE_TICKET)
+
+    def test_batch_within_budget_records_no_skips(self, mock_model):
+        client = TestClient(api.app)
+        tickets = [{"ticket_text": self.DISPUTE_TICKET}, {"ticket_text": "My bill is too high this month"}]
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999):
+            results = client.post("/classify/batch", json={"tickets": tickets}).json()["results"]
+
+        assert [r["decision_stage"] for r in results] == ["ml", "ml"]
+        assert all(r["degraded_stages"] == [] for r in results)
+
+    def test_batch_spent_budget_falls_back_to_rules(self, mock_model):
+        client = TestClient(api.app)
+        tickets = [{"ticket_text": self.DISPUTE_TICKET}, {"ticket_text": self.DISPUTE_TICKET}]
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999), \
+                patch('src.api.main.classification_budget_seconds', 0.0):
+            results = client.post("/classify/batch", json={"tickets": tickets}).json()["results"]
+
+        assert [r["rule_id"] for r in results] == ["R001_DISPUTE_EXPLICIT"] * 2
+        assert all(r["degraded_stages"][0]["action"] == "skip" for r in results)
+        mock_model.predict.assert_not_called()
+
+    def test_batch_spent_budget_without_rule_runs_model(self, mock_model):
+        client = TestClient(api.app)
+        tickets = [{"ticket_text": self.DISPUTE_TICKET}, {"ticket_text": "My bill is too high this month"}]
+
+        with patch('src.api.main.model_pipeline', mock_model), \
+                patch('src.api.main.rules_short_circuit_confidence', 0.999), \
+                patch('src.api.main.classification_budget_seconds', 0.0):
+            results = client.post("/classify/batch", json={"tickets": tickets}).json()["results"]
+
+        assert [r["decision_stage"] for r in results] == ["ml", "ml"]
+        assert results[0]["degraded_stages"][0]["action"] == "overrun"
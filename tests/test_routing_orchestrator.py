@@ -0,0 +1,331 @@
+"""
+Tests for the tiered routing orchestrator
+
+Tests:
+- Pipeline config: stage order, thresholds and costs from config/routing_pipeline.json
+- Early exit at the first stage meeting its min_confidence; best answer otherwise
+- Per-stage hit rate, cost and latency; share of tickets that never reached an LLM
+- Vector cache stage: router cached routes without an LLM call (route_from_cache)
+- SLA budget: stages that no longer fit are skipped, the last stage always runs
+- Label maps: every component's own labels (rule departments, router departments, Gemini
+  categories) land on the pipeline categories; the rules threshold comes from the business rules
+"""
+
+import asyncio
+import json
+from dataclasses import replace
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.models.business_rules_config import BusinessRulesConfig
+from src.models.confidence_based_routing import ConfidenceBasedRouter, RoutingMethod
+from src.models.enhanced_classifier import EnhancedClassificationResult
+from src.models.multi_provider_manager import ClassificationResult
+from src.models.request_deadline import RequestDeadline
+from src.models.routing_orchestrator import RoutingOrchestrator, StageConfig, load_pipeline_config
+from src.models.rules_engine import RuleMatch, TelcoRulesEngine
+
+from conftest import historical_match
+
+REPO_STAGES = {stage.type: stage for stage in load_pipeline_config()}
+
+
+class FakeRules:
+    def __init__(self, matches):
+        self.matches = matches
+
+    def evaluate_ticket(self, ticket_text, metadata=None):
+        confidence = self.matches.get(ticket_text)
+        if confidence is None:
+            return None
+        return RuleMatch(rule_id="R003_DOUBLE_BILLING", department="credit_management", urgency="High",
+                         confidence=confidence, pattern_matched="", keywords_matched=[], reasoning="", sla_hours=6)
+
+
+class FakePipeline:
+    classes_ = np.array(["BILLING", "NETWORK"])                       # TicketClassificationPipeline categories
+
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+        self.calls = 0
+
+    def predict_proba(self, texts):
+        self.calls += 1
+        return np.array([self.probabilities.get(text, [0.5, 0.5]) for text in texts])
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = []
+
+    def classify_ticket(self, ticket_text, priority=None):
+        self.calls.append(priority)
+        return _gemini_result("NETWORK", confidence=0.7)
+
+
+class FakeManager:
+    def classify_ticket(self, ticket_text, use_vector_search=True):
+        return ClassificationResult(department="technical_support_l1", reasoning="", confidence=0.6,
+                                    processing_time_ms=900.0, cost_estimate=0.002, providers_used={},
+                                    fallback_used=False, metadata={})
+
+
+def _gemini_result(category, confidence=0.9, department_allocation="CRM"):
+    return EnhancedClassificationResult(
+        predicted_category=category, confidence=confidence, reasoning="", traditional_prediction=category,
+        traditional_confidence=0.5, gemini_prediction=category, gemini_confidence=confidence,
+        all_probabilities={}, processing_time_ms=1200.0, department_allocation=department_allocation,
+    )
+
+
+def _stages(rules=0.9, ml=0.85, llm=0.0):
+    """rules -> ml -> llm with the repo's label maps."""
+    return [replace(REPO_STAGES["rules"], min_confidence=rules), replace(REPO_STAGES["ml"], min_confidence=ml),
+            replace(REPO_STAGES["llm"], min_confidence=llm, cost_per_call=0.001)]
+
+
+def _route(orchestrator, text, **kwargs):
+    return asyncio.run(orchestrator.route(text, **kwargs))
+
+
+class TestPipelineConfig:
+    def test_repo_pipeline_runs_cheapest_first(self):
+        stages = load_pipeline_config()
+
+        assert [s.type for s in stages] == ["rules", "ml", "vector_cache", "llm"]
+        assert stages[0].min_confidence is None                        # Read from the business rules
+        assert stages[-1].min_confidence == 0.0
+        assert all(s.enabled for s in stages)
+
+    def test_disabled_and_unwired_stages_are_dropped(self, tmp_path):
+        path = tmp_path / "pipeline.json"
+        path.write_text(json.dumps({"stages": [
+            {"type": "rules", "min_confidence": 0.9},
+            {"type": "ml", "min_confidence": 0.8, "enabled": False},
+            {"type": "vector_cache", "min_confidence": 0.9},
+            {"type": "llm", "min_confidence": 0.0, "cost_per_call": 0.01},
+        ]}))
+
+        orchestrator = RoutingOrchestrator.from_config(path, {"rules": FakeRules({}), "llm": FakeLLM()})
+
+        assert list(orchestrator.get_stats()["stages"]) == ["rules", "llm"]
+
+    def test_unknown_stage_type_rejected(self):
+        with pytest.raises(ValueError, match="Unknown routing stage type"):
+            StageConfig.from_dict({"type": "oracle", "min_confidence": 0.5})
+
+
+class TestEarlyExit:
+    def test_first_confident_stage_decides(self):
+        pipeline = FakePipeline({})
+        llm = FakeLLM()
+        orchestrator = RoutingOrchestrator(_stages(), {"rules": FakeRules({"refund": 0.95}),
+                                                       "ml": pipeline, "llm": llm})
+
+        decision = _route(orchestrator, "refund")
+
+        assert (decision.label, decision.stage, decision.exited_early) == ("BILLING", "rules", True)
+        assert not decision.reached_llm
+        assert [t["outcome"] for t in decision.trace] == ["exit"]
+        assert pipeline.calls == 0
+        assert llm.calls == []
+
+    def test_low_confidence_falls_through_to_next_stage(self):
+        orchestrator = RoutingOrchestrator(_stages(), {
+            "rules": FakeRules({"slow net": 0.6}), "ml": FakePipeline({"slow net": [0.1, 0.9]}), "llm": FakeLLM()
+        })
+
+        decision = _route(orchestrator, "slow net")
+
+        assert (decision.label, decision.stage) == ("NETWORK", "ml")
+        assert decision.confidence == pytest.approx(0.9)
+        assert [t["outcome"] for t in decision.trace] == ["pass", "exit"]
+
+    def test_llm_terminal_stage_and_priority(self):
+        llm = FakeLLM()
+        orchestrator = RoutingOrchestrator(_stages(), {"rules": FakeRules({}), "ml": FakePipeline({}), "llm": llm})
+
+        decision = _route(orchestrator, "something odd", priority="P1_HIGH")
+
+        assert (decision.stage, decision.reached_llm) == ("llm", True)
+        assert [t["outcome"] for t in decision.trace] == ["miss", "pass", "exit"]
+        assert decision.cost_estimate == pytest.approx(0.001)
+        assert llm.calls == ["P1_HIGH"]
+
+    def test_best_answer_when_no_stage_is_confident(self):
+        orchestrator = RoutingOrchestrator(_stages(llm=0.99), {
+            "rules": FakeRules({"x": 0.8}), "ml": FakePipeline({"x": [0.6, 0.4]}), "llm": FakeLLM()
+        })
+
+        decision = _route(orchestrator, "x")
+
+        assert (decision.stage, decision.label, decision.exited_early) == ("rules", "BILLING", False)
+
+    def test_stage_error_passes_to_next_stage(self):
+        class Broken:
+            def predict_proba(self, texts):
+                raise RuntimeError("model not loaded")
+
+        orchestrator = RoutingOrchestrator(_stages(), {"rules": FakeRules({}), "ml": Broken(), "llm": FakeLLM()})
+
+        decision = _route(orchestrator, "x")
+
+        assert decision.stage == "llm"
+        assert orchestrator.get_stats()["stages"]["ml"]["errors"] == 1
+
+    def test_multi_provider_manager_reports_its_own_cost(self):
+        orchestrator = RoutingOrchestrator([replace(REPO_STAGES["llm"], cost_per_call=0.5)], {"llm": FakeManager()})
+
+        decision = _route(orchestrator, "x", priority="P0_IMMEDIATE")
+
+        assert decision.label == "TECHNICAL"
+        assert decision.cost_estimate == pytest.approx(0.002)
+
+
+class TestStageStats:
+    def test_hit_rates_costs_and_llm_avoided(self):
+        orchestrator = RoutingOrchestrator(_stages(), {
+            "rules": FakeRules({"refund": 0.95}), "ml": FakePipeline({"net": [0.05, 0.95]}), "llm": FakeLLM()
+        })
+        for text in ("refund", "refund", "net", "other"):
+            _route(orchestrator, text)
+
+        stats = orchestrator.get_stats()
+
+        assert stats["tickets"] == 4
+        assert stats["llm_avoided_rate"] == pytest.approx(0.75)
+        assert stats["stages"]["rules"]["hit_rate"] == pytest.approx(0.5)
+        assert stats["stages"]["ml"]["calls"] == 2
+        assert stats["stages"]["ml"]["exits"] == 1
+        assert stats["stages"]["llm"]["total_cost"] == pytest.approx(0.001)
+        assert stats["stages"]["rules"]["latency_ms"]["1m"]["count"] == 4
+
+        text = orchestrator.export_prometheus()
+        assert 'routing_pipeline_stage_exits_total{stage="rules"} 2' in text
+        assert "routing_pipeline_llm_avoided_ratio 0.750000" in text
+
+
+class TestVectorCacheStage:
+    @pytest.fixture
+    def router(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        router = ConfidenceBasedRouter(confidence_threshold=0.9, accuracy_threshold=0.0)
+        similarities = {"double charge": 0.97, "odd noise": 0.4}
+
+        async def fake_search(query_text, top_k=5, query_embedding=None):
+            return [historical_match(similarities[query_text])]
+
+        router.similarity_search.search_similar_tickets_with_routing = fake_search
+        return router
+
+    def test_cached_route_exits_before_llm(self, router):
+        llm = FakeLLM()
+        orchestrator = RoutingOrchestrator(
+            [replace(REPO_STAGES["vector_cache"], min_confidence=0.9), REPO_STAGES["llm"]],
+            {"vector_cache": router, "llm": llm}
+        )
+
+        async def scenario():
+            try:
+                return [await orchestrator.route(text) for text in ("double charge", "odd noise", "double charge")]
+            finally:
+                await router.close()
+
+        cached, missed, duplicate = asyncio.run(scenario())
+
+        assert (cached.stage, cached.label) == ("vector_cache", "BILLING")
+        assert cached.detail.routing_method == RoutingMethod.CACHED_ROUTE
+        assert missed.stage == "llm"
+        assert [t["outcome"] for t in missed.trace] == ["miss", "exit"]
+        assert duplicate.detail.routing_method == RoutingMethod.EXACT_CACHE
+        assert len(llm.calls) == 1
+
+
+class TestDeadline:
+    def test_stages_that_do_not_fit_are_skipped(self):
+        llm = FakeLLM()
+        pipeline = FakePipeline({})
+        orchestrator = RoutingOrchestrator(_stages(), {"rules": FakeRules({}), "ml": pipeline, "llm": llm})
+
+        decision = _route(orchestrator, "x", deadline=RequestDeadline(0.02))   # 20 ms: rules only
+
+        assert [t["outcome"] for t in decision.trace] == ["miss", "skip", "exit"]
+        assert pipeline.calls == 0
+        assert [(s["stage"], s["action"]) for s in decision.degraded_stages] == [("ml", "skip"), ("llm", "overrun")]
+        assert orchestrator.get_stats()["stages"]["ml"]["skipped"] == 1
+
+
+class TestLabelMaps:
+    """Real component outputs through the repo pipeline config."""
+
+    @pytest.fixture
+    def router(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        router = ConfidenceBasedRouter(confidence_threshold=0.9, accuracy_threshold=0.0)
+        departments = {"my invoice is double": "billing_corrections", "thanks for the help": "customer_feedback"}
+
+        async def fake_search(query_text, top_k=5, query_embedding=None):
+            return [historical_match(0.97, departments[query_text])] if query_text in departments else []
+
+        router.similarity_search.search_similar_tickets_with_routing = fake_search
+        return router
+
+    def test_component_labels_land_on_pipeline_categories(self, router):
+        llm = FakeLLM()
+        orchestrator = RoutingOrchestrator.from_config(components={
+            "rules": TelcoRulesEngine(),
+            "ml": FakePipeline({"my invoice is double": [0.5, 0.5], "thanks for the help": [0.5, 0.5]}),
+            "vector_cache": router, "llm": llm,
+        })
+        texts = ["I was charged twice this month", "My account is locked and I cannot login",
+                 "my invoice is double", "thanks for the help"]
+
+        async def scenario():
+            try:
+                return [await orchestrator.route(text) for text in texts]
+            finally:
+                await router.close()
+
+        double_billing, locked, cached, feedback = asyncio.run(scenario())
+
+        assert (double_billing.stage, double_billing.label) == ("rules", "BILLING")
+        assert double_billing.detail.department == "credit_management"
+        assert (locked.stage, locked.label) == ("rules", "ACCOUNT")       # R004 override of technical_support_l2
+        assert (cached.stage, cached.label) == ("vector_cache", "BILLING")
+        assert cached.detail.recommended_department == "billing_corrections"
+        assert (feedback.stage, feedback.label) == ("llm", "NETWORK")     # Gemini predicted_category
+        assert [t["outcome"] for t in feedback.trace][-2:] == ["unmapped", "exit"]
+        assert orchestrator.get_stats()["stages"]["vector_cache"]["unmapped"] == 1
+
+    def test_every_rule_department_is_mapped(self):
+        label_map = REPO_STAGES["rules"].label_map
+
+        assert {rule.department for rule in TelcoRulesEngine().rules} <= set(label_map)
+
+    def test_gemini_category_used_not_department_allocation(self):
+        class Gemini:
+            def classify_ticket(self, ticket_text, priority=None):
+                return _gemini_result("BILLING", department_allocation="CREDIT_MGMT")
+
+        orchestrator = RoutingOrchestrator([REPO_STAGES["llm"]], {"llm": Gemini()})
+
+        assert _route(orchestrator, "x").label == "BILLING"
+
+    def test_rules_threshold_from_business_rules(self):
+        rules = FakeRules({"refund": 0.93})
+        rules.business_config = SimpleNamespace(get_rules_short_circuit_confidence=lambda: 0.95)
+        orchestrator = RoutingOrchestrator([REPO_STAGES["rules"], REPO_STAGES["llm"]],
+                                           {"rules": rules, "llm": FakeLLM()})
+        repo_default = RoutingOrchestrator([REPO_STAGES["rules"]],
+                                           {"rules": TelcoRulesEngine(business_config=BusinessRulesConfig())})
+
+        assert _route(orchestrator, "refund").stage == "llm"
+        assert orchestrator.get_stats()["stages"]["rules"]["min_confidence"] == 0.95
+        assert repo_default.get_stats()["stages"]["rules"]["min_confidence"] == \
+            BusinessRulesConfig().get_rules_short_circuit_confidence()
+
+    def test_unknown_label_map_rejected(self):
+        with pytest.raises(ValueError, match="Unknown label map"):
+            StageConfig.from_dict({"type": "ml", "min_confidence": 0.8, "label_map": "typo"}, {"categories": {}})
@@ -0,0 +1,93 @@
+"""
+Tests for the routing decision replay harness
+"""
+
+import asyncio
+import gzip
+import json
+from itertools import pairwise
+
+import pytest
+
+from scripts.benchmarks.replay_routing_decisions import (DEFAULT_LOG, ReplayEvent, build_replay_router,
+                                                         load_decision_stream, recorded_latencies, replay)
+from scripts.benchmarks.stand_ins import constant_latency, parse_latency
+
+
+def _entry(timestamp, text, department="billing_corrections", method="rag_llm", ms=1000.0):
+    return {
+        "timestamp": timestamp,
+        "event_type": "routing_decision",
+        "ticket_id": "TICKET-TEST",
+        "routing": {"department": department, "confidence": 0.75, "method": method, "cache_hit": False},
+        "performance": {"processing_time_ms": ms},
+        "ticket": {"text_preview": text, "text_length": len(text)},
+    }
+
+
+def _run_replay(events, tmp_path, speedup=0.0, concurrency=16, llm_ms=20.0, history=None):
+    async def scenario():
+        router = build_replay_router(events, constant_latency(1.0), constant_latency(llm_ms), str(tmp_path),
+                                     history=history)
+        try:
+            return await replay(events, router, speedup, concurrency)
+        finally:
+            await router.close()
+    return asyncio.run(scenario())
+
+
+class TestLoadDecisionStream:
+    def test_recorded_stream_is_in_arrival_order(self):
+        events = load_decision_stream([DEFAULT_LOG])
+
+        assert len(events) == 199
+        assert events[0].offset_seconds == 0.0
+        assert all(a.offset_seconds <= b.offset_seconds for a, b in pairwise(events))
+        assert len(recorded_latencies(events)) == 199
+
+    def test_reads_rotated_segments_and_skips_partial_lines(self, tmp_path):
+        segment = tmp_path / "routing_decisions.jsonl.1.gz"
+        with gzip.open(segment, "wt") as handle:
+            handle.write(json.dumps(_entry("2025-10-08T21:00:00+00:00", "first")) + "\n")
+        live = tmp_path / "routing_decisions.jsonl"
+        live.write_text(json.dumps(_entry("2025-10-08T21:00:05+00:00", "second")) + "\n" + '{"timestamp": "2025-1')
+
+        events = load_decision_stream([live, segment])
+
+        assert [e.ticket_text for e in events] == ["first", "second"]
+        assert events[1].offset_seconds == pytest.approx(5.0)
+
+
+class TestLatencySpecs:
+    def test_parses_constant_lognormal_and_empirical(self):
+        assert parse_latency("constant:20")() == 20
+        assert parse_latency("lognormal:100,0.5")() > 0
+        assert parse_latency("empirical", [7.0])() == 7.0
+
+    def test_rejects_malformed_spec(self):
+        with pytest.raises(ValueError, match="Invalid latency spec"):
+            parse_latency("lognormal:100")
+
+
+class TestReplay:
+    def test_report_covers_every_event(self, tmp_path):
+        events = load_decision_stream([DEFAULT_LOG], limit=40)
+
+        report = _run_replay(events, tmp_path)
+
+        assert report["events"] == 40
+        assert sum(stats["count"] for stats in report["methods"].values()) == 40
+        assert report["methods"]["rag_llm"]["latency_p99_ms"] >= 20.0
+        assert 0 < report["cache_hit_rate"] < 1
+        assert report["department_agreement"] == 1.0
+
+    def test_saturated_slots_show_queueing_delay(self, tmp_path):
+        history = [ReplayEvent(0.0, "Refund the double charge", "billing_corrections", "rag_llm", 1000.0)]
+        events = [ReplayEvent(0.0, f"Ticket {i} about a billing error", "billing_corrections", "rag_llm", 1000.0)
+                  for i in range(6)]
+
+        report = _run_replay(events, tmp_path, concurrency=1, llm_ms=30.0, history=history)
+
+        assert report["llm_calls"] == 6
+        assert report["queueing_delay_ms"]["max"] >= 5 * 30.0 * 0.9
+
@@ -0,0 +1,107 @@
+"""
+Regression tests for the rules engine benchmark suite
+
+Tests:
+- Fixture replay from data/test (JSON + CSV)
+- Synthetic ticket generation (determinism, realistic lengths)
+- Baseline comparison (throughput tolerance, accuracy drops)
+- Small end-to-end benchmark run
+"""
+
+import pytest
+
+from scripts.benchmarks.benchmark_rules_engine import (
+    compare_to_baseline,
+    evaluate_accuracy,
+    generate_synthetic_tickets,
+    load_baseline,
+    load_fixture_cases,
+    load_seed_texts,
+    run_benchmark,
+    save_baseline,
+)
+from src.models.rules_engine import TelcoRulesEngine
+
+
+def _results(tps: float, rule_acc: float = 0.9, dept_acc: float = 1.0) -> dict:
+    return {
+        "performance": {"throughput_tps": tps},
+        "accuracy": {"rule_accuracy": rule_acc, "department_accuracy": dept_acc},
+    }
+
+
+class TestFixtureReplay:
+    """Test replay of the labelled data/test fixtures."""
+
+    def test_fixture_cases_loaded_and_deduplicated(self):
+        """JSON and CSV fixtures describe the same 19 tickets."""
+        cases = load_fixture_cases()
+
+        assert len(cases) == 19
+        assert len({case["ticket_id"] for case in cases}) == len(cases)
+
+    def test_fixture_accuracy_floor(self):
+        """Rules engine keeps routing the fixtures to the expected departments."""
+        accuracy = evaluate_accuracy(TelcoRulesEngine(), load_fixture_cases())
+
+        assert accuracy["department_accuracy"] >= 0.95
+        assert accuracy["rule_accuracy"] >= 0.75
+
+
+class TestSyntheticTickets:
+    """Test synthetic scale-up generation."""
+
+    def test_generation_is_deterministic(self):
+        """Same seed produces the same tickets."""
+        seeds = load_seed_texts()
+
+        assert generate_synthetic_tickets(50, seeds, seed=7) == \
+            generate_synthetic_tickets(50, seeds, seed=7)
+
+    def test_tickets_have_realistic_lengths(self):
+        """Tickets are padded towards the target median length."""
+        tickets = generate_synthetic_tickets(500, load_seed_texts(), median_length=320)
+        lengths = sorted(len(t) for t in tickets)
+
+        assert 200 <= lengths[len(lengths) // 2] <= 500
+        assert lengths[-1] <= 2200
+
+
+class TestBaselineComparison:
+    """Test regression detection against a stored baseline."""
+
+    def test_no_baseline_passes(self):
+        assert compare_to_baseline(_results(1000), None) == []
+
+    def test_throughput_within_tolerance_passes(self):
+        assert compare_to_baseline(_results(850), _results(1000), tolerance=0.2) == []
+
+    def test_throughput_regression_fails(self):
+        regressions = compare_to_baseline(_results(700), _results(1000), tolerance=0.2)
+
+        assert len(regressions) == 1
+        assert "Throughput regressed" in regressions[0]
+
+    def test_accuracy_drop_fails(self):
+        regressions = compare_to_baseline(_results(1000, rule_acc=0.8), _results(1000))
+
+        assert any("rule_accuracy" in message for message in regressions)
+
+    def test_baseline_round_trip(self, tmp_path):
+        path = tmp_path / "benchmarks" / "baseline.json"
+        save_baseline(_results(1234), path)
+
+        assert load_baseline(path)["performance"]["throughput_tps"] == 1234
+        assert load_baseline(tmp_path / "missing.json") is None
+
+
+@pytest.mark.slow
+def test_small_benchmark_run():
+    """End-to-end run on a small synthetic workload."""
+    results = run_benchmark(ticket_count=500)
+
+    assert results["performance"]["tickets"] == 500
+    assert results["performance"]["throughput_tps"] > 0
+    assert results["performance"]["latency_us"]["p99"] >= results["performance"]["latency_us"]["p50"]
+    assert results["peak_memory_kib"] > 0
+    assert results["accuracy"]["fixture_cases"] == 19
@@ -0,0 +1,144 @@
+"""
+Tests for the process pool running the CPU-bound routing stages
+
+Tests:
+- Rules matches and ML probabilities from worker processes equal in-process results
+- Workers pre-warmed at start, model loaded from a memory-mapped .joblib artifact
+- Batches split across workers through shared memory (blocks released afterwards)
+- Pool as the rules / ML components of RoutingOrchestrator
+- Started off the event loop on first use, workers never forked from a threaded parent
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from src.models.business_rules_config import BusinessRulesConfig
+from src.models.routing_orchestrator import RoutingOrchestrator, StageConfig
+from src.models.rules_engine import TelcoRulesEngine
+from src.models.stage_worker_pool import StageWorkerPool, _pack_texts, _read_texts, _release
+from src.models.ticket_classifier import TicketClassificationPipeline
+
+TICKETS = [
+    "I was charged twice on my bill this month, please refund the double charge",
+    "My internet connection keeps dropping every evening",
+    "Fibre line is down since the storm, no connectivity at all",
+    "Please explain the extra fee on my invoice",
+    "Ek wil my rekening betaal – café ☕ unicode ticket",
+    "Account locked after too many password attempts",
+]
+
+TRAINING = [
+    ("billing", "I was charged twice on my bill, refund the payment"),
+    ("billing", "Extra fee on my invoice this month"),
+    ("billing", "Wrong amount billed, please correct my invoice"),
+    ("billing", "Refund the duplicate payment on my account bill"),
+    ("network", "Internet connection keeps dropping every evening"),
+    ("network", "No signal and slow internet speeds at home"),
+    ("network", "Fibre line down, no connectivity since the storm"),
+    ("network", "Mobile data not working and internet is slow"),
+]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    pipeline = TicketClassificationPipeline(random_state=0)
+    labels, texts = zip(*(TRAINING * 4), strict=True)
+    pipeline.fit(list(texts), list(labels), list(texts), list(labels))
+    path = tmp_path_factory.mktemp("models") / "classifier.joblib"
+    pipeline.save_model_mmap(str(path))
+    return path
+
+
+@pytest.fixture(scope="module")
+def pool(model_path):
+    with StageWorkerPool(workers=2, model_path=model_path, chunk_size=2) as pool:
+        yield pool
+
+
+class TestSharedMemoryBatch:
+    def test_texts_round_trip(self):
+        block = _pack_texts(TICKETS)
+        try:
+            assert _read_texts(block, len(TICKETS), 0, len(TICKETS)) == TICKETS
+            assert _read_texts(block, len(TICKETS), 4, 5) == [TICKETS[4]]
+        finally:
+            _release(block)
+
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=block.name)
+
+
+class TestStageWorkerPool:
+    def test_workers_prewarmed_at_start(self, pool):
+        stats = pool.get_stats()
+
+        assert stats["started"]
+        assert len(stats["worker_pids"]) == 2
+        assert os.getpid() not in stats["worker_pids"]
+        assert list(pool.classes_) == ["billing", "network"]
+
+    def test_rules_match_in_process_engine(self, pool):
+        engine = TelcoRulesEngine(business_config=BusinessRulesConfig())
+        engine.compile_rules()
+        expected = [engine.evaluate_ticket(text) for text in TICKETS]
+
+        matches = asyncio.run(pool.evaluate_tickets(TICKETS))
+
+        assert [(m.rule_id, m.confidence) if m else None for m in matches] == \
+               [(m.rule_id, m.confidence) if m else None for m in expected]
+        assert pool.get_stats()["tasks"] >= 3
+
+    def test_probabilities_match_in_process_model(self, pool, model_path):
+        local = TicketClassificationPipeline()
+        local.load_model(str(model_path), mmap_mode="r")
+
+        probabilities = asyncio.run(pool.predict_proba(TICKETS))
+
+        np.testing.assert_allclose(probabilities, local.predict_proba(TICKETS))
+        assert asyncio.run(pool.predict_proba([])).shape == (0, 2)
+
+    def test_rules_only_pool_has_no_model(self):
+        with StageWorkerPool(workers=1) as pool:
+            assert asyncio.run(pool.evaluate_ticket(TICKETS[0])) is not None
+            with pytest.raises(RuntimeError, match="no ML model"):
+                asyncio.run(pool.predict_proba(TICKETS))
+
+    def test_first_use_starts_pool_off_event_loop(self):
+        pool = StageWorkerPool(workers=1)
+        start = pool.start
+        start_threads = []
+
+        def recording_start():
+            start_threads.append(threading.current_thread())
+            return start()
+
+        pool.start = recording_start
+        try:
+            assert asyncio.run(pool.evaluate_ticket(TICKETS[0])) is not None
+        finally:
+            pool.close()
+
+        assert len(start_threads) == 1
+        assert start_threads[0] is not threading.main_thread()
+
+    def test_workers_not_forked(self):
+        expected = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        assert StageWorkerPool(workers=1).mp_context.get_start_method() == expected
+
+    def test_pool_as_orchestrator_stages(self, pool):
+        orchestrator = RoutingOrchestrator(
+            [StageConfig("rules", "rules", 1.1), StageConfig("ml", "ml", 0.0)],
+            {"rules": pool, "ml": pool}
+        )
+
+        decision = asyncio.run(orchestrator.route("Fibre line down, no connectivity"))
+
+        assert decision.stage == "ml"
+        assert decision.label == "network"
+        assert [t["stage"] for t in decision.trace] == ["rules", "ml"]
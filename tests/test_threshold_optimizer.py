@@ -0,0 +1,156 @@
+"""
+Tests for the offline cached-route threshold optimizer
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.models.business_rules_config import BusinessRulesConfig, ThresholdValidationError
+from src.models.threshold_optimizer import (LabelledDecisions, choose_thresholds, evaluate_thresholds,
+                                            records_from_routing_log, sweep_thresholds, write_thresholds)
+
+CONFIG_FILE = Path(__file__).parent.parent / "config" / "business_rules.json"
+
+
+def _synthetic(n=2000, seed=7):
+    """Decisions where the cached department is right more often at high similarity and accuracy."""
+    rng = np.random.default_rng(seed)
+    similarity = rng.uniform(0.4, 1.0, n)
+    accuracy = rng.uniform(0.5, 1.0, n)
+    cached_right = rng.random(n) < similarity * accuracy
+    return LabelledDecisions(
+        top_similarity=similarity,
+        historical_accuracy=accuracy,
+        cached_correct=cached_right.astype(float),
+        llm_correct=(rng.random(n) < 0.9).astype(float),
+        llm_latency_ms=rng.uniform(4000, 12000, n),
+        cached_latency_ms=np.full(n, 50.0),
+    )
+
+
+def _log_entry(ticket_id, method, department, top_match_department=None, similarity=0.9, accuracy=0.9, ms=100.0):
+    return {
+        "event_type": "routing_decision",
+        "ticket_id": ticket_id,
+        "routing": {"department": department, "method": method},
+        "evidence": {"top_similarity": similarity, "historical_accuracy": accuracy,
+                     "top_match_department": top_match_department},
+        "performance": {"processing_time_ms": ms},
+    }
+
+
+class TestSweep:
+    def test_matches_brute_force_evaluation(self):
+        data = _synthetic()
+        grid = np.round(np.arange(0.5, 1.0001, 0.05), 2)
+
+        sweep = sweep_thresholds(data, grid, grid)
+
+        for i, c in enumerate(grid):
+            for j, a in enumerate(grid):
+                hit = (data.top_similarity >= c) & (data.historical_accuracy >= a)
+                expected = np.where(hit, data.cached_correct, data.llm_correct).mean()
+                assert sweep.cache_hits[i, j] == hit.sum()
+                assert sweep.accuracy[i, j] == pytest.approx(expected)
+                assert sweep.latency_saved_ms[i, j] == pytest.approx(
+                    (data.llm_latency_ms - data.cached_latency_ms)[hit].sum())
+
+    def test_threshold_equal_to_score_is_a_hit(self):
+        data = _synthetic(n=1)
+        data.top_similarity[:] = 0.92
+        data.historical_accuracy[:] = 0.85
+
+        assert evaluate_thresholds(data, 0.92, 0.85)["llm_calls_saved"] == 1
+        assert evaluate_thresholds(data, 0.93, 0.85)["llm_calls_saved"] == 0
+
+    def test_pareto_frontier_is_non_dominated(self):
+        sweep = sweep_thresholds(_synthetic())
+
+        frontier = sweep.pareto_frontier()
+
+        hit_rates = [point["cache_hit_rate"] for point in frontier]
+        accuracies = [point["accuracy"] for point in frontier]
+        assert hit_rates == sorted(hit_rates)
+        assert accuracies == sorted(accuracies, reverse=True)
+        for point in frontier:
+            at_least = (sweep.cache_hit_rate >= point["cache_hit_rate"]) & (sweep.accuracy >= point["accuracy"])
+            better = (sweep.cache_hit_rate > point["cache_hit_rate"]) | (sweep.accuracy > point["accuracy"])
+            assert not (at_least & better).any()
+
+    def test_choose_respects_min_accuracy(self):
+        sweep = sweep_thresholds(_synthetic())
+
+        chosen = choose_thresholds(sweep, min_accuracy=0.85)
+
+        assert chosen["accuracy"] >= 0.85
+        eligible = sweep.cache_hit_rate[sweep.accuracy >= 0.85]
+        assert chosen["cache_hit_rate"] == pytest.approx(eligible.max())
+        assert choose_thresholds(sweep, min_accuracy=1.01) is None
+
+
+class TestLabelledRecords:
+    def test_routing_log_entries_become_labelled_decisions(self):
+        entries = [
+            _log_entry("T1", "rag_llm", "billing", top_match_department="technical", ms=8000.0),
+            _log_entry("T2", "cached_route", "technical", ms=40.0),
+            _log_entry("T3", "exact_cache", "technical"),
+            _log_entry("T4", "rag_llm", "billing", top_match_department="billing", ms=6000.0),
+            _log_entry("T5", "rag_llm", "billing", top_match_department=None),
+        ]
+        labels = {"T1": "billing", "T2": "technical", "T4": "network", "T5": "billing"}
+
+        data = LabelledDecisions.from_records(records_from_routing_log(entries, labels))
+
+        assert len(data) == 3
+        assert data.skipped == 1
+        assert data.cached_correct.tolist() == [0.0, 1.0, 0.0]
+        # LLM outcome of the cached decision is imputed from the observed LLM accuracy
+        assert data.llm_correct.tolist() == [1.0, 0.5, 0.0]
+        assert data.llm_latency_ms.tolist() == [8000.0, 7000.0, 6000.0]
+        assert data.cached_latency_ms.tolist() == [40.0, 40.0, 40.0]
+
+
+class TestWriteThresholds:
+    @pytest.fixture
+    def config_dir(self, tmp_path):
+        shutil.copy(CONFIG_FILE, tmp_path / "business_rules.json")
+        return tmp_path
+
+    def test_writes_thresholds_and_keeps_layout(self, config_dir):
+        path = config_dir / "business_rules.json"
+        before = path.read_text().splitlines()
+
+        write_thresholds(path, 0.88, 0.8)
+
+        after = path.read_text().splitlines()
+        assert len(before) == len(after)
+        changed = [line for old, line in zip(before, after, strict=True) if old != line]
+        assert [line for line in changed if "last_updated" not in line and "updated_by" not in line] == [
+            '    "cached_route_similarity": 0.88,', '    "cached_route_accuracy": 0.80,'
+        ]
+        assert json.loads(path.read_text())["metadata"]["updated_by"] == "threshold_optimizer"
+        assert BusinessRulesConfig(config_path=config_dir).get_cached_route_thresholds() == (0.88, 0.80)
+
+    def test_adds_missing_keys(self, config_dir):
+        path = config_dir / "business_rules.json"
+        config = json.loads(path.read_text())
+        del config["routing_thresholds"]["cached_route_similarity"]
+        del config["routing_thresholds"]["cached_route_accuracy"]
+        path.write_text(json.dumps(config, indent=2))
+
+        write_thresholds(path, 0.9, 0.75)
+
+        assert json.loads(path.read_text())["routing_thresholds"]["cached_route_similarity"] == 0.9
+        assert BusinessRulesConfig(config_path=config_dir).get_cached_route_thresholds() == (0.9, 0.75)
+
+    def test_rejects_out_of_range_threshold(self, config_dir):
+        path = config_dir / "business_rules.json"
+        before = path.read_text()
+
+        with pytest.raises(ThresholdValidationError):
+            write_thresholds(path, 0.3, 0.8)
+        assert path.read_text() == before